@@ -13,6 +13,7 @@ project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root))
 
 from src.api.twitter_api import twitter_api
+from src.api.stop_strategies import ProjectTimesStrategy
 from src.utils.logger import get_logger
 
 def analyze_stop_timing():
@@ -139,12 +140,14 @@ def analyze_stop_timing():
                               f"最新: {hours_ago:.1f}h前, {status}")
             
             # **关键分析：智能停止判断**
-            should_stop = twitter_api._should_stop_by_project_times(
+            # 本脚本只统计本页的项目状态，"曾有有效推文"按本页计
+            should_stop = ProjectTimesStrategy().evaluate(
                 page_project_times, 
                 page_project_valid, 
+                page_project_valid, 
                 time_cutoff, 
                 hours_limit
-            )
+            ) is not None
             
             if should_stop:
                 logger.info(f"🛑 智能检测决定在第 {page} 页停止拉取")
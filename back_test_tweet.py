@@ -19,6 +19,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from src.models.tweet import Tweet
 from src.database.connection import db_manager
+from src.utils.twitter_time import parse_twitter_datetime, get_tweet_created_at
 
 
 class BackTestTweetCrawler:
@@ -274,47 +275,32 @@ class BackTestTweetCrawler:
             created_at: 推文创建时间字符串
             
         Returns:
-            解析后的datetime对象
+            解析后的datetime对象（没有时区信息的视为UTC）
         """
         if not created_at:
             return None
+        
+        # Twitter API时间格式: "Wed Oct 10 20:19:24 +0000 2018"，其他格式由共享解析器依次尝试
+        dt = parse_twitter_datetime(created_at)
+        if dt is None:
+            self.logger.warning(f"无法解析时间格式: {created_at}")
+            return None
+        return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+    
+    def _get_tweet_time(self, tweet: Dict[str, Any]) -> Optional[datetime]:
+        """
+        获取推文创建时间（解析结果保存在推文字典上，重复检查时不再解析）
+        
+        Args:
+            tweet: 推文数据
             
-        try:
-            # Twitter API时间格式: "Wed Oct 10 20:19:24 +0000 2018"
-            dt = datetime.strptime(created_at, "%a %b %d %H:%M:%S %z %Y")
-            return dt
-        except ValueError:
-            try:
-                # 尝试ISO格式
-                if created_at.endswith('Z'):
-                    dt = datetime.fromisoformat(created_at[:-1]).replace(tzinfo=timezone.utc)
-                else:
-                    dt = datetime.fromisoformat(created_at)
-                    # 如果没有时区信息，假设是UTC
-                    if dt.tzinfo is None:
-                        dt = dt.replace(tzinfo=timezone.utc)
-                return dt
-            except ValueError:
-                try:
-                    # 尝试其他常见格式
-                    for fmt in [
-                        "%Y-%m-%d %H:%M:%S",
-                        "%Y-%m-%dT%H:%M:%S",
-                        "%Y-%m-%d %H:%M:%S.%f",
-                        "%Y-%m-%dT%H:%M:%S.%f"
-                    ]:
-                        try:
-                            dt = datetime.strptime(created_at, fmt)
-                            # 没有时区信息，假设是UTC
-                            return dt.replace(tzinfo=timezone.utc)
-                        except ValueError:
-                            continue
-                    
-                    self.logger.warning(f"无法解析时间格式: {created_at}")
-                    return None
-                except Exception as e:
-                    self.logger.warning(f"解析时间时发生异常: {created_at}, 错误: {e}")
-                    return None
+        Returns:
+            解析后的datetime对象（没有时区信息的视为UTC）
+        """
+        dt = get_tweet_created_at(tweet)
+        if dt is None:
+            return self._parse_tweet_time(tweet.get('created_at', ''))
+        return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
     
     def _is_tweet_in_time_range(self, tweet: Dict[str, Any]) -> bool:
         """
@@ -326,11 +312,10 @@ class BackTestTweetCrawler:
         Returns:
             是否在时间范围内
         """
-        created_at = tweet.get('created_at')
-        if not created_at:
+        if not tweet.get('created_at'):
             return False
         
-        tweet_time = self._parse_tweet_time(created_at)
+        tweet_time = self._get_tweet_time(tweet)
         if not tweet_time:
             return False
         
@@ -358,7 +343,7 @@ class BackTestTweetCrawler:
             
             if screen_name.lower() == target_screen_name.lower():
                 # 检查时间是否在时间范围内
-                tweet_time = self._parse_tweet_time(tweet.get('created_at', ''))
+                tweet_time = self._get_tweet_time(tweet)
                 if tweet_time:
                     # 确保时间对象都是datetime类型并且时区一致
                     if tweet_time.tzinfo is None:
@@ -617,7 +602,7 @@ class BackTestTweetCrawler:
                 has_tweets_in_range = False  # 添加标记，检查本页是否有目标时间范围内的推文
                 
                 for tweet in tweets:  # 检查所有推文而不只是过滤后的
-                    tweet_time = self._parse_tweet_time(tweet.get('created_at', ''))
+                    tweet_time = self._get_tweet_time(tweet)
                     if tweet_time:
                         # 确保tweet_time是datetime对象且有时区信息
                         if tweet_time.tzinfo is None:
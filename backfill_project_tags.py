@@ -260,6 +260,9 @@ def backfill_project_tags(tweets: List[Dict[str, Any]], batch_size: int = 50) ->
             stats['failed'] += 1
             continue
 
+    # 写入分类过程中提高的话题热度
+    classifier.flush_topic_popularity()
+
     return stats
 
 
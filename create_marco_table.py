@@ -74,6 +74,35 @@ def create_marco_table():
         return False
 
 
+def create_marco_stance_table():
+    """创建 twitter_marco_stance 表（推文情绪标签，重叠窗口复用）"""
+    
+    create_table_sql = """
+    CREATE TABLE IF NOT EXISTS twitter_marco_stance (
+        `tweet_id` VARCHAR(50) NOT NULL COMMENT "推文ID",
+        `stance` VARCHAR(10) NOT NULL COMMENT "情绪倾向: bullish/bearish/neutral",
+        `update_time` DATETIME DEFAULT CURRENT_TIMESTAMP COMMENT "记录更新时间"
+    )
+    ENGINE=OLAP
+    UNIQUE KEY(`tweet_id`)
+    COMMENT "推特Marco推文情绪标签表"
+    DISTRIBUTED BY HASH(`tweet_id`) BUCKETS 10
+    PROPERTIES (
+        "replication_allocation" = "tag.location.default: 1"
+    )
+    """
+    
+    logger = logging.getLogger(__name__)
+    try:
+        logger.info("开始创建 twitter_marco_stance 表...")
+        db_manager.execute_update(create_table_sql)
+        logger.info("✅ twitter_marco_stance 表创建完成")
+        return True
+    except Exception as e:
+        logger.error(f"创建 twitter_marco_stance 表失败: {e}")
+        return False
+
+
 def main():
     """主函数"""
     # 设置日志
@@ -86,7 +115,7 @@ def main():
     try:
         logger.info("开始创建 twitter_marco 数据表")
         
-        if create_marco_table():
+        if create_marco_table() and create_marco_stance_table():
             logger.info("🎉 twitter_marco 表创建成功！")
             print("\n现在可以运行以下命令生成Marco数据:")
             print("python generate_marco_data.py --mode latest")
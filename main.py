@@ -139,6 +139,10 @@ def run_scheduled(args):
     
     logger.info("开始定时调度模式...")
     
+    if config.get('scheduler.adaptive.enabled', False):
+        run_adaptive_scheduled(args)
+        return
+    
     # 设置调度间隔
     if args.interval:
         scheduler.update_interval(args.interval)
@@ -204,6 +208,47 @@ def run_scheduled(args):
         scheduler.stop()
 
 
+def run_adaptive_scheduled(args):
+    """按list自适应间隔的定时调度"""
+    logger = get_logger(__name__)
+    
+    from src.utils.list_scheduler import AdaptiveCrawlerScheduler
+    adaptive_scheduler = AdaptiveCrawlerScheduler()
+    
+    # 每轮只拉取到期的list，时间窗口由各list的推文速率决定
+    adaptive_scheduler.set_list_crawler(
+        lambda list_ids, hours_limits: crawler.crawl_lists(
+            list_ids, hours_limits, max_pages=args.max_pages, page_size=args.page_size
+        )
+    )
+    
+    logger.info("执行连接测试...")
+    if not (crawler.test_connection() and crawler.test_api_connection()):
+        logger.error("连接测试失败，无法启动定时调度")
+        sys.exit(1)
+    
+    adaptive_scheduler.start_crawling()
+    
+    logger.info("自适应定时调度已启动，按 Ctrl+C 停止")
+    
+    try:
+        while True:
+            time.sleep(300)  # 每5分钟显示一次状态
+            
+            scheduler_status = adaptive_scheduler.get_status()
+            logger.info(f"调度器状态: 运行中={scheduler_status['is_running']}, "
+                       f"任务数={scheduler_status['task_count']}, "
+                       f"成功率={scheduler_status['success_rate']:.1f}%, "
+                       f"下次运行={scheduler_status['next_run_time']}")
+            for list_id, state in scheduler_status['lists'].items():
+                logger.info(f"  list {list_id}: 间隔 {state['interval_minutes']} 分钟, "
+                           f"窗口 {state['hours_limit']} 小时, 速率 {state['tweet_rate']} 条/小时")
+    
+    except KeyboardInterrupt:
+        logger.info("接收到停止信号...")
+        adaptive_scheduler.stop()
+
+
 def run_topic_analysis(args):
     """运行话题分析 - 已移除，请使用独立的话题分析脚本"""
     logger = get_logger(__name__)
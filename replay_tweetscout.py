@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+回放录制的TweetScout分页数据，离线评估分页拉取耗时和早停时机
+
+录制：在配置中设置 api.replay.mode = "record"，正常运行爬虫即可
+回放：python replay_tweetscout.py --file data/tweetscout_pages.jsonl.gz --hours-limit 2 --latency-ms 300
+"""
+import sys
+import time
+import argparse
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from src.api.twitter_api import TwitterAPIClient
+from src.utils.config_manager import config
+from src.utils.logger import get_logger
+
+
+def replay(file_path: str, list_ids, hours_limit: int, max_pages: int = None,
+           latency_ms: float = 0, rate_limit_every: int = 0, retry_after: float = 1):
+    """
+    逐个list回放分页拉取并输出统计
+
+    Args:
+        file_path: 录制文件路径
+        list_ids: 列表ID列表
+        hours_limit: 时间限制（小时）
+        max_pages: 最大页数
+        latency_ms: 每次请求注入的延迟（毫秒）
+        rate_limit_every: 每N次请求注入一次429
+        retry_after: 注入429时的Retry-After秒数
+    """
+    logger = get_logger(__name__)
+
+    client = TwitterAPIClient()
+    session = client.enable_replay(file_path, latency_ms, rate_limit_every, retry_after)
+
+    logger.info("=" * 80)
+    logger.info(f"回放 {len(list_ids)} 个list，时间限制: {hours_limit} 小时")
+    logger.info("=" * 80)
+
+    total_start = time.perf_counter()
+    for list_id in list_ids:
+        start = time.perf_counter()
+        requests_before = session.request_count
+        pages = 0
+        tweets = 0
+        for page_tweets in client.fetch_tweets_with_pagination(list_id=list_id, max_pages=max_pages,
+                                                               hours_limit=hours_limit):
+            pages += 1
+            tweets += len(page_tweets)
+
+        logger.info(f"list {list_id}: 有效页 {pages}, 有效推文 {tweets}, "
+                    f"请求 {session.request_count - requests_before}, 耗时 {time.perf_counter() - start:.2f}s")
+
+    logger.info("=" * 80)
+    logger.info(f"总耗时 {time.perf_counter() - total_start:.2f}s, 请求 {session.request_count}, "
+                f"注入429 {session.rate_limited_count}, 未录制页面 {session.missing_count}")
+    logger.info(f"客户端统计: {client.get_request_stats()}")
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='TweetScout分页数据回放')
+    parser.add_argument('--file', default=config.get('api.replay.file', 'data/tweetscout_pages.jsonl.gz'),
+                        help='录制文件路径')
+    parser.add_argument('--list-ids', nargs='*', help='列表ID，默认使用配置中的list_ids')
+    parser.add_argument('--hours-limit', type=int, default=2, help='时间限制（小时）')
+    parser.add_argument('--max-pages', type=int, help='最大页数')
+    parser.add_argument('--latency-ms', type=float, default=0, help='每次请求注入的延迟（毫秒）')
+    parser.add_argument('--rate-limit-every', type=int, default=0, help='每N次请求注入一次429')
+    parser.add_argument('--retry-after', type=float, default=1, help='注入429时的Retry-After秒数')
+    args = parser.parse_args()
+
+    list_ids = args.list_ids or config.get('api.default_params.list_ids', [])
+    replay(args.file, list_ids, args.hours_limit, args.max_pages,
+           args.latency_ms, args.rate_limit_every, args.retry_after)
+
+
+if __name__ == '__main__':
+    main()
@@ -15,6 +15,7 @@ from datetime import datetime, timedelta
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from src.utils.marco_processor import marco_processor
+from src.utils.marco_backfill import marco_backfill_engine
 from src.database.marco_dao import marco_dao
 from src.utils.logger import setup_logger
 import logging
@@ -149,38 +150,30 @@ def backfill_days(days):
         
         print(f"⏰ 时间范围: {start_date.date()} 到 {end_date.date()}")
         
-        timestamps = marco_processor.generate_timestamp_sequence(start_date, end_date)
-        print(f"📅 需要处理 {len(timestamps)} 个时间点")
-        
-        success_count = 0
-        skip_count = 0
-        
-        for i, timestamp in enumerate(timestamps, 1):
-            # 显示进度
-            if i % 10 == 0 or i == len(timestamps):
-                print(f"   进度: {i}/{len(timestamps)}")
-            
-            # 检查是否已存在
-            if marco_dao.exists_for_timestamp(timestamp):
-                skip_count += 1
-                continue
-            
-            # 生成Marco数据
-            marco_data = marco_processor.process_tweets_to_marco(timestamp)
-            
-            if marco_data and marco_dao.insert(marco_data):
-                success_count += 1
-        
-        print(f"✅ 回填完成!")
-        print(f"   成功生成: {success_count} 条")
-        print(f"   跳过已存在: {skip_count} 条")
-        return True
+        return run_backfill(start_date, end_date, "回填完成")
         
     except Exception as e:
         print(f"❌ 回填数据异常: {e}")
         return False
 
 
+def run_backfill(start_date, end_date, done_message):
+    """单次扫描回填时间范围内缺失的时间点并输出结果"""
+    timestamps = marco_processor.generate_timestamp_sequence(start_date, end_date)
+    print(f"📅 需要处理 {len(timestamps)} 个时间点")
+    
+    stats = marco_backfill_engine.backfill(start_date, end_date)
+    
+    print(f"✅ {done_message}!")
+    print(f"   成功生成: {stats['success']} 条")
+    print(f"   跳过已存在: {stats['skipped']} 条")
+    if stats['empty']:
+        print(f"   无推文数据: {stats['empty']} 条")
+    if stats['failed']:
+        print(f"   生成失败: {stats['failed']} 条")
+    return True
+
+
 def backfill_date_range(start_str, end_str=None):
     """回填指定日期范围的数据"""
     try:
@@ -198,32 +191,7 @@ def backfill_date_range(start_str, end_str=None):
         print(f"📊 生成日期范围的Marco数据...")
         print(f"⏰ 时间范围: {start_date.date()} 到 {end_date.date()}")
         
-        timestamps = marco_processor.generate_timestamp_sequence(start_date, end_date)
-        print(f"📅 需要处理 {len(timestamps)} 个时间点")
-        
-        success_count = 0
-        skip_count = 0
-        
-        for i, timestamp in enumerate(timestamps, 1):
-            # 显示进度
-            if i % 10 == 0 or i == len(timestamps):
-                print(f"   进度: {i}/{len(timestamps)}")
-            
-            # 检查是否已存在
-            if marco_dao.exists_for_timestamp(timestamp):
-                skip_count += 1
-                continue
-            
-            # 生成Marco数据
-            marco_data = marco_processor.process_tweets_to_marco(timestamp)
-            
-            if marco_data and marco_dao.insert(marco_data):
-                success_count += 1
-        
-        print(f"✅ 生成完成!")
-        print(f"   成功生成: {success_count} 条")
-        print(f"   跳过已存在: {skip_count} 条")
-        return True
+        return run_backfill(start_date, end_date, "生成完成")
         
     except ValueError:
         print("❌ 日期格式错误，请使用: YYYY-MM-DD")
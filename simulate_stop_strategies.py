@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+在录制的TweetScout分页数据上对比分页早停策略
+
+录制：设置 api.replay.mode = "record" 且 api.pagination.stop_strategy.enabled = false，正常运行爬虫
+模拟：python simulate_stop_strategies.py --file data/tweetscout_pages.jsonl.gz --hours-limit 2
+"""
+import sys
+import argparse
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from src.api.stop_simulator import StopStrategySimulator, load_recorded_sequences
+from src.api.stop_strategies import build_stop_strategy
+from src.utils.config_manager import config
+from src.utils.logger import get_logger
+
+
+def build_presets():
+    """
+    内置的策略预设：当前配置、不早停、去掉项目时间判断、更严格和更宽松的阈值
+
+    Returns:
+        {预设名称: 创建策略实例的函数}
+    """
+    current = config.get('api.pagination.stop_strategy', {}) or {}
+
+    def with_project_times(**overrides):
+        settings = dict(current)
+        settings['project_times'] = {**current.get('project_times', {}), **overrides}
+        return settings
+
+    return {
+        'default': lambda: build_stop_strategy(current, name='default'),
+        'none': lambda: build_stop_strategy({'enabled': False}, name='none'),
+        'no_project_times': lambda: build_stop_strategy(with_project_times(enabled=False), name='no_project_times'),
+        'strict': lambda: build_stop_strategy(with_project_times(inactive_overdue_ratio=0.5, overdue_ratio=0.7),
+                                              name='strict'),
+        'lenient': lambda: build_stop_strategy(with_project_times(inactive_overdue_ratio=0.8, overdue_ratio=0.9),
+                                               name='lenient'),
+    }
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='分页早停策略离线模拟')
+    parser.add_argument('--file', default=config.get('api.replay.file', 'data/tweetscout_pages.jsonl.gz'),
+                        help='录制文件路径')
+    parser.add_argument('--hours-limit', type=int, default=2, help='时间限制（小时）')
+    parser.add_argument('--max-pages', type=int, default=config.get('api.pagination.max_pages', 100),
+                        help='最大页数')
+    parser.add_argument('--presets', nargs='*', help='要对比的预设，默认全部')
+    args = parser.parse_args()
+
+    logger = get_logger(__name__)
+
+    sequences = load_recorded_sequences(args.file)
+    simulator = StopStrategySimulator(sequences, hours_limit=args.hours_limit, max_pages=args.max_pages)
+
+    presets = build_presets()
+    if args.presets:
+        presets = {name: presets[name] for name in args.presets}
+
+    logger.info("=" * 100)
+    logger.info(f"分页序列: {len(sequences)}，时间限制: {args.hours_limit} 小时，最大页数: {args.max_pages}")
+    logger.info(f"{'策略':<18}{'拉取页/可用页':>14}{'浪费页':>8}{'窗口内推文':>12}{'已获取':>8}{'漏掉':>8}{'召回率':>9}")
+    logger.info("-" * 100)
+    for report in simulator.compare(presets):
+        logger.info(f"{report['strategy']:<18}"
+                    f"{report['pages_fetched']:>7}/{report['pages_available']:<6}"
+                    f"{report['pages_wasted']:>8}{report['in_window_tweets']:>12}"
+                    f"{report['captured_tweets']:>8}{report['missed_tweets']:>8}{report['recall']:>9.1%}"
+                    f"  {report['stop_reasons']}")
+    logger.info("=" * 100)
+
+
+if __name__ == '__main__':
+    main()
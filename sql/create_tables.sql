@@ -69,4 +69,18 @@ COMMENT "推特Marco衍生数据表"
 DISTRIBUTED BY HASH(`id`) BUCKETS 10
 PROPERTIES (
     "replication_allocation" = "tag.location.default: 1"
-); 
\ No newline at end of file
+);
+
+-- Twitter Marco 推文情绪标签表 - 保存每条推文的看涨/看跌/中性判断，重叠窗口复用
+CREATE TABLE IF NOT EXISTS twitter_marco_stance (
+    `tweet_id` VARCHAR(50) NOT NULL COMMENT "推文ID",
+    `stance` VARCHAR(10) NOT NULL COMMENT "情绪倾向: bullish/bearish/neutral",
+    `update_time` DATETIME DEFAULT CURRENT_TIMESTAMP COMMENT "记录更新时间"
+)
+ENGINE=OLAP
+UNIQUE KEY(`tweet_id`)
+COMMENT "推特Marco推文情绪标签表"
+DISTRIBUTED BY HASH(`tweet_id`) BUCKETS 10
+PROPERTIES (
+    "replication_allocation" = "tag.location.default: 1"
+);
@@ -5,6 +5,7 @@ Gemini API 客户端
 """
 import json
 import logging
+import threading
 from typing import Dict, Any, List, Optional, Tuple
 import time
 
@@ -17,6 +18,9 @@ except ImportError:
     types = None
 
 from ..utils.config_manager import config
+from ..utils.llm_cache import llm_response_cache
+from ..utils.rate_limiter import TokenBucket
+from ..utils.similarity_grouping import MinHashLSHGrouper
 
 
 class ChatGPTClient:
@@ -48,6 +52,15 @@ class ChatGPTClient:
         self.success_count = 0
         self.error_count = 0
         
+        # 多线程共享：客户端初始化锁、统计锁和全局限流
+        self._client_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        rate_limit_config = self.chatgpt_config.get('rate_limit', {})
+        self.rate_limiter = TokenBucket.per_minute(
+            rate_limit_config.get('requests_per_minute', 60),
+            rate_limit_config.get('burst')
+        )
+        
         # 批处理优化配置
         batch_config = self.chatgpt_config.get('batch_processing', {})
         opt_config = self.chatgpt_config.get('optimization', {})
@@ -55,11 +68,12 @@ class ChatGPTClient:
         self.enable_batch_consolidation = opt_config.get('enable_batch_consolidation', True)
         self.max_prompt_tokens = opt_config.get('max_prompt_tokens', 3000)
         self.content_merge_threshold = batch_config.get('content_merge_threshold', 2000)
+        # 合并相似内容：词集合相似度超过0.3的推文分入同一组
+        self.content_grouper = MinHashLSHGrouper(threshold=0.3)
         
-        # 响应缓存
-        self.enable_response_caching = opt_config.get('enable_response_caching', True)
-        self.response_cache = {} if self.enable_response_caching else None
-        self.cache_ttl_hours = opt_config.get('cache_ttl_hours', 24)
+        # 响应缓存（持久化，跨进程共享）
+        self.response_cache = llm_response_cache
+        self.enable_response_caching = self.response_cache.enabled
         
         # 打印模型配置信息
         self.logger.info(f"🤖 Gemini客户端初始化完成")
@@ -74,26 +88,59 @@ class ChatGPTClient:
     def _get_client(self):
         """获取Gemini客户端（延迟初始化），支持自定义端点"""
         if self.client is None:
-            # 如果配置了自定义 base_url（代理服务），使用 HttpOptions
-            if self.base_url and GENAI_TYPES_AVAILABLE:
-                http_options = types.HttpOptions(base_url=self.base_url)
-                self.client = genai.Client(api_key=self.api_key, http_options=http_options)
-            else:
-                # 标准 Gemini API
-                self.client = genai.Client(api_key=self.api_key)
+            with self._client_lock:
+                if self.client is None:
+                    # 如果配置了自定义 base_url（代理服务），使用 HttpOptions
+                    if self.base_url and GENAI_TYPES_AVAILABLE:
+                        http_options = types.HttpOptions(base_url=self.base_url)
+                        self.client = genai.Client(api_key=self.api_key, http_options=http_options)
+                    else:
+                        # 标准 Gemini API
+                        self.client = genai.Client(api_key=self.api_key)
         return self.client
     
-    def _make_request(self, messages: List[Dict[str, str]], **kwargs) -> Optional[str]:
+    def _make_request(self, messages: List[Dict[str, str]], cache_operation: Optional[str] = None,
+                      **kwargs) -> Optional[str]:
         """
         发起Gemini API请求，包含重试机制
         
         Args:
             messages: 对话消息列表
+            cache_operation: 操作类型，指定时使用持久化响应缓存（键为 模型+操作+规范化提示词）
             **kwargs: 其他参数（temperature, max_tokens等，Gemini可能不支持所有参数）
             
         Returns:
             生成的文本内容或None
         """
+        # 将messages转换为Gemini格式
+        # Gemini使用单条消息，需要合并system和user消息
+        system_content = ""
+        user_content = ""
+        for msg in messages:
+            role = msg.get('role', 'user')
+            content = msg.get('content', '')
+            if role == 'system':
+                system_content = content
+            elif role == 'user':
+                if user_content:
+                    user_content += "\n\n" + content
+                else:
+                    user_content = content
+        
+        # 合并system和user内容
+        if system_content:
+            prompt = f"{system_content}\n\n{user_content}"
+        else:
+            prompt = user_content
+        
+        cache_key = None
+        if cache_operation and self.enable_response_caching:
+            cache_key = self.response_cache.make_key(self.model, cache_operation, prompt)
+            cached_content = self.response_cache.get(cache_key)
+            if cached_content is not None:
+                self.logger.debug(f"命中LLM响应缓存: {cache_operation}")
+                return cached_content
+        
         for attempt in range(self.max_retries):
             try:
                 self.logger.debug(f"发起Gemini请求 (尝试 {attempt + 1}/{self.max_retries})")
@@ -102,35 +149,20 @@ class ChatGPTClient:
                 client = self._get_client()
                 chat = client.chats.create(model=self.model)
                 
-                # 将messages转换为Gemini格式
-                # Gemini使用单条消息，需要合并system和user消息
-                system_content = ""
-                user_content = ""
-                for msg in messages:
-                    role = msg.get('role', 'user')
-                    content = msg.get('content', '')
-                    if role == 'system':
-                        system_content = content
-                    elif role == 'user':
-                        if user_content:
-                            user_content += "\n\n" + content
-                        else:
-                            user_content = content
-                
-                # 合并system和user内容
-                if system_content:
-                    prompt = f"{system_content}\n\n{user_content}"
-                else:
-                    prompt = user_content
-                
+                # 所有线程共享同一限流器
+                self.rate_limiter.acquire()
                 response = chat.send_message(prompt)
                 content = response.text
                 
-                self.request_count += 1
-                self.success_count += 1
+                with self._stats_lock:
+                    self.request_count += 1
+                    self.success_count += 1
                 
                 self.logger.debug(f"Gemini请求成功，生成内容长度: {len(content)}")
                 
+                if cache_key and content:
+                    self.response_cache.set(cache_key, cache_operation, content)
+                
                 return content
                 
             except Exception as e:
@@ -141,6 +173,8 @@ class ChatGPTClient:
                 if 'RateLimitError' in error_type or 'rate_limit' in error_str or '429' in error_str or 'quota' in error_str:
                     self.logger.warning(f"Gemini速率限制，等待 {self.retry_delay} 秒后重试")
                     self.logger.error(f"RateLimitError详情: {str(e)}")
+                    # 通知其他线程一起退避
+                    self.rate_limiter.penalize(self.retry_delay * (attempt + 1))
                     time.sleep(self.retry_delay * (attempt + 1))
                     continue
                 
@@ -161,8 +195,9 @@ class ChatGPTClient:
                 else:
                     break
         
-        self.request_count += 1
-        self.error_count += 1
+        with self._stats_lock:
+            self.request_count += 1
+            self.error_count += 1
         return None
     
     def extract_topic_from_tweet(self, tweet_content: str) -> Optional[Dict[str, str]]:
@@ -201,6 +236,7 @@ class ChatGPTClient:
             
             response = self._make_request(
                 messages=messages,
+                cache_operation='topic_extraction',
                 temperature=0.3,
                 max_tokens=200
             )
@@ -283,6 +319,7 @@ class ChatGPTClient:
             
             response = self._make_request(
                 messages=messages,
+                cache_operation='sentiment',
                 temperature=0.2,
                 max_tokens=150
             )
@@ -673,43 +710,13 @@ Output only the above JSON without additional explanation."""
     
     def _group_similar_content(self, tweets: List[str]) -> List[Tuple[List[int], List[str]]]:
         """
-        基于内容相似度将推文分组
+        基于内容相似度将推文分组（词集合的Jaccard相似度超过30%）
         """
-        import hashlib
-        
-        groups = []
-        processed = set()
-        
-        for i, tweet in enumerate(tweets):
-            if i in processed:
-                continue
-                
-            # 简单的相似度检查 - 基于关键词
-            current_group_indices = [i]
-            current_group_tweets = [tweet]
-            processed.add(i)
-            
-            tweet_keywords = set(tweet.lower().split())
-            
-            # 查找相似推文
-            for j, other_tweet in enumerate(tweets[i+1:], i+1):
-                if j in processed:
-                    continue
-                    
-                other_keywords = set(other_tweet.lower().split())
-                # 计算Jaccard相似度
-                intersection = tweet_keywords & other_keywords
-                union = tweet_keywords | other_keywords
-                similarity = len(intersection) / len(union) if union else 0
-                
-                if similarity > 0.3:  # 30%相似度阈值
-                    current_group_indices.append(j)
-                    current_group_tweets.append(other_tweet)
-                    processed.add(j)
-            
-            groups.append((current_group_indices, current_group_tweets))
-        
-        return groups
+        keyword_sets = [set(tweet.lower().split()) for tweet in tweets]
+        return [
+            (group, [tweets[index] for index in group])
+            for group in self.content_grouper.group(keyword_sets)
+        ]
     
     def _extract_topics_from_merged_content(self, tweets: List[str]) -> Optional[Dict[str, str]]:
         """
@@ -765,46 +772,41 @@ Return format:
     
     def _get_cached_response(self, content: str, operation: str) -> Optional[Dict[str, Any]]:
         """
-        获取缓存的响应
+        获取缓存的解析结果
+        
+        Args:
+            content: 原始内容
+            operation: 操作类型
+            
+        Returns:
+            缓存的结果字典或None
         """
-        if not self.enable_response_caching or not self.response_cache:
+        if not self.enable_response_caching:
             return None
-            
-        cache_key = f"{operation}:{hash(content)}"
-        cached_item = self.response_cache.get(cache_key)
         
-        if cached_item:
-            # 检查是否过期
-            from datetime import datetime, timedelta
-            if datetime.now() - cached_item['timestamp'] < timedelta(hours=self.cache_ttl_hours):
-                return cached_item['result']
-            else:
-                # 删除过期缓存
-                del self.response_cache[cache_key]
+        cached = self.response_cache.get(self.response_cache.make_key(self.model, f"{operation}:result", content))
+        if cached is None:
+            return None
         
-        return None
+        try:
+            return json.loads(cached)
+        except (json.JSONDecodeError, TypeError):
+            return None
     
     def _cache_response(self, content: str, operation: str, result: Dict[str, Any]):
         """
-        缓存响应结果
+        缓存解析结果
+        
+        Args:
+            content: 原始内容
+            operation: 操作类型
+            result: 结果字典
         """
-        if not self.enable_response_caching or not self.response_cache:
+        if not self.enable_response_caching:
             return
-            
-        from datetime import datetime
-        cache_key = f"{operation}:{hash(content)}"
-        self.response_cache[cache_key] = {
-            'result': result,
-            'timestamp': datetime.now()
-        }
         
-        # 限制缓存大小，避免内存溢出
-        if len(self.response_cache) > 1000:
-            # 删除最旧的20%缓存项
-            oldest_keys = sorted(self.response_cache.keys(), 
-                               key=lambda k: self.response_cache[k]['timestamp'])[:200]
-            for key in oldest_keys:
-                del self.response_cache[key]
+        cache_key = self.response_cache.make_key(self.model, f"{operation}:result", content)
+        self.response_cache.set(cache_key, f"{operation}:result", json.dumps(result, ensure_ascii=False))
     
     def get_statistics(self) -> Dict[str, Any]:
         """
@@ -813,11 +815,16 @@ Return format:
         Returns:
             统计信息字典
         """
+        cache_stats = self.response_cache.get_statistics()
         return {
             'total_requests': self.request_count,
             'success_count': self.success_count,
             'error_count': self.error_count,
-            'success_rate': (self.success_count / max(self.request_count, 1)) * 100
+            'success_rate': (self.success_count / max(self.request_count, 1)) * 100,
+            'cache_hits': cache_stats['hits'],
+            'cache_misses': cache_stats['misses'],
+            'cache_hit_rate': cache_stats['hit_rate'],
+            'cache_entries': cache_stats['entries']
         }
     
     def analyze_kol_profile(self, user_info: Dict[str, Any], recent_tweets: List[str]) -> Optional[Dict[str, Any]]:
@@ -1735,6 +1742,7 @@ Return format:
 
             response = self._make_request(
                 messages=messages,
+                cache_operation='token_extraction',
                 temperature=0.1,  # 低温度以获得更确定的结果
                 max_tokens=150
             )
@@ -1825,6 +1833,7 @@ If the tweet does NOT match any category, return:
 
             response = self._make_request(
                 messages=messages,
+                cache_operation='announcement',
                 temperature=0.1,  # 低温度以获得更确定的结果
                 max_tokens=200
             )
@@ -2124,6 +2133,7 @@ Now generate the summary:
 
             response = self._make_request(
                 messages=messages,
+                cache_operation='activity_extraction',
                 temperature=0.1,  # Low temperature for consistent extraction
                 max_tokens=200
             )
@@ -2161,6 +2171,155 @@ Now generate the summary:
             self.logger.error(f"Failed to extract activity structured data: {e}")
             return None
 
+    def batch_enrich_tweets(self, tweets: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        一次请求为一批推文同时完成内容验证、情绪分析、项目/话题分类、token提取和公告判断
+
+        每条推文的结果只包含通过校验的字段，缺失的字段由调用方回退到单一用途的调用。
+
+        Args:
+            tweets: 推文列表，每项包含 text 和可选的 is_project_tweet（是否项目官方账号）
+
+        Returns:
+            与输入等长的结果列表，每项为字段字典（解析失败的推文为空字典）：
+            is_valid(bool), sentiment(positive/negative/neutral), classification(dict，格式同
+            SmartClassifier._ai_classify_content), token_symbols(list), is_announce(0/1)
+        """
+        results = [{} for _ in tweets]
+        if not tweets:
+            return results
+
+        try:
+            tweet_lines = []
+            for index, tweet in enumerate(tweets):
+                text = (tweet.get('text') or '').replace('\n', ' ')
+                project_flag = ' [PROJECT_OFFICIAL]' if tweet.get('is_project_tweet') else ''
+                tweet_lines.append(f"[{index}]{project_flag} {text}")
+
+            prompt = f"""
+Analyze each of the following cryptocurrency tweets. Tweets are numbered with a stable index in square brackets.
+
+{chr(10).join(tweet_lines)}
+
+For EVERY tweet return one object with these fields:
+- index: the tweet index (integer, unchanged)
+- is_valid: true if the tweet is related to crypto/blockchain/DeFi/NFT, is not obvious advertising or spam, and contains valuable information, opinions or discussion; otherwise false
+- sentiment: "positive" (bullish, optimistic), "negative" (bearish, pessimistic) or "neutral"
+- type: "project" if it mentions any specific crypto project or token (e.g. Bitcoin, ETH, $SOL), "topic" for general discussion without a specific project (DeFi, regulation, market trends), or "unknown"
+- name: standardized project name (e.g. Bitcoin, Ethereum) or concise topic name
+- brief: short description of the project or topic
+- confidence: 0.0-1.0
+- token_symbols: all token symbols mentioned (uppercase, without $, at most 10; map full names like Bitcoin -> BTC), [] if none
+- is_announcement: only for tweets marked [PROJECT_OFFICIAL]: true if it announces key ecosystem partners & collaborations, community spaces/events (AMA, Spaces, conferences, hackathons, meetups) or major tech updates (releases, upgrades, mainnet/testnet launches); false otherwise
+
+Return ONLY a JSON array, one object per tweet, for example:
+[{{"index": 0, "is_valid": true, "sentiment": "positive", "type": "project", "name": "Bitcoin", "brief": "...", "confidence": 0.9, "token_symbols": ["BTC"], "is_announcement": false}}]
+"""
+
+            messages = [
+                {"role": "system", "content": "You are a professional cryptocurrency content analyst. You always answer with strictly valid JSON."},
+                {"role": "user", "content": prompt}
+            ]
+
+            response = self._make_request(
+                messages=messages,
+                cache_operation='batch_enrichment',
+                temperature=0.1,
+                max_tokens=200 * len(tweets)
+            )
+
+            if not response:
+                return results
+
+            # 清理响应内容，移除代码块标记
+            cleaned_response = response.strip()
+            if cleaned_response.startswith('```json'):
+                cleaned_response = cleaned_response[7:]  # 移除 ```json
+            if cleaned_response.startswith('```'):
+                cleaned_response = cleaned_response[3:]  # 移除 ```
+            if cleaned_response.endswith('```'):
+                cleaned_response = cleaned_response[:-3]  # 移除结尾的 ```
+            cleaned_response = cleaned_response.strip()
+
+            json_start = cleaned_response.find('[')
+            json_end = cleaned_response.rfind(']') + 1
+            if json_start < 0 or json_end <= json_start:
+                self.logger.warning(f"批量增强返回格式无效: {response[:200]}")
+                return results
+
+            items = json.loads(cleaned_response[json_start:json_end])
+            if not isinstance(items, list):
+                return results
+
+            for item in items:
+                if not isinstance(item, dict):
+                    continue
+                try:
+                    index = int(item.get('index'))
+                except (TypeError, ValueError):
+                    continue
+                if 0 <= index < len(tweets):
+                    results[index] = self._parse_batch_enrich_item(item)
+
+            parsed_count = sum(1 for result in results if result)
+            self.logger.info(f"批量增强完成: {parsed_count}/{len(tweets)} 条推文解析成功")
+            return results
+
+        except (json.JSONDecodeError, ValueError, TypeError) as e:
+            self.logger.warning(f"批量增强JSON解析失败，将回退到单项调用: {e}")
+            return results
+        except Exception as e:
+            self.logger.error(f"批量增强失败: {e}")
+            return results
+
+    def _parse_batch_enrich_item(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        逐字段校验批量增强结果，只保留格式正确的字段
+
+        Args:
+            item: 模型返回的单条推文结果
+
+        Returns:
+            校验通过的字段字典
+        """
+        parsed = {}
+
+        if isinstance(item.get('is_valid'), bool):
+            parsed['is_valid'] = item['is_valid']
+
+        sentiment = item.get('sentiment')
+        if isinstance(sentiment, str) and sentiment.lower() in ('positive', 'negative', 'neutral'):
+            parsed['sentiment'] = sentiment.lower()
+
+        content_type = item.get('type')
+        if content_type == 'unknown' or (content_type in ('project', 'topic') and item.get('name')):
+            try:
+                confidence = float(item.get('confidence', 0.0))
+            except (TypeError, ValueError):
+                confidence = 0.0
+            parsed['classification'] = {
+                'type': content_type,
+                'name': item.get('name') or '',
+                'brief': item.get('brief') or '',
+                'confidence': confidence,
+                'reason': 'batch'
+            }
+
+        symbols = item.get('token_symbols')
+        if isinstance(symbols, list):
+            filtered_symbols = []
+            for symbol in symbols:
+                if isinstance(symbol, str):
+                    clean_symbol = symbol.strip().upper().lstrip('$')
+                    if 2 <= len(clean_symbol) <= 10 and clean_symbol not in filtered_symbols:
+                        filtered_symbols.append(clean_symbol)
+            parsed['token_symbols'] = filtered_symbols[:10]
+
+        if isinstance(item.get('is_announcement'), bool):
+            parsed['is_announce'] = 1 if item['is_announcement'] else 0
+
+        return parsed
+
 
 # 全局ChatGPT客户端实例
 chatgpt_client = ChatGPTClient() 
\ No newline at end of file
@@ -0,0 +1,196 @@
+"""
+分页早停策略模拟器
+把录制的分页序列（见 tweetscout_replay）依次交给各个早停策略，
+统计拉取页数、浪费的页数以及漏掉的时间窗口内推文，用数据选择阈值
+
+为了得到完整的"真实值"，录制时应关闭早停（api.pagination.stop_strategy.enabled = false），
+让分页一直走到没有next_cursor或达到最大页数
+"""
+import gzip
+import json
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Callable
+
+from ..utils.twitter_time import get_tweet_local_time
+from .stop_strategies import PaginationState, StopStrategy
+
+
+@dataclass
+class RecordedSequence:
+    """一次录制的分页序列（从首页开始沿cursor连续的页面）"""
+
+    list_id: str
+    recorded_at: datetime
+    pages: List[List[Dict[str, Any]]] = field(default_factory=list)
+
+
+def load_recorded_sequences(file_path: str) -> List[RecordedSequence]:
+    """
+    从录制文件中还原分页序列：每个首页（cursor为空）开始一个新序列，后续页面按cursor衔接
+
+    Args:
+        file_path: 录制文件路径（.jsonl.gz）
+
+    Returns:
+        分页序列列表
+    """
+    sequences: List[RecordedSequence] = []
+    # 每个list当前序列等待的下一页cursor
+    open_sequences: Dict[str, RecordedSequence] = {}
+    expected_cursor: Dict[str, str] = {}
+
+    with gzip.open(file_path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            list_id = str(entry.get('list_id'))
+            response = entry.get('response')
+            tweets = response.get('tweets', response.get('data', [])) if isinstance(response, dict) else response
+            if not isinstance(tweets, list):
+                continue
+
+            if not entry.get('cursor'):
+                sequence = RecordedSequence(list_id, datetime.fromisoformat(entry['recorded_at']))
+                sequences.append(sequence)
+                open_sequences[list_id] = sequence
+            elif list_id in open_sequences and entry.get('cursor') == expected_cursor.get(list_id):
+                sequence = open_sequences[list_id]
+            else:
+                # 与当前序列不衔接的页面（例如重试或中断的录制）
+                continue
+
+            sequence.pages.append(tweets)
+            expected_cursor[list_id] = entry.get('next_cursor')
+
+    return sequences
+
+
+class StopStrategySimulator:
+    """在录制的分页序列上回放早停策略"""
+
+    def __init__(self, sequences: List[RecordedSequence], hours_limit: int = 2, max_pages: int = 100):
+        """
+        初始化模拟器
+
+        Args:
+            sequences: 分页序列
+            hours_limit: 时间限制（小时），截止点按录制时间计算
+            max_pages: 最大页数
+        """
+        self.logger = logging.getLogger(__name__)
+        self.sequences = sequences
+        self.hours_limit = hours_limit
+        self.max_pages = max_pages
+
+    def simulate(self, strategy_factory: Callable[[], StopStrategy], name: str = None) -> Dict[str, Any]:
+        """
+        用一个策略回放所有序列
+
+        Args:
+            strategy_factory: 创建策略实例的函数（每个序列使用新的实例）
+            name: 策略名称
+
+        Returns:
+            统计结果：拉取页数、可用页数、浪费页数、窗口内推文数、已获取、漏掉、召回率
+        """
+        report = {
+            'strategy': name, 'sequences': len(self.sequences), 'pages_available': 0,
+            'pages_fetched': 0, 'pages_wasted': 0, 'in_window_tweets': 0,
+            'captured_tweets': 0, 'missed_tweets': 0, 'stop_reasons': {}
+        }
+
+        for sequence in self.sequences:
+            strategy = strategy_factory()
+            result = self._simulate_sequence(sequence, strategy)
+            for key in ('pages_available', 'pages_fetched', 'pages_wasted', 'in_window_tweets', 'captured_tweets'):
+                report[key] += result[key]
+            if result['stop_reason']:
+                # 按触发停止的子策略计数
+                for triggered in getattr(strategy, 'triggered', None) or [strategy.name]:
+                    report['stop_reasons'][triggered] = report['stop_reasons'].get(triggered, 0) + 1
+            if report['strategy'] is None:
+                report['strategy'] = strategy.name
+
+        report['missed_tweets'] = report['in_window_tweets'] - report['captured_tweets']
+        report['recall'] = report['captured_tweets'] / report['in_window_tweets'] if report['in_window_tweets'] else 1.0
+        return report
+
+    def compare(self, strategy_factories: Dict[str, Callable[[], StopStrategy]]) -> List[Dict[str, Any]]:
+        """
+        对比多个策略
+
+        Args:
+            strategy_factories: {策略名称: 创建策略实例的函数}
+
+        Returns:
+            每个策略的统计结果
+        """
+        return [self.simulate(factory, name) for name, factory in strategy_factories.items()]
+
+    def _simulate_sequence(self, sequence: RecordedSequence, strategy: StopStrategy) -> Dict[str, Any]:
+        """
+        回放单个序列
+
+        Args:
+            sequence: 分页序列
+            strategy: 早停策略
+
+        Returns:
+            单个序列的统计结果
+        """
+        time_cutoff = sequence.recorded_at - timedelta(hours=self.hours_limit)
+        pages = sequence.pages[:self.max_pages]
+
+        # 真实值：每页时间窗口内的推文数
+        in_window_per_page = [self._count_in_window(page, time_cutoff) for page in pages]
+        last_useful_page = max((i + 1 for i, count in enumerate(in_window_per_page) if count), default=0)
+
+        state = PaginationState(time_cutoff, self.hours_limit)
+        strategy.reset()
+        fetched = 0
+        captured = 0
+        stop_reason = None
+
+        for page in pages:
+            if not page:
+                break
+            fetched += 1
+            state.start_page(len(page))
+            valid_count = 0
+            for tweet in page:
+                user_id = (tweet.get('user') or {}).get('id_str', 'unknown')
+                tweet_time = get_tweet_local_time(tweet)
+                if tweet_time is None:
+                    # 与分页拉取一致：没有时间的推文保留
+                    state.mark_valid(user_id)
+                    valid_count += 1
+                elif state.observe(user_id, tweet_time):
+                    valid_count += 1
+            state.finish_page(valid_count)
+            captured += in_window_per_page[fetched - 1]
+
+            stop_reason = strategy.should_stop(state)
+            if stop_reason:
+                break
+
+        return {
+            'pages_available': len(pages),
+            'pages_fetched': fetched,
+            'pages_wasted': max(0, fetched - last_useful_page),
+            'in_window_tweets': sum(in_window_per_page),
+            'captured_tweets': captured,
+            'stop_reason': stop_reason
+        }
+
+    @staticmethod
+    def _count_in_window(page: List[Dict[str, Any]], time_cutoff: datetime) -> int:
+        """统计一页中时间窗口内的推文数"""
+        count = 0
+        for tweet in page:
+            tweet_time = get_tweet_local_time(tweet)
+            if tweet_time is not None and tweet_time >= time_cutoff:
+                count += 1
+        return count
@@ -0,0 +1,336 @@
+"""
+分页早停策略
+把 fetch_tweets_with_pagination 中的停止判断拆分为可组合的策略对象，
+分页拉取和离线模拟器共用同一套分页状态和策略实现
+"""
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional
+
+from ..utils.config_manager import config
+
+
+logger = logging.getLogger(__name__)
+
+
+class PaginationState:
+    """一次分页拉取过程中跨页累积的状态"""
+
+    def __init__(self, time_cutoff: datetime, hours_limit: int):
+        """
+        初始化分页状态
+
+        Args:
+            time_cutoff: 时间截止点
+            hours_limit: 时间限制（小时）
+        """
+        self.time_cutoff = time_cutoff
+        self.hours_limit = hours_limit
+        self.page = 0
+        self.page_tweet_count = 0
+        self.page_valid_count = 0
+        self.total_valid_count = 0
+
+        # 跨页跟踪每个项目/账号的最新推文时间和是否曾有有效推文
+        self.project_latest_times: Dict[str, datetime] = {}
+        self.project_ever_had_valid_tweets: Dict[str, bool] = {}
+        # 本页每个项目是否有有效推文
+        self.project_has_valid_tweets_this_page: Dict[str, bool] = {}
+
+    def start_page(self, tweet_count: int) -> None:
+        """
+        开始处理新的一页
+
+        Args:
+            tweet_count: 本页推文数
+        """
+        self.page += 1
+        self.page_tweet_count = tweet_count
+        self.page_valid_count = 0
+        self.project_has_valid_tweets_this_page = {}
+
+    def observe(self, user_id: str, tweet_time: datetime) -> bool:
+        """
+        记录一条带时间的推文
+
+        Args:
+            user_id: 作者ID
+            tweet_time: 推文时间（本地时间）
+
+        Returns:
+            是否在时间范围内
+        """
+        # 更新该项目的最新推文时间（跨页累积）
+        latest_time = self.project_latest_times.get(user_id)
+        if latest_time is None or tweet_time > latest_time:
+            self.project_latest_times[user_id] = tweet_time
+
+        if tweet_time >= self.time_cutoff:
+            self.mark_valid(user_id)
+            return True
+        return False
+
+    def mark_valid(self, user_id: str) -> None:
+        """
+        标记项目本页有有效推文
+
+        Args:
+            user_id: 作者ID
+        """
+        self.project_has_valid_tweets_this_page[user_id] = True
+        self.project_ever_had_valid_tweets[user_id] = True
+
+    def finish_page(self, valid_count: int) -> None:
+        """
+        结束本页
+
+        Args:
+            valid_count: 本页保留的有效推文数
+        """
+        self.page_valid_count = valid_count
+        self.total_valid_count += valid_count
+
+
+class StopStrategy:
+    """早停策略基类：每页结束时调用，返回停止原因或None"""
+
+    name = 'base'
+
+    def reset(self) -> None:
+        """重置策略内部状态（每次分页拉取开始时调用）"""
+
+    def should_stop(self, state: PaginationState) -> Optional[str]:
+        """
+        判断是否停止拉取
+
+        Args:
+            state: 分页状态
+
+        Returns:
+            停止原因，继续拉取时返回None
+        """
+        return None
+
+
+class ConsecutiveEmptyPagesStrategy(StopStrategy):
+    """连续多页没有有效推文时停止"""
+
+    name = 'consecutive_empty_pages'
+
+    def __init__(self, max_empty_pages: int = 5):
+        self.max_empty_pages = max_empty_pages
+        self.empty_pages = 0
+
+    def reset(self) -> None:
+        self.empty_pages = 0
+
+    def should_stop(self, state: PaginationState) -> Optional[str]:
+        if state.page_valid_count > 0:
+            self.empty_pages = 0
+            return None
+
+        self.empty_pages += 1
+        logger.debug(f"连续空页面计数: {self.empty_pages}/{self.max_empty_pages}")
+        if self.empty_pages >= self.max_empty_pages:
+            return f"连续 {self.empty_pages} 页无有效推文"
+        return None
+
+
+class EfficiencyWindowStrategy(StopStrategy):
+    """达到一定页数后，最近N页平均有效推文数过低时停止"""
+
+    name = 'efficiency_window'
+
+    def __init__(self, window_pages: int = 10, min_avg_valid: float = 1.0):
+        self.window_pages = window_pages
+        self.min_avg_valid = min_avg_valid
+        self.window_valid = 0
+
+    def reset(self) -> None:
+        self.window_valid = 0
+
+    def should_stop(self, state: PaginationState) -> Optional[str]:
+        self.window_valid += state.page_valid_count
+        if state.page <= self.window_pages:
+            return None
+
+        # 简化的滑动窗口：检测后从本页重新累计
+        avg_valid_per_page = self.window_valid / self.window_pages
+        self.window_valid = state.page_valid_count
+        if avg_valid_per_page < self.min_avg_valid:
+            return f"最近 {self.window_pages} 页平均有效推文密度过低 ({avg_valid_per_page:.2f}/页)"
+        return None
+
+
+class InactivePageLimitStrategy(StopStrategy):
+    """超过一定页数后，本页没有任何活跃项目时停止"""
+
+    name = 'inactive_page_limit'
+
+    def __init__(self, min_page: int = 40):
+        self.min_page = min_page
+
+    def should_stop(self, state: PaginationState) -> Optional[str]:
+        if state.page < self.min_page:
+            return None
+        if not any(state.project_has_valid_tweets_this_page.values()):
+            return f"已拉取 {state.page} 页，本页无任何活跃项目"
+        return None
+
+
+class ProjectTimesStrategy(StopStrategy):
+    """基于每个项目最新推文时间的停止判断"""
+
+    name = 'project_times'
+
+    def __init__(self, inactive_overdue_ratio: float = 0.6, overdue_ratio: float = 0.8,
+                 max_active_projects: int = 2, very_overdue_ratio: float = 0.8,
+                 very_overdue_factor: float = 2):
+        """
+        初始化项目时间策略
+
+        Args:
+            inactive_overdue_ratio: 本页无活跃项目时，超时项目比例达到该值即停止
+            overdue_ratio: 超时项目比例达到该值且活跃项目不超过 max_active_projects 时停止
+            max_active_projects: 见 overdue_ratio
+            very_overdue_ratio: 曾有有效推文的项目中，超时很久的比例达到该值时停止
+            very_overdue_factor: 超时很久 = 早于截止点 hours_limit × factor 小时
+        """
+        self.inactive_overdue_ratio = inactive_overdue_ratio
+        self.overdue_ratio = overdue_ratio
+        self.max_active_projects = max_active_projects
+        self.very_overdue_ratio = very_overdue_ratio
+        self.very_overdue_factor = very_overdue_factor
+
+    def should_stop(self, state: PaginationState) -> Optional[str]:
+        return self.evaluate(state.project_latest_times, state.project_has_valid_tweets_this_page,
+                             state.project_ever_had_valid_tweets, state.time_cutoff, state.hours_limit)
+
+    def evaluate(self, project_latest_times: Dict[str, datetime], project_has_valid_tweets: Dict[str, bool],
+                 project_ever_had_valid_tweets: Dict[str, bool], time_cutoff: datetime,
+                 hours_limit: int) -> Optional[str]:
+        """
+        基于项目级别的时间分析判断是否应该停止拉取
+
+        Args:
+            project_latest_times: 每个项目的最新推文时间（跨页累积）
+            project_has_valid_tweets: 每个项目本页是否有有效推文
+            project_ever_had_valid_tweets: 每个项目是否曾经有过有效推文（跨页累积）
+            time_cutoff: 时间截止点
+            hours_limit: 时间限制（小时）
+
+        Returns:
+            停止原因，继续拉取时返回None
+        """
+        try:
+            if not project_latest_times:
+                logger.debug("没有项目时间数据，不基于项目时间停止")
+                return None
+
+            total_projects = len(project_latest_times)
+            overdue_projects = sum(1 for latest_time in project_latest_times.values() if latest_time < time_cutoff)
+            active_projects = sum(1 for user_id in project_latest_times if project_has_valid_tweets.get(user_id, False))
+            projects_ever_had_valid = sum(
+                1 for user_id in project_latest_times if project_ever_had_valid_tweets.get(user_id, False)
+            )
+
+            logger.debug(f"项目时间分析: 总项目数={total_projects}, 超时项目数={overdue_projects}, "
+                         f"本页有效推文项目数={active_projects}, 曾经有有效推文项目数={projects_ever_had_valid}")
+
+            # 停止条件1: 所有项目的最新推文都已经超时
+            if overdue_projects == total_projects:
+                return f"所有 {total_projects} 个项目的最新推文都已超过 {hours_limit} 小时限制"
+
+            # 停止条件2: 本页没有任何项目产生有效推文，且大部分项目都已超时
+            if active_projects == 0 and overdue_projects >= total_projects * self.inactive_overdue_ratio:
+                return (f"本页无任何项目产生有效推文，且 {overdue_projects}/{total_projects} "
+                        f"({overdue_projects / total_projects:.1%}) 项目已超时")
+
+            # 停止条件3: 超时项目比例很高，且活跃项目很少
+            overdue_ratio = overdue_projects / total_projects
+            if overdue_ratio >= self.overdue_ratio and active_projects <= self.max_active_projects:
+                return f"超时项目比例过高 ({overdue_ratio:.1%})，且活跃项目数量过少 ({active_projects})"
+
+            # 停止条件4: 曾经有有效推文的项目大多已超时很久
+            if projects_ever_had_valid > 0:
+                very_overdue_cutoff = time_cutoff - timedelta(hours=hours_limit * self.very_overdue_factor)
+                very_overdue_projects = sum(
+                    1 for user_id, latest_time in project_latest_times.items()
+                    if latest_time < very_overdue_cutoff and project_ever_had_valid_tweets.get(user_id, False)
+                )
+                if very_overdue_projects >= projects_ever_had_valid * self.very_overdue_ratio:
+                    return f"大部分有效项目 ({very_overdue_projects}/{projects_ever_had_valid}) 都已超时很久"
+
+            logger.debug(f"继续拉取: 超时比例={overdue_ratio:.1%}, 活跃项目数={active_projects}")
+            return None
+
+        except Exception as e:
+            logger.error(f"项目时间分析失败: {e}")
+            # 发生异常时，保守地继续拉取
+            return None
+
+
+class CompositeStopStrategy(StopStrategy):
+    """组合多个策略：每页所有策略都参与计算（保持各自的计数状态），任一策略要求停止即停止"""
+
+    name = 'composite'
+
+    def __init__(self, strategies: List[StopStrategy], name: str = None):
+        self.strategies = strategies
+        if name:
+            self.name = name
+        # 最近一次要求停止的子策略名称
+        self.triggered: List[str] = []
+
+    def reset(self) -> None:
+        self.triggered = []
+        for strategy in self.strategies:
+            strategy.reset()
+
+    def should_stop(self, state: PaginationState) -> Optional[str]:
+        reasons = []
+        self.triggered = []
+        for strategy in self.strategies:
+            reason = strategy.should_stop(state)
+            if reason:
+                reasons.append(reason)
+                self.triggered.append(strategy.name)
+        return '；'.join(reasons) if reasons else None
+
+
+def build_stop_strategy(settings: Dict[str, Any] = None, name: str = 'default') -> StopStrategy:
+    """
+    按配置构建早停策略
+
+    Args:
+        settings: 策略参数，默认读取 api.pagination.stop_strategy；enabled 为 false 时不做任何早停
+        name: 策略名称（用于模拟报告）
+
+    Returns:
+        组合策略
+    """
+    if settings is None:
+        settings = config.get('api.pagination.stop_strategy', {}) or {}
+
+    if not settings.get('enabled', True):
+        return CompositeStopStrategy([], name=name)
+
+    strategies: List[StopStrategy] = []
+    project_settings = settings.get('project_times', {})
+    if project_settings.get('enabled', True):
+        strategies.append(ProjectTimesStrategy(
+            inactive_overdue_ratio=project_settings.get('inactive_overdue_ratio', 0.6),
+            overdue_ratio=project_settings.get('overdue_ratio', 0.8),
+            max_active_projects=project_settings.get('max_active_projects', 2),
+            very_overdue_ratio=project_settings.get('very_overdue_ratio', 0.8),
+            very_overdue_factor=project_settings.get('very_overdue_factor', 2)
+        ))
+    if settings.get('consecutive_empty_pages', 5):
+        strategies.append(ConsecutiveEmptyPagesStrategy(settings.get('consecutive_empty_pages', 5)))
+    if settings.get('efficiency_window', 10):
+        strategies.append(EfficiencyWindowStrategy(settings.get('efficiency_window', 10),
+                                                   settings.get('efficiency_min_avg', 1.0)))
+    if settings.get('inactive_after_page', 40):
+        strategies.append(InactivePageLimitStrategy(settings.get('inactive_after_page', 40)))
+
+    return CompositeStopStrategy(strategies, name=name)
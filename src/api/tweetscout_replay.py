@@ -0,0 +1,185 @@
+"""
+TweetScout分页数据的录制与回放
+录制模式把每页原始响应连同list_id和cursor写入gzip压缩的JSONL；
+回放模式作为进程内的会话替身按(list_id, cursor)返回录制的页面，可注入延迟和429限流，
+用于离线、可复现地评估爬取性能和早停策略
+"""
+import gzip
+import json
+import logging
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+
+class PageRecorder:
+    """把TweetScout分页响应追加写入压缩JSONL"""
+
+    def __init__(self, file_path: str):
+        """
+        初始化录制器
+
+        Args:
+            file_path: 录制文件路径（.jsonl.gz）
+        """
+        self.logger = logging.getLogger(__name__)
+        self.file_path = Path(file_path)
+        self.file_path.parent.mkdir(parents=True, exist_ok=True)
+        self.recorded_pages = 0
+        self._lock = threading.Lock()
+
+    def record(self, params: Dict[str, Any], response_data: Any) -> None:
+        """
+        录制一页响应
+
+        Args:
+            params: 请求参数（包含list_id和cursor）
+            response_data: 响应JSON
+        """
+        next_cursor = None
+        if isinstance(response_data, dict):
+            next_cursor = response_data.get('next_cursor') or response_data.get('cursor')
+
+        line = json.dumps({
+            'list_id': params.get('list_id'),
+            'cursor': params.get('cursor'),
+            'next_cursor': next_cursor,
+            'recorded_at': datetime.now().isoformat(),
+            'response': response_data
+        }, ensure_ascii=False)
+
+        try:
+            with self._lock:
+                # 追加写入新的gzip成员，读取时按一个连续流处理
+                with gzip.open(self.file_path, 'at', encoding='utf-8') as f:
+                    f.write(line + '\n')
+                self.recorded_pages += 1
+        except Exception as e:
+            self.logger.error(f"录制分页数据失败: {e}")
+
+
+class ReplayResponse:
+    """回放的HTTP响应"""
+
+    def __init__(self, status_code: int, body: str = '', headers: Dict[str, str] = None):
+        self.status_code = status_code
+        self.text = body
+        self.headers = headers or {}
+
+    def json(self) -> Any:
+        # 每次返回新的对象，下游对推文字典的修改不影响后续回放
+        return json.loads(self.text)
+
+
+class ReplaySession:
+    """按(list_id, cursor)回放录制页面的会话替身，接口与requests.Session.get一致"""
+
+    def __init__(self, file_path: str, latency_ms: float = 0, rate_limit_every: int = 0,
+                 retry_after: float = 1):
+        """
+        加载录制文件
+
+        Args:
+            file_path: 录制文件路径（.jsonl.gz）
+            latency_ms: 每次请求注入的延迟（毫秒）
+            rate_limit_every: 每N次请求返回一次429，0表示不注入
+            retry_after: 注入429时的Retry-After秒数
+        """
+        self.logger = logging.getLogger(__name__)
+        self.latency = latency_ms / 1000.0
+        self.rate_limit_every = rate_limit_every
+        self.retry_after = retry_after
+        self.headers: Dict[str, str] = {}
+
+        # 同一(list_id, cursor)录制多次时按录制顺序依次返回，用完后重复最后一页
+        self._pages: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+        self._served: Dict[Tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+        self.request_count = 0
+        self.rate_limited_count = 0
+        self.missing_count = 0
+
+        self._load(Path(file_path))
+
+    def _load(self, file_path: Path) -> None:
+        """读取录制文件"""
+        with gzip.open(file_path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                key = (str(entry.get('list_id')), entry.get('cursor') or '')
+                self._pages.setdefault(key, []).append({
+                    'body': json.dumps(entry.get('response')),
+                    'recorded_at': entry.get('recorded_at')
+                })
+        self.logger.info(f"加载回放数据: {sum(len(pages) for pages in self._pages.values())} 页, "
+                         f"{len({key[0] for key in self._pages})} 个list")
+
+    def reference_time(self, list_id: str) -> Optional[datetime]:
+        """
+        获取list下一次回放首页时的录制时间，用作时间截止点的"当前时间"
+
+        Args:
+            list_id: 列表ID
+
+        Returns:
+            录制时间，没有录制数据时返回None
+        """
+        key = (str(list_id), '')
+        with self._lock:
+            pages = self._pages.get(key)
+            if not pages:
+                return None
+            page = pages[min(self._served.get(key, 0), len(pages) - 1)]
+        return datetime.fromisoformat(page['recorded_at']) if page.get('recorded_at') else None
+
+    def get(self, url: str, params: Dict[str, Any] = None, timeout: float = None) -> ReplayResponse:
+        """
+        回放一次请求
+
+        Args:
+            url: 请求URL（忽略）
+            params: 请求参数
+            timeout: 超时（忽略）
+
+        Returns:
+            回放响应
+        """
+        params = params or {}
+        key = (str(params.get('list_id')), params.get('cursor') or '')
+
+        with self._lock:
+            self.request_count += 1
+            inject_429 = self.rate_limit_every > 0 and self.request_count % self.rate_limit_every == 0
+            page = None
+            if not inject_429:
+                pages = self._pages.get(key)
+                if pages:
+                    served = self._served.get(key, 0)
+                    page = pages[min(served, len(pages) - 1)]
+                    self._served[key] = served + 1
+
+        if self.latency > 0:
+            time.sleep(self.latency)
+
+        if inject_429:
+            with self._lock:
+                self.rate_limited_count += 1
+            return ReplayResponse(429, 'Too Many Requests', {'Retry-After': str(self.retry_after)})
+
+        if page is None:
+            with self._lock:
+                self.missing_count += 1
+            self.logger.warning(f"回放数据中没有该页: list_id={key[0]}, cursor={key[1][:20]}")
+            return ReplayResponse(404, 'Not recorded')
+
+        return ReplayResponse(200, page['body'])
+
+    def mount(self, prefix: str, adapter: Any) -> None:
+        """兼容requests.Session接口"""
+
+    def close(self) -> None:
+        """兼容requests.Session接口"""
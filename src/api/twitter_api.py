@@ -3,13 +3,20 @@ Twitter API 客户端
 用于从TweetScout API获取Twitter数据
 """
 import requests
+import random
+import threading
 import time
 import logging
 from typing import Dict, Any, List, Optional, Generator
 from datetime import datetime, timedelta
-from dateutil import parser as date_parser
-
+from email.utils import parsedate_to_datetime
+from requests.adapters import HTTPAdapter
 from ..utils.config_manager import config
+from ..utils.crawl_watermark import crawl_watermark_store
+from ..utils.rate_limiter import TokenBucket
+from ..utils.twitter_time import get_tweet_local_time
+from .tweetscout_replay import PageRecorder, ReplaySession
+from .stop_strategies import PaginationState, StopStrategy, build_stop_strategy
 
 
 class TwitterAPIClient:
@@ -25,16 +32,99 @@ class TwitterAPIClient:
         self.timeout = self.api_config.get('timeout', 30)
         self.retry_attempts = self.api_config.get('retry_attempts', 3)
         self.retry_delay = self.api_config.get('retry_delay', 5)
+        self.retry_jitter = self.api_config.get('retry_jitter', 0.5)
+        self.max_retry_after = self.api_config.get('max_retry_after', 120)
+        
+        # 多个list并行拉取时的最大并发数，连接池按并发数设置
+        self.max_concurrency = max(1, self.api_config.get('max_concurrency', 8))
         
         self.session = requests.Session()
         self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_concurrency)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        
+        # 所有list共享的令牌桶限流（默认每分钟60次，即原来的每秒1次）
+        rate_limit_config = self.api_config.get('rate_limit', {})
+        self.rate_limiter = TokenBucket.per_minute(
+            rate_limit_config.get('requests_per_minute', 60),
+            rate_limit_config.get('burst')
+        )
+        
+        # 增量爬取水位线
+        self.watermark_store = crawl_watermark_store
         
         self.logger = logging.getLogger(__name__)
         
-        # 请求统计
+        # 请求统计（多线程共享）
         self.request_count = 0
         self.error_count = 0
-        self.last_request_time = 0
+        self.rate_limited_count = 0
+        self._stats_lock = threading.Lock()
+        
+        # 录制/回放模式（off/record/replay），用于离线评估爬取性能和早停策略
+        self.page_recorder = None
+        self.replay_session = None
+        replay_config = self.api_config.get('replay', {})
+        replay_mode = replay_config.get('mode', 'off')
+        replay_file = replay_config.get('file', 'data/tweetscout_pages.jsonl.gz')
+        try:
+            if replay_mode == 'record':
+                self.enable_recording(replay_file)
+            elif replay_mode == 'replay':
+                self.enable_replay(
+                    replay_file,
+                    latency_ms=replay_config.get('latency_ms', 0),
+                    rate_limit_every=replay_config.get('rate_limit_every', 0),
+                    retry_after=replay_config.get('retry_after', 1)
+                )
+        except Exception as e:
+            self.logger.error(f"初始化{replay_mode}模式失败，使用真实API: {e}")
+    
+    def enable_recording(self, file_path: str) -> None:
+        """
+        开启录制模式：每页原始响应连同list_id和cursor写入压缩JSONL
+        
+        Args:
+            file_path: 录制文件路径
+        """
+        self.page_recorder = PageRecorder(file_path)
+        self.logger.info(f"TweetScout录制模式: {file_path}")
+    
+    def enable_replay(self, file_path: str, latency_ms: float = 0, rate_limit_every: int = 0,
+                      retry_after: float = 1) -> ReplaySession:
+        """
+        开启回放模式：请求由录制数据应答，不消耗API额度；回放时不读写增量水位线
+        
+        Args:
+            file_path: 录制文件路径
+            latency_ms: 每次请求注入的延迟（毫秒）
+            rate_limit_every: 每N次请求注入一次429，0表示不注入
+            retry_after: 注入429时的Retry-After秒数
+            
+        Returns:
+            回放会话
+        """
+        self.replay_session = ReplaySession(file_path, latency_ms, rate_limit_every, retry_after)
+        self.session = self.replay_session
+        self.logger.info(f"TweetScout回放模式: {file_path}, 延迟 {latency_ms}ms, 每 {rate_limit_every} 次请求注入429")
+        return self.replay_session
+    
+    def _current_time(self, list_id: str = None) -> datetime:
+        """
+        当前时间；回放时使用该list首页的录制时间，使时间截止点可复现
+        
+        Args:
+            list_id: 列表ID
+            
+        Returns:
+            当前时间
+        """
+        if self.replay_session:
+            reference_time = self.replay_session.reference_time(list_id)
+            if reference_time:
+                return reference_time
+        return datetime.now()
     
     def _make_request(self, url: str, params: Dict[str, Any] = None) -> Optional[Dict[str, Any]]:
         """
@@ -55,12 +145,8 @@ class TwitterAPIClient:
         
         for attempt in range(self.retry_attempts):
             try:
-                # 请求限制：避免请求过于频繁
-                current_time = time.time()
-                if self.last_request_time > 0:
-                    time_diff = current_time - self.last_request_time
-                    if time_diff < 1:  # 最小间隔1秒
-                        time.sleep(1 - time_diff)
+                # 所有线程共享同一限流器
+                self.rate_limiter.acquire()
                 
                 self.logger.info(f"发起API请求 (尝试 {attempt + 1}/{self.retry_attempts}): {url}")
                 self.logger.debug(f"请求参数: {final_params}")
@@ -71,60 +157,111 @@ class TwitterAPIClient:
                     timeout=self.timeout
                 )
                 
-                self.last_request_time = time.time()
-                self.request_count += 1
+                with self._stats_lock:
+                    self.request_count += 1
                 
                 # 检查响应状态
                 if response.status_code == 200:
                     data = response.json()
                     self.logger.info(f"API请求成功: {url}")
+                    if self.page_recorder:
+                        self.page_recorder.record(final_params, data)
                     return data
                 
                 elif response.status_code == 429:
-                    # 速率限制
-                    self.logger.warning(f"API速率限制 (429)，等待 {self.retry_delay} 秒后重试")
-                    time.sleep(self.retry_delay * (attempt + 1))
+                    # 速率限制：优先使用服务端的Retry-After，并通知其他线程一起退避
+                    with self._stats_lock:
+                        self.rate_limited_count += 1
+                    delay = self._get_backoff_delay(attempt, response.headers.get('Retry-After'))
+                    self.logger.warning(f"API速率限制 (429)，等待 {delay:.1f} 秒后重试")
+                    self.rate_limiter.penalize(delay)
+                    time.sleep(delay)
                     continue
                 
                 elif response.status_code in [500, 502, 503, 504]:
                     # 服务器错误，可重试
-                    self.logger.warning(f"服务器错误 ({response.status_code})，等待 {self.retry_delay} 秒后重试")
-                    time.sleep(self.retry_delay * (attempt + 1))
+                    delay = self._get_backoff_delay(attempt, response.headers.get('Retry-After'))
+                    self.logger.warning(f"服务器错误 ({response.status_code})，等待 {delay:.1f} 秒后重试")
+                    time.sleep(delay)
                     continue
                 
                 else:
                     # 其他错误
                     self.logger.error(f"API请求失败: {response.status_code} - {response.text}")
-                    self.error_count += 1
+                    self._record_error()
                     return None
                 
             except requests.exceptions.Timeout:
                 self.logger.warning(f"请求超时，尝试 {attempt + 1}/{self.retry_attempts}")
                 if attempt < self.retry_attempts - 1:
-                    time.sleep(self.retry_delay * (attempt + 1))
+                    time.sleep(self._get_backoff_delay(attempt))
                     continue
                 else:
                     self.logger.error("请求超时，已达到最大重试次数")
-                    self.error_count += 1
+                    self._record_error()
                     return None
             
             except requests.exceptions.RequestException as e:
                 self.logger.error(f"请求异常: {e}")
                 if attempt < self.retry_attempts - 1:
-                    time.sleep(self.retry_delay * (attempt + 1))
+                    time.sleep(self._get_backoff_delay(attempt))
                     continue
                 else:
                     self.logger.error("网络异常，已达到最大重试次数")
-                    self.error_count += 1
+                    self._record_error()
                     return None
             
             except Exception as e:
                 self.logger.error(f"未知错误: {e}")
-                self.error_count += 1
+                self._record_error()
                 return None
         
         return None
     
+    def _get_backoff_delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """
+        计算重试等待时间：有Retry-After时按服务端要求，否则线性退避，并加随机抖动避免多线程同时重试
+        
+        Args:
+            attempt: 当前尝试次数（从0开始）
+            retry_after: 响应头Retry-After的值（秒数或HTTP日期）
+            
+        Returns:
+            等待秒数
+        """
+        delay = self._parse_retry_after(retry_after)
+        if delay is None:
+            delay = self.retry_delay * (attempt + 1)
+        delay = min(delay, self.max_retry_after)
+        return delay + random.uniform(0, delay * self.retry_jitter)
+    
+    def _parse_retry_after(self, value: Optional[str]) -> Optional[float]:
+        """
+        解析Retry-After响应头
+        
+        Args:
+            value: 秒数或HTTP日期
+            
+        Returns:
+            等待秒数，无法解析时返回None
+        """
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            retry_time = parsedate_to_datetime(value)
+            return max(0.0, (retry_time - datetime.now(retry_time.tzinfo)).total_seconds())
+        except (TypeError, ValueError):
+            return None
+    
+    def _record_error(self) -> None:
+        """累计失败请求数"""
+        with self._stats_lock:
+            self.error_count += 1
+    
     def fetch_tweets(self, list_id: str = None, **kwargs) -> tuple[List[Dict[str, Any]], Optional[str]]:
         """
         获取推文列表（单页），返回推文列表和下一页游标
@@ -182,7 +319,9 @@ class TwitterAPIClient:
     def fetch_tweets_with_pagination(self, list_id: str = None, 
                                    max_pages: int = None, 
                                    page_size: int = None,
-                                   hours_limit: int = 2) -> Generator[List[Dict[str, Any]], None, None]:
+                                   hours_limit: int = 2,
+                                   use_watermark: bool = True,
+                                   stop_strategy: StopStrategy = None) -> Generator[List[Dict[str, Any]], None, None]:
         """
         获取推文列表（支持分页和时间过滤）
         使用 next_cursor 机制进行真正的分页
@@ -192,6 +331,8 @@ class TwitterAPIClient:
             max_pages: 最大页数（默认100页，从配置读取）
             page_size: 每页大小（建议值，实际由API返回决定）
             hours_limit: 时间限制（小时），只拉取过去N小时的推文，默认2小时
+            use_watermark: 是否使用增量水位线，遇到已入库推文即停止（时间截止点仍作为兜底）
+            stop_strategy: 早停策略，默认按 api.pagination.stop_strategy 配置构建
             
         Yields:
             每页的推文数据列表
@@ -210,8 +351,12 @@ class TwitterAPIClient:
         if page_size is None:
             page_size = self.pagination_config.get('page_size', 100)
         
+        # 回放时不读写水位线，保证结果可复现
+        if self.replay_session:
+            use_watermark = False
+        
         # 计算时间截止点（过去8小时）
-        time_cutoff = datetime.now() - timedelta(hours=hours_limit)
+        time_cutoff = self._current_time(list_id or self.default_params.get('list_id')) - timedelta(hours=hours_limit)
         self.logger.info(f"时间过滤: 只拉取 {time_cutoff.strftime('%Y-%m-%d %H:%M:%S')} 之后的推文（使用cursor分页）")
         
         page = 1
@@ -220,17 +365,18 @@ class TwitterAPIClient:
         stopped_by_time = False
         cursor = None  # 使用cursor进行分页
         
-        # 跨页跟踪每个项目/账号的最新推文时间（提升到循环外，避免跨页状态丢失）
-        project_latest_times = {}  # {user_id: latest_tweet_time} - 跨页累积
-        project_ever_had_valid_tweets = {}  # {user_id: bool} - 跨页累积，记录是否曾经有过有效推文
-        
-        # 早期停止检测：连续空页面计数
-        consecutive_empty_pages = 0  # 连续没有有效推文的页面数
-        max_consecutive_empty_pages = 5  # 最多允许5页连续空页面
+        # 跨页累积的项目时间状态和早停策略（每次分页拉取使用独立的策略实例）
+        state = PaginationState(time_cutoff, hours_limit)
+        if stop_strategy is None:
+            stop_strategy = self.build_stop_strategy()
+        stop_strategy.reset()
         
-        # 早期停止检测：总体效率跟踪
-        total_valid_tweets_last_n_pages = 0  # 最近N页的有效推文总数
-        pages_for_efficiency_check = 10  # 检查最近10页的效率
+        # 增量水位线：上次已入库的最新推文，以及本次看到的最新推文
+        watermark = self.watermark_store.get(list_id) if use_watermark else None
+        if watermark:
+            self.logger.info(f"list_id {list_id} 水位线: newest_id={watermark['newest_id']}, newest_time={watermark.get('newest_time')}")
+        newest_id = None
+        newest_time = None
         
         while page <= max_pages:
             self.logger.info(f"获取第 {page} 页数据（最多{max_pages}页保护）" + (f", cursor={cursor[:20]}..." if cursor else ", 首页"))
@@ -252,12 +398,19 @@ class TwitterAPIClient:
             
             # 过滤推文：只保留过去hours_limit小时内的，并跟踪每个项目的时间状态
             valid_tweets = []
-            old_tweet_count = 0  # 记录超时推文数量
+            state.start_page(len(tweets))
             
-            # 本页每个项目是否有有效推文（用于本页判断）
-            project_has_valid_tweets_this_page = {}  # {user_id: bool} 本页是否有有效推文
+            # 本页遇到的已入库推文数量（水位线以下）
+            seen_tweet_count = 0
             
             for tweet in tweets:
+                tweet_id = tweet.get('id_str')
+                if self.watermark_store.is_seen(watermark, tweet_id):
+                    seen_tweet_count += 1
+                elif str(tweet_id or '').isdigit() and (newest_id is None or int(tweet_id) > int(newest_id)):
+                    newest_id = tweet_id
+                    newest_time = None
+                
                 try:
                     # 提取用户信息
                     user_info = tweet.get('user', {})
@@ -267,38 +420,26 @@ class TwitterAPIClient:
                     # 尝试解析 created_at 字段
                     created_at_str = tweet.get('created_at', '')
                     if created_at_str:
-                        # 使用 dateutil 解析各种格式的日期
-                        tweet_time = date_parser.parse(created_at_str)
-                        # 如果是UTC时间，转换为本地时间进行比较
-                        if tweet_time.tzinfo:
-                            # 转换为本地时间
-                            tweet_time = tweet_time.astimezone().replace(tzinfo=None)
-                        # 如果没有时区信息但格式符合UTC标准(+0000结尾)，假设为UTC
-                        elif created_at_str.endswith('+0000') or 'GMT' in created_at_str or 'UTC' in created_at_str:
-                            from datetime import timezone
-                            # 将其视为UTC时间并转换为本地时间
-                            tweet_time = tweet_time.replace(tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+                        # 共享解析器（结果保存在推文字典上，后续映射环节复用），转换为本地时间进行比较
+                        tweet_time = get_tweet_local_time(tweet)
+                        if tweet_time is None:
+                            raise ValueError(f"无法解析时间: {created_at_str}")
                         
-                        # 更新该项目的最新推文时间（跨页累积）
-                        if user_id not in project_latest_times or tweet_time > project_latest_times[user_id]:
-                            project_latest_times[user_id] = tweet_time
+                        if tweet_id == newest_id:
+                            newest_time = tweet_time
                         
-                        # 检查是否在时间范围内
-                        if tweet_time >= time_cutoff:
+                        # 检查是否在时间范围内（同时更新项目的最新推文时间）
+                        if state.observe(user_id, tweet_time):
                             valid_tweets.append(tweet)
-                            project_has_valid_tweets_this_page[user_id] = True
-                            project_ever_had_valid_tweets[user_id] = True  # 标记该项目曾经有过有效推文
                             self.logger.debug(f"保留推文: {user_name} ({user_id}) {tweet_time}")
                         else:
                             # 推文太旧，记录但继续处理其他推文
-                            old_tweet_count += 1
                             filtered_tweets += 1
                             self.logger.debug(f"跳过超时推文: {user_name} ({user_id}) {tweet_time} < {time_cutoff}")
                     else:
                         # 如果没有 created_at 字段，保留该推文
                         valid_tweets.append(tweet)
-                        project_has_valid_tweets_this_page[user_id] = True
-                        project_ever_had_valid_tweets[user_id] = True  # 标记该项目曾经有过有效推文
+                        state.mark_valid(user_id)
                         self.logger.warning(f"推文缺少 created_at 字段，已保留: {tweet.get('id_str', 'unknown')}")
                         
                 except Exception as e:
@@ -306,57 +447,28 @@ class TwitterAPIClient:
                     self.logger.warning(f"解析推文时间失败，已保留: {e}")
                     valid_tweets.append(tweet)
             
-            # 智能停止判断：检查是否所有项目都已经超时（使用跨页累积的状态）
-            should_stop_by_projects = self._should_stop_by_project_times(
-                project_latest_times, 
-                project_has_valid_tweets_this_page,  # 本页是否有有效推文
-                project_ever_had_valid_tweets,  # 跨页累积：是否曾经有过有效推文
-                time_cutoff, 
-                hours_limit
-            )
-            
-            # 如果基于项目时间分析应该停止，则设置停止标志
-            if should_stop_by_projects:
-                stopped_by_time = True
-            
+            state.finish_page(len(valid_tweets))
             total_tweets += len(valid_tweets)
             self.logger.info(f"第 {page} 页获取到 {len(tweets)} 条推文，过滤后 {len(valid_tweets)} 条，累计 {total_tweets} 条有效推文")
             
-            # 早期停止检测1: 连续空页面检测
-            if len(valid_tweets) == 0:
-                consecutive_empty_pages += 1
-                self.logger.debug(f"连续空页面计数: {consecutive_empty_pages}/{max_consecutive_empty_pages}")
-                if consecutive_empty_pages >= max_consecutive_empty_pages:
-                    self.logger.info(f"连续 {consecutive_empty_pages} 页无有效推文，停止拉取以节省资源")
-                    stopped_by_time = True
-            else:
-                consecutive_empty_pages = 0  # 重置连续空页面计数
-            
-            # 早期停止检测2: 效率检测（在一定页数后开始检测）
-            if page >= pages_for_efficiency_check:
-                # 计算最近N页的有效推文密度
-                total_valid_tweets_last_n_pages += len(valid_tweets)
-                if page > pages_for_efficiency_check:
-                    # 滑动窗口：减去N页前的数据（这里简化处理）
-                    avg_valid_per_page = total_valid_tweets_last_n_pages / pages_for_efficiency_check
-                    if avg_valid_per_page < 1.0:  # 平均每页不到1条有效推文
-                        self.logger.info(f"最近 {pages_for_efficiency_check} 页平均有效推文密度过低 ({avg_valid_per_page:.2f}/页)，停止拉取")
-                        stopped_by_time = True
-                    # 重置计数器（简化的滑动窗口）
-                    total_valid_tweets_last_n_pages = len(valid_tweets)
-            else:
-                total_valid_tweets_last_n_pages += len(valid_tweets)
+            # 早停策略：项目时间、连续空页面、效率窗口、大页数保护
+            stop_reason = stop_strategy.should_stop(state)
+            if stop_reason:
+                self.logger.info(f"{stop_reason}，停止拉取")
+                stopped_by_time = True
             
-            # 早期停止检测3: 大页数保护（40页以上时更严格）
-            if page >= 40:
-                active_projects_count = len([uid for uid, has_valid in project_has_valid_tweets_this_page.items() if has_valid])
-                if active_projects_count == 0:
-                    self.logger.info(f"已拉取 {page} 页，本页无任何活跃项目，停止拉取")
-                    stopped_by_time = True
+            # 暂存水位线，待数据入库成功后由调用方提交
+            if use_watermark and newest_id:
+                self.watermark_store.stage(list_id, newest_id, newest_time)
             
             if valid_tweets:
                 yield valid_tweets
             
+            # 增量停止：本页已出现上次入库过的推文，更早的数据都已入库
+            if seen_tweet_count > 0:
+                self.logger.info(f"第 {page} 页遇到 {seen_tweet_count} 条已入库推文（水位线 {watermark['newest_id']}），停止拉取")
+                break
+            
             # 如果因为时间过滤停止，直接退出
             if stopped_by_time:
                 self.logger.info(f"已到达时间边界（{hours_limit}小时前），停止拉取")
@@ -371,8 +483,9 @@ class TwitterAPIClient:
             cursor = next_cursor
             page += 1
             
-            # 页面间延迟
-            time.sleep(1)
+            # 令牌桶负责请求节奏，未启用限流时保留原来的页面间延迟（回放不访问API，不需要延迟）
+            if not self.rate_limiter.enabled and not self.replay_session:
+                time.sleep(1)
         
         if page > max_pages:
             # 计算理论最大数据量
@@ -398,7 +511,8 @@ class TwitterAPIClient:
     def fetch_all_tweets(self, list_id: str = None, 
                         max_pages: int = None, 
                         page_size: int = None,
-                        hours_limit: int = 2) -> List[Dict[str, Any]]:
+                        hours_limit: int = 2,
+                        use_watermark: bool = True) -> List[Dict[str, Any]]:
         """
         获取所有推文（自动处理分页，最多15页，只拉取过去2小时）
         
@@ -407,6 +521,7 @@ class TwitterAPIClient:
             max_pages: 最大页数（从配置读取，默认100页）
             page_size: 每页大小
             hours_limit: 时间限制（小时），默认12小时
+            use_watermark: 是否使用增量水位线
             
         Returns:
             所有推文数据列表
@@ -418,7 +533,8 @@ class TwitterAPIClient:
                 list_id=list_id, 
                 max_pages=max_pages, 
                 page_size=page_size,
-                hours_limit=hours_limit
+                hours_limit=hours_limit,
+                use_watermark=use_watermark
             ):
                 all_tweets.extend(page_tweets)
                 
@@ -430,6 +546,27 @@ class TwitterAPIClient:
         
         return all_tweets
     
+    def commit_watermarks(self, list_ids: List[str] = None) -> int:
+        """
+        数据入库成功后提交本次拉取暂存的水位线
+        
+        Args:
+            list_ids: 列表ID，默认提交全部
+            
+        Returns:
+            更新的list数量
+        """
+        return self.watermark_store.commit(list_ids)
+    
+    def discard_watermarks(self, list_ids: List[str] = None) -> None:
+        """
+        数据入库失败时丢弃暂存的水位线，下次重新拉取
+        
+        Args:
+            list_ids: 列表ID，默认丢弃全部
+        """
+        self.watermark_store.discard(list_ids)
+    
     def get_request_stats(self) -> Dict[str, int]:
         """
         获取请求统计信息
@@ -437,122 +574,34 @@ class TwitterAPIClient:
         Returns:
             统计信息字典
         """
-        return {
-            'total_requests': self.request_count,
-            'error_count': self.error_count,
-            'success_rate': (self.request_count - self.error_count) / max(self.request_count, 1) * 100
-        }
+        with self._stats_lock:
+            return {
+                'total_requests': self.request_count,
+                'error_count': self.error_count,
+                'rate_limited_count': self.rate_limited_count,
+                'success_rate': (self.request_count - self.error_count) / max(self.request_count, 1) * 100
+            }
     
     def reset_stats(self):
         """重置统计信息"""
-        self.request_count = 0
-        self.error_count = 0
+        with self._stats_lock:
+            self.request_count = 0
+            self.error_count = 0
+            self.rate_limited_count = 0
     
     def close(self):
         """关闭会话"""
         if self.session:
             self.session.close()
     
-    def _should_stop_by_project_times(self, 
-                                     project_latest_times: Dict[str, datetime], 
-                                     project_has_valid_tweets: Dict[str, bool],
-                                     project_ever_had_valid_tweets: Dict[str, bool],
-                                     time_cutoff: datetime, 
-                                     hours_limit: int) -> bool:
+    def build_stop_strategy(self) -> StopStrategy:
         """
-        基于项目级别的时间分析判断是否应该停止拉取
+        按配置构建分页早停策略（每次分页拉取使用新的实例）
         
-        Args:
-            project_latest_times: 每个项目的最新推文时间 {user_id: latest_time}（跨页累积）
-            project_has_valid_tweets: 每个项目本页是否有有效推文 {user_id: bool}
-            project_ever_had_valid_tweets: 每个项目是否曾经有过有效推文 {user_id: bool}（跨页累积）
-            time_cutoff: 时间截止点
-            hours_limit: 时间限制（小时）
-            
         Returns:
-            是否应该停止拉取
+            早停策略
         """
-        try:
-            if not project_latest_times:
-                self.logger.debug("没有项目时间数据，不基于项目时间停止")
-                return False
-            
-            # 计算有多少个项目的最新推文已经超时
-            total_projects = len(project_latest_times)
-            overdue_projects = 0
-            active_projects_with_valid_tweets = 0  # 本页有有效推文的活跃项目数
-            projects_ever_had_valid = 0  # 曾经有过有效推文的项目数（跨页累积）
-            
-            project_analysis = []
-            
-            for user_id, latest_time in project_latest_times.items():
-                is_overdue = latest_time < time_cutoff
-                has_valid_tweets_this_page = project_has_valid_tweets.get(user_id, False)
-                ever_had_valid = project_ever_had_valid_tweets.get(user_id, False)
-                
-                if is_overdue:
-                    overdue_projects += 1
-                    
-                if has_valid_tweets_this_page:
-                    active_projects_with_valid_tweets += 1
-                
-                if ever_had_valid:
-                    projects_ever_had_valid += 1
-                
-                project_analysis.append({
-                    'user_id': user_id,
-                    'latest_time': latest_time,
-                    'is_overdue': is_overdue,
-                    'has_valid_tweets': has_valid_tweets_this_page,
-                    'time_diff_hours': (datetime.now() - latest_time).total_seconds() / 3600
-                })
-            
-            # 记录详细的项目分析
-            self.logger.debug(f"项目时间分析: 总项目数={total_projects}, 超时项目数={overdue_projects}, "
-                            f"本页有效推文项目数={active_projects_with_valid_tweets}, "
-                            f"曾经有有效推文项目数={projects_ever_had_valid}")
-            for analysis in project_analysis[:5]:  # 只显示前5个项目的详情
-                self.logger.debug(f"  项目 {analysis['user_id']}: 最新推文={analysis['latest_time']}, "
-                                f"超时={analysis['is_overdue']}, 有效推文={analysis['has_valid_tweets']}, "
-                                f"时间差={analysis['time_diff_hours']:.1f}小时")
-            
-            # 停止条件1: 如果所有项目的最新推文都已经超时，则停止
-            if overdue_projects == total_projects:
-                self.logger.info(f"所有 {total_projects} 个项目的最新推文都已超过 {hours_limit} 小时限制，停止拉取")
-                return True
-            
-            # 停止条件2: 如果本页没有任何项目产生有效推文，且大部分项目都已超时（降低阈值）
-            # 改进：更积极的停止条件，避免资源浪费
-            if active_projects_with_valid_tweets == 0 and overdue_projects >= total_projects * 0.6:  # 从0.7降低到0.6
-                self.logger.info(f"本页无任何项目产生有效推文，且 {overdue_projects}/{total_projects} ({overdue_projects/total_projects:.1%}) 项目已超时，停止拉取")
-                return True
-            
-            # 停止条件3: 如果超时项目比例很高（>=80%），且活跃项目很少（更积极）
-            overdue_ratio = overdue_projects / total_projects
-            if overdue_ratio >= 0.8 and active_projects_with_valid_tweets <= 2:  # 从0.9降低到0.8，活跃项目从1增加到2
-                self.logger.info(f"超时项目比例过高 ({overdue_ratio:.1%})，且活跃项目数量过少 ({active_projects_with_valid_tweets})，停止拉取")
-                return True
-            
-            # 停止条件4: 新增连续无效页面保护（基于项目维度）
-            # 如果所有曾经有有效推文的项目都已经超时很久，也停止
-            if projects_ever_had_valid > 0:
-                very_overdue_projects = sum(
-                    1 for user_id, latest_time in project_latest_times.items()
-                    if latest_time < time_cutoff - timedelta(hours=hours_limit * 2)  # 超时时间的2倍
-                    and project_ever_had_valid_tweets.get(user_id, False)
-                )
-                if very_overdue_projects >= projects_ever_had_valid * 0.8:  # 80%的有效项目都超时很久
-                    self.logger.info(f"大部分有效项目 ({very_overdue_projects}/{projects_ever_had_valid}) 都已超时很久，停止拉取")
-                    return True
-            
-            self.logger.debug(f"继续拉取: 超时比例={overdue_ratio:.1%}, 活跃项目数={active_projects_with_valid_tweets}, "
-                            f"曾经有有效推文项目数={projects_ever_had_valid}")
-            return False
-            
-        except Exception as e:
-            self.logger.error(f"项目时间分析失败: {e}")
-            # 发生异常时，保守地继续拉取
-            return False
+        return build_stop_strategy(self.pagination_config.get('stop_strategy', {}))
 
 
 # 全局API客户端实例
@@ -2,19 +2,26 @@
 Twitter数据爬虫核心模块
 """
 import logging
-from typing import List, Dict, Any, Optional
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Iterator, Set
 from datetime import datetime
 
 from .api.twitter_api import twitter_api
 from .database.tweet_dao import tweet_dao
 from .database.user_dao import user_dao
 from .database.quotation_dao import quotation_dao
+from .database.stream_load import stream_loader
+from .database.write_buffer import write_buffer
+from .database.entity_cache import get_entity_cache_stats
 from .utils.data_mapper import data_mapper
 from .utils.config_manager import config
 from .utils.logger import get_logger
 from .utils.tweet_enricher import tweet_enricher
 from .utils.simple_tweet_enricher import simple_tweet_enricher
 from .utils.quotation_extractor import quotation_extractor
+from .utils.seen_tweets import SeenTweetRegistry, recent_tweet_filter
 # from .utils.user_language_integration import UserLanguageIntegration  # 语言检测已禁用
 from .models.tweet import Tweet
 from .models.user import TwitterUser
@@ -33,6 +40,7 @@ class TwitterCrawler:
         self.tweet_dao = tweet_dao
         self.user_dao = user_dao
         self.quotation_dao = quotation_dao
+        self.stream_loader = stream_loader
         self.data_mapper = data_mapper
         # self.topic_engine = topic_engine  # 话题分析已移除
         # self.kol_engine = kol_engine  # KOL分析已禁用
@@ -53,10 +61,30 @@ class TwitterCrawler:
         self.error_count = 0
         self.last_crawl_time = None
         
+        # 当前爬取标识（用于Stream Load幂等label）
+        self.current_crawl_id = None
+        
+        # 流式爬取：逐页映射、增强并入库，同时预取后续页面
+        self.streaming_enabled = config.get('crawler.streaming.enabled', True)
+        self.stream_prefetch_pages = max(1, config.get('crawler.streaming.prefetch_pages', 2))
+        
+        # 跨list推文去重：最近爬取已处理的推文（可选）和最近一次爬取的list重叠统计
+        self.recent_tweet_filter = recent_tweet_filter
+        self.last_overlap_report = None
+        
+        # 写后缓冲：活动状态等补充字段合并后批量写入，每次爬取结束时写入剩余数据
+        self.write_buffer = write_buffer
+        self.tweet_table = self.tweet_dao.db_manager.db_config.get('tables', {}).get('tweet', 'twitter_tweet')
+        self.activity_channel = f"{self.tweet_table}:activity"
+        self.write_buffer.register(
+            self.activity_channel,
+            lambda rows: self.tweet_dao.db_manager.execute_case_update(self.tweet_table, 'id_str', rows)
+        )
+        
         self.logger.info("Twitter爬虫初始化完成")
     
     def crawl_tweets(self, list_id: str = None, list_ids: List[str] = None, max_pages: int = None, 
-                    page_size: int = None, hours_limit: int = 2) -> bool:
+                    page_size: int = None, hours_limit: int = 2, hours_limits: Dict[str, float] = None) -> bool:
         """
         爬取推文数据
         
@@ -66,21 +94,30 @@ class TwitterCrawler:
             max_pages: 最大页数（从配置读取，默认100页）
             page_size: 每页大小
             hours_limit: 时间限制（小时），只拉取过去N小时的推文，默认2小时（生产环境使用UTC时间）
+            hours_limits: 按list指定的时间限制（小时），未指定的list使用hours_limit
             
         Returns:
             是否成功
         """
+        if self.streaming_enabled:
+            return self.crawl_tweets_streaming(list_id, list_ids, max_pages, page_size, hours_limit, hours_limits)
+        
         self.crawl_count += 1
         self.last_crawl_time = datetime.now()
+        self.current_crawl_id = self.last_crawl_time.strftime('%Y%m%d%H%M%S')
         
         try:
             self.logger.info(f"开始爬取推文数据 (第 {self.crawl_count} 次，时间限制: {hours_limit}小时)")
             
             # 1. 从API获取数据（支持多个list并行处理，最多15页，只拉取过去8小时）
-            api_data_list = self._fetch_api_data(list_id, list_ids, max_pages, page_size, hours_limit)
+            seen_registry = SeenTweetRegistry(self.recent_tweet_filter)
+            api_data_list = self._fetch_api_data(list_id, list_ids, max_pages, page_size, hours_limit, seen_registry,
+                                                 hours_limits)
+            self.last_overlap_report = seen_registry.log_overlap_report(self.logger)
             
             if not api_data_list:
                 self.logger.warning("未获取到任何API数据")
+                self.api_client.discard_watermarks()
                 self.error_count += 1
                 return False
             
@@ -91,11 +128,15 @@ class TwitterCrawler:
             
             if not tweets:
                 self.logger.warning("数据映射后没有有效的推文数据")
+                self.api_client.discard_watermarks()
                 self.error_count += 1
                 return False
             
             self.logger.info(f"成功映射 {len(tweets)} 条推文数据")
             
+            # 2.0 已入库推文只刷新互动数据，完整增强只处理新推文
+            tweets, refreshed_count = self._refresh_known_tweets(tweets, seen_registry)
+            
             # 2.1 提取用户数据
             users = self._extract_users_from_api_data(api_data_list)
             self.logger.info(f"成功提取 {len(users)} 条用户数据")
@@ -117,12 +158,17 @@ class TwitterCrawler:
             self.logger.info("开始提取引用关系数据...")
             quotations = self.quotation_extractor.extract_quotations_from_api_data(api_data_list)
             valid_quotations = self.quotation_extractor.filter_valid_quotations(quotations)
+            # 已入库推文的引用关系在首次入库时已保存
+            new_tweet_ids = {tweet.id_str for tweet in tweets}
+            valid_quotations = [q for q in valid_quotations if q.get('twitter_id') in new_tweet_ids]
             self.logger.info(f"引用关系数据提取完成，获得 {len(valid_quotations)} 条有效引用关系")
             
             # 2.4 增强推文数据（添加 kol_id 和 entity_id）
-            self.logger.info("开始增强推文数据...")
-            enriched_tweets = self.tweet_enricher.enrich_tweets(tweets, user_data_map)
-            self.logger.info(f"推文增强完成，处理了 {len(enriched_tweets)} 条推文")
+            enriched_tweets = []
+            if tweets:
+                self.logger.info("开始增强推文数据...")
+                enriched_tweets = self.tweet_enricher.enrich_tweets(tweets, user_data_map)
+                self.logger.info(f"推文增强完成，处理了 {len(enriched_tweets)} 条推文")
             
             # 3. 存储到数据库
             # 先保存用户数据（因为推文可能引用用户）
@@ -131,7 +177,7 @@ class TwitterCrawler:
                 self.logger.info(f"成功保存 {user_saved_count} 条用户数据")
             
             # 然后保存增强后的推文数据
-            tweet_saved_count = self._save_tweets_to_database(enriched_tweets)
+            tweet_saved_count = self._save_tweets_to_database(enriched_tweets) if enriched_tweets else 0
             
             # 保存引用关系数据
             quotation_saved_count = 0
@@ -140,8 +186,12 @@ class TwitterCrawler:
                 self.logger.info(f"成功保存 {quotation_saved_count} 条引用关系数据")
             
             # 4. 数据保存完成
-            if tweet_saved_count > 0:
-                self.logger.info(f"成功保存 {tweet_saved_count} 条推文到数据库")
+            if tweet_saved_count > 0 or refreshed_count > 0:
+                self.logger.info(f"成功保存 {tweet_saved_count} 条新推文，刷新 {refreshed_count} 条已入库推文的互动数据")
+                
+                # 数据已入库，按各list的结果提交增量水位线
+                self._commit_watermarks(self._resolve_list_ids(list_id, list_ids), seen_registry)
+                seen_registry.commit()
                 
                 # 话题分析已移除 - 在其他独立脚本中处理
                 # try:
@@ -195,20 +245,362 @@ class TwitterCrawler:
                 except Exception as e:
                     self.logger.error(f"活动检测异常: {e}")
 
+                self._flush_write_buffer()
                 self.success_count += 1
                 return True
             else:
                 self.logger.error("保存推文到数据库失败")
+                self.api_client.discard_watermarks()
                 self.error_count += 1
                 return False
                 
         except Exception as e:
             self.logger.error(f"爬取推文数据异常: {e}")
+            self.api_client.discard_watermarks()
+            self.error_count += 1
+            return False
+    
+    def crawl_tweets_streaming(self, list_id: str = None, list_ids: List[str] = None, max_pages: int = None,
+                               page_size: int = None, hours_limit: int = 2,
+                               hours_limits: Dict[str, float] = None) -> bool:
+        """
+        流式爬取推文数据：每页依次完成映射、去重、增强和入库，后台线程同时预取后续页面，
+        内存中只保留少量页面，首批推文在第一页返回后即可入库
+        
+        Args:
+            list_id: 单个列表ID（向后兼容）
+            list_ids: 多个列表ID列表，优先级高于list_id
+            max_pages: 最大页数
+            page_size: 每页大小
+            hours_limit: 时间限制（小时）
+            hours_limits: 按list指定的时间限制（小时），未指定的list使用hours_limit
+            
+        Returns:
+            是否成功
+        """
+        self.crawl_count += 1
+        self.last_crawl_time = datetime.now()
+        self.current_crawl_id = self.last_crawl_time.strftime('%Y%m%d%H%M%S')
+        
+        totals = {'pages': 0, 'raw': 0, 'tweets': 0, 'saved': 0, 'refreshed': 0, 'users': 0, 'quotations': 0}
+        seen_registry = SeenTweetRegistry(self.recent_tweet_filter)
+        seen_user_ids: Set[str] = set()
+        # 启用Stream Load时跨页累积待入库数据，每张表每次爬取只提交一个导入任务（累积超过 max_batch_rows 时提前导入）
+        deferred = {'users': [], 'tweets': [], 'quotations': []} if self.stream_loader.enabled else None
+        
+        try:
+            target_list_ids = self._resolve_list_ids(list_id, list_ids)
+            self.logger.info(f"开始流式爬取推文数据 (第 {self.crawl_count} 次，{len(target_list_ids)} 个list，时间限制: {hours_limit}小时)")
+            
+            for api_page in self._iter_api_pages(target_list_ids, max_pages, page_size, hours_limit, seen_registry,
+                                                 hours_limits):
+                totals['pages'] += 1
+                totals['raw'] += len(api_page)
+                self._process_api_page(api_page, seen_user_ids, totals, deferred, seen_registry)
+                if deferred is not None and len(deferred['tweets']) >= self.stream_loader.max_batch_rows:
+                    self._save_deferred_rows(deferred, totals, seen_registry)
+            
+            if deferred is not None:
+                self._save_deferred_rows(deferred, totals, seen_registry)
+            
+            self.logger.info(f"流式爬取完成: {totals}, API请求统计: {self.api_client.get_request_stats()}")
+            self.last_overlap_report = seen_registry.log_overlap_report(self.logger)
+            
+            if totals['raw'] == 0:
+                self.logger.warning("未获取到任何API数据")
+                self.api_client.discard_watermarks()
+                self.error_count += 1
+                return False
+            
+            if totals['saved'] == 0 and totals['refreshed'] == 0:
+                self.logger.error("保存推文到数据库失败")
+                self.api_client.discard_watermarks()
+                self.error_count += 1
+                return False
+            
+            # 数据已入库，按各list的结果提交增量水位线
+            self._commit_watermarks(target_list_ids, seen_registry)
+            seen_registry.commit()
+            
+            # 进行项目分析
+            try:
+                self.logger.info("开始进行项目分析...")
+                if self.project_engine.analyze_recent_tweets(hours=1, max_tweets=50):
+                    self.logger.info("项目分析完成")
+                else:
+                    self.logger.warning("项目分析失败，但不影响主流程")
+            except Exception as e:
+                self.logger.error(f"项目分析异常: {e}")
+            
+            self._flush_write_buffer()
+            self.success_count += 1
+            return True
+            
+        except Exception as e:
+            self.logger.error(f"流式爬取推文数据异常: {e}")
+            self.api_client.discard_watermarks()
             self.error_count += 1
             return False
     
+    def crawl_lists(self, list_ids: List[str], hours_limits: Dict[str, float], max_pages: int = None,
+                    page_size: int = None) -> Optional[Dict[str, Dict[str, Any]]]:
+        """
+        按list各自的时间窗口爬取，返回各list拉取到的推文数及其覆盖时长（供自适应调度估计推文速率）
+
+        Args:
+            list_ids: 列表ID列表
+            hours_limits: 各list的时间限制（小时）
+            max_pages: 最大页数
+            page_size: 每页大小
+
+        Returns:
+            {list_id: {'tweets': 推文数, 'hours': 最早一条推文距今的小时数，没有推文时间时为None}}，
+            爬取失败（包括API在返回任何数据前失败）时返回None
+        """
+        self.last_overlap_report = None
+        success = self.crawl_tweets(list_ids=list_ids, max_pages=max_pages, page_size=page_size,
+                                    hours_limit=max(hours_limits.values(), default=2), hours_limits=hours_limits)
+        if not success:
+            return None
+        report = self.last_overlap_report or {'lists': {}, 'total_raw': 0}
+        now = datetime.now()
+        observations = {}
+        for list_id in list_ids:
+            stats = report['lists'].get(str(list_id), {})
+            oldest_time = stats.get('oldest_time')
+            observations[list_id] = {
+                'tweets': stats.get('raw', 0),
+                'hours': (now - oldest_time).total_seconds() / 3600 if oldest_time else None
+            }
+        return observations
+
+    def _iter_api_pages(self, list_ids: List[str], max_pages: int = None, page_size: int = None,
+                        hours_limit: int = 2, seen_registry: SeenTweetRegistry = None,
+                        hours_limits: Dict[str, float] = None) -> Iterator[List[Dict[str, Any]]]:
+        """
+        后台线程按list分页拉取，通过有界队列逐页交给调用方（队列满时拉取线程等待）；
+        拉取线程共享已见推文集合，重复推文在入队前丢弃
+        
+        Args:
+            list_ids: 列表ID列表
+            max_pages: 最大页数
+            page_size: 每页大小
+            hours_limit: 时间限制（小时）
+            seen_registry: 已见推文集合，默认只在本次调用内去重
+            hours_limits: 按list指定的时间限制（小时），未指定的list使用hours_limit
+            
+        Yields:
+            单页API数据（不含重复推文）
+        """
+        if seen_registry is None:
+            seen_registry = SeenTweetRegistry()
+        hours_limits = hours_limits or {}
+        
+        page_queue: queue.Queue = queue.Queue(maxsize=self.stream_prefetch_pages)
+        stop_event = threading.Event()
+        finished = object()
+        
+        def put(item) -> bool:
+            # 调用方提前结束时不再阻塞
+            while not stop_event.is_set():
+                try:
+                    page_queue.put(item, timeout=0.5)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        
+        def produce(single_list_id: str) -> None:
+            try:
+                for page in self.api_client.fetch_tweets_with_pagination(
+                    list_id=single_list_id,
+                    max_pages=max_pages,
+                    page_size=page_size,
+                    hours_limit=hours_limits.get(single_list_id, hours_limit)
+                ):
+                    page = seen_registry.filter_page(single_list_id, page)
+                    if page and not put(page):
+                        break
+            except Exception as e:
+                self.logger.error(f"获取 list_id {single_list_id} 数据失败: {e}")
+                seen_registry.mark_list_failed(single_list_id)
+            finally:
+                put(finished)
+        
+        max_workers = max(1, min(len(list_ids), self.api_client.max_concurrency))
+        executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='crawl-page')
+        try:
+            for single_list_id in list_ids:
+                executor.submit(produce, single_list_id)
+            
+            remaining = len(list_ids)
+            while remaining > 0:
+                item = page_queue.get()
+                if item is finished:
+                    remaining -= 1
+                    continue
+                yield item
+        finally:
+            stop_event.set()
+            executor.shutdown(wait=True)
+    
+    def _process_api_page(self, api_page: List[Dict[str, Any]], seen_user_ids: Set[str],
+                          totals: Dict[str, int], deferred: Optional[Dict[str, list]] = None,
+                          seen_registry: SeenTweetRegistry = None) -> None:
+        """
+        处理单页API数据：映射、刷新已入库推文、增强并入库（跨页、跨list的重复推文已在拉取时丢弃）
+        
+        Args:
+            api_page: 单页API数据
+            seen_user_ids: 本次爬取已保存的用户ID
+            totals: 累计统计，原地更新
+            deferred: 跨页累积的待入库数据（用户、推文、引用关系），提供时本页数据不立即入库
+            seen_registry: 本次爬取的已见推文集合（标记了最近爬取已处理的推文）
+        """
+        tweets = self._map_data_to_tweets(api_page)
+        if not tweets:
+            return
+        totals['tweets'] += len(tweets)
+        
+        # 已入库推文只刷新互动数据
+        tweets, refreshed_count = self._refresh_known_tweets(tweets, seen_registry)
+        totals['refreshed'] += refreshed_count
+        
+        # 用户数据（同一用户本次爬取只保存一次）
+        users = [user for user in self._extract_users_from_api_data(api_page) if user.id_str not in seen_user_ids]
+        if users:
+            seen_user_ids.update(user.id_str for user in users)
+            if deferred is not None:
+                deferred['users'].extend(users)
+            else:
+                totals['users'] += self._save_users_to_database(users)
+        
+        if not tweets:
+            return
+        
+        new_tweet_ids = {tweet.id_str for tweet in tweets}
+        user_data_map = {
+            api_data.get('id_str'): api_data.get('user')
+            for api_data in api_page
+            if api_data.get('id_str') in new_tweet_ids and isinstance(api_data.get('user'), dict)
+        }
+        
+        quotations = self.quotation_extractor.extract_quotations_from_api_data(api_page)
+        valid_quotations = [
+            q for q in self.quotation_extractor.filter_valid_quotations(quotations)
+            if q.get('twitter_id') in new_tweet_ids
+        ]
+        
+        enriched_tweets = self.tweet_enricher.enrich_tweets(tweets, user_data_map)
+        if deferred is not None:
+            deferred['tweets'].extend(enriched_tweets)
+            deferred['quotations'].extend(valid_quotations)
+            self.logger.info(f"第 {totals['pages']} 页处理完成: 新推文 {len(tweets)} 条，"
+                             f"累积待导入 {len(deferred['tweets'])} 条，刷新 {refreshed_count} 条")
+            return
+        
+        saved_count = self._save_tweets_to_database(enriched_tweets) if enriched_tweets else 0
+        totals['saved'] += saved_count
+        self._mark_unsaved_tweets(enriched_tweets, saved_count, seen_registry)
+        
+        if valid_quotations:
+            totals['quotations'] += self._save_quotations_to_database(valid_quotations)
+        
+        self.logger.info(f"第 {totals['pages']} 页处理完成: 新推文 {len(tweets)} 条，入库 {saved_count} 条，刷新 {refreshed_count} 条")
+        
+        # 活动检测需要推文已入库
+        if saved_count > 0:
+            try:
+                self._detect_and_structure_activities(enriched_tweets)
+            except Exception as e:
+                self.logger.error(f"活动检测异常: {e}")
+    
+    def _save_deferred_rows(self, deferred: Dict[str, list], totals: Dict[str, int],
+                            seen_registry: SeenTweetRegistry = None) -> None:
+        """
+        导入跨页累积的数据（每张表一个Stream Load任务），随后对入库的推文进行活动检测
+        
+        Args:
+            deferred: 跨页累积的待入库数据，导入后清空
+            totals: 累计统计，原地更新
+            seen_registry: 本次爬取的已见推文集合，用于标记入库失败的list
+        """
+        users, tweets, quotations = deferred['users'], deferred['tweets'], deferred['quotations']
+        deferred.update(users=[], tweets=[], quotations=[])
+        
+        # 先保存用户数据（因为推文可能引用用户）
+        if users:
+            totals['users'] += self._save_users_to_database(users)
+        saved_count = self._save_tweets_to_database(tweets) if tweets else 0
+        totals['saved'] += saved_count
+        self._mark_unsaved_tweets(tweets, saved_count, seen_registry)
+        if quotations:
+            totals['quotations'] += self._save_quotations_to_database(quotations)
+        
+        self.logger.info(f"累积数据导入完成: 用户 {len(users)} 条，推文 {saved_count}/{len(tweets)} 条，引用关系 {len(quotations)} 条")
+        
+        # 活动检测需要推文已入库
+        if saved_count > 0:
+            try:
+                self._detect_and_structure_activities(tweets)
+            except Exception as e:
+                self.logger.error(f"活动检测异常: {e}")
+    
+    def _mark_unsaved_tweets(self, tweets: List[Tweet], saved_count: int,
+                             seen_registry: SeenTweetRegistry = None) -> None:
+        """
+        整批推文都没有入库时，把这些推文所属的list标记为失败（部分入库的批次已逐行回退，剩下的是无法写入的数据）
+        
+        Args:
+            tweets: 本批待入库的推文
+            saved_count: 成功入库的数量
+            seen_registry: 本次爬取的已见推文集合
+        """
+        if seen_registry is None or saved_count > 0:
+            return
+        unsaved_ids = [tweet.id_str for tweet in tweets if tweet.is_valid != 0]
+        if unsaved_ids:
+            seen_registry.mark_tweets_failed(unsaved_ids)
+    
+    def _commit_watermarks(self, list_ids: List[str], seen_registry: SeenTweetRegistry) -> None:
+        """
+        按各list自己的结果提交水位线：拉取失败或推文入库失败的list丢弃水位线，下次重新拉取
+        
+        Args:
+            list_ids: 本次爬取的列表ID
+            seen_registry: 本次爬取的已见推文集合
+        """
+        failed = seen_registry.failed_lists()
+        failed_list_ids = [list_id for list_id in list_ids if str(list_id) in failed]
+        if failed_list_ids:
+            self.logger.warning(f"list {failed_list_ids} 拉取或入库失败，不提交其水位线")
+            self.api_client.discard_watermarks(failed_list_ids)
+        self.api_client.commit_watermarks([list_id for list_id in list_ids if str(list_id) not in failed])
+    
+    def _resolve_list_ids(self, list_id: str = None, list_ids: List[str] = None) -> List[str]:
+        """
+        确定要爬取的list_ids
+        
+        Args:
+            list_id: 单个列表ID（向后兼容）
+            list_ids: 多个列表ID列表，优先级高于list_id
+            
+        Returns:
+            列表ID列表
+        """
+        if list_ids is not None:
+            # 优先使用传入的list_ids
+            return list_ids
+        if list_id is not None:
+            # 向后兼容：如果只传入了单个list_id，转换为列表
+            return [list_id]
+        # 使用配置文件中的默认值
+        return config.get('api.default_params.list_ids', [config.get('api.default_params.list_id')])
+    
     def _fetch_api_data(self, list_id: str = None, list_ids: List[str] = None, max_pages: int = None, 
-                       page_size: int = None, hours_limit: int = 2) -> List[Dict[str, Any]]:
+                       page_size: int = None, hours_limit: int = 2,
+                       seen_registry: SeenTweetRegistry = None,
+                       hours_limits: Dict[str, float] = None) -> List[Dict[str, Any]]:
         """
         从API获取数据（支持并行获取多个list）
         
@@ -218,21 +610,19 @@ class TwitterCrawler:
             max_pages: 最大页数（从配置读取，默认100页）
             page_size: 每页大小
             hours_limit: 时间限制（小时），只拉取过去N小时的推文
+            seen_registry: 已见推文集合，重复推文在各list返回时丢弃，默认只在本次调用内去重
+            hours_limits: 按list指定的时间限制（小时），未指定的list使用hours_limit
             
         Returns:
-            API数据列表
+            API数据列表（不含重复推文）
         """
+        if seen_registry is None:
+            seen_registry = SeenTweetRegistry()
+        hours_limits = hours_limits or {}
+        
         try:
             # 确定要使用的list_ids列表
-            if list_ids is not None:
-                # 优先使用传入的list_ids
-                target_list_ids = list_ids
-            elif list_id is not None:
-                # 向后兼容：如果只传入了单个list_id，转换为列表
-                target_list_ids = [list_id]
-            else:
-                # 使用配置文件中的默认值
-                target_list_ids = config.get('api.default_params.list_ids', [config.get('api.default_params.list_id')])
+            target_list_ids = self._resolve_list_ids(list_id, list_ids)
             
             self.logger.info(f"正在并行获取 {len(target_list_ids)} 个list的数据: {target_list_ids}, 时间限制: {hours_limit}小时")
             
@@ -245,8 +635,9 @@ class TwitterCrawler:
                     list_id=list_id_single,
                     max_pages=max_pages,
                     page_size=page_size,
-                    hours_limit=hours_limit
+                    hours_limit=hours_limits.get(list_id_single, hours_limit)
                 )
+                api_data_list = seen_registry.filter_page(list_id_single, api_data_list)
                 
                 # 获取API请求统计
                 stats = self.api_client.get_request_stats()
@@ -259,8 +650,9 @@ class TwitterCrawler:
             
             all_api_data = []
             
-            # 使用线程池并行获取多个list的数据
-            with concurrent.futures.ThreadPoolExecutor(max_workers=len(target_list_ids)) as executor:
+            # 使用线程池并行获取多个list的数据（并发数不超过连接池大小，速率由客户端共享限流器控制）
+            max_workers = min(len(target_list_ids), self.api_client.max_concurrency)
+            with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
                 # 提交所有任务
                 future_to_list_id = {
                     executor.submit(
@@ -268,7 +660,7 @@ class TwitterCrawler:
                         list_id=single_list_id,
                         max_pages=max_pages,
                         page_size=page_size,
-                        hours_limit=hours_limit
+                        hours_limit=hours_limits.get(single_list_id, hours_limit)
                     ): single_list_id for single_list_id in target_list_ids
                 }
                 
@@ -276,7 +668,7 @@ class TwitterCrawler:
                 for future in concurrent.futures.as_completed(future_to_list_id):
                     single_list_id = future_to_list_id[future]
                     try:
-                        api_data = future.result()
+                        api_data = seen_registry.filter_page(single_list_id, future.result())
                         if api_data:
                             self.logger.info(f"list_id {single_list_id} 获取到 {len(api_data)} 条数据")
                             all_api_data.extend(api_data)
@@ -284,6 +676,7 @@ class TwitterCrawler:
                             self.logger.warning(f"list_id {single_list_id} 未获取到数据")
                     except Exception as e:
                         self.logger.error(f"获取 list_id {single_list_id} 数据失败: {e}")
+                        seen_registry.mark_list_failed(single_list_id)
             
             # 获取API请求统计
             stats = self.api_client.get_request_stats()
@@ -343,6 +736,47 @@ class TwitterCrawler:
         
         return unique_tweets
     
+    def _refresh_known_tweets(self, tweets: List[Tweet], seen_registry: SeenTweetRegistry = None) -> tuple:
+        """
+        一次批量查询区分已入库推文和新推文，已入库推文只批量更新互动数据
+        
+        最近推文过滤器确认没有处理过的推文直接按新推文处理，不查询数据库；
+        其余推文（包括过滤器命中的）是否入库以数据库为准，过滤器误判的新推文仍按新推文完整增强和入库
+        
+        Args:
+            tweets: 推文列表
+            seen_registry: 本次爬取的已见推文集合
+            
+        Returns:
+            (需要完整增强的新推文列表, 刷新互动数据的推文数量)
+        """
+        try:
+            lookup_tweets = tweets
+            if seen_registry is not None:
+                lookup_tweets = [tweet for tweet in tweets if not seen_registry.is_definitely_new(tweet.id_str)]
+                if len(lookup_tweets) < len(tweets):
+                    self.logger.debug(f"最近推文过滤器确认的新推文 {len(tweets) - len(lookup_tweets)} 条，跳过已入库查询")
+            existing_ids = self.tweet_dao.get_existing_ids([tweet.id_str for tweet in lookup_tweets])
+            if seen_registry is not None:
+                misjudged = [tweet.id_str for tweet in tweets
+                             if tweet.id_str not in existing_ids and seen_registry.is_seen_recently(tweet.id_str)]
+                if misjudged:
+                    self.logger.info(f"最近推文过滤器命中但未入库的推文 {len(misjudged)} 条，按新推文处理")
+            if not existing_ids:
+                return tweets, 0
+            
+            new_tweets = [tweet for tweet in tweets if tweet.id_str not in existing_ids]
+            known_tweets = [tweet for tweet in tweets if tweet.id_str in existing_ids]
+            
+            refreshed_count = self.tweet_dao.batch_update_engagement(known_tweets)
+            self.logger.info(f"已入库推文 {len(known_tweets)} 条（刷新互动数据 {refreshed_count} 条），新推文 {len(new_tweets)} 条")
+            
+            return new_tweets, refreshed_count
+            
+        except Exception as e:
+            self.logger.error(f"区分已入库推文失败，全部按新推文处理: {e}")
+            return tweets, 0
+    
     def _extract_users_from_api_data(self, api_data_list: List[Dict[str, Any]]) -> List[TwitterUser]:
         """
         从API数据中提取用户信息
@@ -428,6 +862,13 @@ class TwitterCrawler:
         try:
             self.logger.info(f"开始保存 {len(users)} 条用户到数据库...")
 
+            # 优先使用Stream Load，失败时回退到INSERT
+            if self.stream_loader.enabled:
+                result = self.stream_loader.load_users(users, self._get_crawl_id())
+                if result['success']:
+                    return result['loaded_rows']
+                self.logger.warning("用户Stream Load失败，回退到INSERT写入")
+
             # 语言检测已禁用，直接批量保存用户数据
             # enhanced_users = self._enhance_users_with_language(users)
             saved_count = self.user_dao.batch_upsert_users(users)
@@ -481,6 +922,13 @@ class TwitterCrawler:
         try:
             self.logger.info(f"开始保存 {len(tweets)} 条推文到数据库...")
             
+            # 优先使用Stream Load，失败时回退到INSERT
+            if self.stream_loader.enabled:
+                result = self.stream_loader.load_tweets(tweets, self._get_crawl_id())
+                if result['success']:
+                    return result['loaded_rows']
+                self.logger.warning("推文Stream Load失败，回退到INSERT写入")
+            
             # 批量保存
             saved_count = self.tweet_dao.batch_upsert_tweets(tweets)
             
@@ -512,6 +960,13 @@ class TwitterCrawler:
             
             self.logger.info(f"开始保存 {len(quotations)} 条引用关系到数据库...")
             
+            # 优先使用Stream Load，失败时回退到INSERT
+            if self.stream_loader.enabled:
+                result = self.stream_loader.load_quotations(quotations, self._get_crawl_id())
+                if result['success']:
+                    return result['loaded_rows']
+                self.logger.warning("引用关系Stream Load失败，回退到INSERT写入")
+            
             # 批量保存
             saved_count = self.quotation_dao.batch_insert_quotations(quotations)
             
@@ -521,6 +976,17 @@ class TwitterCrawler:
             self.logger.error(f"保存引用关系到数据库失败: {e}")
             return 0
 
+    def _get_crawl_id(self) -> str:
+        """
+        获取当前爬取标识，未处于爬取流程时按当前时间生成
+        
+        Returns:
+            爬取标识字符串
+        """
+        if not self.current_crawl_id:
+            self.current_crawl_id = datetime.now().strftime('%Y%m%d%H%M%S')
+        return self.current_crawl_id
+    
     def _detect_and_structure_activities(self, tweets: List[Tweet]) -> bool:
         """
         检测推文中的活动并结构化存储
@@ -618,10 +1084,13 @@ class TwitterCrawler:
             是否成功
         """
         try:
-            table_name = self.tweet_dao.db_manager.db_config.get('tables', {}).get('tweet', 'twitter_tweet')
+            if self.write_buffer.enabled:
+                self.write_buffer.put(self.activity_channel, tweet_id,
+                                      {'is_activity': is_activity, 'activity_detail': activity_detail})
+                return True
 
             sql = f"""
-            UPDATE {table_name}
+            UPDATE {self.tweet_table}
             SET is_activity = %s, activity_detail = %s
             WHERE id_str = %s
             """
@@ -636,6 +1105,13 @@ class TwitterCrawler:
             self.logger.error(f"更新推文活动状态失败 {tweet_id}: {e}")
             return False
 
+    def _flush_write_buffer(self) -> None:
+        """写入本次爬取缓冲的补充数据（失败的数据留在缓冲中由后台重试）"""
+        try:
+            self.write_buffer.flush()
+        except Exception as e:
+            self.logger.error(f"写后缓冲写入异常: {e}")
+
     def test_connection(self) -> bool:
         """
         测试数据库连接
@@ -698,6 +1174,10 @@ class TwitterCrawler:
             'success_rate': (self.success_count / max(self.crawl_count, 1)) * 100,
             'last_crawl_time': self.last_crawl_time.isoformat() if self.last_crawl_time else None,
             'api_stats': self.api_client.get_request_stats(),
+            'list_overlap': self.last_overlap_report,
+            'db_pool_stats': self.tweet_dao.db_manager.get_pool_stats(),
+            'write_buffer_stats': self.write_buffer.get_stats(),
+            'entity_cache_stats': get_entity_cache_stats(),
             'database_tweet_count': self.tweet_dao.get_tweet_count(),
             'database_user_count': self.user_dao.get_user_count(),
             'database_quotation_count': self.quotation_dao.get_quotation_count(),
@@ -729,6 +1209,7 @@ class TwitterCrawler:
         """
         self.crawl_count += 1
         self.last_crawl_time = datetime.now()
+        self.current_crawl_id = self.last_crawl_time.strftime('%Y%m%d%H%M%S')
         
         try:
             self.logger.info(f"开始爬取项目推文数据 (第 {self.crawl_count} 次，时间限制: {hours_limit}小时)")
@@ -742,10 +1223,15 @@ class TwitterCrawler:
             
             self.logger.info(f"使用项目列表IDs: {list_ids_project}")
             
-            api_data_list = self._fetch_api_data(None, list_ids_project, max_pages, page_size, hours_limit)
+            # 项目推文写入单独的表，只在本次爬取内去重，不使用最近推文过滤器
+            seen_registry = SeenTweetRegistry()
+            api_data_list = self._fetch_api_data(None, list_ids_project, max_pages, page_size, hours_limit,
+                                                 seen_registry)
+            self.last_overlap_report = seen_registry.log_overlap_report(self.logger)
             
             if not api_data_list:
                 self.logger.warning("未获取到任何项目推文API数据")
+                self.api_client.discard_watermarks()
                 self.error_count += 1
                 return False
             
@@ -756,6 +1242,7 @@ class TwitterCrawler:
             
             if not tweets:
                 self.logger.warning("项目推文数据映射后没有有效的数据")
+                self.api_client.discard_watermarks()
                 self.error_count += 1
                 return False
             
@@ -795,15 +1282,18 @@ class TwitterCrawler:
             # 4. 数据保存完成
             if tweet_saved_count > 0:
                 self.logger.info(f"成功保存 {tweet_saved_count} 条项目推文到数据库")
+                self.api_client.commit_watermarks()
                 self.success_count += 1
                 return True
             else:
                 self.logger.error("保存项目推文到数据库失败")
+                self.api_client.discard_watermarks()
                 self.error_count += 1
                 return False
                 
         except Exception as e:
             self.logger.error(f"爬取项目推文数据异常: {e}")
+            self.api_client.discard_watermarks()
             self.error_count += 1
             return False
     
@@ -9,6 +9,7 @@ from .topic_dao import topic_dao, TopicDAO
 from .kol_dao import kol_dao, KolDAO
 from .project_dao import project_dao, ProjectDAO
 from .marco_dao import marco_dao, MarcoDAO
+from .stream_load import stream_loader, DorisStreamLoader
 
 __all__ = [
     'db_manager',
@@ -24,5 +25,7 @@ __all__ = [
     'project_dao',
     'ProjectDAO',
     'marco_dao',
-    'MarcoDAO'
+    'MarcoDAO',
+    'stream_loader',
+    'DorisStreamLoader'
 ] 
\ No newline at end of file
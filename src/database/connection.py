@@ -3,18 +3,23 @@
 """
 import pymysql
 from pymysql import Connection
+from pymysql.constants import SERVER_STATUS
 from contextlib import contextmanager
 from typing import Dict, Any, List, Optional, Generator
 import threading
 import time
-from queue import Queue, Empty
 import logging
 
 from ..utils.config_manager import config
 
 
 class DatabaseConnectionPool:
-    """数据库连接池"""
+    """
+    数据库连接池
+
+    信号量限制同时借出的连接数；空闲连接后进先出复用，只有空闲超过 validate_idle_seconds 才在借出时ping；
+    归还时只在连接处于未结束的事务中时回滚；后台线程定期对空闲连接保活并回收超过 idle_timeout 的多余连接
+    """
     
     def __init__(self, db_config: Dict[str, Any]):
         """
@@ -30,23 +35,46 @@ class DatabaseConnectionPool:
         self.min_connections = self.pool_config.get('min_connections', 1)
         self.connection_timeout = self.pool_config.get('connection_timeout', 30)
         self.idle_timeout = self.pool_config.get('idle_timeout', 600)
+        self.validate_idle_seconds = self.pool_config.get('validate_idle_seconds', 30)
+        self.keepalive_interval = self.pool_config.get('keepalive_interval', 300)
+        self.reaper_interval = self.pool_config.get('reaper_interval', 60)
+        self.autocommit = self.pool_config.get('autocommit', False)
         
-        self._pool = Queue(maxsize=self.max_connections)
-        self._active_connections = 0
+        # 信号量控制借出数量，空闲连接按 (连接, 最后使用时间) 存放
+        self._capacity = threading.BoundedSemaphore(self.max_connections)
+        self._idle: List[tuple] = []
         self._lock = threading.Lock()
+        self._closed = threading.Event()
+        
+        # 连接池指标
+        self._stats = {
+            'checkout_count': 0,
+            'in_use': 0,
+            'created_count': 0,
+            'closed_count': 0,
+            'validation_count': 0,
+            'rollback_count': 0,
+            'timeout_count': 0,
+            'total_wait_seconds': 0.0,
+            'max_wait_seconds': 0.0,
+        }
         
         self.logger = logging.getLogger(__name__)
         
         # 初始化最小连接数
         self._initialize_pool()
+        
+        self._reaper_thread = None
+        if self.reaper_interval and self.reaper_interval > 0:
+            self._reaper_thread = threading.Thread(target=self._reaper_loop, name='db-pool-reaper', daemon=True)
+            self._reaper_thread.start()
     
     def _initialize_pool(self):
         """初始化连接池"""
         for _ in range(self.min_connections):
             try:
                 conn = self._create_connection()
-                self._pool.put((conn, time.time()))
-                self._active_connections += 1
+                self._idle.append((conn, time.time()))
             except Exception as e:
                 self.logger.error(f"初始化连接池失败: {e}")
                 break
@@ -67,7 +95,7 @@ class DatabaseConnectionPool:
                 'database': self.db_config['database'],
                 'charset': 'utf8mb4',
                 'connect_timeout': self.connection_timeout,
-                'autocommit': False,
+                'autocommit': self.autocommit,
             }
             
             # 添加额外选项
@@ -76,6 +104,8 @@ class DatabaseConnectionPool:
                 connection_params['ssl_disabled'] = True
             
             conn = pymysql.connect(**connection_params)
+            with self._lock:
+                self._stats['created_count'] += 1
             self.logger.info("创建新的数据库连接成功")
             return conn
             
@@ -85,69 +115,102 @@ class DatabaseConnectionPool:
     
     def get_connection(self) -> Connection:
         """
-        从连接池获取连接
+        从连接池获取连接，借出数量达到上限时最多等待 connection_timeout 秒
         
         Returns:
             数据库连接对象
         """
+        wait_start = time.monotonic()
+        if not self._capacity.acquire(timeout=self.connection_timeout):
+            with self._lock:
+                self._stats['timeout_count'] += 1
+            raise TimeoutError(f"等待数据库连接超时（{self.connection_timeout}秒，最大连接数 {self.max_connections}）")
+        waited = time.monotonic() - wait_start
+        
         try:
-            # 尝试从池中获取连接
-            conn, last_used = self._pool.get_nowait()
-            
-            # 检查连接是否超时
-            if time.time() - last_used > self.idle_timeout:
-                try:
-                    conn.close()
-                except:
-                    pass
-                conn = self._create_connection()
-            
-            # 检查连接是否有效
-            if not self._is_connection_valid(conn):
+            conn = self._checkout_idle()
+            if conn is None:
                 conn = self._create_connection()
+        except Exception:
+            self._capacity.release()
+            raise
+        
+        with self._lock:
+            self._stats['checkout_count'] += 1
+            self._stats['in_use'] += 1
+            self._stats['total_wait_seconds'] += waited
+            self._stats['max_wait_seconds'] = max(self._stats['max_wait_seconds'], waited)
+        return conn
+    
+    def _checkout_idle(self) -> Optional[Connection]:
+        """
+        取出一个可用的空闲连接（最近使用的优先），空闲较久的连接先验证
+        
+        Returns:
+            数据库连接对象，没有可用空闲连接时返回None
+        """
+        while True:
+            with self._lock:
+                if not self._idle:
+                    return None
+                conn, last_used = self._idle.pop()
             
+            idle_seconds = time.time() - last_used
+            if idle_seconds > self.idle_timeout:
+                self._close_connection(conn)
+                continue
+            if idle_seconds > self.validate_idle_seconds and not self._is_connection_valid(conn):
+                self._close_connection(conn)
+                continue
             return conn
-            
-        except Empty:
-            # 池中没有连接，创建新连接
-            with self._lock:
-                if self._active_connections < self.max_connections:
-                    conn = self._create_connection()
-                    self._active_connections += 1
-                    return conn
-                else:
-                    # 等待连接可用
-                    conn, _ = self._pool.get(timeout=self.connection_timeout)
-                    return conn
     
-    def return_connection(self, conn: Connection):
+    def return_connection(self, conn: Connection, read_only: bool = False, had_error: bool = False):
         """
         将连接返回到池中
         
         Args:
             conn: 数据库连接对象
+            read_only: 连接只用于查询，无需回滚
+            had_error: 使用过程中发生异常，需要回滚（回滚失败则关闭连接）
         """
-        if self._is_connection_valid(conn):
-            try:
-                # 回滚任何未提交的事务
+        try:
+            if had_error or (not read_only and self._in_transaction(conn)):
+                # 回滚未提交的事务
                 conn.rollback()
-                self._pool.put((conn, time.time()), block=False)
-            except:
-                # 池已满，关闭连接
-                try:
-                    conn.close()
-                except:
-                    pass
                 with self._lock:
-                    self._active_connections -= 1
-        else:
-            # 连接无效，关闭并减少计数
-            try:
-                conn.close()
-            except:
-                pass
-            with self._lock:
-                self._active_connections -= 1
+                    self._stats['rollback_count'] += 1
+        except Exception:
+            self._close_connection(conn)
+            conn = None
+        
+        close_after = False
+        with self._lock:
+            self._stats['in_use'] -= 1
+            if conn is not None:
+                if len(self._idle) >= self.max_connections:
+                    close_after = True
+                else:
+                    self._idle.append((conn, time.time()))
+        if close_after:
+            self._close_connection(conn)
+        self._capacity.release()
+    
+    def _in_transaction(self, conn: Connection) -> bool:
+        """
+        根据服务端状态判断连接是否处于未结束的事务中（不产生网络往返）
+        
+        Args:
+            conn: 数据库连接对象
+            
+        Returns:
+            是否需要回滚
+        """
+        try:
+            if conn.get_autocommit():
+                return False
+            return bool(conn.server_status & SERVER_STATUS.SERVER_STATUS_IN_TRANS)
+        except Exception:
+            return True
     
     def _is_connection_valid(self, conn: Connection) -> bool:
         """
@@ -159,23 +222,95 @@ class DatabaseConnectionPool:
         Returns:
             连接是否有效
         """
+        with self._lock:
+            self._stats['validation_count'] += 1
         try:
             conn.ping(reconnect=False)
             return True
         except:
             return False
     
-    def close_all(self):
-        """关闭所有连接"""
-        while not self._pool.empty():
+    def _close_connection(self, conn: Connection):
+        """关闭连接"""
+        try:
+            conn.close()
+        except:
+            pass
+        with self._lock:
+            self._stats['closed_count'] += 1
+    
+    def _reaper_loop(self):
+        """后台线程：定期保活和回收空闲连接"""
+        while not self._closed.wait(self.reaper_interval):
             try:
-                conn, _ = self._pool.get_nowait()
-                conn.close()
-            except:
-                pass
+                self.reap_idle_connections()
+            except Exception as e:
+                self.logger.error(f"空闲连接回收异常: {e}")
+    
+    def reap_idle_connections(self) -> Dict[str, int]:
+        """
+        回收超过 idle_timeout 的多余空闲连接（保留 min_connections 个），
+        对空闲超过 keepalive_interval 的保留连接发送ping保活
+        
+        Returns:
+            {'closed': 关闭数, 'kept_alive': 保活数}
+        """
+        now = time.time()
+        with self._lock:
+            # 最久未使用的在前
+            idle = self._idle
+            self._idle = []
+        
+        closable = max(0, len(idle) - self.min_connections)
+        keep, to_close, to_ping = [], [], []
+        for conn, last_used in idle:
+            if now - last_used > self.idle_timeout and len(to_close) < closable:
+                to_close.append(conn)
+            elif now - last_used > self.keepalive_interval:
+                to_ping.append(conn)
+            else:
+                keep.append((conn, last_used))
+        
+        kept_alive = 0
+        for conn in to_ping:
+            if self._is_connection_valid(conn):
+                keep.append((conn, time.time()))
+                kept_alive += 1
+            else:
+                to_close.append(conn)
+        for conn in to_close:
+            self._close_connection(conn)
+        
+        with self._lock:
+            # 回收期间归还的连接最近使用过，排在后面
+            self._idle = sorted(keep, key=lambda item: item[1]) + self._idle
+        
+        if to_close or kept_alive:
+            self.logger.debug(f"空闲连接回收: 关闭 {len(to_close)} 个，保活 {kept_alive} 个")
+        return {'closed': len(to_close), 'kept_alive': kept_alive}
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取连接池指标
         
+        Returns:
+            借出次数、当前借出数、空闲数、等待时间等
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['idle'] = len(self._idle)
+        stats['max_connections'] = self.max_connections
+        stats['avg_wait_ms'] = stats['total_wait_seconds'] / stats['checkout_count'] * 1000 if stats['checkout_count'] else 0.0
+        return stats
+    
+    def close_all(self):
+        """停止后台线程并关闭所有空闲连接（借出中的连接归还后仍可复用）"""
+        self._closed.set()
         with self._lock:
-            self._active_connections = 0
+            idle = self._idle
+            self._idle = []
+        for conn, _ in idle:
+            self._close_connection(conn)
 
 
 class DatabaseManager:
@@ -190,30 +325,38 @@ class DatabaseManager:
         self.logger = logging.getLogger(__name__)
     
     @contextmanager
-    def get_connection(self) -> Generator[Connection, None, None]:
+    def get_connection(self, read_only: bool = False) -> Generator[Connection, None, None]:
         """
         获取数据库连接的上下文管理器
         
+        Args:
+            read_only: 只执行查询，归还时无需回滚
+        
         Yields:
             数据库连接对象
         """
-        conn = None
+        conn = self.pool.get_connection()
+        had_error = False
         try:
-            conn = self.pool.get_connection()
             yield conn
+        except BaseException:
+            had_error = True
+            raise
         finally:
-            if conn:
-                self.pool.return_connection(conn)
+            self.pool.return_connection(conn, read_only=read_only, had_error=had_error)
     
     @contextmanager
-    def get_cursor(self) -> Generator[tuple, None, None]:
+    def get_cursor(self, read_only: bool = False) -> Generator[tuple, None, None]:
         """
         获取数据库游标的上下文管理器
         
+        Args:
+            read_only: 只执行查询，归还时无需回滚
+        
         Yields:
             (连接对象, 游标对象)
         """
-        with self.get_connection() as conn:
+        with self.get_connection(read_only) as conn:
             cursor = conn.cursor(pymysql.cursors.DictCursor)
             try:
                 yield conn, cursor
@@ -232,13 +375,44 @@ class DatabaseManager:
             查询结果列表
         """
         try:
-            with self.get_cursor() as (conn, cursor):
+            with self.get_cursor(read_only=True) as (conn, cursor):
                 cursor.execute(sql, params)
                 return cursor.fetchall()
         except Exception as e:
             self.logger.error(f"执行查询失败: {sql}, 参数: {params}, 错误: {e}")
             raise
     
+    def iter_query(self, sql: str, params: Optional[tuple] = None,
+                   fetch_size: int = 1000) -> Generator[Dict[str, Any], None, None]:
+        """
+        流式执行查询SQL，使用无缓冲游标逐批读取，避免一次性加载全部结果
+        
+        调用方需要完整消费或关闭生成器，连接在此之前一直被占用。
+        
+        Args:
+            sql: SQL语句
+            params: 参数
+            fetch_size: 每次从服务端读取的行数
+            
+        Yields:
+            查询结果行
+        """
+        with self.get_connection(read_only=True) as conn:
+            cursor = conn.cursor(pymysql.cursors.SSDictCursor)
+            try:
+                cursor.execute(sql, params)
+                while True:
+                    rows = cursor.fetchmany(fetch_size)
+                    if not rows:
+                        break
+                    for row in rows:
+                        yield row
+            except Exception as e:
+                self.logger.error(f"流式查询失败: {sql}, 参数: {params}, 错误: {e}")
+                raise
+            finally:
+                cursor.close()
+    
     def execute_update(self, sql: str, params: Optional[tuple] = None) -> int:
         """
         执行更新SQL
@@ -285,6 +459,83 @@ class DatabaseManager:
             self.logger.error(f"执行批量更新失败: {sql}, 错误: {e}")
             raise
     
+    def execute_bulk_insert(self, table_name: str, fields: List[str],
+                            params_list: List[tuple]) -> int:
+        """
+        执行多行VALUES批量插入，整批使用同一连接和同一事务
+
+        Args:
+            table_name: 表名
+            fields: 字段列表
+            params_list: 每行参数列表，顺序与fields一致
+
+        Returns:
+            总影响的行数
+        """
+        if not params_list:
+            return 0
+
+        row_placeholder = '(' + ', '.join(['%s'] * len(fields)) + ')'
+        sql = (
+            f"INSERT INTO {table_name} ({', '.join(fields)}) VALUES "
+            + ', '.join([row_placeholder] * len(params_list))
+        )
+        flat_params = [value for params in params_list for value in params]
+
+        try:
+            with self.get_cursor() as (conn, cursor):
+                try:
+                    affected_rows = cursor.execute(sql, flat_params)
+                    conn.commit()
+                    return affected_rows
+                except Exception:
+                    conn.rollback()
+                    raise
+        except Exception as e:
+            self.logger.error(f"执行多行批量插入失败: {table_name}, 行数: {len(params_list)}, 错误: {e}")
+            raise
+    
+    def execute_case_update(self, table_name: str, key_column: str,
+                            rows: List[tuple]) -> int:
+        """
+        用一条 UPDATE ... SET col = CASE key WHEN ... END WHERE key IN (...) 批量更新多行
+
+        Args:
+            table_name: 表名
+            key_column: 主键列
+            rows: [(主键, {列: 值})]，某行没有的列保持原值
+
+        Returns:
+            影响的行数
+        """
+        if not rows:
+            return 0
+
+        columns = list(dict.fromkeys(column for _, values in rows for column in values))
+        set_clauses = []
+        params: List[Any] = []
+        for column in columns:
+            cases = []
+            for key, values in rows:
+                if column in values:
+                    cases.append("WHEN %s THEN %s")
+                    params.extend([key, values[column]])
+            set_clauses.append(f"{column} = CASE {key_column} {' '.join(cases)} ELSE {column} END")
+
+        keys = [key for key, _ in rows]
+        params.extend(keys)
+        sql = (f"UPDATE {table_name} SET {', '.join(set_clauses)} "
+               f"WHERE {key_column} IN ({', '.join(['%s'] * len(keys))})")
+
+        try:
+            with self.get_cursor() as (conn, cursor):
+                affected_rows = cursor.execute(sql, params)
+                conn.commit()
+                return affected_rows
+        except Exception as e:
+            self.logger.error(f"执行批量CASE更新失败: {table_name}, 行数: {len(rows)}, 错误: {e}")
+            raise
+    
     def test_connection(self) -> bool:
         """
         测试数据库连接
@@ -293,7 +544,7 @@ class DatabaseManager:
             连接是否成功
         """
         try:
-            with self.get_cursor() as (conn, cursor):
+            with self.get_cursor(read_only=True) as (conn, cursor):
                 cursor.execute("SELECT 1")
                 result = cursor.fetchone()
                 return result is not None
@@ -301,6 +552,15 @@ class DatabaseManager:
             self.logger.error(f"数据库连接测试失败: {e}")
             return False
     
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """
+        获取连接池指标
+        
+        Returns:
+            连接池指标字典
+        """
+        return self.pool.get_stats()
+    
     def close(self):
         """关闭数据库连接池"""
         self.pool.close_all()
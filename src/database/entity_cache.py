@@ -0,0 +1,188 @@
+"""
+实体读穿缓存
+按名称缓存项目、话题等实体的单行查询结果：命中时不访问数据库，未命中时查询并缓存，
+不存在的名称也缓存较短时间（负缓存）；DAO写入时同步更新缓存，写后缓冲尚未写入的实体也能立即查到
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+from ..utils.config_manager import config
+
+
+# 负缓存标记（区分"不存在"和"未缓存"）
+_MISSING = object()
+
+
+class EntityCache:
+    """带TTL、负缓存和LRU容量上限的进程内读穿缓存"""
+
+    def __init__(self, name: str, settings: Dict[str, Any] = None):
+        """
+        初始化实体缓存
+
+        Args:
+            name: 缓存名称（用于日志和统计）
+            settings: 缓存参数，默认读取 database.entity_cache
+        """
+        self.logger = logging.getLogger(__name__)
+        if settings is None:
+            settings = config.get('database.entity_cache', {}) or {}
+
+        self.name = name
+        self.enabled = settings.get('enabled', True)
+        self.ttl_seconds = settings.get('ttl_seconds', 300)
+        self.negative_ttl_seconds = settings.get('negative_ttl_seconds', 60)
+        self.max_entries = settings.get('max_entries', 10000)
+
+        self._lock = threading.Lock()
+        # key -> (值或负缓存标记, 过期时间)
+        self._entries: 'OrderedDict[str, tuple]' = OrderedDict()
+
+        self.stats = {'hits': 0, 'negative_hits': 0, 'misses': 0, 'loads': 0, 'writes': 0,
+                      'invalidations': 0, 'evictions': 0}
+
+    def get_or_load(self, key: str, loader: Callable[[str], Optional[Any]],
+                    bypass_negative: bool = False) -> Optional[Any]:
+        """
+        读取缓存，未命中或已过期时调用 loader 查询并缓存结果
+
+        Args:
+            key: 缓存键
+            loader: 查询函数，返回实体或None（不存在），查询失败时应抛出异常（异常不缓存）
+            bypass_negative: 忽略负缓存重新查询（创建实体前的复查使用，避免按过时的"不存在"重复创建）
+
+        Returns:
+            实体或None
+        """
+        if not self.enabled:
+            return loader(key)
+
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > now and not (bypass_negative and entry[0] is _MISSING):
+                self._entries.move_to_end(key)
+                if entry[0] is _MISSING:
+                    self.stats['negative_hits'] += 1
+                    return None
+                self.stats['hits'] += 1
+                return entry[0]
+            self.stats['misses'] += 1
+
+        value = loader(key)
+        with self._lock:
+            self.stats['loads'] += 1
+            # 查询期间写入的新值优先（忽略负缓存时查询结果替换负缓存）
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= now or (bypass_negative and entry[0] is _MISSING):
+                self._store(key, value)
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        """
+        写入缓存（DAO写入成功后调用）
+
+        Args:
+            key: 缓存键
+            value: 实体
+        """
+        if not self.enabled or not key:
+            return
+        with self._lock:
+            self.stats['writes'] += 1
+            self._store(key, value)
+
+    def invalidate(self, key: str) -> None:
+        """
+        移除缓存项
+
+        Args:
+            key: 缓存键
+        """
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self.stats['invalidations'] += 1
+
+    def invalidate_where(self, predicate: Callable[[Any], bool]) -> int:
+        """
+        移除值满足条件的缓存项（例如按ID删除实体时）
+
+        Args:
+            predicate: 判断函数，参数为缓存的实体
+
+        Returns:
+            移除的数量
+        """
+        with self._lock:
+            keys = [key for key, (value, _) in self._entries.items()
+                    if value is not _MISSING and predicate(value)]
+            for key in keys:
+                del self._entries[key]
+            self.stats['invalidations'] += len(keys)
+            return len(keys)
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+
+    def _store(self, key: str, value: Optional[Any]) -> None:
+        """写入缓存项并按LRU淘汰（调用方持有锁）"""
+        if value is None:
+            self._entries[key] = (_MISSING, time.time() + self.negative_ttl_seconds)
+        else:
+            self._entries[key] = (value, time.time() + self.ttl_seconds)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats['evictions'] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取缓存统计
+
+        Returns:
+            命中、负缓存命中、未命中次数，命中率和当前条数
+        """
+        with self._lock:
+            lookups = self.stats['hits'] + self.stats['negative_hits'] + self.stats['misses']
+            hit_rate = (self.stats['hits'] + self.stats['negative_hits']) / lookups if lookups else 0.0
+            return dict(self.stats, name=self.name, size=len(self._entries), hit_rate=round(hit_rate, 4))
+
+
+# 按名称共享的缓存实例：同一张表的多个DAO实例共用一个缓存，写入时相互可见
+_shared_caches: Dict[str, EntityCache] = {}
+_shared_lock = threading.Lock()
+
+
+def get_entity_cache(name: str) -> EntityCache:
+    """
+    获取共享的实体缓存
+
+    Args:
+        name: 缓存名称（使用表名）
+
+    Returns:
+        实体缓存
+    """
+    with _shared_lock:
+        cache = _shared_caches.get(name)
+        if cache is None:
+            cache = EntityCache(name)
+            _shared_caches[name] = cache
+        return cache
+
+
+def get_entity_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    获取全部共享缓存的统计
+
+    Returns:
+        {缓存名称: 统计信息}
+    """
+    with _shared_lock:
+        caches = list(_shared_caches.values())
+    return {cache.name: cache.get_stats() for cache in caches}
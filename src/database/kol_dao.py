@@ -6,17 +6,29 @@ import logging
 from datetime import datetime, timedelta
 
 from .connection import db_manager
+from .write_buffer import write_buffer
 from ..models.kol import KOL
 
 
 class KolDAO:
     """KOL数据访问对象"""
+
+    # 写后缓冲批量写入的字段（Doris Unique Key 表，相同主键的INSERT覆盖旧行）
+    UPSERT_FIELDS = [
+        'kol_id', 'type', 'tag', 'influence_score', 'influence_score_history',
+        'call_increase_1h', 'call_increase_24h', 'call_increase_3d', 'call_increase_7d',
+        'sentiment', 'sentiment_history', 'summary', 'trust_rating', 'is_kol100',
+        'last_updated', 'created_at'
+    ]
     
     def __init__(self):
         """初始化DAO"""
         self.db_manager = db_manager
         self.table_name = self.db_manager.db_config.get('tables', {}).get('kol', 'kols')
         self.logger = logging.getLogger(__name__)
+        self.write_buffer = write_buffer
+        self.upsert_channel = f"{self.table_name}:upsert"
+        self.write_buffer.register(self.upsert_channel, self._flush_upserts)
     
     def insert_kol(self, kol: KOL) -> bool:
         """
@@ -91,6 +103,13 @@ class KolDAO:
         if not kol.validate():
             self.logger.error(f"KOL数据验证失败: {kol}")
             return False
+
+        if self.write_buffer.enabled:
+            # 写后缓冲：不再逐条查询是否存在，合并后批量写入
+            kol_data = kol.to_dict()
+            self.write_buffer.put(self.upsert_channel, kol.kol_id,
+                                  {field: kol_data[field] for field in self.UPSERT_FIELDS})
+            return True
         
         try:
             # 先尝试查找现有KOL
@@ -152,6 +171,28 @@ class KolDAO:
         except Exception as e:
             self.logger.error(f"Upsert KOL数据失败: {kol.kol_id}, 错误: {e}")
             return False
+
+    def _flush_upserts(self, rows: List[tuple]) -> int:
+        """
+        批量写入缓冲的KOL数据（已存在的KOL保留原创建时间）
+
+        Args:
+            rows: [(kol_id, 字段值字典)]
+
+        Returns:
+            影响的行数
+        """
+        kol_ids = [kol_id for kol_id, _ in rows]
+        sql = (f"SELECT kol_id, created_at FROM {self.table_name} "
+               f"WHERE kol_id IN ({', '.join(['%s'] * len(kol_ids))})")
+        created_at = {row['kol_id']: row['created_at']
+                      for row in self.db_manager.execute_query(sql, tuple(kol_ids))}
+
+        params_list = []
+        for kol_id, values in rows:
+            values = dict(values, created_at=created_at.get(kol_id, values['created_at']))
+            params_list.append(tuple(values[field] for field in self.UPSERT_FIELDS))
+        return self.db_manager.execute_bulk_insert(self.table_name, self.UPSERT_FIELDS, params_list)
     
     def batch_upsert_kols(self, kols: List[KOL]) -> int:
         """
@@ -15,6 +15,7 @@ class MarcoDAO:
     def __init__(self):
         """初始化MarcoDAO"""
         self.table_name = 'twitter_marco'
+        self.stance_table_name = 'twitter_marco_stance'
         self.logger = logging.getLogger(__name__)
     
     def insert(self, marco_data: MarcoData) -> bool:
@@ -209,6 +210,31 @@ class MarcoDAO:
             self.logger.error(f"检查Marco数据存在性异常: {e}")
             return False
     
+    def get_existing_timestamps(self, start_time: datetime, end_time: datetime) -> set:
+        """
+        一次查询时间范围内已存在数据的时间戳
+        
+        Args:
+            start_time: 开始时间
+            end_time: 结束时间
+            
+        Returns:
+            已存在的时间戳集合
+        """
+        try:
+            sql = f"""
+            SELECT DISTINCT timestamp
+            FROM {self.table_name}
+            WHERE timestamp >= %s AND timestamp <= %s
+            """
+            
+            results = db_manager.execute_query(sql, (start_time, end_time))
+            return {row['timestamp'] for row in results}
+            
+        except Exception as e:
+            self.logger.error(f"查询已存在的Marco时间戳异常: {e}")
+            return set()
+    
     def update_by_timestamp(self, timestamp: datetime, 
                            sentiment_index: Optional[float] = None,
                            summary: Optional[str] = None) -> bool:
@@ -288,6 +314,69 @@ class MarcoDAO:
             self.logger.error(f"删除旧Marco数据异常: {e}")
             return 0
     
+    def get_stances(self, tweet_ids: List[str], chunk_size: int = 1000) -> Dict[str, str]:
+        """
+        批量查询已保存的推文情绪倾向标签
+        
+        Args:
+            tweet_ids: 推文ID列表
+            chunk_size: 每次IN查询的ID数量
+            
+        Returns:
+            {tweet_id: 'bullish'/'bearish'/'neutral'}
+        """
+        stances = {}
+        unique_ids = list(dict.fromkeys(tweet_id for tweet_id in tweet_ids if tweet_id))
+        
+        for start in range(0, len(unique_ids), chunk_size):
+            chunk = unique_ids[start:start + chunk_size]
+            try:
+                placeholders = ', '.join(['%s'] * len(chunk))
+                sql = f"""
+                SELECT tweet_id, stance
+                FROM {self.stance_table_name}
+                WHERE tweet_id IN ({placeholders})
+                """
+                
+                results = db_manager.execute_query(sql, chunk)
+                for row in results:
+                    stances[row['tweet_id']] = row['stance']
+                    
+            except Exception as e:
+                self.logger.error(f"查询推文情绪标签异常: {e}")
+        
+        return stances
+    
+    def save_stances(self, stances: Dict[str, str], chunk_size: int = 500) -> int:
+        """
+        批量保存推文情绪倾向标签（UNIQUE KEY表，重复写入覆盖）
+        
+        Args:
+            stances: {tweet_id: 'bullish'/'bearish'/'neutral'}
+            chunk_size: 每条INSERT语句的行数
+            
+        Returns:
+            成功保存的数量
+        """
+        if not stances:
+            return 0
+        
+        fields = ['tweet_id', 'stance', 'update_time']
+        now = datetime.now()
+        params_list = [(tweet_id, stance, now) for tweet_id, stance in stances.items()]
+        
+        saved_count = 0
+        for start in range(0, len(params_list), chunk_size):
+            chunk = params_list[start:start + chunk_size]
+            try:
+                db_manager.execute_bulk_insert(self.stance_table_name, fields, chunk)
+                saved_count += len(chunk)
+            except Exception as e:
+                self.logger.error(f"保存推文情绪标签异常: {e}")
+        
+        self.logger.info(f"保存推文情绪标签: {saved_count}/{len(params_list)}")
+        return saved_count
+    
     def get_statistics(self) -> Dict[str, Any]:
         """
         获取统计信息
@@ -6,17 +6,32 @@ import logging
 from datetime import datetime, timedelta
 
 from .connection import db_manager
+from .write_buffer import write_buffer
+from .entity_cache import get_entity_cache
 from ..models.project import Project
 
 
 class ProjectDAO:
     """Project数据访问对象"""
+
+    # 写后缓冲批量写入的字段（Doris Unique Key 表，相同主键的INSERT覆盖旧行）
+    UPSERT_FIELDS = [
+        'project_id', 'name', 'symbol', 'token_address', 'twitter_id',
+        'created_at', 'category', 'narratives', 'sentiment_index', 'sentiment_history',
+        'popularity', 'popularity_history', 'summary', 'is_announce', 'announce_summary',
+        'last_updated', 'update_time'
+    ]
     
     def __init__(self):
         """初始化DAO"""
         self.db_manager = db_manager
         self.table_name = self.db_manager.db_config.get('tables', {}).get('project', 'twitter_projects')
         self.logger = logging.getLogger(__name__)
+        self.write_buffer = write_buffer
+        self.upsert_channel = f"{self.table_name}:upsert"
+        self.write_buffer.register(self.upsert_channel, self._flush_upserts)
+        # 按名称查询项目的读穿缓存
+        self.name_cache = get_entity_cache(f"{self.table_name}:name")
     
     def insert_project(self, project: Project) -> bool:
         """
@@ -69,6 +84,7 @@ class ProjectDAO:
             success = affected_rows > 0
             
             if success:
+                self._cache_project(project)
                 self.logger.info(f"项目插入成功: {project.name} ({project.symbol})")
             else:
                 self.logger.warning(f"项目插入失败: {project.name}")
@@ -92,6 +108,14 @@ class ProjectDAO:
         if not project.validate():
             self.logger.error(f"项目数据验证失败: {project}")
             return False
+
+        if self.write_buffer.enabled:
+            # 写后缓冲：不再逐条查询是否存在，合并后批量写入
+            project_data = project.to_dict()
+            self.write_buffer.put(self.upsert_channel, project.project_id,
+                                  {field: project_data[field] for field in self.UPSERT_FIELDS})
+            self._cache_project(project)
+            return True
         
         try:
             # 先尝试查找现有项目
@@ -143,6 +167,7 @@ class ProjectDAO:
                 success = affected_rows > 0
                 
                 if success:
+                    self._cache_project(project)
                     self.logger.info(f"项目更新成功: {project.name}")
                 else:
                     self.logger.warning(f"项目更新失败: {project.name}")
@@ -155,6 +180,28 @@ class ProjectDAO:
         except Exception as e:
             self.logger.error(f"Upsert项目数据失败: {project.name}, 错误: {e}")
             return False
+
+    def _flush_upserts(self, rows: List[tuple]) -> int:
+        """
+        批量写入缓冲的项目数据（已存在的项目保留原创建时间）
+
+        Args:
+            rows: [(project_id, 字段值字典)]
+
+        Returns:
+            影响的行数
+        """
+        project_ids = [project_id for project_id, _ in rows]
+        sql = (f"SELECT project_id, created_at FROM {self.table_name} "
+               f"WHERE project_id IN ({', '.join(['%s'] * len(project_ids))})")
+        created_at = {row['project_id']: row['created_at']
+                      for row in self.db_manager.execute_query(sql, tuple(project_ids))}
+
+        params_list = []
+        for project_id, values in rows:
+            values = dict(values, created_at=created_at.get(project_id, values['created_at']))
+            params_list.append(tuple(values[field] for field in self.UPSERT_FIELDS))
+        return self.db_manager.execute_bulk_insert(self.table_name, self.UPSERT_FIELDS, params_list)
     
     def batch_upsert_projects(self, projects: List[Project]) -> int:
         """
@@ -211,27 +258,48 @@ class ProjectDAO:
             self.logger.error(f"查询项目失败: {project_id}, 错误: {e}")
             return None
     
-    def get_project_by_name(self, name: str) -> Optional[Project]:
+    def get_project_by_name(self, name: str, bypass_negative: bool = False) -> Optional[Project]:
         """
         根据项目名称获取项目
         
         Args:
             name: 项目名称
+            bypass_negative: 忽略"不存在"的缓存重新查询（创建项目前的复查使用）
             
         Returns:
             Project对象或None
         """
         try:
-            sql = f"SELECT * FROM {self.table_name} WHERE name = %s"
-            results = self.db_manager.execute_query(sql, (name,))
-            
-            if results:
-                return Project.from_dict(results[0])
-            return None
+            return self.name_cache.get_or_load(name, self._query_project_by_name, bypass_negative)
             
         except Exception as e:
             self.logger.error(f"根据名称查询项目失败: {name}, 错误: {e}")
             return None
+
+    def _query_project_by_name(self, name: str) -> Optional[Project]:
+        """按名称查询数据库（查询失败时抛出异常，避免被负缓存）"""
+        sql = f"SELECT * FROM {self.table_name} WHERE name = %s"
+        results = self.db_manager.execute_query(sql, (name,))
+
+        if results:
+            return Project.from_dict(results[0])
+        return None
+
+    def _cache_project(self, project: Project) -> None:
+        """写入成功后更新名称缓存（项目改名时移除旧名称）"""
+        self.name_cache.invalidate_where(
+            lambda cached: cached.project_id == project.project_id and cached.name != project.name
+        )
+        self.name_cache.put(project.name, project)
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """
+        获取名称缓存统计
+
+        Returns:
+            命中率等统计信息
+        """
+        return self.name_cache.get_stats()
     
     def get_project_by_symbol(self, symbol: str) -> Optional[Project]:
         """
@@ -423,6 +491,7 @@ class ProjectDAO:
             
             success = affected_rows > 0
             if success:
+                self.name_cache.invalidate_where(lambda cached: cached.project_id == project_id)
                 self.logger.info(f"项目删除成功: {project_id}")
             else:
                 self.logger.warning(f"项目删除失败，可能不存在: {project_id}")
@@ -0,0 +1,422 @@
+"""
+Doris Stream Load 写入模块
+
+通过 Doris FE 的 HTTP stream-load 接口批量导入推文、用户和引用关系数据，
+每次爬取每张表只提交一个导入任务（流式爬取跨页累积，超过 max_batch_rows 条推文时分批导入），
+使用 label 保证重试幂等。
+"""
+import hashlib
+import json
+import logging
+import re
+import time
+from datetime import datetime, date
+from typing import List, Dict, Any
+
+import requests
+
+from .connection import db_manager
+from .tweet_dao import tweet_dao
+from ..models.tweet import Tweet
+from ..models.user import TwitterUser
+from ..utils.config_manager import config
+
+
+# Doris 判定为导入成功的状态
+SUCCESS_STATUSES = ('Success', 'Publish Timeout')
+
+# CSV 中表示 NULL 的标记（不能被包围或转义，否则会被当作字符串 "\N" 导入）
+CSV_NULL = '\\N'
+
+# CSV 字段包含这些字符时需要用引号包围
+CSV_SPECIAL_CHARS = (',', '"', '\\', '\n', '\r')
+
+# label 已存在时，已有任务处于这些状态说明数据已经导入（重试命中幂等）
+FINISHED_JOB_STATUSES = ('FINISHED', 'VISIBLE', 'COMMITTED')
+
+
+class DorisStreamLoader:
+    """Doris Stream Load 写入器"""
+
+    def __init__(self):
+        """初始化Stream Load写入器"""
+        self.db_config = db_manager.db_config
+        self.stream_config = self.db_config.get('stream_load', {})
+        self.logger = logging.getLogger(__name__)
+
+        self.enabled = self.stream_config.get('enabled', False)
+        self.host = self.stream_config.get('host') or self.db_config.get('host')
+        self.http_port = self.stream_config.get('http_port', 8030)
+        self.database = self.db_config.get('database')
+        self.username = self.db_config.get('username')
+        self.password = self.db_config.get('password') or ''
+        self.data_format = self.stream_config.get('format', 'json')
+        self.timeout = self.stream_config.get('timeout', 60)
+        self.max_retries = self.stream_config.get('max_retries', 3)
+        self.retry_delay = self.stream_config.get('retry_delay', 2)
+        self.label_prefix = self.stream_config.get('label_prefix', 'twitter_crawler')
+        # 流式爬取跨页累积的推文数上限，达到后提前导入
+        self.max_batch_rows = self.stream_config.get('max_batch_rows', 10000)
+
+        self.tables = self.db_config.get('tables', {})
+
+        # 统计信息
+        self.load_count = 0
+        self.success_count = 0
+        self.error_count = 0
+        self.loaded_rows = 0
+
+    def load_tweets(self, tweets: List[Tweet], crawl_id: str,
+                    table_name: str = None) -> Dict[str, Any]:
+        """
+        通过Stream Load导入推文
+
+        Args:
+            tweets: 推文对象列表
+            crawl_id: 本次爬取的标识，用于生成幂等label
+            table_name: 可选的表名，默认使用推文主表
+
+        Returns:
+            导入结果字典
+        """
+        target_table = table_name or self.tables.get('tweet', 'twitter_tweet')
+
+        # 与 TweetDAO.batch_upsert_tweets 保持相同的过滤规则
+        valid_tweets = [tweet for tweet in tweets if tweet.validate() and tweet.is_valid != 0]
+        if len(valid_tweets) != len(tweets):
+            self.logger.info(f"Stream Load过滤推文: {len(tweets) - len(valid_tweets)} 条")
+
+        fields = tweet_dao.get_insert_fields(target_table)
+        rows = [
+            dict(zip(fields, tweet_dao.build_insert_params(tweet, fields, target_table)))
+            for tweet in valid_tweets
+        ]
+        return self.load_rows(target_table, fields, rows, crawl_id)
+
+    def load_users(self, users: List[TwitterUser], crawl_id: str) -> Dict[str, Any]:
+        """
+        通过Stream Load导入用户
+
+        Args:
+            users: 用户对象列表
+            crawl_id: 本次爬取的标识，用于生成幂等label
+
+        Returns:
+            导入结果字典
+        """
+        target_table = self.tables.get('user', 'twitter_user')
+
+        # 与 UserDAO.batch_upsert_users 保持相同的字段
+        fields = [
+            'id_str', 'screen_name', 'name', 'description', 'avatar',
+            'created_at', 'followers_count', 'friends_count',
+            'statuses_count', 'language', 'update_time'
+        ]
+        rows = []
+        for user in users:
+            if not user.validate():
+                continue
+            user_data = user.to_dict()
+            rows.append({field: user_data.get(field) for field in fields})
+
+        return self.load_rows(target_table, fields, rows, crawl_id)
+
+    def load_quotations(self, quotations: List[Dict[str, Any]], crawl_id: str) -> Dict[str, Any]:
+        """
+        通过Stream Load导入引用关系
+
+        Args:
+            quotations: 引用关系数据列表
+            crawl_id: 本次爬取的标识，用于生成幂等label
+
+        Returns:
+            导入结果字典
+        """
+        target_table = 'twitter_quotations'
+
+        # 与 QuotationDAO.batch_insert_quotations 保持相同的字段和校验
+        required_fields = [
+            'twitter_id', 'user_id', 'user_name',
+            'twitter_quotation_id', 'user_quotation_id',
+            'quotations_user_name'
+        ]
+        fields = required_fields + ['quotation_name']
+        rows = []
+        for quotation in quotations:
+            if not all(quotation.get(field) for field in required_fields):
+                continue
+            row = {field: quotation.get(field) for field in required_fields}
+            row['quotation_name'] = quotation['quotations_user_name']
+            rows.append(row)
+
+        return self.load_rows(target_table, fields, rows, crawl_id)
+
+    def load_rows(self, table_name: str, columns: List[str], rows: List[Dict[str, Any]],
+                  crawl_id: str, label: str = None) -> Dict[str, Any]:
+        """
+        将一批行数据作为一个Stream Load任务导入指定表
+
+        Args:
+            table_name: 目标表名
+            columns: 列名列表
+            rows: 行数据列表
+            crawl_id: 本次爬取的标识
+            label: 可选的导入label，不指定则由表名、爬取标识和数据摘要生成
+
+        Returns:
+            导入结果字典，包含 success、loaded_rows、status、label、message
+        """
+        if not rows:
+            return {'success': True, 'loaded_rows': 0, 'status': 'Empty', 'label': None, 'message': ''}
+
+        payload = self._serialize(columns, rows)
+        if label is None:
+            label = self._build_label(table_name, crawl_id, payload)
+
+        self.load_count += 1
+        result = self._send_with_retry(table_name, columns, payload, label)
+
+        if result['success']:
+            self.success_count += 1
+            self.loaded_rows += result['loaded_rows']
+            self.logger.info(f"Stream Load成功: {table_name}, label={label}, 导入 {result['loaded_rows']}/{len(rows)} 行")
+        else:
+            self.error_count += 1
+            self.logger.error(f"Stream Load失败: {table_name}, label={label}, 状态: {result['status']}, 信息: {result['message']}")
+
+        return result
+
+    def _send_with_retry(self, table_name: str, columns: List[str],
+                         payload: bytes, label: str) -> Dict[str, Any]:
+        """
+        发送导入请求，失败时使用相同label重试
+
+        Args:
+            table_name: 目标表名
+            columns: 列名列表
+            payload: 序列化后的数据
+            label: 导入label
+
+        Returns:
+            导入结果字典
+        """
+        result = {'success': False, 'loaded_rows': 0, 'status': 'Unknown', 'label': label, 'message': ''}
+
+        for attempt in range(self.max_retries):
+            try:
+                response_data = self._put(table_name, columns, payload, label)
+                result = self._parse_response(response_data, label)
+
+                # 数据问题导致的失败（如列不匹配、过滤率过高）重试无意义
+                if result['success'] or result['status'] == 'Fail':
+                    return result
+
+            except requests.exceptions.RequestException as e:
+                result['status'] = 'RequestError'
+                result['message'] = str(e)
+                self.logger.warning(f"Stream Load请求异常 (尝试 {attempt + 1}/{self.max_retries}): {e}")
+
+            except ValueError as e:
+                result['status'] = 'InvalidResponse'
+                result['message'] = str(e)
+                self.logger.warning(f"Stream Load响应解析失败 (尝试 {attempt + 1}/{self.max_retries}): {e}")
+
+            if attempt < self.max_retries - 1:
+                time.sleep(self.retry_delay * (attempt + 1))
+
+        return result
+
+    def _put(self, table_name: str, columns: List[str], payload: bytes, label: str) -> Dict[str, Any]:
+        """
+        向FE发送stream load请求，手动跟随到BE的307重定向
+
+        requests 在跨主机重定向时会丢弃认证头，因此这里手动处理重定向。
+
+        Args:
+            table_name: 目标表名
+            columns: 列名列表
+            payload: 序列化后的数据
+            label: 导入label
+
+        Returns:
+            Doris返回的JSON结果
+        """
+        url = f"http://{self.host}:{self.http_port}/api/{self.database}/{table_name}/_stream_load"
+        headers = self._build_headers(columns, label)
+        auth = (self.username, self.password)
+
+        for _ in range(3):
+            response = requests.put(url, data=payload, headers=headers, auth=auth,
+                                    timeout=self.timeout, allow_redirects=False)
+            if response.status_code in (301, 302, 307, 308) and response.headers.get('Location'):
+                url = response.headers['Location']
+                continue
+
+            response.raise_for_status()
+            return response.json()
+
+        raise requests.exceptions.TooManyRedirects(f"Stream Load重定向次数过多: {url}")
+
+    def _build_headers(self, columns: List[str], label: str) -> Dict[str, str]:
+        """
+        构建stream load请求头
+
+        Args:
+            columns: 列名列表
+            label: 导入label
+
+        Returns:
+            请求头字典
+        """
+        headers = {
+            'label': label,
+            'columns': ','.join(columns),
+            'Expect': '100-continue',
+        }
+
+        if self.data_format == 'csv':
+            headers.update({
+                'format': 'csv',
+                'column_separator': ',',
+                'enclose': '"',
+                'escape': '\\',
+            })
+        else:
+            headers.update({
+                'format': 'json',
+                'read_json_by_line': 'true',
+            })
+
+        return headers
+
+    def _parse_response(self, response_data: Dict[str, Any], label: str) -> Dict[str, Any]:
+        """
+        解析Doris返回的导入结果
+
+        Args:
+            response_data: Doris返回的JSON
+            label: 导入label
+
+        Returns:
+            导入结果字典
+        """
+        status = response_data.get('Status', 'Unknown')
+        message = response_data.get('Message', '')
+        loaded_rows = int(response_data.get('NumberLoadedRows', 0) or 0)
+
+        if status in SUCCESS_STATUSES:
+            success = True
+        elif status == 'Label Already Exists':
+            # 相同label的任务已提交过：已完成则视为成功，避免重复导入
+            success = response_data.get('ExistingJobStatus') in FINISHED_JOB_STATUSES
+            if success:
+                self.logger.info(f"Stream Load label已存在且已完成，跳过重复导入: {label}")
+        else:
+            success = False
+
+        return {
+            'success': success,
+            'loaded_rows': loaded_rows,
+            'status': status,
+            'label': label,
+            'message': message
+        }
+
+    def _serialize(self, columns: List[str], rows: List[Dict[str, Any]]) -> bytes:
+        """
+        将行数据序列化为JSON-lines或CSV
+
+        Args:
+            columns: 列名列表
+            rows: 行数据列表
+
+        Returns:
+            序列化后的字节串
+        """
+        if self.data_format == 'csv':
+            lines = [
+                ','.join(self._csv_field(row.get(column)) for column in columns)
+                for row in rows
+            ]
+            return ''.join(line + '\n' for line in lines).encode('utf-8')
+
+        lines = [
+            json.dumps({column: self._format_value(row.get(column)) for column in columns},
+                       ensure_ascii=False)
+            for row in rows
+        ]
+        return '\n'.join(lines).encode('utf-8')
+
+    def _csv_field(self, value: Any) -> str:
+        """
+        将单个值转换为CSV字段（与请求头中的 column_separator、enclose、escape 对应）
+
+        Args:
+            value: 原始值
+
+        Returns:
+            CSV字段：None 为不加引号的 \\N；包含分隔符、引号、转义符或换行的值用引号包围，
+            其中的引号和转义符前加转义符
+        """
+        if value is None:
+            return CSV_NULL
+
+        text = str(self._format_value(value))
+        if text == CSV_NULL or any(char in text for char in CSV_SPECIAL_CHARS):
+            return '"' + text.replace('\\', '\\\\').replace('"', '\\"') + '"'
+        return text
+
+    def _format_value(self, value: Any) -> Any:
+        """
+        将Python值转换为Doris可识别的格式
+
+        Args:
+            value: 原始值
+
+        Returns:
+            转换后的值
+        """
+        if isinstance(value, datetime):
+            return value.strftime('%Y-%m-%d %H:%M:%S')
+        if isinstance(value, date):
+            return value.strftime('%Y-%m-%d')
+        if isinstance(value, bool):
+            return int(value)
+        if isinstance(value, (list, dict)):
+            return json.dumps(value, ensure_ascii=False)
+        return value
+
+    def _build_label(self, table_name: str, crawl_id: str, payload: bytes) -> str:
+        """
+        生成导入label：同一次爬取的同一批数据重试时label不变
+
+        Args:
+            table_name: 目标表名
+            crawl_id: 本次爬取的标识
+            payload: 序列化后的数据
+
+        Returns:
+            符合Doris规则的label（字母、数字、-_:，最长128字符）
+        """
+        digest = hashlib.sha1(payload).hexdigest()[:16]
+        label = f"{self.label_prefix}_{table_name}_{crawl_id}_{digest}"
+        return re.sub(r'[^A-Za-z0-9_\-:]', '_', label)[:128]
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """
+        获取统计信息
+
+        Returns:
+            统计信息字典
+        """
+        return {
+            'enabled': self.enabled,
+            'load_count': self.load_count,
+            'success_count': self.success_count,
+            'error_count': self.error_count,
+            'loaded_rows': self.loaded_rows
+        }
+
+
+# 全局Stream Load写入器实例
+stream_loader = DorisStreamLoader()
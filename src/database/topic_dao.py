@@ -7,7 +7,9 @@ from datetime import datetime, timedelta
 import json
 
 from .connection import db_manager
+from .entity_cache import get_entity_cache
 from ..models.topic import Topic
+from ..utils.config_manager import config
 
 
 class TopicDAO:
@@ -18,6 +20,8 @@ class TopicDAO:
         self.db_manager = db_manager
         self.table_name = self.db_manager.db_config.get('tables', {}).get('topic', 'topics')
         self.logger = logging.getLogger(__name__)
+        # 按名称查询话题的读穿缓存
+        self.name_cache = get_entity_cache(f"{self.table_name}:name")
     
     def insert_topic(self, topic: Topic) -> bool:
         """
@@ -67,6 +71,7 @@ class TopicDAO:
             success = affected_rows > 0
             
             if success:
+                self._cache_topic(topic)
                 self.logger.info(f"话题插入成功: {topic.topic_name} (ID: {topic.topic_id})")
             else:
                 self.logger.warning(f"话题插入失败: {topic.topic_name}")
@@ -92,8 +97,8 @@ class TopicDAO:
             return False
         
         try:
-            # 先尝试查找现有话题
-            existing_topic = self.get_topic_by_name(topic.topic_name)
+            # 先尝试查找现有话题（直接查询数据库，随后要按ID删除旧记录）
+            existing_topic = self._query_topic_by_name(topic.topic_name)
             
             if existing_topic:
                 # Doris不允许更新主键，所以删除旧记录再插入新记录
@@ -177,54 +182,75 @@ class TopicDAO:
             self.logger.error(f"查询话题失败: {topic_id}, 错误: {e}")
             return None
     
-    def get_topic_by_name(self, topic_name: str) -> Optional[Topic]:
+    def get_topic_by_name(self, topic_name: str, bypass_negative: bool = False) -> Optional[Topic]:
         """
         根据话题名称查询话题
         
         Args:
             topic_name: 话题名称
+            bypass_negative: 忽略"不存在"的缓存重新查询（创建话题前的复查使用）
             
         Returns:
             话题对象或None
         """
         try:
-            sql = f"""
-            SELECT topic_id, topic_name, created_at, brief, key_entities, popularity,
-                   propagation_speed_5m, propagation_speed_1h, propagation_speed_4h,
-                   kol_opinions, mob_opinion_direction, summary,
-                   popularity_history, update_time
-            FROM {self.table_name}
-            WHERE topic_name = %s
-            LIMIT 1
-            """
-            
-            results = self.db_manager.execute_query(sql, (topic_name,))
-            
-            if results:
-                row = results[0]
-                topic = Topic(
-                    topic_id=row['topic_id'],
-                    topic_name=row['topic_name'],
-                    created_at=row['created_at'],
-                    brief=row['brief'],
-                    key_entities=row['key_entities'],  # 新增字段
-                    popularity=row['popularity'],
-                    propagation_speed_5m=row['propagation_speed_5m'],
-                    propagation_speed_1h=row['propagation_speed_1h'],
-                    propagation_speed_4h=row['propagation_speed_4h'],
-                    kol_opinions=json.loads(row['kol_opinions']) if row['kol_opinions'] else [],
-                    mob_opinion_direction=row['mob_opinion_direction'],
-                    summary=row['summary'],
-                    popularity_history=json.loads(row['popularity_history']) if row['popularity_history'] else [],
-                    update_time=row['update_time']
-                )
-                return topic
-            
-            return None
+            return self.name_cache.get_or_load(topic_name, self._query_topic_by_name, bypass_negative)
             
         except Exception as e:
             self.logger.error(f"根据名称查询话题失败: {topic_name}, 错误: {e}")
             return None
+
+    def _query_topic_by_name(self, topic_name: str) -> Optional[Topic]:
+        """按名称查询数据库（查询失败时抛出异常，避免被负缓存）"""
+        sql = f"""
+        SELECT topic_id, topic_name, created_at, brief, key_entities, popularity,
+               propagation_speed_5m, propagation_speed_1h, propagation_speed_4h,
+               kol_opinions, mob_opinion_direction, summary,
+               popularity_history, update_time
+        FROM {self.table_name}
+        WHERE topic_name = %s
+        LIMIT 1
+        """
+        
+        results = self.db_manager.execute_query(sql, (topic_name,))
+        
+        if results:
+            row = results[0]
+            topic = Topic(
+                topic_id=row['topic_id'],
+                topic_name=row['topic_name'],
+                created_at=row['created_at'],
+                brief=row['brief'],
+                key_entities=row['key_entities'],  # 新增字段
+                popularity=row['popularity'],
+                propagation_speed_5m=row['propagation_speed_5m'],
+                propagation_speed_1h=row['propagation_speed_1h'],
+                propagation_speed_4h=row['propagation_speed_4h'],
+                kol_opinions=json.loads(row['kol_opinions']) if row['kol_opinions'] else [],
+                mob_opinion_direction=row['mob_opinion_direction'],
+                summary=row['summary'],
+                popularity_history=json.loads(row['popularity_history']) if row['popularity_history'] else [],
+                update_time=row['update_time']
+            )
+            return topic
+        
+        return None
+
+    def _cache_topic(self, topic: Topic) -> None:
+        """写入成功后更新名称缓存（话题改名时移除旧名称）"""
+        self.name_cache.invalidate_where(
+            lambda cached: cached.topic_id == topic.topic_id and cached.topic_name != topic.topic_name
+        )
+        self.name_cache.put(topic.topic_name, topic)
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """
+        获取名称缓存统计
+
+        Returns:
+            命中率等统计信息
+        """
+        return self.name_cache.get_stats()
     
     def get_topics_by_date_range(self, start_date: datetime, end_date: datetime, 
                                 limit: int = 100) -> List[Topic]:
@@ -378,6 +404,7 @@ class TopicDAO:
             
             success = affected_rows > 0
             if success:
+                self.name_cache.invalidate_where(lambda cached: cached.topic_id == topic_id)
                 self.logger.info(f"话题删除成功: {topic_id}")
             else:
                 self.logger.warning(f"话题删除失败，可能不存在: {topic_id}")
@@ -444,6 +471,38 @@ class TopicDAO:
             self.logger.error(f"查询指定时间以来的话题失败: {e}")
             return []
     
+    def get_topics_updated_since(self, since_time: Optional[datetime] = None,
+                                 limit: int = 5000) -> List[Topic]:
+        """
+        按更新时间升序获取更新时间不早于指定时间的话题（用于增量刷新内存索引）
+
+        Args:
+            since_time: 起始更新时间，None表示从最早的话题开始
+            limit: 限制数量
+
+        Returns:
+            话题列表
+        """
+        try:
+            if since_time is None:
+                sql = f"SELECT * FROM {self.table_name} ORDER BY update_time ASC LIMIT %s"
+                params = (limit,)
+            else:
+                sql = f"""
+                SELECT * FROM {self.table_name}
+                WHERE update_time >= %s
+                ORDER BY update_time ASC
+                LIMIT %s
+                """
+                params = (since_time, limit)
+            results = self.db_manager.execute_query(sql, params)
+
+            return [Topic.from_dict(row) for row in results]
+
+        except Exception as e:
+            self.logger.error(f"查询更新时间以来的话题失败: {e}")
+            return []
+    
     def insert(self, topic: Topic) -> bool:
         """
         插入话题数据（新的简化接口）
@@ -509,6 +568,7 @@ class TopicDAO:
             success = affected_rows > 0
             
             if success:
+                self._cache_topic(topic)
                 self.logger.info(f"话题更新成功: {topic.topic_name} (ID: {topic.topic_id})")
             else:
                 self.logger.warning(f"话题更新失败: {topic.topic_name}")
@@ -519,46 +579,57 @@ class TopicDAO:
             self.logger.error(f"更新话题数据失败: {topic.topic_name}, 错误: {e}")
             return False
     
-    def update_topic_popularity(self, topic_id: str, new_popularity: int) -> bool:
+    def append_popularity_history(self, popularities: Dict[str, int]) -> Dict[str, List[Dict[str, Any]]]:
         """
-        更新话题的热度值
-        
+        批量更新话题热度，并在数据库中当前的热度历史末尾追加一条
+
+        先按批读取当前的热度历史再用一条CASE UPDATE写入，不使用内存中可能过期的话题对象，
+        不会覆盖话题引擎等其他写入者追加的记录
+
         Args:
-            topic_id: 话题ID
-            new_popularity: 新的热度值
-            
+            popularities: 话题ID -> 新的热度值
+
         Returns:
-            是否更新成功
+            写入成功的话题ID -> 写入后的热度历史
         """
-        if not topic_id:
-            self.logger.error("更新话题热度时topic_id不能为空")
-            return False
-            
-        try:
-            sql = f"""
-            UPDATE {self.table_name} SET
-                popularity = %s,
-                update_time = %s
-            WHERE topic_id = %s
-            """
-            
-            from datetime import datetime
-            params = (new_popularity, datetime.now(), topic_id)
-            
-            affected_rows = self.db_manager.execute_update(sql, params)
-            success = affected_rows > 0
-            
-            if success:
-                self.logger.debug(f"话题热度更新成功: {topic_id} -> {new_popularity}")
-            else:
-                self.logger.warning(f"话题热度更新失败: {topic_id}")
-            
-            return success
-            
-        except Exception as e:
-            self.logger.error(f"更新话题热度失败: {topic_id}, 错误: {e}")
-            return False
-    
+        if not popularities:
+            return {}
+
+        now = datetime.now()
+        topic_ids = list(popularities)
+        chunk_size = config.get('database.bulk_insert.chunk_size', 200)
+        written = {}
+        for i in range(0, len(topic_ids), chunk_size):
+            chunk = topic_ids[i:i + chunk_size]
+            try:
+                sql = f"""
+                SELECT topic_id, popularity_history
+                FROM {self.table_name}
+                WHERE topic_id IN ({', '.join(['%s'] * len(chunk))})
+                """
+                results = self.db_manager.execute_query(sql, tuple(chunk))
+
+                histories = {}
+                rows = []
+                for row in results:
+                    topic_id = row['topic_id']
+                    history = json.loads(row['popularity_history']) if row['popularity_history'] else []
+                    history.append({'popularity': popularities[topic_id], 'timestamp': now.isoformat()})
+                    histories[topic_id] = history
+                    rows.append((topic_id, {
+                        'popularity': popularities[topic_id],
+                        'update_time': now,
+                        'popularity_history': json.dumps(history, ensure_ascii=False)
+                    }))
+
+                self.db_manager.execute_case_update(self.table_name, 'topic_id', rows)
+                written.update(histories)
+
+            except Exception as e:
+                self.logger.error(f"批量更新话题热度历史失败: {len(chunk)} 个话题, 错误: {e}")
+
+        return written
+
     def get_by_id(self, topic_id: str) -> Optional[Topic]:
         """
         根据ID获取话题（简化接口）
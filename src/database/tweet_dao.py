@@ -7,6 +7,7 @@ from datetime import datetime
 
 from .connection import db_manager
 from ..models.tweet import Tweet
+from ..utils.config_manager import config
 
 
 class TweetDAO:
@@ -174,13 +175,15 @@ class TweetDAO:
             self.logger.error(f"推文upsert失败: {tweet.id_str}, 错误: {e}")
             return False
     
-    def batch_upsert_tweets(self, tweets: List[Tweet], table_name: str = None) -> int:
+    def batch_upsert_tweets(self, tweets: List[Tweet], table_name: str = None,
+                            chunk_size: Optional[int] = None) -> int:
         """
         批量插入或更新推文数据
         
         Args:
             tweets: 推文对象列表
             table_name: 可选的表名，如果不指定则使用默认的self.table_name
+            chunk_size: 每个多行INSERT包含的行数，默认读取 database.bulk_insert.chunk_size
             
         Returns:
             成功操作的数量
@@ -204,37 +207,9 @@ class TweetDAO:
             target_table = table_name if table_name is not None else self.table_name
             
             # 根据表名动态决定字段列表
-            if target_table in ['twitter_tweet_project_new', 'twitter_tweet_back_test_cmc300']:
-                # 项目推文表字段（根据实际表结构调整，排除缺失字段）
-                if target_table == 'twitter_tweet_back_test_cmc300':
-                    # twitter_tweet_back_test_cmc300 表的实际字段（只保留确实存在的核心字段）
-                    fields = [
-                        'id_str', 'full_text', 'created_at_datetime',
-                        'bookmark_count', 'favorite_count', 'quote_count', 'reply_count',
-                        'retweet_count', 'view_count', 'engagement_total', 'update_time',
-                        'sentiment', 'user_id', 'tweet_url', 'link_url', 'isAnnounce', 'summary', 
-                        'is_activity', 'activity_detail', 'is_retweet', 'user_name'
-                    ]
-                else:
-                    # twitter_tweet_project_new 表的字段（保持原有配置）
-                    fields = [
-                        'id_str', 'conversation_id_str', 'in_reply_to_status_id_str',
-                        'full_text', 'created_at', 'created_at_datetime',
-                        'bookmark_count', 'favorite_count', 'quote_count', 'reply_count',
-                        'retweet_count', 'view_count', 'engagement_total', 'update_time',
-                        'sentiment', 'user_id', 'tweet_url', 'link_url', 'isAnnounce', 'summary', 'is_activity', 'activity_detail', 'is_retweet', 'user_name'
-                    ]
-            else:
-                # 常规推文表字段（包含所有字段）
-                fields = [
-                    'id_str', 'conversation_id_str', 'in_reply_to_status_id_str',
-                    'full_text', 'created_at', 'created_at_datetime',
-                    'bookmark_count', 'favorite_count', 'quote_count', 'reply_count',
-                    'retweet_count', 'view_count', 'engagement_total', 'update_time',
-                    'kol_id', 'entity_id', 'project_id', 'topic_id', 'is_valid', 'sentiment', 'tweet_url', 'link_url', 'token_tag', 'project_tag', 'isAnnounce', 'summary', 'is_real_project_tweet'
-                ]
+            fields = self.get_insert_fields(target_table)
             
-            # 构建SQL语句
+            # 构建SQL语句（逐行模式及分块失败回退时使用）
             fields_str = ', '.join(fields)
             placeholders = ', '.join(['%s'] * len(fields))
             sql = f"""
@@ -245,54 +220,26 @@ class TweetDAO:
             )
             """
 
+            if chunk_size is None:
+                chunk_size = config.get('database.bulk_insert.chunk_size', 200)
+            bulk_enabled = config.get('database.bulk_insert.enabled', True) and chunk_size > 1
+
             success_count = 0
-            for tweet in valid_tweets:
-                try:
-                    tweet_data = tweet.to_dict()
-                    
-                    # 根据字段列表动态提取参数
-                    if target_table in ['twitter_tweet_project_new', 'twitter_tweet_back_test_cmc300']:
-                        # 项目推文表：只提取存在的字段
-                        params = tuple(tweet_data.get(field) for field in fields)
-                    else:
-                        # 常规推文表：使用原有逻辑保持兼容性
-                        params = (
-                            tweet_data['id_str'],
-                            tweet_data['conversation_id_str'],
-                            tweet_data['in_reply_to_status_id_str'],
-                            tweet_data['full_text'],
-                            tweet_data['created_at'],
-                            tweet_data['created_at_datetime'],
-                            tweet_data['bookmark_count'],
-                            tweet_data['favorite_count'],
-                            tweet_data['quote_count'],
-                            tweet_data['reply_count'],
-                            tweet_data['retweet_count'],
-                            tweet_data['view_count'],
-                            tweet_data['engagement_total'],
-                            tweet_data['update_time'],
-                            tweet_data['kol_id'],
-                            tweet_data['entity_id'],
-                            tweet_data['project_id'],
-                            tweet_data['topic_id'],
-                            tweet_data['is_valid'],
-                            tweet_data['sentiment'],
-                            tweet_data['tweet_url'],
-                            tweet_data.get('link_url'),
-                            tweet_data.get('token_tag'),
-                            tweet_data.get('project_tag'),
-                            tweet_data.get('isAnnounce', 0),
-                            tweet_data.get('summary'),
-                            tweet_data.get('is_real_project_tweet', 0)
-                        )
-                    
-                    affected_rows = self.db_manager.execute_update(sql, params)
-                    if affected_rows > 0:
-                        success_count += 1
-                        
-                except Exception as e:
-                    self.logger.error(f"插入推文失败: {tweet.id_str}, 错误: {e}")
-                    continue
+            if bulk_enabled:
+                # 分块多行VALUES插入：每块一次往返、一个事务
+                for i in range(0, len(valid_tweets), chunk_size):
+                    chunk = valid_tweets[i:i + chunk_size]
+                    try:
+                        params_list = [self.build_insert_params(tweet, fields, target_table) for tweet in chunk]
+                        affected_rows = self.db_manager.execute_bulk_insert(target_table, fields, params_list)
+                        if affected_rows < len(chunk):
+                            self.logger.warning(f"分块批量插入只写入 {affected_rows}/{len(chunk)} 条")
+                        success_count += min(affected_rows, len(chunk))
+                    except Exception as e:
+                        self.logger.warning(f"分块批量插入失败，回退逐行插入: {len(chunk)} 条, 错误: {e}")
+                        success_count += self._insert_tweets_row_by_row(chunk, sql, fields, target_table)
+            else:
+                success_count = self._insert_tweets_row_by_row(valid_tweets, sql, fields, target_table)
             
             self.logger.info(f"批量upsert推文成功: {success_count}/{len(valid_tweets)} 条数据")
             return success_count
@@ -301,6 +248,220 @@ class TweetDAO:
             self.logger.error(f"批量upsert推文数据失败: {e}")
             return 0
     
+    def get_existing_ids(self, id_strs: List[str], table_name: str = None) -> set:
+        """
+        批量查询已存在的推文ID
+        
+        Args:
+            id_strs: 推文ID列表
+            table_name: 可选的表名，默认使用self.table_name
+            
+        Returns:
+            已存在于表中的推文ID集合
+        """
+        if not id_strs:
+            return set()
+        
+        target_table = table_name if table_name is not None else self.table_name
+        unique_ids = list(dict.fromkeys(id_str for id_str in id_strs if id_str))
+        chunk_size = config.get('database.bulk_insert.chunk_size', 200) * 5
+        existing_ids = set()
+        
+        try:
+            for i in range(0, len(unique_ids), chunk_size):
+                chunk = unique_ids[i:i + chunk_size]
+                placeholders = ', '.join(['%s'] * len(chunk))
+                sql = f"SELECT id_str FROM {target_table} WHERE id_str IN ({placeholders})"
+                results = self.db_manager.execute_query(sql, tuple(chunk))
+                existing_ids.update(row['id_str'] for row in results)
+            
+            self.logger.info(f"查询已存在推文: {len(existing_ids)}/{len(unique_ids)} 条已入库")
+            return existing_ids
+            
+        except Exception as e:
+            self.logger.error(f"批量查询已存在推文失败: {e}")
+            return set()
+    
+    def batch_update_engagement(self, tweets: List[Tweet], table_name: str = None,
+                                chunk_size: Optional[int] = None) -> int:
+        """
+        批量只更新已入库推文的互动数据（favorite_count, retweet_count, view_count, engagement_total, update_time）
+        
+        Args:
+            tweets: 推文对象列表
+            table_name: 可选的表名，默认使用self.table_name
+            chunk_size: 每条UPDATE包含的推文数，默认读取 database.bulk_insert.chunk_size
+            
+        Returns:
+            成功更新的推文数量
+        """
+        if not tweets:
+            return 0
+        
+        target_table = table_name if table_name is not None else self.table_name
+        if chunk_size is None:
+            chunk_size = config.get('database.bulk_insert.chunk_size', 200)
+        chunk_size = max(1, chunk_size)
+        
+        engagement_fields = ['favorite_count', 'retweet_count', 'view_count', 'engagement_total']
+        update_time = datetime.now()
+        success_count = 0
+        
+        for i in range(0, len(tweets), chunk_size):
+            chunk = tweets[i:i + chunk_size]
+            try:
+                # 每个字段一个 CASE 表达式，整块推文一条UPDATE
+                set_clauses = []
+                params = []
+                for field in engagement_fields:
+                    cases = ' '.join(['WHEN %s THEN %s'] * len(chunk))
+                    set_clauses.append(f"{field} = CASE id_str {cases} ELSE {field} END")
+                    for tweet in chunk:
+                        value = getattr(tweet, field, None)
+                        params.extend([tweet.id_str, value if value is not None else 0])
+                
+                set_clauses.append("update_time = %s")
+                params.append(update_time)
+                
+                placeholders = ', '.join(['%s'] * len(chunk))
+                params.extend(tweet.id_str for tweet in chunk)
+                
+                sql = f"""
+                UPDATE {target_table}
+                SET {', '.join(set_clauses)}
+                WHERE id_str IN ({placeholders})
+                """
+                
+                self.db_manager.execute_update(sql, tuple(params))
+                success_count += len(chunk)
+                
+            except Exception as e:
+                self.logger.error(f"批量更新推文互动数据失败: {len(chunk)} 条, 错误: {e}")
+                continue
+        
+        self.logger.info(f"批量更新推文互动数据: {success_count}/{len(tweets)} 条")
+        return success_count
+    
+    def get_insert_fields(self, target_table: str) -> List[str]:
+        """
+        根据目标表名获取插入字段列表
+        
+        Args:
+            target_table: 目标表名
+            
+        Returns:
+            字段列表
+        """
+        if target_table in ['twitter_tweet_project_new', 'twitter_tweet_back_test_cmc300']:
+            # 项目推文表字段（根据实际表结构调整，排除缺失字段）
+            if target_table == 'twitter_tweet_back_test_cmc300':
+                # twitter_tweet_back_test_cmc300 表的实际字段（只保留确实存在的核心字段）
+                fields = [
+                    'id_str', 'full_text', 'created_at_datetime',
+                    'bookmark_count', 'favorite_count', 'quote_count', 'reply_count',
+                    'retweet_count', 'view_count', 'engagement_total', 'update_time',
+                    'sentiment', 'user_id', 'tweet_url', 'link_url', 'isAnnounce', 'summary', 
+                    'is_activity', 'activity_detail', 'is_retweet', 'user_name'
+                ]
+            else:
+                # twitter_tweet_project_new 表的字段（保持原有配置）
+                fields = [
+                    'id_str', 'conversation_id_str', 'in_reply_to_status_id_str',
+                    'full_text', 'created_at', 'created_at_datetime',
+                    'bookmark_count', 'favorite_count', 'quote_count', 'reply_count',
+                    'retweet_count', 'view_count', 'engagement_total', 'update_time',
+                    'sentiment', 'user_id', 'tweet_url', 'link_url', 'isAnnounce', 'summary', 'is_activity', 'activity_detail', 'is_retweet', 'user_name'
+                ]
+        else:
+            # 常规推文表字段（包含所有字段）
+            fields = [
+                'id_str', 'conversation_id_str', 'in_reply_to_status_id_str',
+                'full_text', 'created_at', 'created_at_datetime',
+                'bookmark_count', 'favorite_count', 'quote_count', 'reply_count',
+                'retweet_count', 'view_count', 'engagement_total', 'update_time',
+                'kol_id', 'entity_id', 'project_id', 'topic_id', 'is_valid', 'sentiment', 'tweet_url', 'link_url', 'token_tag', 'project_tag', 'isAnnounce', 'summary', 'is_real_project_tweet'
+            ]
+        
+        return fields
+    
+    def build_insert_params(self, tweet: Tweet, fields: List[str], target_table: str) -> tuple:
+        """
+        按字段列表构建单条推文的插入参数
+        
+        Args:
+            tweet: 推文对象
+            fields: 字段列表
+            target_table: 目标表名
+            
+        Returns:
+            参数元组
+        """
+        tweet_data = tweet.to_dict()
+        
+        # 根据字段列表动态提取参数
+        if target_table in ['twitter_tweet_project_new', 'twitter_tweet_back_test_cmc300']:
+            # 项目推文表：只提取存在的字段
+            return tuple(tweet_data.get(field) for field in fields)
+        
+        # 常规推文表：使用原有逻辑保持兼容性
+        return (
+            tweet_data['id_str'],
+            tweet_data['conversation_id_str'],
+            tweet_data['in_reply_to_status_id_str'],
+            tweet_data['full_text'],
+            tweet_data['created_at'],
+            tweet_data['created_at_datetime'],
+            tweet_data['bookmark_count'],
+            tweet_data['favorite_count'],
+            tweet_data['quote_count'],
+            tweet_data['reply_count'],
+            tweet_data['retweet_count'],
+            tweet_data['view_count'],
+            tweet_data['engagement_total'],
+            tweet_data['update_time'],
+            tweet_data['kol_id'],
+            tweet_data['entity_id'],
+            tweet_data['project_id'],
+            tweet_data['topic_id'],
+            tweet_data['is_valid'],
+            tweet_data['sentiment'],
+            tweet_data['tweet_url'],
+            tweet_data.get('link_url'),
+            tweet_data.get('token_tag'),
+            tweet_data.get('project_tag'),
+            tweet_data.get('isAnnounce', 0),
+            tweet_data.get('summary'),
+            tweet_data.get('is_real_project_tweet', 0)
+        )
+    
+    def _insert_tweets_row_by_row(self, tweets: List[Tweet], sql: str,
+                                  fields: List[str], target_table: str) -> int:
+        """
+        逐行插入推文，单条失败不影响其他推文
+        
+        Args:
+            tweets: 推文对象列表
+            sql: 单行INSERT语句
+            fields: 字段列表
+            target_table: 目标表名
+            
+        Returns:
+            成功插入的数量
+        """
+        success_count = 0
+        for tweet in tweets:
+            try:
+                params = self.build_insert_params(tweet, fields, target_table)
+                affected_rows = self.db_manager.execute_update(sql, params)
+                if affected_rows > 0:
+                    success_count += 1
+                    
+            except Exception as e:
+                self.logger.error(f"插入推文失败: {tweet.id_str}, 错误: {e}")
+                continue
+        
+        return success_count
+    
     def get_tweet_by_id(self, id_str: str) -> Optional[Tweet]:
         """
         根据ID获取推文
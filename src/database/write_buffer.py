@@ -0,0 +1,493 @@
+"""
+写后缓冲（write-behind）
+按 通道（表 + 写入类型）和主键合并待写入的数据，同一主键只保留最新的列值，
+达到数量阈值或时间阈值时由后台线程批量写入；每次写入先追加到本地spool文件，进程崩溃后启动时恢复
+
+每个服务（启动脚本 + 运行模式）使用自己的spool文件，进程存活期间持有文件锁；
+同一服务同时运行多个进程时，后启动的进程使用带序号的spool文件，不会读取或写入其他进程的待写入数据
+"""
+import atexit
+import itertools
+import json
+import logging
+import os
+import re
+import sys
+import threading
+from datetime import datetime, date
+from pathlib import Path
+from typing import Callable, Dict, Any, List, Optional, Tuple
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    fcntl = None
+    FCNTL_AVAILABLE = False
+
+from ..utils.config_manager import config
+
+
+# 通道的批量写入函数：接收 [(主键, 列值字典)]，返回写入行数，失败时抛出异常
+FlushFunction = Callable[[List[Tuple[str, Dict[str, Any]]]], int]
+
+
+def default_service_name() -> str:
+    """
+    按启动脚本和运行模式生成服务名称（例如 main-schedule、main-project-schedule、backfill_project_tags）
+
+    Returns:
+        可用作文件名的服务名称
+    """
+    argv = sys.argv or ['']
+    name = Path(argv[0]).stem if argv[0] else 'python'
+    for index, arg in enumerate(argv[1:], 1):
+        if arg == '--mode' and index + 1 < len(argv):
+            name = f"{name}-{argv[index + 1]}"
+        elif arg.startswith('--mode='):
+            name = f"{name}-{arg.split('=', 1)[1]}"
+    return re.sub(r'[^\w.-]', '_', name).strip('.') or 'python'
+
+
+class WriteBehindBuffer:
+    """按通道和主键合并的写后缓冲"""
+
+    def __init__(self, settings: Dict[str, Any] = None):
+        """
+        初始化写后缓冲
+
+        Args:
+            settings: 缓冲参数，默认读取 database.write_buffer；
+                      spool文件默认为 spool_dir/<服务名称>.spool.jsonl，也可以用 spool_file 指定
+        """
+        self.logger = logging.getLogger(__name__)
+        if settings is None:
+            settings = config.get('database.write_buffer', {}) or {}
+
+        self.enabled = settings.get('enabled', True)
+        self.flush_size = settings.get('flush_size', 500)
+        self.flush_interval = settings.get('flush_interval_seconds', 5)
+        self.batch_size = settings.get('batch_size', config.get('database.bulk_insert.chunk_size', 200))
+        self.service_name = settings.get('service_name') or default_service_name()
+        spool_file = settings.get('spool_file') or str(
+            Path(settings.get('spool_dir', 'data/write_buffer')) / f"{self.service_name}.spool.jsonl")
+        self.spool_file = Path(spool_file)
+        self.spool_fsync = settings.get('spool_fsync', False)
+        # 同一行随批次写入失败达到该次数后改为逐行写入，逐行仍失败的行移入死信文件
+        self.max_retries = settings.get('max_retries', 5)
+
+        self._lock = threading.Lock()
+        # 同一时间只有一个线程执行批量写入
+        self._flush_lock = threading.Lock()
+        self._flushers: Dict[str, FlushFunction] = {}
+        self._pending: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._pending_count = 0
+        # (通道, 主键) -> 随批次写入失败的次数
+        self._attempts: Dict[Tuple[str, str], int] = {}
+        self._spool = None
+        # spool文件锁（进程存活期间一直持有）
+        self._spool_lock_file = None
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+        self.stats = {'queued': 0, 'coalesced': 0, 'flushed_rows': 0, 'flush_count': 0, 'failed_flushes': 0,
+                      'dead_letter_rows': 0}
+
+        if self.enabled:
+            self._acquire_spool()
+            self._recover_spool()
+            self._thread = threading.Thread(target=self._flush_loop, name='write-behind', daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+
+    def register(self, channel: str, flush_function: FlushFunction) -> None:
+        """
+        注册通道的批量写入函数
+
+        Args:
+            channel: 通道名称（建议使用 "表名:写入类型"）
+            flush_function: 批量写入函数
+        """
+        with self._lock:
+            self._flushers[channel] = flush_function
+
+    def put(self, channel: str, key: str, values: Dict[str, Any]) -> None:
+        """
+        加入一条待写入数据（立即返回，不访问数据库）
+
+        Args:
+            channel: 通道名称
+            key: 主键
+            values: 列值，与同一主键已有的待写入数据按列合并，新值覆盖旧值
+        """
+        values = {column: self._to_db_value(value) for column, value in values.items()}
+        with self._lock:
+            self._merge(channel, str(key), values)
+            self.stats['queued'] += 1
+            self._append_spool([(channel, str(key), values)])
+            should_flush = self._pending_count >= self.flush_size
+        if should_flush:
+            self._wakeup.set()
+
+    def _merge(self, channel: str, key: str, values: Dict[str, Any]) -> None:
+        """合并到待写入数据（调用方持有锁）"""
+        rows = self._pending.setdefault(channel, {})
+        existing = rows.get(key)
+        if existing is None:
+            rows[key] = dict(values)
+            self._pending_count += 1
+        else:
+            existing.update(values)
+            self.stats['coalesced'] += 1
+
+    def flush(self) -> int:
+        """
+        立即写入全部待写入数据（每次爬取结束时调用）
+
+        Returns:
+            写入的行数
+        """
+        if not self.enabled:
+            return 0
+
+        with self._flush_lock:
+            with self._lock:
+                # 未注册的通道（例如从spool恢复、但本进程没有加载对应DAO）留在缓冲中
+                batch = {channel: rows for channel, rows in self._pending.items() if channel in self._flushers}
+                if not batch:
+                    return 0
+                self._pending = {channel: rows for channel, rows in self._pending.items() if channel not in batch}
+                self._pending_count = sum(len(rows) for rows in self._pending.values())
+                # 本批数据对应的spool内容另存，新写入追加到新的spool文件
+                flushing_file = self._rotate_spool()
+                self._append_spool([(channel, key, values) for channel, rows in self._pending.items()
+                                    for key, values in rows.items()])
+                attempts = {(channel, key): self._attempts.get((channel, key), 0)
+                            for channel, rows in batch.items() for key in rows}
+
+            written = 0
+            failed: Dict[str, Dict[str, Dict[str, Any]]] = {}
+            dead_letters: List[Tuple[str, str, Dict[str, Any], str]] = []
+            for channel, rows in batch.items():
+                flush_function = self._flushers[channel]
+                items = [(key, values) for key, values in rows.items() if attempts[(channel, key)] < self.max_retries]
+                for start in range(0, len(items), self.batch_size):
+                    chunk = items[start:start + self.batch_size]
+                    try:
+                        written += flush_function(chunk) or 0
+                    except Exception as e:
+                        self.logger.error(f"写后缓冲批量写入失败: {channel}, {len(chunk)} 条, 错误: {e}")
+                        failed.setdefault(channel, {}).update(chunk)
+
+                # 多次随批次失败的行逐行写入，找出导致整批失败的行
+                for key, values in rows.items():
+                    if attempts[(channel, key)] < self.max_retries:
+                        continue
+                    try:
+                        written += flush_function([(key, values)]) or 0
+                    except Exception as e:
+                        dead_letters.append((channel, key, values, str(e)))
+
+            with self._lock:
+                self.stats['flush_count'] += 1
+                self.stats['flushed_rows'] += written
+                for channel_key in attempts:
+                    self._attempts.pop(channel_key, None)
+                if failed:
+                    self.stats['failed_flushes'] += 1
+                    for channel, rows in failed.items():
+                        for key in rows:
+                            self._attempts[(channel, key)] = attempts[(channel, key)] + 1
+                    self._requeue(failed)
+                if dead_letters:
+                    self.stats['dead_letter_rows'] += len(dead_letters)
+                    self._append_dead_letters(dead_letters)
+                self._discard_spool(flushing_file)
+
+            message = f"写后缓冲写入 {written} 行"
+            if failed:
+                message += f"，{sum(len(r) for r in failed.values())} 条待重试"
+            if dead_letters:
+                message += f"，{len(dead_letters)} 条逐行写入仍失败，已移入死信文件 {self.dead_letter_file}"
+            (self.logger.warning if dead_letters else self.logger.info)(message)
+            return written
+
+    def _requeue(self, failed: Dict[str, Dict[str, Dict[str, Any]]]) -> None:
+        """写入失败的数据放回缓冲，期间新加入的同主键数据优先（调用方持有锁）"""
+        entries = []
+        for channel, rows in failed.items():
+            pending_rows = self._pending.setdefault(channel, {})
+            for key, values in rows.items():
+                newer = pending_rows.get(key)
+                merged = dict(values)
+                if newer is not None:
+                    merged.update(newer)
+                else:
+                    self._pending_count += 1
+                pending_rows[key] = merged
+                entries.append((channel, key, merged))
+        self._append_spool(entries)
+
+    def _flush_loop(self) -> None:
+        """后台线程：按时间阈值或数量阈值写入"""
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            if self._stopped.is_set():
+                break
+            try:
+                self.flush()
+            except Exception as e:
+                self.logger.error(f"写后缓冲后台写入异常: {e}")
+
+    def pending_count(self) -> int:
+        """待写入的主键数量"""
+        with self._lock:
+            return self._pending_count
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取缓冲统计
+
+        Returns:
+            加入次数、合并次数、写入行数、写入次数、失败次数和当前待写入数量
+        """
+        with self._lock:
+            return dict(self.stats, pending=self._pending_count)
+
+    def close(self) -> None:
+        """写入剩余数据并停止后台线程"""
+        if not self.enabled or self._stopped.is_set():
+            return
+        self._stopped.set()
+        self._wakeup.set()
+        try:
+            self.flush()
+        except Exception as e:
+            self.logger.error(f"写后缓冲关闭时写入失败: {e}")
+        with self._lock:
+            if self._spool is not None:
+                self._spool.close()
+                self._spool = None
+            self._release_spool_lock()
+
+    @property
+    def dead_letter_file(self) -> Path:
+        """死信文件：逐行写入仍失败的行（格式与spool相同，附带错误信息，修复后可追加回spool文件重新写入）"""
+        return self.spool_file.with_name(self.spool_file.name + '.dead')
+
+    def _append_dead_letters(self, entries: List[Tuple[str, str, Dict[str, Any], str]]) -> None:
+        """追加写入死信文件（调用方持有锁）"""
+        failed_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        try:
+            self.dead_letter_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.dead_letter_file, 'a', encoding='utf-8') as f:
+                for channel, key, values, error in entries:
+                    f.write(json.dumps({'channel': channel, 'key': key, 'values': values,
+                                        'error': error, 'failed_at': failed_at}, ensure_ascii=False) + '\n')
+        except Exception as e:
+            self.logger.error(f"写入死信文件失败: {e}")
+
+    # ---- spool文件 ----
+
+    def _append_spool(self, entries: List[Tuple[str, str, Dict[str, Any]]]) -> None:
+        """追加写入spool文件（调用方持有锁）"""
+        if not entries:
+            return
+        try:
+            if self._spool is None:
+                self.spool_file.parent.mkdir(parents=True, exist_ok=True)
+                self._spool = open(self.spool_file, 'a', encoding='utf-8')
+            for channel, key, values in entries:
+                self._spool.write(json.dumps({'channel': channel, 'key': key, 'values': values},
+                                             ensure_ascii=False) + '\n')
+            self._spool.flush()
+            if self.spool_fsync:
+                os.fsync(self._spool.fileno())
+        except Exception as e:
+            self.logger.error(f"写入spool文件失败: {e}")
+
+    def _rotate_spool(self) -> Path:
+        """把当前spool文件改名为本批写入的备份（调用方持有锁）"""
+        if self._spool is not None:
+            self._spool.close()
+            self._spool = None
+        flushing_file = self._flushing_path(self.spool_file)
+        try:
+            if self.spool_file.exists():
+                os.replace(self.spool_file, flushing_file)
+        except Exception as e:
+            self.logger.error(f"轮换spool文件失败: {e}")
+        return flushing_file
+
+    def _discard_spool(self, flushing_file: Path) -> None:
+        """本批写入完成（失败部分已重新写入spool）后删除备份"""
+        try:
+            if flushing_file.exists():
+                flushing_file.unlink()
+        except Exception as e:
+            self.logger.error(f"删除spool备份失败: {e}")
+
+    @staticmethod
+    def _flushing_path(spool_file: Path) -> Path:
+        """spool文件对应的写入中备份"""
+        return spool_file.with_name(spool_file.name + '.flushing')
+
+    @staticmethod
+    def _lock_path(spool_file: Path) -> Path:
+        """spool文件对应的锁文件（spool文件会被轮换和替换，锁加在不会被替换的独立文件上）"""
+        return spool_file.with_name(spool_file.name + '.lock')
+
+    def _try_lock(self, spool_file: Path) -> Optional[Any]:
+        """
+        尝试以非阻塞方式锁定spool文件
+
+        Args:
+            spool_file: spool文件路径
+
+        Returns:
+            持有锁的文件对象，已被其他进程锁定时返回None
+        """
+        spool_file.parent.mkdir(parents=True, exist_ok=True)
+        lock_file = open(self._lock_path(spool_file), 'a')
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return None
+        return lock_file
+
+    def _acquire_spool(self) -> None:
+        """
+        选择并锁定本进程的spool文件
+
+        默认文件已被同一服务的其他进程锁定时依次尝试 <spool文件>.1、.2 …，
+        保证每个spool文件（及其备份）只被一个进程读写
+        """
+        if not FCNTL_AVAILABLE:
+            self.logger.warning("当前平台不支持文件锁，同一服务请勿同时运行多个进程")
+            return
+        base = self.spool_file
+        try:
+            for slot in itertools.count():
+                path = base if slot == 0 else base.with_name(f"{base.name}.{slot}")
+                lock_file = self._try_lock(path)
+                if lock_file is not None:
+                    self.spool_file = path
+                    self._spool_lock_file = lock_file
+                    break
+        except Exception as e:
+            self.logger.error(f"锁定spool文件失败: {e}")
+            return
+        if self.spool_file != base:
+            self.logger.info(f"spool文件 {base} 正被其他进程使用，本进程使用 {self.spool_file}")
+
+    def _release_spool_lock(self) -> None:
+        """释放spool文件锁（调用方持有锁）"""
+        if self._spool_lock_file is not None:
+            try:
+                self._spool_lock_file.close()
+            except Exception as e:
+                self.logger.error(f"释放spool文件锁失败: {e}")
+            self._spool_lock_file = None
+
+    def _orphan_spool_files(self) -> List[Path]:
+        """同一服务中其他序号、当前没有进程持有的spool文件（对应进程已退出）"""
+        base_name = re.sub(r'\.\d+$', '', self.spool_file.name)
+        pattern = re.compile(re.escape(base_name) + r'(\.\d+)?$')
+        paths = set()
+        for path in self.spool_file.parent.glob(base_name + '*'):
+            name = path.name
+            for suffix in ('.flushing', '.lock'):
+                if name.endswith(suffix):
+                    name = name[:-len(suffix)]
+            if pattern.fullmatch(name) and name != self.spool_file.name:
+                paths.add(path.with_name(name))
+        return sorted(paths)
+
+    def _read_spool(self, paths: List[Path]) -> int:
+        """读取spool文件合并到待写入数据（调用方持有锁）"""
+        recovered = 0
+        for path in paths:
+            if not path.exists():
+                continue
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        if not line.strip():
+                            continue
+                        try:
+                            entry = json.loads(line)
+                        except json.JSONDecodeError:
+                            # 崩溃时写了一半的最后一行
+                            continue
+                        self._merge(entry['channel'], entry['key'], entry['values'])
+                        recovered += 1
+            except Exception as e:
+                self.logger.error(f"读取spool文件失败: {path}, 错误: {e}")
+        return recovered
+
+    def _recover_spool(self) -> None:
+        """
+        启动时恢复上次未写入的数据（先恢复写入中的备份，再恢复新的spool），
+        同时接管同一服务中已退出进程遗留的其他序号spool文件
+        """
+        flushing_file = self._flushing_path(self.spool_file)
+        with self._lock:
+            recovered = self._read_spool([flushing_file, self.spool_file])
+
+            adopted = []
+            if self._spool_lock_file is not None:
+                for orphan in self._orphan_spool_files():
+                    if not (orphan.exists() or self._flushing_path(orphan).exists()):
+                        continue
+                    try:
+                        orphan_lock = self._try_lock(orphan)
+                    except Exception as e:
+                        self.logger.error(f"锁定spool文件失败: {orphan}, 错误: {e}")
+                        continue
+                    if orphan_lock is None:
+                        continue
+                    count = self._read_spool([self._flushing_path(orphan), orphan])
+                    recovered += count
+                    adopted.append((orphan, orphan_lock))
+
+            if recovered:
+                # 压缩为合并后的数据
+                entries = [(channel, key, values) for channel, rows in self._pending.items()
+                           for key, values in rows.items()]
+                tmp_path = self.spool_file.with_name(self.spool_file.name + '.tmp')
+                try:
+                    with open(tmp_path, 'w', encoding='utf-8') as f:
+                        for channel, key, values in entries:
+                            f.write(json.dumps({'channel': channel, 'key': key, 'values': values},
+                                               ensure_ascii=False) + '\n')
+                    os.replace(tmp_path, self.spool_file)
+                    if flushing_file.exists():
+                        flushing_file.unlink()
+                    # 接管的数据已写入本进程的spool文件后再删除原文件
+                    for orphan, _ in adopted:
+                        for path in (orphan, self._flushing_path(orphan)):
+                            if path.exists():
+                                path.unlink()
+                except Exception as e:
+                    self.logger.error(f"压缩spool文件失败: {e}")
+                self.logger.info(f"从spool文件恢复 {recovered} 条待写入数据（合并后 {self._pending_count} 条）"
+                                 + (f"，接管 {len(adopted)} 个已退出进程的spool文件" if adopted else ""))
+
+            for _, orphan_lock in adopted:
+                orphan_lock.close()
+
+    @staticmethod
+    def _to_db_value(value: Any) -> Any:
+        """转换为可写入spool文件的值（时间转为数据库可接受的字符串）"""
+        if isinstance(value, datetime):
+            return value.strftime('%Y-%m-%d %H:%M:%S')
+        if isinstance(value, date):
+            return value.isoformat()
+        return value
+
+
+# 全局写后缓冲实例
+write_buffer = WriteBehindBuffer()
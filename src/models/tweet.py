@@ -5,7 +5,8 @@ from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Optional, Dict, Any
 import re
-from dateutil import parser
+
+from ..utils.twitter_time import parse_twitter_datetime, get_tweet_created_at
 
 
 @dataclass
@@ -74,27 +75,11 @@ class Tweet:
         """
         if not date_str:
             return None
-            
-        try:
-            # 尝试多种日期格式
-            formats = [
-                '%a %b %d %H:%M:%S %z %Y',  # Twitter标准格式
-                '%Y-%m-%dT%H:%M:%S.%fZ',     # ISO格式
-                '%Y-%m-%d %H:%M:%S',         # 标准格式
-            ]
-            
-            for fmt in formats:
-                try:
-                    return datetime.strptime(date_str, fmt)
-                except ValueError:
-                    continue
-            
-            # 如果都失败了，尝试使用dateutil解析
-            return parser.parse(date_str)
-            
-        except Exception as e:
-            print(f"解析日期时间失败: {date_str}, 错误: {e}")
-            return None
+        
+        parsed = parse_twitter_datetime(date_str)
+        if parsed is None:
+            print(f"解析日期时间失败: {date_str}")
+        return parsed
     
     def _calculate_engagement_total(self) -> int:
         """
@@ -158,6 +143,10 @@ class Tweet:
                 # 为了向后兼容性，同时设置kol_id
                 mapped_data['kol_id'] = str(user_id)
         
+        # 复用分页过滤时已解析并保存在原始推文上的创建时间
+        if mapped_data.get('created_at') and not mapped_data.get('created_at_datetime'):
+            mapped_data['created_at_datetime'] = get_tweet_created_at(api_data)
+        
         # 创建Tweet对象
         return cls(**mapped_data)
     
@@ -4,7 +4,8 @@ Twitter用户数据模型
 from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Optional, Dict, Any
-from dateutil import parser
+
+from ..utils.twitter_time import parse_twitter_datetime
 
 
 @dataclass
@@ -46,27 +47,11 @@ class TwitterUser:
         """
         if not date_str:
             return None
-            
-        try:
-            # 尝试多种日期格式
-            formats = [
-                '%a %b %d %H:%M:%S %z %Y',  # Twitter标准格式
-                '%Y-%m-%dT%H:%M:%S.%fZ',     # ISO格式
-                '%Y-%m-%d %H:%M:%S',         # 标准格式
-            ]
-            
-            for fmt in formats:
-                try:
-                    return datetime.strptime(date_str, fmt)
-                except ValueError:
-                    continue
-            
-            # 如果都失败了，尝试使用dateutil解析
-            return parser.parse(date_str)
-            
-        except Exception as e:
-            print(f"解析用户创建时间失败: {date_str}, 错误: {e}")
-            return None
+        
+        parsed = parse_twitter_datetime(date_str)
+        if parsed is None:
+            print(f"解析用户创建时间失败: {date_str}")
+        return parsed
     
     @classmethod
     def from_api_data(cls, api_data: Dict[str, Any], field_mapping: Dict[str, str]) -> 'TwitterUser':
@@ -0,0 +1,174 @@
+"""
+增量爬取水位线管理
+按 list_id 持久化已入库的最新推文ID和时间，分页遇到已入库推文即可停止
+"""
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Optional, List
+
+from .config_manager import config
+
+
+class CrawlWatermarkStore:
+    """按list_id存储的爬取水位线（本地JSON文件）"""
+
+    def __init__(self, file_path: str = None):
+        """
+        初始化水位线存储
+
+        Args:
+            file_path: 水位线文件路径，默认读取 api.watermark.file
+        """
+        self.logger = logging.getLogger(__name__)
+        self.enabled = config.get('api.watermark.enabled', True)
+        self.file_path = Path(file_path or config.get('api.watermark.file', 'data/crawl_watermarks.json'))
+
+        self._lock = threading.Lock()
+        self._watermarks: Dict[str, Dict[str, Any]] = {}
+        self._pending: Dict[str, Dict[str, Any]] = {}
+
+        self._load()
+
+    def _load(self) -> None:
+        """从文件加载水位线"""
+        try:
+            if self.file_path.exists():
+                with open(self.file_path, 'r', encoding='utf-8') as f:
+                    self._watermarks = json.load(f)
+                self.logger.info(f"加载爬取水位线: {len(self._watermarks)} 个list")
+        except Exception as e:
+            self.logger.warning(f"加载爬取水位线失败，将全量爬取: {e}")
+            self._watermarks = {}
+
+    def _save(self) -> None:
+        """原子写入水位线文件（调用方持有锁）"""
+        try:
+            self.file_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.file_path.with_suffix(self.file_path.suffix + '.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._watermarks, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.file_path)
+        except Exception as e:
+            self.logger.error(f"保存爬取水位线失败: {e}")
+
+    def get(self, list_id: str) -> Optional[Dict[str, Any]]:
+        """
+        获取list的已提交水位线
+
+        Args:
+            list_id: 列表ID
+
+        Returns:
+            {'newest_id': str, 'newest_time': str} 或 None
+        """
+        if not self.enabled or not list_id:
+            return None
+        with self._lock:
+            watermark = self._watermarks.get(str(list_id))
+            return dict(watermark) if watermark else None
+
+    def is_seen(self, watermark: Optional[Dict[str, Any]], tweet_id: str) -> bool:
+        """
+        判断推文是否已在水位线之内（推文ID为单调递增的snowflake ID）
+
+        Args:
+            watermark: 水位线
+            tweet_id: 推文ID
+
+        Returns:
+            是否已入库
+        """
+        if not watermark or not tweet_id:
+            return False
+        try:
+            return int(tweet_id) <= int(watermark['newest_id'])
+        except (ValueError, TypeError, KeyError):
+            return False
+
+    def stage(self, list_id: str, newest_id: str, newest_time: Optional[datetime]) -> None:
+        """
+        暂存本次拉取到的最新推文，数据入库成功后再提交
+
+        Args:
+            list_id: 列表ID
+            newest_id: 最新推文ID
+            newest_time: 最新推文时间
+        """
+        if not self.enabled or not list_id or not newest_id:
+            return
+        with self._lock:
+            self._pending[str(list_id)] = {
+                'newest_id': str(newest_id),
+                'newest_time': newest_time.isoformat() if newest_time else None
+            }
+
+    def commit(self, list_ids: List[str] = None) -> int:
+        """
+        提交暂存的水位线（只前进不后退）
+
+        Args:
+            list_ids: 要提交的列表ID，默认提交全部
+
+        Returns:
+            更新的list数量
+        """
+        with self._lock:
+            keys = [str(lid) for lid in list_ids] if list_ids is not None else list(self._pending.keys())
+            if not any(key in self._pending for key in keys):
+                return 0
+
+            # 其他进程（如项目推文爬取）可能写过同一文件，合并前重新加载
+            self._load()
+
+            updated = 0
+            for key in keys:
+                pending = self._pending.pop(key, None)
+                if not pending:
+                    continue
+                current = self._watermarks.get(key)
+                if current and not self.is_seen(pending, current.get('newest_id')):
+                    # 已有水位线比暂存的更新
+                    continue
+                self._watermarks[key] = pending
+                updated += 1
+
+            if updated:
+                self._save()
+                self.logger.info(f"提交爬取水位线: {updated} 个list")
+            return updated
+
+    def discard(self, list_ids: List[str] = None) -> None:
+        """
+        丢弃暂存的水位线（数据未成功入库时调用）
+
+        Args:
+            list_ids: 要丢弃的列表ID，默认丢弃全部
+        """
+        with self._lock:
+            if list_ids is None:
+                self._pending.clear()
+            else:
+                for list_id in list_ids:
+                    self._pending.pop(str(list_id), None)
+
+    def reset(self, list_id: str = None) -> None:
+        """
+        清除水位线，下一次爬取将只受时间截止点限制
+
+        Args:
+            list_id: 列表ID，默认清除全部
+        """
+        with self._lock:
+            if list_id is None:
+                self._watermarks.clear()
+            else:
+                self._watermarks.pop(str(list_id), None)
+            self._save()
+
+
+# 全局水位线存储实例
+crawl_watermark_store = CrawlWatermarkStore()
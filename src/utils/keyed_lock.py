@@ -0,0 +1,60 @@
+"""
+按键加锁
+同一个键的临界区串行执行，不同键之间互不阻塞；用于并发分类时按实体名称串行化"查找或创建"，
+后到的线程等待先到的线程创建完成后复用其结果
+"""
+import threading
+from contextlib import contextmanager
+from typing import Dict, Any, Hashable, Iterator
+
+
+class KeyedLock:
+    """按键加锁（没有持有者和等待者的键自动清理）"""
+
+    def __init__(self):
+        """初始化按键加锁"""
+        self._lock = threading.Lock()
+        # key -> [锁, 持有和等待的线程数]
+        self._locks: Dict[Hashable, list] = {}
+        self.stats = {'acquired': 0, 'contended': 0}
+
+    @contextmanager
+    def hold(self, key: Hashable) -> Iterator[None]:
+        """
+        持有指定键的锁
+
+        Args:
+            key: 锁的键
+        """
+        with self._lock:
+            entry = self._locks.get(key)
+            if entry is None:
+                entry = [threading.Lock(), 0]
+                self._locks[key] = entry
+            entry[1] += 1
+
+        lock = entry[0]
+        if not lock.acquire(blocking=False):
+            with self._lock:
+                self.stats['contended'] += 1
+            lock.acquire()
+        try:
+            with self._lock:
+                self.stats['acquired'] += 1
+            yield
+        finally:
+            lock.release()
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._locks[key]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取加锁统计
+
+        Returns:
+            加锁次数、需要等待的次数和当前活跃的键数
+        """
+        with self._lock:
+            return dict(self.stats, active_keys=len(self._locks))
@@ -0,0 +1,359 @@
+"""
+按list自适应的轮询调度
+根据每个list历次爬取观察到的推文速率决定轮询间隔和时间窗口：活跃的list频繁拉取小窗口，
+安静的list很少拉取；每轮最多处理固定数量的到期list，按相对逾期程度排序保证公平
+"""
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, Any, List, Optional
+
+from .config_manager import config
+from .scheduler import CrawlerScheduler
+
+
+class ListPollingState:
+    """单个list的轮询状态"""
+
+    def __init__(self, list_id: str, interval_minutes: float, hours_limit: float):
+        """
+        初始化轮询状态
+
+        Args:
+            list_id: 列表ID
+            interval_minutes: 轮询间隔（分钟）
+            hours_limit: 时间窗口（小时）
+        """
+        self.list_id = list_id
+        self.interval_minutes = interval_minutes
+        self.hours_limit = hours_limit
+        # 推文速率（条/小时，指数平滑），None表示尚未观察
+        self.tweet_rate: Optional[float] = None
+        self.last_run: Optional[datetime] = None
+        self.next_run: Optional[datetime] = None
+        self.failures = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典（用于持久化）"""
+        return {
+            'interval_minutes': self.interval_minutes,
+            'hours_limit': self.hours_limit,
+            'tweet_rate': self.tweet_rate,
+            'last_run': self.last_run.isoformat() if self.last_run else None,
+            'next_run': self.next_run.isoformat() if self.next_run else None,
+            'failures': self.failures
+        }
+
+    @classmethod
+    def from_dict(cls, list_id: str, data: Dict[str, Any]) -> 'ListPollingState':
+        """从字典恢复轮询状态"""
+        state = cls(list_id, data['interval_minutes'], data['hours_limit'])
+        state.tweet_rate = data.get('tweet_rate')
+        state.last_run = datetime.fromisoformat(data['last_run']) if data.get('last_run') else None
+        state.next_run = datetime.fromisoformat(data['next_run']) if data.get('next_run') else None
+        state.failures = data.get('failures', 0)
+        return state
+
+
+class AdaptiveListPlanner:
+    """根据观察到的推文速率规划每个list的轮询间隔和时间窗口"""
+
+    def __init__(self, state_file: str = None, settings: Dict[str, Any] = None):
+        """
+        初始化规划器
+
+        Args:
+            state_file: 轮询状态文件路径，默认读取 scheduler.adaptive.state_file
+            settings: 规划参数，默认读取 scheduler.adaptive
+        """
+        self.logger = logging.getLogger(__name__)
+        if settings is None:
+            settings = config.get('scheduler.adaptive', {}) or {}
+
+        self.state_file = Path(state_file or settings.get('state_file', 'data/list_schedule.json'))
+        self.default_interval_minutes = config.get('scheduler.interval_minutes', 5)
+        self.default_hours_limit = settings.get('default_hours_limit', 2)
+        self.min_interval_minutes = settings.get('min_interval_minutes', 2)
+        self.max_interval_minutes = settings.get('max_interval_minutes', 60)
+        self.target_tweets_per_poll = settings.get('target_tweets_per_poll', 50)
+        self.rate_smoothing = settings.get('rate_smoothing', 0.5)
+        self.window_factor = settings.get('window_factor', 2)
+        self.min_hours_limit = settings.get('min_hours_limit', 0.5)
+        self.max_hours_limit = settings.get('max_hours_limit', 6)
+        self.max_lists_per_tick = settings.get('max_lists_per_tick', 20)
+
+        self._lock = threading.Lock()
+        self._states: Dict[str, ListPollingState] = {}
+        self._load()
+
+    def _load(self) -> None:
+        """从文件加载轮询状态"""
+        try:
+            if self.state_file.exists():
+                with open(self.state_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                self._states = {list_id: ListPollingState.from_dict(list_id, item) for list_id, item in data.items()}
+                self.logger.info(f"加载list轮询状态: {len(self._states)} 个list")
+        except Exception as e:
+            self.logger.warning(f"加载list轮询状态失败，使用默认间隔: {e}")
+            self._states = {}
+
+    def save(self) -> None:
+        """原子写入轮询状态文件"""
+        with self._lock:
+            data = {list_id: state.to_dict() for list_id, state in self._states.items()}
+        try:
+            self.state_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.state_file.with_suffix(self.state_file.suffix + '.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.state_file)
+        except Exception as e:
+            self.logger.error(f"保存list轮询状态失败: {e}")
+
+    def _get_state(self, list_id: str) -> ListPollingState:
+        """获取list状态，新list立即到期（调用方持有锁）"""
+        state = self._states.get(list_id)
+        if state is None:
+            state = ListPollingState(list_id, self.default_interval_minutes, self.default_hours_limit)
+            self._states[list_id] = state
+        return state
+
+    def due_lists(self, list_ids: List[str], now: datetime = None) -> List[str]:
+        """
+        获取本轮要拉取的list：按相对逾期程度（逾期时间 / 轮询间隔）从高到低，最多 max_lists_per_tick 个
+
+        Args:
+            list_ids: 当前配置的全部列表ID
+            now: 当前时间
+
+        Returns:
+            到期的列表ID
+        """
+        now = now or datetime.now()
+        with self._lock:
+            due = []
+            for list_id in list_ids:
+                state = self._get_state(str(list_id))
+                if state.next_run is None or state.next_run <= now:
+                    overdue_minutes = (now - state.next_run).total_seconds() / 60 if state.next_run else float('inf')
+                    due.append((overdue_minutes / state.interval_minutes, state.last_run or datetime.min, state.list_id))
+        # 逾期越多越优先，相同时上次拉取越早越优先
+        due.sort(key=lambda item: (-item[0], item[1]))
+        return [list_id for _, _, list_id in due[:self.max_lists_per_tick]]
+
+    def next_due_time(self, list_ids: List[str]) -> Optional[datetime]:
+        """
+        获取最早的下次拉取时间
+
+        Args:
+            list_ids: 当前配置的全部列表ID
+
+        Returns:
+            下次拉取时间，有list从未拉取过时返回None
+        """
+        with self._lock:
+            next_runs = [self._get_state(str(list_id)).next_run for list_id in list_ids]
+        if not next_runs or any(next_run is None for next_run in next_runs):
+            return None
+        return min(next_runs)
+
+    def hours_limits(self, list_ids: List[str]) -> Dict[str, float]:
+        """
+        获取各list本轮的时间窗口
+
+        Args:
+            list_ids: 列表ID
+
+        Returns:
+            {list_id: 时间窗口（小时）}
+        """
+        with self._lock:
+            return {list_id: self._get_state(list_id).hours_limit for list_id in list_ids}
+
+    def record_results(self, list_ids: List[str], tweet_counts: Optional[Dict[str, Any]],
+                       now: datetime = None) -> None:
+        """
+        记录一轮拉取结果并更新各list的速率、间隔和时间窗口
+
+        Args:
+            list_ids: 本轮拉取的列表ID
+            tweet_counts: 各list本轮的观测 {'tweets': 推文数, 'hours': 这些推文覆盖的时长}，
+                也可以直接给时间窗口内推文数；None表示本轮失败
+            now: 拉取完成时间
+        """
+        now = now or datetime.now()
+        with self._lock:
+            for list_id in list_ids:
+                state = self._get_state(list_id)
+                if tweet_counts is None:
+                    # 失败时按次数退避，速率保持不变
+                    state.failures += 1
+                    backoff_minutes = min(self.max_interval_minutes, state.interval_minutes * (2 ** state.failures))
+                    state.next_run = now + timedelta(minutes=backoff_minutes)
+                    continue
+
+                observed_rate = self._observed_rate(state, tweet_counts.get(list_id, 0), now)
+                if state.tweet_rate is None:
+                    state.tweet_rate = observed_rate
+                else:
+                    state.tweet_rate = self.rate_smoothing * observed_rate + (1 - self.rate_smoothing) * state.tweet_rate
+
+                state.interval_minutes = self._plan_interval(state.tweet_rate)
+                state.hours_limit = self._plan_hours_limit(state.interval_minutes)
+                state.failures = 0
+                state.last_run = now
+                state.next_run = now + timedelta(minutes=state.interval_minutes)
+
+    def _observed_rate(self, state: ListPollingState, observation: Any, now: datetime) -> float:
+        """
+        按本轮拉取到的推文数和它们实际覆盖的时长计算推文速率
+
+        拉取到的推文包括水位线之前的重叠页，覆盖时长按最早一条推文到本轮拉取计算；
+        拉取至少覆盖到上次拉取（不超过时间窗口），覆盖时长不短于该间隔
+
+        Args:
+            state: list的轮询状态
+            observation: {'tweets', 'hours'} 或时间窗口内推文数
+            now: 拉取完成时间
+
+        Returns:
+            推文速率（条/小时）
+        """
+        if isinstance(observation, dict):
+            tweet_count = observation.get('tweets', 0)
+            observed_hours = observation.get('hours')
+        else:
+            tweet_count, observed_hours = observation, None
+
+        covered_hours = state.hours_limit
+        if state.last_run is not None:
+            covered_hours = min(covered_hours, (now - state.last_run).total_seconds() / 3600)
+        if observed_hours is None:
+            # 没有推文时间时，推文数是整个时间窗口内的
+            observed_hours = state.hours_limit
+        observed_hours = max(observed_hours, covered_hours, 1 / 60)
+        return tweet_count / observed_hours
+
+    def _plan_interval(self, tweet_rate: float) -> float:
+        """
+        按推文速率计算轮询间隔：每次轮询预期拉取 target_tweets_per_poll 条
+
+        Args:
+            tweet_rate: 推文速率（条/小时）
+
+        Returns:
+            轮询间隔（分钟）
+        """
+        if tweet_rate <= 0:
+            return self.max_interval_minutes
+        interval = self.target_tweets_per_poll / tweet_rate * 60
+        return round(min(self.max_interval_minutes, max(self.min_interval_minutes, interval)), 2)
+
+    def _plan_hours_limit(self, interval_minutes: float) -> float:
+        """
+        按轮询间隔计算时间窗口（留出余量以覆盖调度延迟）
+
+        Args:
+            interval_minutes: 轮询间隔（分钟）
+
+        Returns:
+            时间窗口（小时）
+        """
+        hours_limit = interval_minutes / 60 * self.window_factor
+        return round(min(self.max_hours_limit, max(self.min_hours_limit, hours_limit)), 2)
+
+    def get_snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """
+        获取各list的轮询状态
+
+        Returns:
+            {list_id: 状态字典}
+        """
+        with self._lock:
+            return {list_id: state.to_dict() for list_id, state in self._states.items()}
+
+
+class AdaptiveCrawlerScheduler(CrawlerScheduler):
+    """按list自适应间隔的爬虫调度器：每轮只拉取到期的list"""
+
+    def __init__(self, planner: AdaptiveListPlanner = None):
+        """
+        初始化自适应调度器
+
+        Args:
+            planner: 轮询规划器，默认按配置创建
+        """
+        super().__init__()
+        self.planner = planner or AdaptiveListPlanner()
+        self.tick_seconds = config.get('scheduler.adaptive.tick_seconds', 30)
+        self.list_crawler = None
+        self.list_ids_provider = lambda: config.get('api.default_params.list_ids', [])
+
+    def set_list_crawler(self, list_crawler: Callable[[List[str], Dict[str, float]], Optional[Dict[str, Any]]]) -> None:
+        """
+        设置按list拉取的函数
+
+        Args:
+            list_crawler: 接收 (list_ids, hours_limits)，返回各list拉取到的推文数及覆盖时长（见 record_results），失败时返回None
+        """
+        self.list_crawler = list_crawler
+        self.set_crawler(self.run_due_lists)
+
+    def run_due_lists(self, now: datetime = None) -> bool:
+        """
+        拉取本轮到期的list并更新轮询计划
+
+        Args:
+            now: 当前时间
+
+        Returns:
+            是否成功（没有到期的list时也返回True）
+        """
+        list_ids = [str(list_id) for list_id in self.list_ids_provider()]
+        due_list_ids = self.planner.due_lists(list_ids, now)
+        if not due_list_ids:
+            return True
+
+        hours_limits = self.planner.hours_limits(due_list_ids)
+        self.logger.info(f"本轮到期 {len(due_list_ids)}/{len(list_ids)} 个list: {hours_limits}")
+
+        tweet_counts = None
+        try:
+            tweet_counts = self.list_crawler(due_list_ids, hours_limits)
+        except Exception as e:
+            self.logger.error(f"按list拉取异常: {e}")
+
+        self.planner.record_results(due_list_ids, tweet_counts)
+        self.planner.save()
+        self.next_run_time = self.planner.next_due_time(list_ids)
+        return tweet_counts is not None
+
+    def _scheduler_loop(self) -> None:
+        """调度器主循环：每个tick检查一次是否有到期的list"""
+        while self.is_running:
+            try:
+                list_ids = [str(list_id) for list_id in self.list_ids_provider()]
+                if self.planner.due_lists(list_ids):
+                    self._execute_task()
+                self.next_run_time = self.planner.next_due_time(list_ids)
+                time.sleep(self.tick_seconds)
+
+            except Exception as e:
+                self.logger.error(f"调度器循环出现异常: {e}")
+                time.sleep(60)  # 出错后等待1分钟
+
+    def get_status(self) -> Dict[str, Any]:
+        """
+        获取调度器状态（包含各list的轮询计划）
+
+        Returns:
+            状态信息字典
+        """
+        status = super().get_status()
+        status['lists'] = self.planner.get_snapshot()
+        return status
@@ -0,0 +1,233 @@
+"""
+持久化的大模型响应缓存
+以 模型 + 操作 + 规范化提示词 的稳定摘要为键存储在本地SQLite中，
+进程重启后仍然有效，并可在爬虫、话题和Marco等服务之间共享
+"""
+import hashlib
+import logging
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+from .config_manager import config
+
+
+class LLMResponseCache:
+    """基于SQLite的LLM响应缓存（TTL + 按最近访问时间的LRU淘汰）"""
+
+    def __init__(self, db_path: str = None, ttl_hours: float = None,
+                 max_entries: int = None, enabled: bool = None):
+        """
+        初始化响应缓存
+
+        Args:
+            db_path: SQLite文件路径，默认读取 chatgpt.optimization.cache_file
+            ttl_hours: 缓存有效期（小时），默认读取 chatgpt.optimization.cache_ttl_hours
+            max_entries: 最大缓存条数，默认读取 chatgpt.optimization.cache_max_entries
+            enabled: 是否启用，默认读取 chatgpt.optimization.enable_response_caching
+        """
+        self.logger = logging.getLogger(__name__)
+        opt_config = config.get('chatgpt.optimization', {}) or {}
+
+        self.enabled = opt_config.get('enable_response_caching', True) if enabled is None else enabled
+        self.db_path = Path(db_path or opt_config.get('cache_file', 'data/llm_cache.sqlite3'))
+        self.ttl_seconds = (ttl_hours if ttl_hours is not None else opt_config.get('cache_ttl_hours', 24)) * 3600
+        self.max_entries = max_entries if max_entries is not None else opt_config.get('cache_max_entries', 50000)
+
+        self._lock = threading.Lock()
+        self._conn = None
+        self._entry_count = 0
+
+        # 统计信息
+        self.hit_count = 0
+        self.miss_count = 0
+        self.write_count = 0
+        self.evict_count = 0
+
+        if self.enabled:
+            self._connect()
+
+    def _connect(self) -> None:
+        """打开SQLite连接并建表，失败时禁用缓存"""
+        try:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            # 多个服务进程共享同一文件，使用WAL并设置忙等待
+            self._conn = sqlite3.connect(str(self.db_path), timeout=10, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    cache_key TEXT PRIMARY KEY,
+                    operation TEXT NOT NULL,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_accessed ON llm_cache (accessed_at)")
+            self._conn.commit()
+            self._entry_count = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+            self.logger.info(f"LLM响应缓存已加载: {self.db_path}，{self._entry_count} 条")
+        except Exception as e:
+            self.logger.warning(f"初始化LLM响应缓存失败，将不使用缓存: {e}")
+            self._conn = None
+            self.enabled = False
+
+    @staticmethod
+    def normalize_prompt(prompt: str) -> str:
+        """
+        规范化提示词：去除首尾空白并合并连续空白，避免缩进差异导致缓存未命中
+
+        Args:
+            prompt: 原始提示词
+
+        Returns:
+            规范化后的提示词
+        """
+        return re.sub(r'\s+', ' ', prompt or '').strip()
+
+    @classmethod
+    def make_key(cls, model: str, operation: str, prompt: str) -> str:
+        """
+        生成稳定的缓存键（跨进程一致，不依赖Python的hash随机化）
+
+        Args:
+            model: 模型名称
+            operation: 操作类型
+            prompt: 提示词
+
+        Returns:
+            SHA-256摘要
+        """
+        raw = '\x1f'.join([model or '', operation or '', cls.normalize_prompt(prompt)])
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        读取缓存，命中时刷新访问时间
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            缓存的响应文本，未命中或已过期返回None
+        """
+        if not self.enabled or self._conn is None:
+            return None
+
+        try:
+            now = time.time()
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT response, created_at FROM llm_cache WHERE cache_key = ?", (key,)
+                ).fetchone()
+
+                if row and now - row[1] < self.ttl_seconds:
+                    self._conn.execute("UPDATE llm_cache SET accessed_at = ? WHERE cache_key = ?", (now, key))
+                    self._conn.commit()
+                    self.hit_count += 1
+                    return row[0]
+
+                if row:
+                    # 已过期
+                    self._conn.execute("DELETE FROM llm_cache WHERE cache_key = ?", (key,))
+                    self._conn.commit()
+                    self._entry_count = max(0, self._entry_count - 1)
+
+                self.miss_count += 1
+                return None
+
+        except Exception as e:
+            self.logger.warning(f"读取LLM响应缓存失败: {e}")
+            return None
+
+    def set(self, key: str, operation: str, response: str) -> None:
+        """
+        写入缓存，超过容量时按最近访问时间淘汰
+
+        Args:
+            key: 缓存键
+            operation: 操作类型
+            response: 响应文本
+        """
+        if not self.enabled or self._conn is None or response is None:
+            return
+
+        try:
+            now = time.time()
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO llm_cache (cache_key, operation, response, created_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, operation, response, now, now)
+                )
+                self._conn.commit()
+                self.write_count += 1
+                self._entry_count += 1
+
+                if self._entry_count > self.max_entries:
+                    self._evict(now)
+
+        except Exception as e:
+            self.logger.warning(f"写入LLM响应缓存失败: {e}")
+
+    def _evict(self, now: float) -> None:
+        """
+        清理过期条目，并按LRU淘汰到容量的90%（调用方持有锁）
+
+        Args:
+            now: 当前时间戳
+        """
+        deleted = self._conn.execute(
+            "DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl_seconds,)
+        ).rowcount
+
+        # 计数是近似值（其他进程也会写入），淘汰前重新统计
+        count = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        target = int(self.max_entries * 0.9)
+        if count > target:
+            deleted += self._conn.execute(
+                "DELETE FROM llm_cache WHERE cache_key IN "
+                "(SELECT cache_key FROM llm_cache ORDER BY accessed_at ASC LIMIT ?)",
+                (count - target,)
+            ).rowcount
+            count = target
+
+        self._conn.commit()
+        self._entry_count = count
+        self.evict_count += deleted
+        self.logger.debug(f"LLM响应缓存淘汰 {deleted} 条，剩余 {count} 条")
+
+    def clear(self) -> None:
+        """清空缓存"""
+        if self._conn is None:
+            return
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+            self._entry_count = 0
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """
+        获取缓存统计信息
+
+        Returns:
+            统计信息字典
+        """
+        lookups = self.hit_count + self.miss_count
+        return {
+            'enabled': self.enabled,
+            'entries': self._entry_count,
+            'hits': self.hit_count,
+            'misses': self.miss_count,
+            'hit_rate': (self.hit_count / lookups) * 100 if lookups else 0.0,
+            'writes': self.write_count,
+            'evictions': self.evict_count
+        }
+
+
+# 全局LLM响应缓存实例
+llm_response_cache = LLMResponseCache()
@@ -0,0 +1,228 @@
+"""
+Marco数据回填引擎
+对整个回填时间范围只做一次流式扫描，在内存中滑动4小时窗口生成每个30分钟时间点的数据
+"""
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional, Iterable, Iterator, Tuple
+
+from ..database.marco_dao import marco_dao
+from .config_manager import config
+from .marco_processor import marco_processor
+from .marco_weights import BASE_COLUMNS, MarcoTweetColumns, base_weight_columns
+
+
+class MarcoBackfillEngine:
+    """单次扫描 + 滑动窗口的Marco回填引擎"""
+
+    def __init__(self, processor=None, dao=None):
+        """
+        初始化回填引擎
+
+        Args:
+            processor: Marco处理器，默认使用全局实例
+            dao: Marco数据访问对象，默认使用全局实例
+        """
+        self.logger = logging.getLogger(__name__)
+        self.processor = processor or marco_processor
+        self.dao = dao or marco_dao
+        self.max_workers = config.get('marco.backfill.max_workers', 4)
+
+    def backfill(self, start_date: datetime, end_date: datetime,
+                 lookback_hours: int = 4, mock_mode: bool = None,
+                 max_workers: int = None) -> Dict[str, Any]:
+        """
+        回填时间范围内所有缺失的30分钟时间点
+
+        Args:
+            start_date: 开始时间
+            end_date: 结束时间
+            lookback_hours: 每个时间点的回看窗口（小时）
+            mock_mode: 模拟模式
+            max_workers: 并行处理的窗口数，默认读取 marco.backfill.max_workers
+
+        Returns:
+            统计信息 {total, skipped, success, empty, failed}
+        """
+        timestamps = self.processor.generate_timestamp_sequence(start_date, end_date)
+        stats = {'total': len(timestamps), 'skipped': 0, 'success': 0, 'empty': 0, 'failed': 0}
+        if not timestamps:
+            return stats
+
+        # 一次范围查询代替逐个时间点的存在性检查
+        existing = self.dao.get_existing_timestamps(timestamps[0], timestamps[-1])
+        pending = [timestamp for timestamp in timestamps if timestamp not in existing]
+        stats['skipped'] = len(timestamps) - len(pending)
+
+        if not pending:
+            self.logger.info("回填范围内的时间点均已存在")
+            return stats
+
+        lookback = timedelta(hours=lookback_hours)
+        self.logger.info(f"回填 {len(pending)} 个时间点，扫描范围: {pending[0] - lookback} 到 {pending[-1]}")
+
+        rows = self.processor.iter_kol_tweets(pending[0] - lookback, pending[-1])
+        windows = self.iter_windows(rows, pending, lookback)
+
+        workers = max(1, max_workers or self.max_workers)
+        if workers <= 1:
+            for timestamp, window_tweets, stance_labels in self._label_windows(windows, mock_mode):
+                self._record(stats, self._process_window(timestamp, window_tweets, mock_mode, stance_labels))
+            return stats
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='marco-backfill') as executor:
+            in_flight: deque = deque()
+            for timestamp, window_tweets, stance_labels in self._label_windows(windows, mock_mode):
+                in_flight.append(executor.submit(self._process_window, timestamp, window_tweets,
+                                                 mock_mode, stance_labels))
+                # 限制同时驻留内存的窗口数
+                while len(in_flight) >= workers * 2:
+                    self._record(stats, in_flight.popleft())
+            while in_flight:
+                self._record(stats, in_flight.popleft())
+
+        return stats
+
+    def iter_windows(self, rows: Iterable[Dict[str, Any]], timestamps: List[datetime],
+                     lookback: timedelta) -> Iterator[Tuple[datetime, MarcoTweetColumns]]:
+        """
+        在按update_time升序的推文流上滑动窗口，每条推文只从数据库读取一次
+
+        Args:
+            rows: 按update_time升序排列的查询结果行
+            timestamps: 升序的窗口结束时间列表
+            lookback: 窗口长度
+
+        Yields:
+            (时间戳, 窗口内按update_time降序排列的列式推文数据)
+        """
+        # 窗口内的 (推文行, 基础列值)，基础列在推文进入窗口时计算一次，各窗口只计算时间衰减
+        window: deque = deque()
+        row_iter = iter(rows)
+        next_row = next(row_iter, None)
+        limit = self.processor.window_tweet_limit
+
+        for timestamp in timestamps:
+            # 加入窗口结束时间之前的推文
+            admitted = []
+            while next_row is not None and next_row['update_time'] <= timestamp:
+                admitted.append(next_row)
+                next_row = next(row_iter, None)
+            if admitted:
+                base = base_weight_columns(admitted)
+                window.extend(zip(admitted, zip(*(base[name] for name in BASE_COLUMNS))))
+
+            # 移出窗口开始时间之前的推文
+            window_start = timestamp - lookback
+            while window and window[0][0]['update_time'] < window_start:
+                window.popleft()
+
+            # 与单窗口查询一致：按update_time降序，最多取最新的N条
+            recent = list(window)[-limit:] if limit else list(window)
+            recent.reverse()
+            yield timestamp, self._window_columns(recent, timestamp)
+
+    @staticmethod
+    def _window_columns(entries: List[Tuple[Dict[str, Any], tuple]], timestamp: datetime) -> MarcoTweetColumns:
+        """
+        用窗口内推文的基础列构建列式数据，不重新计算互动热度和影响力权重
+
+        Args:
+            entries: (推文行, 基础列值) 列表
+            timestamp: 窗口结束时间
+
+        Returns:
+            列式推文数据
+        """
+        rows = [row for row, _ in entries]
+        values = list(zip(*(value for _, value in entries))) or [()] * len(BASE_COLUMNS)
+        base = {name: list(column) for name, column in zip(BASE_COLUMNS, values)}
+        return MarcoTweetColumns(rows, timestamp, base=base)
+
+    def _label_windows(self, windows: Iterable[Tuple[datetime, MarcoTweetColumns]],
+                       mock_mode: bool) -> Iterator[Tuple[datetime, MarcoTweetColumns, Optional[Dict[str, str]]]]:
+        """
+        按时间顺序为窗口补全情绪标签，相邻窗口的重叠推文只分析一次
+
+        Args:
+            windows: iter_windows 生成的窗口
+            mock_mode: 模拟模式（不调用AI）
+
+        Yields:
+            (时间戳, 窗口推文, 窗口情绪标签)
+        """
+        labels: Dict[str, str] = {}
+        # 已请求过标签的推文，判断失败的推文在本次回填中不再重复请求（不计入情绪指数）
+        requested: set = set()
+        for timestamp, window_tweets in windows:
+            if mock_mode:
+                yield timestamp, window_tweets, None
+                continue
+
+            window_ids = set(window_tweets.ids)
+            unlabeled = [
+                {'id': window_tweets.ids[i], 'content': window_tweets.contents[i]}
+                for i in window_tweets.eligible_indices(min_length=10)
+                if window_tweets.ids[i] not in requested
+            ]
+            if unlabeled:
+                labels.update(self.processor._get_stance_labels(unlabeled))
+                requested.update(tweet['id'] for tweet in unlabeled)
+
+            # 只保留当前窗口内推文的标签
+            labels = {tweet_id: stance for tweet_id, stance in labels.items() if tweet_id in window_ids}
+            requested &= window_ids
+            yield timestamp, window_tweets, dict(labels)
+
+    def _process_window(self, timestamp: datetime, window_tweets: MarcoTweetColumns,
+                        mock_mode: bool, stance_labels: Optional[Dict[str, str]]) -> Optional[bool]:
+        """
+        生成并保存单个时间点的Marco数据
+
+        Args:
+            timestamp: 时间戳
+            window_tweets: 窗口推文
+            mock_mode: 模拟模式
+            stance_labels: 窗口情绪标签
+
+        Returns:
+            是否保存成功；窗口内没有推文时返回None
+        """
+        try:
+            if not window_tweets:
+                self.logger.warning(f"时间点 {timestamp} 窗口内没有推文，跳过")
+                return None
+
+            marco_data = self.processor.process_window_tweets(timestamp, window_tweets, mock_mode, stance_labels)
+            return bool(marco_data and self.dao.insert(marco_data))
+
+        except Exception as e:
+            self.logger.error(f"回填时间点 {timestamp} 失败: {e}")
+            return False
+
+    def _record(self, stats: Dict[str, Any], result) -> None:
+        """
+        累计单个窗口的处理结果
+
+        Args:
+            stats: 统计信息
+            result: 处理结果或Future
+        """
+        if isinstance(result, Future):
+            result = result.result()
+        if result is None:
+            stats['empty'] += 1
+        elif result:
+            stats['success'] += 1
+        else:
+            stats['failed'] += 1
+
+        done = stats['success'] + stats['empty'] + stats['failed']
+        if done % 10 == 0:
+            self.logger.info(f"回填进度: {done}/{stats['total'] - stats['skipped']}")
+
+
+# 全局Marco回填引擎实例
+marco_backfill_engine = MarcoBackfillEngine()
@@ -2,7 +2,9 @@
 Marco数据处理器
 基于推文数据生成衍生指标和AI总结
 """
+import json
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime, timedelta
 import math
@@ -11,7 +13,10 @@ import statistics
 from ..api.chatgpt_client import chatgpt_client
 from ..database.tweet_dao import tweet_dao
 from ..database.kol_dao import kol_dao
+from ..database.marco_dao import marco_dao
 from ..models.marco import MarcoData
+from .config_manager import config
+from .marco_weights import MarcoTweetColumns, content_quality_scores, top_k_indices
 
 
 class MarcoProcessor:
@@ -21,6 +26,19 @@ class MarcoProcessor:
         """初始化Marco处理器"""
         self.logger = logging.getLogger(__name__)
         self.chatgpt = chatgpt_client
+        self.marco_dao = marco_dao
+        
+        # 推文情绪标签持久化：30分钟生成一次4小时窗口，同一推文会出现在约8个窗口中
+        self.stance_store_enabled = config.get('marco.stance_store.enabled', True)
+        
+        # 单个窗口参与计算的最大推文数（取最新的N条）
+        self.window_tweet_limit = 5000
+        
+        # 批量情绪判断：每个提示词包含多条推文，批次之间并发（共享Gemini全局限流）
+        self.stance_batch_enabled = config.get('marco.stance_batch.enabled', True)
+        self.stance_batch_size = config.get('marco.stance_batch.batch_size', 30)
+        self.stance_batch_workers = config.get('marco.stance_batch.max_workers', 4)
+        self.stance_batch_retries = config.get('marco.stance_batch.max_retries', 2)
     
     def process_tweets_to_marco(self, timestamp: datetime, 
                                lookback_hours: int = 4, 
@@ -46,6 +64,28 @@ class MarcoProcessor:
             # 获取KOL推文（用于情感计算和总结）
             kol_tweets = self._get_kol_tweets_in_range(start_time, end_time)
             
+            return self.process_window_tweets(timestamp, kol_tweets, mock_mode)
+            
+        except Exception as e:
+            self.logger.error(f"处理推文生成Marco数据失败: {e}")
+            return None
+    
+    def process_window_tweets(self, timestamp: datetime, kol_tweets: List[Dict[str, Any]],
+                              mock_mode: bool = None,
+                              stance_labels: Optional[Dict[str, str]] = None) -> Optional[MarcoData]:
+        """
+        基于已加权的窗口推文生成Marco数据
+        
+        Args:
+            timestamp: 目标时间戳（窗口结束时间）
+            kol_tweets: 窗口内已计算权重的推文列表
+            mock_mode: 模拟模式，None表示自动检测
+            stance_labels: 可选的预先获取的情绪标签 {tweet_id: stance}
+            
+        Returns:
+            生成的Marco数据
+        """
+        try:
             if not kol_tweets:
                 self.logger.warning(f"时间窗口内没有找到KOL推文数据")
                 return None
@@ -58,7 +98,7 @@ class MarcoProcessor:
                 self.logger.info("使用真实AI模型生成Marco数据")
             
             # 计算情感指数 - 使用新的基于提示词的算法
-            sentiment_index = self._calculate_sentiment_index(kol_tweets, mock_mode)
+            sentiment_index = self._calculate_sentiment_index(kol_tweets, mock_mode, stance_labels)
             
             # 生成AI总结
             summary = self._generate_ai_summary(kol_tweets, timestamp, mock_mode)
@@ -78,7 +118,7 @@ class MarcoProcessor:
             return None
     
     def _get_kol_tweets_in_range(self, start_time: datetime, 
-                                end_time: datetime) -> List[Dict[str, Any]]:
+                                end_time: datetime) -> MarcoTweetColumns:
         """
         获取时间范围内的推文数据，使用推文表kol_id关联用户表获取真实粉丝数
         
@@ -87,11 +127,39 @@ class MarcoProcessor:
             end_time: 结束时间（当前时间）
             
         Returns:
-            推文列表，包含按提示词算法计算的权重信息
+            列式推文数据，包含按提示词算法计算的权重信息（可按列表方式访问单条推文）
         """
         try:
             # 使用指定时间窗口内的推文数据（最近4小时）
-            sql = """
+            sql = self._build_kol_tweets_sql(order='DESC', limit=self.window_tweet_limit)
+            
+            results = tweet_dao.db_manager.execute_query(sql, [start_time, end_time])
+            
+            if not results:
+                self.logger.warning("时间范围内没有找到推文数据")
+                return []
+            
+            processed_tweets = MarcoTweetColumns(results, end_time)
+            
+            self.logger.info(f"找到 {len(processed_tweets)} 条推文用于情绪指数计算")
+            return processed_tweets
+            
+        except Exception as e:
+            self.logger.error(f"获取推文失败: {e}")
+            return []
+    
+    def _build_kol_tweets_sql(self, order: str = 'DESC', limit: Optional[int] = None) -> str:
+        """
+        构建时间范围内KOL推文的查询SQL（单窗口查询和回填流式扫描共用）
+        
+        Args:
+            order: 按update_time排序方向
+            limit: 可选的行数限制
+            
+        Returns:
+            SQL语句，参数为 [start_time, end_time]
+        """
+        sql = f"""
             SELECT 
                 t.id_str,
                 t.full_text,
@@ -112,61 +180,26 @@ class MarcoProcessor:
             AND t.update_time >= %s
             AND t.update_time <= %s
             AND t.is_valid = 1
-            ORDER BY t.update_time DESC
-            LIMIT 5000
+            ORDER BY t.update_time {order}
             """
+        if limit:
+            sql += f"LIMIT {int(limit)}\n"
+        return sql
+    
+    def iter_kol_tweets(self, start_time: datetime, end_time: datetime):
+        """
+        按update_time升序流式读取时间范围内的KOL推文（用于回填的单次扫描）
+        
+        Args:
+            start_time: 开始时间
+            end_time: 结束时间
             
-            results = tweet_dao.db_manager.execute_query(sql, [start_time, end_time])
-            
-            if not results:
-                self.logger.warning("时间范围内没有找到推文数据")
-                return []
-            
-            processed_tweets = []
-            for row in results:
-                # 计算互动热度系数 = log(转发数 + 点赞数×0.5 + 评论数×0.8)
-                retweet_count = row.get('retweet_count', 0) or 0
-                favorite_count = row.get('favorite_count', 0) or 0
-                reply_count = row.get('reply_count', 0) or 0
-                
-                interaction_score = retweet_count + favorite_count * 0.5 + reply_count * 0.8
-                interaction_coefficient = math.log(max(1, interaction_score))
-                
-                # 使用真实的粉丝数来计算KOL影响力权重
-                real_followers = row.get('followers_count', 0) or 0
-                influence_weight = self._calculate_kol_influence_weight(real_followers)
-                
-                # 计算时间衰减权重（4小时窗口内的推文）
-                tweet_time = row.get('update_time') or row.get('created_at_datetime')
-                time_decay_coefficient = self._calculate_time_decay_weight(tweet_time, end_time)
-                
-                # 单条推文权重 = KOL影响力权重 × 互动热度系数 × 时间衰减系数
-                total_weight = influence_weight * interaction_coefficient * time_decay_coefficient
-                
-                tweet_data = {
-                    'id': row['id_str'],
-                    'content': row['full_text'],
-                    'created_at': row['created_at_datetime'],
-                    'retweet_count': retweet_count,
-                    'favorite_count': favorite_count,
-                    'reply_count': reply_count,
-                    'kol_id': row.get('kol_id'),
-                    'real_followers': real_followers,
-                    'screen_name': row.get('screen_name'),
-                    'name': row.get('name'),
-                    'interaction_coefficient': interaction_coefficient,
-                    'influence_weight': influence_weight,
-                    'time_decay_coefficient': time_decay_coefficient,
-                    'total_weight': total_weight
-                }
-                processed_tweets.append(tweet_data)
-            
-            self.logger.info(f"找到 {len(processed_tweets)} 条推文用于情绪指数计算")
-            return processed_tweets
-            
-        except Exception as e:
-            self.logger.error(f"获取推文失败: {e}")
-            return []
+        Yields:
+            查询结果行
+        """
+        sql = self._build_kol_tweets_sql(order='ASC')
+        for row in tweet_dao.db_manager.iter_query(sql, [start_time, end_time]):
+            yield row
     
     def _estimate_followers_from_engagement(self, retweet_count: int, favorite_count: int, reply_count: int) -> int:
         """
@@ -197,28 +230,8 @@ class MarcoProcessor:
             return 1_000      # 极低互动，估算为小KOL
     
     
-    def _calculate_kol_influence_weight(self, followers_count: int) -> float:
-        """
-        根据粉丝数计算KOL影响力权重
-        
-        Args:
-            followers_count: 粉丝数量
-            
-        Returns:
-            影响力权重值
-        """
-        if followers_count >= 10_000_000:  # 1000万粉丝
-            return 1.0
-        elif followers_count >= 1_000_000:  # 100万粉丝
-            return 0.8
-        elif followers_count >= 100_000:  # 10万粉丝
-            return 0.6
-        elif followers_count >= 10_000:  # 1万粉丝
-            return 0.4
-        else:
-            return 0.2  # 小于1万粉丝，给予最低权重
-    
-    def _calculate_sentiment_index(self, kol_tweets: List[Dict[str, Any]], mock_mode: bool = False) -> float:
+    def _calculate_sentiment_index(self, kol_tweets: List[Dict[str, Any]], mock_mode: bool = False,
+                                   stance_labels: Optional[Dict[str, str]] = None) -> float:
         """
         根据用户提供的算法计算整体情感指数
         
@@ -229,6 +242,7 @@ class MarcoProcessor:
         Args:
             kol_tweets: KOL推文列表
             mock_mode: 模拟模式，不调用ChatGPT API
+            stance_labels: 可选的预先获取的情绪标签，不提供时从标签存储读取并补全
             
         Returns:
             情感指数 (0-100)
@@ -243,28 +257,40 @@ class MarcoProcessor:
             total_weight = 0.0
             
             processed_count = 0
+            unlabeled_count = 0
             
-            for tweet in kol_tweets:
-                content = tweet.get('content', '')
-                if not content or len(content) < 10:
-                    continue
-                
-                # 获取预计算的权重
-                tweet_weight = tweet.get('total_weight', 0)
-                if tweet_weight <= 0:
-                    continue
-                
-                total_weight += tweet_weight
-                processed_count += 1
-                
+            # 只有内容和权重有效的推文参与计算（列式数据不构建单条推文字典）
+            scored_tweets = self._get_scored_tweets(kol_tweets)
+            
+            # 非模拟模式下复用已保存的情绪标签，只对未标注的推文调用AI；
+            # 标签流程中判断失败的推文不计入总权重（不保存，下次运行时重新批量判断），不再逐条调用AI
+            use_stance_labels = (stance_labels is not None
+                                 or self.stance_store_enabled or self.stance_batch_enabled)
+            if mock_mode:
+                stance_labels = {}
+            elif stance_labels is None:
+                stance_labels = self._get_stance_labels(
+                    [{'id': tweet_id, 'content': content} for tweet_id, content, _ in scored_tweets]
+                )
+            
+            for tweet_id, content, tweet_weight in scored_tweets:
                 # 分析推文情绪倾向
                 if mock_mode:
                     # 模拟模式：基于内容关键词简单判断情绪
                     sentiment_tendency = self._analyze_sentiment_tendency_mock(content)
+                elif use_stance_labels:
+                    sentiment_tendency = stance_labels.get(tweet_id)
+                    if sentiment_tendency is None:
+                        # 判断失败的推文情绪未知，按中性计入会把指数拉向50
+                        unlabeled_count += 1
+                        continue
                 else:
                     # 使用ChatGPT分析情绪倾向
                     sentiment_tendency = self._analyze_sentiment_tendency_ai(content)
                 
+                total_weight += tweet_weight
+                processed_count += 1
+                
                 # 根据情绪倾向累计权重
                 if sentiment_tendency == 'bullish':
                     bullish_weight_sum += tweet_weight
@@ -274,6 +300,9 @@ class MarcoProcessor:
                 
                 self.logger.debug(f"推文情绪分析: tendency={sentiment_tendency}, weight={tweet_weight:.4f}")
             
+            if unlabeled_count:
+                self.logger.warning(f"{unlabeled_count} 条推文情绪判断失败，不计入本次情绪指数")
+            
             if total_weight <= 0:
                 self.logger.warning("总权重为0，返回中性情绪指数")
                 return 50.0
@@ -295,6 +324,192 @@ class MarcoProcessor:
             self.logger.error(f"计算情感指数失败: {e}")
             return 50.0
     
+    def _get_scored_tweets(self, kol_tweets) -> List[Tuple[str, str, float]]:
+        """
+        取出参与情绪计算的推文：内容不少于10个字符且权重为正
+        
+        Args:
+            kol_tweets: 列式推文数据或推文字典列表
+            
+        Returns:
+            [(tweet_id, content, total_weight)]
+        """
+        if isinstance(kol_tweets, MarcoTweetColumns):
+            return [
+                (kol_tweets.ids[i], kol_tweets.contents[i], kol_tweets.weight(i))
+                for i in kol_tweets.eligible_indices(min_length=10)
+            ]
+        
+        return [
+            (tweet.get('id'), tweet.get('content'), tweet.get('total_weight', 0))
+            for tweet in kol_tweets
+            if tweet.get('content') and len(tweet.get('content')) >= 10
+            and tweet.get('total_weight', 0) > 0
+        ]
+    
+    def _get_stance_labels(self, tweets: List[Dict[str, Any]]) -> Dict[str, str]:
+        """
+        获取推文的情绪倾向标签：已保存的直接复用，未标注的调用AI分析并保存
+        
+        Args:
+            tweets: 参与情绪计算的推文列表
+            
+        Returns:
+            {tweet_id: 'bullish'/'bearish'/'neutral'}，AI分析失败的推文不包含在内
+        """
+        if not self.stance_store_enabled and not self.stance_batch_enabled:
+            return {}
+        
+        try:
+            stance_labels = {}
+            if self.stance_store_enabled:
+                tweet_ids = [tweet.get('id') for tweet in tweets if tweet.get('id')]
+                stance_labels = self.marco_dao.get_stances(tweet_ids)
+            
+            unlabeled_tweets = [tweet for tweet in tweets
+                                if tweet.get('id') and tweet.get('id') not in stance_labels]
+            self.logger.info(f"情绪标签复用 {len(stance_labels)} 条，待分析 {len(unlabeled_tweets)} 条")
+            
+            if self.stance_batch_enabled:
+                new_labels = self._classify_stances_batched(unlabeled_tweets)
+            else:
+                new_labels = {}
+                for tweet in unlabeled_tweets:
+                    stance = self._classify_stance_ai(tweet.get('content', ''))
+                    if stance:
+                        new_labels[tweet['id']] = stance
+            
+            if new_labels:
+                if self.stance_store_enabled:
+                    self.marco_dao.save_stances(new_labels)
+                stance_labels.update(new_labels)
+            
+            return stance_labels
+            
+        except Exception as e:
+            self.logger.error(f"获取推文情绪标签失败: {e}")
+            return {}
+    
+    def _classify_stances_batched(self, tweets: List[Dict[str, Any]]) -> Dict[str, str]:
+        """
+        批量判断推文情绪倾向：按批次打包进提示词并发请求，只重试解析失败的推文
+        
+        Args:
+            tweets: 待分析的推文列表
+            
+        Returns:
+            {tweet_id: 'bullish'/'bearish'/'neutral'}，多次重试仍失败的推文不包含在内
+        """
+        stance_labels = {}
+        pending = [tweet for tweet in tweets if tweet.get('id')]
+        batch_size = max(1, self.stance_batch_size)
+        
+        for attempt in range(1 + self.stance_batch_retries):
+            if not pending:
+                break
+            
+            batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+            workers = min(max(1, self.stance_batch_workers), len(batches))
+            
+            if workers <= 1:
+                batch_results = [self._classify_stance_batch_ai(batch) for batch in batches]
+            else:
+                with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='marco-stance') as executor:
+                    batch_results = list(executor.map(self._classify_stance_batch_ai, batches))
+            
+            failed = []
+            for batch, results in zip(batches, batch_results):
+                for tweet, stance in zip(batch, results):
+                    if stance:
+                        stance_labels[tweet['id']] = stance
+                    else:
+                        failed.append(tweet)
+            
+            self.logger.info(f"批量情绪判断第 {attempt + 1} 轮: {len(batches)} 个批次，"
+                           f"成功 {len(pending) - len(failed)} 条，失败 {len(failed)} 条")
+            pending = failed
+        
+        if pending:
+            self.logger.warning(f"{len(pending)} 条推文批量情绪判断失败，本次不计入情绪指数，下次运行时重新判断")
+        
+        return stance_labels
+    
+    def _classify_stance_batch_ai(self, tweets: List[Dict[str, Any]]) -> List[Optional[str]]:
+        """
+        一次请求判断一批推文的情绪倾向
+        
+        Args:
+            tweets: 推文列表（通常20-50条）
+            
+        Returns:
+            与输入等长的情绪倾向列表，解析失败的位置为None
+        """
+        results = [None] * len(tweets)
+        if not tweets:
+            return results
+        
+        try:
+            tweet_lines = "\n".join(
+                f"[{index}] {(tweet.get('content') or '').replace(chr(10), ' ')[:500]}"
+                for index, tweet in enumerate(tweets)
+            )
+            
+            prompt = f"""
+            请分析以下每条加密货币相关推文的情绪倾向。每条推文以方括号中的编号开头。
+            
+            {tweet_lines}
+            
+            判断标准：
+            - bullish: 表达乐观、看涨、买入建议的内容
+            - bearish: 表达悲观、看跌、卖出建议的内容  
+            - neutral: 客观分析、中性观点或无明确方向性的内容
+            
+            请只返回JSON数组，每条推文一个对象，编号保持不变，例如：
+            [{{"index": 0, "stance": "bullish"}}, {{"index": 1, "stance": "neutral"}}]
+            """
+            
+            response = self.chatgpt._make_request([
+                {"role": "system", "content": "你是一个专业的加密货币情绪分析专家。"},
+                {"role": "user", "content": prompt}
+            ], temperature=0.1, max_tokens=20 * len(tweets) + 50)
+            
+            if not response:
+                return results
+            
+            # 清理响应内容，移除代码块标记
+            cleaned_response = response.strip()
+            if cleaned_response.startswith('```json'):
+                cleaned_response = cleaned_response[7:]
+            if cleaned_response.startswith('```'):
+                cleaned_response = cleaned_response[3:]
+            if cleaned_response.endswith('```'):
+                cleaned_response = cleaned_response[:-3]
+            cleaned_response = cleaned_response.strip()
+            
+            json_start = cleaned_response.find('[')
+            json_end = cleaned_response.rfind(']') + 1
+            if json_start < 0 or json_end <= json_start:
+                self.logger.warning(f"批量情绪判断返回格式无效: {response[:200]}")
+                return results
+            
+            items = json.loads(cleaned_response[json_start:json_end])
+            for item in items if isinstance(items, list) else []:
+                if not isinstance(item, dict):
+                    continue
+                try:
+                    index = int(item.get('index'))
+                except (TypeError, ValueError):
+                    continue
+                stance = str(item.get('stance', '')).strip().lower()
+                if 0 <= index < len(tweets) and stance in ('bullish', 'bearish', 'neutral'):
+                    results[index] = stance
+            
+            return results
+            
+        except Exception as e:
+            self.logger.warning(f"批量情绪判断失败: {e}")
+            return results
+    
     def _analyze_sentiment_tendency_mock(self, content: str) -> str:
         """
         模拟模式下分析推文情绪倾向
@@ -335,6 +550,23 @@ class MarcoProcessor:
         Returns:
             情绪倾向: 'bullish', 'bearish', 'neutral'
         """
+        stance = self._classify_stance_ai(content)
+        if stance:
+            return stance
+        
+        # AI分析失败，使用模拟方法
+        return self._analyze_sentiment_tendency_mock(content)
+    
+    def _classify_stance_ai(self, content: str) -> Optional[str]:
+        """
+        调用AI判断推文情绪倾向，不做降级
+        
+        Args:
+            content: 推文内容
+            
+        Returns:
+            情绪倾向: 'bullish', 'bearish', 'neutral'；AI调用失败返回None
+        """
         try:
             prompt = f"""
             请分析以下加密货币相关推文的情绪倾向，只需要回答：bullish（看涨）、bearish（看跌）或neutral（中性）。
@@ -362,54 +594,12 @@ class MarcoProcessor:
                     return 'bearish'
                 else:
                     return 'neutral'
-            else:
-                # AI分析失败，使用模拟方法
-                return self._analyze_sentiment_tendency_mock(content)
+            
+            return None
                 
         except Exception as e:
             self.logger.debug(f"AI情绪分析失败: {e}，使用模拟方法")
-            return self._analyze_sentiment_tendency_mock(content)
-    
-    def _calculate_time_decay_weight(self, tweet_time: datetime, 
-                                   current_time: datetime) -> float:
-        """
-        计算时间衰减权重（4小时窗口内）
-        
-        Args:
-            tweet_time: 推文时间
-            current_time: 当前时间
-            
-        Returns:
-            时间权重 (0.6-1.0)
-        """
-        if not tweet_time:
-            return 0.8  # 默认权重
-        
-        try:
-            time_diff_hours = (current_time - tweet_time).total_seconds() / 3600
-            
-            # 4小时窗口内的时间衰减函数: 越新的推文权重越高
-            # 0-0.5小时: 1.0
-            # 0.5-1小时: 0.95
-            # 1-2小时: 0.85  
-            # 2-3小时: 0.75
-            # 3-4小时: 0.6
-            if time_diff_hours <= 0.5:
-                return 1.0
-            elif time_diff_hours <= 1:
-                return 0.95
-            elif time_diff_hours <= 2:
-                return 0.85
-            elif time_diff_hours <= 3:
-                return 0.75
-            elif time_diff_hours <= 4:
-                return 0.6
-            else:
-                # 超过4小时的推文（理论上不应该出现在查询结果中）
-                return 0.5
-            
-        except Exception:
-            return 0.8
+            return None
     
     def _calculate_engagement_weight(self, engagement_total: int) -> float:
         """
@@ -574,22 +764,20 @@ class MarcoProcessor:
             重要推文列表
         """
         try:
-            scored_tweets = []
+            if isinstance(kol_tweets, MarcoTweetColumns):
+                return self._filter_important_columns(kol_tweets)
             
-            for tweet in kol_tweets:
-                content = tweet.get('content', '')
-                if len(content) < 20:  # 跳过太短的推文
-                    continue
-                
+            # 跳过太短的推文，内容质量得分（基于长度、关键词等）按列一次计算
+            candidates = [tweet for tweet in kol_tweets if len(tweet.get('content', '')) >= 20]
+            quality_scores = content_quality_scores([tweet.get('content', '') for tweet in candidates])
+            
+            scored_tweets = []
+            for tweet, content_score in zip(candidates, quality_scores):
                 # 使用已计算的权重作为重要性得分
                 total_weight = tweet.get('total_weight', 0)
-                real_followers = tweet.get('real_followers', 0)
-                
-                # 内容质量得分（基于长度、关键词等）
-                content_score = self._calculate_content_quality_score(content)
                 
                 # 综合得分：权重 * 内容质量
-                total_score = total_weight * (1 + content_score / 100)
+                total_score = total_weight * (1 + float(content_score) / 100)
                 
                 scored_tweets.append({
                     **tweet,
@@ -607,51 +795,28 @@ class MarcoProcessor:
             self.logger.error(f"筛选重要推文失败: {e}")
             return kol_tweets[:20]  # 默认返回前20条
     
-    def _calculate_content_quality_score(self, content: str) -> float:
+    def _filter_important_columns(self, columns: MarcoTweetColumns, limit: int = 30) -> List[Dict[str, Any]]:
         """
-        计算内容质量得分
+        在列式数据上筛选重要推文，只为选中的推文构建字典
         
         Args:
-            content: 推文内容
+            columns: 列式推文数据
+            limit: 返回的推文数
             
         Returns:
-            内容质量得分 (0-100)
+            重要推文列表（按得分降序）
         """
-        try:
-            score = 0
-            
-            # 长度得分
-            if len(content) > 100:
-                score += 20
-            elif len(content) > 50:
-                score += 10
-            
-            # 加密货币关键词得分
-            crypto_keywords = ['btc', 'bitcoin', 'eth', 'ethereum', 'crypto', '加密', 
-                              'defi', 'nft', 'dao', 'web3', '区块链', '比特币', '以太坊']
-            
-            content_lower = content.lower()
-            keyword_count = sum(1 for keyword in crypto_keywords if keyword in content_lower)
-            score += min(30, keyword_count * 5)
-            
-            # 技术分析关键词得分
-            ta_keywords = ['支撑', '阻力', '突破', '回调', '牛市', '熊市', '分析', 'analysis']
-            ta_count = sum(1 for keyword in ta_keywords if keyword in content_lower)
-            score += min(20, ta_count * 5)
-            
-            # 数字和价格信息得分
-            import re
-            if re.search(r'\$[\d,]+', content) or re.search(r'[\d,]+\$', content):
-                score += 15
-            
-            # URL和图片得分（可能包含更多信息）
-            if 'http' in content or '图片' in content:
-                score += 10
-            
-            return min(100, score)
-            
-        except Exception:
-            return 50  # 默认得分
+        # 综合得分：权重 * 内容质量（跳过太短的推文）
+        scores, candidates = columns.importance_scores(min_length=20)
+        
+        important_tweets = []
+        for i in top_k_indices(scores, limit, candidates):
+            tweet = columns.to_dict(i)
+            tweet['importance_score'] = float(scores[i])
+            important_tweets.append(tweet)
+        
+        self.logger.info(f"筛选出{len(important_tweets)}条重要推文")
+        return important_tweets
     
     def generate_timestamp_sequence(self, start_date: datetime, 
                                   end_date: datetime) -> List[datetime]:
@@ -0,0 +1,362 @@
+"""
+Marco推文权重的列式计算
+按列保存窗口内推文的数据，互动热度、KOL影响力和时间衰减一次性向量化计算；
+安装了NumPy（requirements-optional.txt）时使用数组运算，否则退化为纯Python实现，结果一致
+"""
+import heapq
+import math
+import re
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional, Sequence
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+
+# KOL影响力权重：粉丝数分段阈值及对应权重（<1万, 1万+, 10万+, 100万+, 1000万+）
+INFLUENCE_THRESHOLDS = [10_000, 100_000, 1_000_000, 10_000_000]
+INFLUENCE_WEIGHTS = [0.2, 0.4, 0.6, 0.8, 1.0]
+
+# 时间衰减权重：距窗口结束的小时数上界及对应权重，超过4小时为0.5
+DECAY_HOUR_BOUNDS = [0.5, 1, 2, 3, 4]
+DECAY_WEIGHTS = [1.0, 0.95, 0.85, 0.75, 0.6, 0.5]
+
+# 推文时间缺失时的默认时间权重
+DEFAULT_DECAY_WEIGHT = 0.8
+
+# 内容质量得分：加密货币关键词、技术分析关键词、价格信息
+CRYPTO_KEYWORDS = ['btc', 'bitcoin', 'eth', 'ethereum', 'crypto', '加密',
+                   'defi', 'nft', 'dao', 'web3', '区块链', '比特币', '以太坊']
+TA_KEYWORDS = ['支撑', '阻力', '突破', '回调', '牛市', '熊市', '分析', 'analysis']
+PRICE_PATTERN = re.compile(r'\$[\d,]+|[\d,]+\$')
+
+# 窗口无关的基础列（每条推文只计算一次）
+BASE_COLUMNS = ('followers', 'interaction', 'influence', 'timestamps')
+
+MICROSECONDS_PER_HOUR = 3_600_000_000
+
+
+def interaction_coefficients(retweets: Sequence[float], favorites: Sequence[float],
+                             replies: Sequence[float]):
+    """
+    互动热度系数 = log(max(1, 转发数 + 点赞数×0.5 + 评论数×0.8))
+
+    Args:
+        retweets: 转发数列
+        favorites: 点赞数列
+        replies: 评论数列
+
+    Returns:
+        互动热度系数列
+    """
+    if NUMPY_AVAILABLE:
+        scores = np.asarray(retweets, dtype=float) + np.asarray(favorites, dtype=float) * 0.5 \
+            + np.asarray(replies, dtype=float) * 0.8
+        return np.log(np.maximum(1, scores))
+    return [math.log(max(1, r + f * 0.5 + p * 0.8)) for r, f, p in zip(retweets, favorites, replies)]
+
+
+def influence_weights(followers: Sequence[float]):
+    """
+    按粉丝数分段计算KOL影响力权重
+
+    Args:
+        followers: 粉丝数列
+
+    Returns:
+        影响力权重列
+    """
+    if NUMPY_AVAILABLE:
+        buckets = np.searchsorted(INFLUENCE_THRESHOLDS, np.asarray(followers, dtype=float), side='right')
+        return np.asarray(INFLUENCE_WEIGHTS)[buckets]
+
+    weights = []
+    for count in followers:
+        bucket = 0
+        while bucket < len(INFLUENCE_THRESHOLDS) and count >= INFLUENCE_THRESHOLDS[bucket]:
+            bucket += 1
+        weights.append(INFLUENCE_WEIGHTS[bucket])
+    return weights
+
+
+def time_decay_weights(ages_hours: Sequence[Optional[float]]):
+    """
+    按距窗口结束时间的小时数计算时间衰减权重
+
+    Args:
+        ages_hours: 小时数列，None（或NaN）表示推文时间缺失
+
+    Returns:
+        时间衰减权重列
+    """
+    if NUMPY_AVAILABLE:
+        ages = np.asarray(ages_hours, dtype=float)
+        missing = np.isnan(ages)
+        ages = np.where(missing, 0.0, ages)
+        weights = np.asarray(DECAY_WEIGHTS)[np.searchsorted(DECAY_HOUR_BOUNDS, ages, side='left')]
+        weights[missing] = DEFAULT_DECAY_WEIGHT
+        return weights
+
+    weights = []
+    for age in ages_hours:
+        if age is None:
+            weights.append(DEFAULT_DECAY_WEIGHT)
+            continue
+        bucket = 0
+        while bucket < len(DECAY_HOUR_BOUNDS) and age > DECAY_HOUR_BOUNDS[bucket]:
+            bucket += 1
+        weights.append(DECAY_WEIGHTS[bucket])
+    return weights
+
+
+def content_quality_scores(contents: Sequence[str]):
+    """
+    内容质量得分（0-100）：长度、加密货币关键词、技术分析关键词、价格信息、URL和图片
+
+    Args:
+        contents: 推文内容列
+
+    Returns:
+        内容质量得分列
+    """
+    if NUMPY_AVAILABLE:
+        texts = np.asarray(contents, dtype=str)
+        lowered = np.char.lower(texts)
+        lengths = np.char.str_len(texts)
+        scores = np.where(lengths > 100, 20, np.where(lengths > 50, 10, 0))
+
+        crypto_count = np.zeros(len(texts), dtype=int)
+        for keyword in CRYPTO_KEYWORDS:
+            crypto_count += np.char.find(lowered, keyword) >= 0
+        ta_count = np.zeros(len(texts), dtype=int)
+        for keyword in TA_KEYWORDS:
+            ta_count += np.char.find(lowered, keyword) >= 0
+        scores = scores + np.minimum(30, crypto_count * 5) + np.minimum(20, ta_count * 5)
+
+        has_price = np.fromiter((PRICE_PATTERN.search(content) is not None for content in contents),
+                                dtype=bool, count=len(texts))
+        has_media = (np.char.find(texts, 'http') >= 0) | (np.char.find(texts, '图片') >= 0)
+        scores = scores + has_price * 15 + has_media * 10
+        return np.minimum(100, scores)
+
+    scores = []
+    for content in contents:
+        score = 20 if len(content) > 100 else 10 if len(content) > 50 else 0
+        content_lower = content.lower()
+        score += min(30, sum(5 for keyword in CRYPTO_KEYWORDS if keyword in content_lower))
+        score += min(20, sum(5 for keyword in TA_KEYWORDS if keyword in content_lower))
+        if PRICE_PATTERN.search(content):
+            score += 15
+        if 'http' in content or '图片' in content:
+            score += 10
+        scores.append(min(100, score))
+    return scores
+
+
+def _epoch_microseconds(value: datetime) -> float:
+    """时间点距1970-01-01的微秒数（在float64中精确表示，相减即得精确的时间差）"""
+    return (value - datetime(1970, 1, 1, tzinfo=value.tzinfo)) // timedelta(microseconds=1)
+
+
+def base_weight_columns(rows: List[Dict[str, Any]]) -> Dict[str, list]:
+    """
+    计算与窗口无关的基础列：粉丝数、互动热度系数、KOL影响力权重和推文时间
+
+    滑动窗口回填时每条推文只在进入窗口时计算一次，各窗口只需按窗口结束时间计算时间衰减
+
+    Args:
+        rows: 查询结果行
+
+    Returns:
+        {列名: 与rows等长的列表}，列名见 BASE_COLUMNS；推文时间缺失时为None
+    """
+    retweets = [row.get('retweet_count', 0) or 0 for row in rows]
+    favorites = [row.get('favorite_count', 0) or 0 for row in rows]
+    replies = [row.get('reply_count', 0) or 0 for row in rows]
+    followers = [row.get('followers_count', 0) or 0 for row in rows]
+
+    timestamps = []
+    for row in rows:
+        tweet_time = row.get('update_time') or row.get('created_at_datetime')
+        timestamps.append(_epoch_microseconds(tweet_time) if tweet_time else None)
+
+    interaction = interaction_coefficients(retweets, favorites, replies)
+    influence = influence_weights(followers)
+    if NUMPY_AVAILABLE:
+        interaction = interaction.tolist()
+        influence = influence.tolist()
+
+    return {'followers': followers, 'interaction': interaction,
+            'influence': influence, 'timestamps': timestamps}
+
+
+def top_k_indices(scores: Sequence[float], k: int, candidates: Optional[List[int]] = None) -> List[int]:
+    """
+    选出得分最高的k个下标（按得分降序，得分相同时保持原顺序）
+
+    Args:
+        scores: 得分列
+        k: 数量
+        candidates: 可选的候选下标，默认全部
+
+    Returns:
+        下标列表
+    """
+    indices = list(range(len(scores))) if candidates is None else list(candidates)
+    if k <= 0 or not indices:
+        return []
+
+    if NUMPY_AVAILABLE:
+        index_array = np.asarray(indices, dtype=int)
+        candidate_scores = np.asarray(scores, dtype=float)[index_array]
+        if len(index_array) > k:
+            # argpartition找到第k大的得分，只对不低于它的候选排序（保留并列项，与稳定排序一致）
+            kth_score = candidate_scores[np.argpartition(-candidate_scores, k - 1)[k - 1]]
+            top = np.flatnonzero(candidate_scores >= kth_score)
+        else:
+            top = np.arange(len(index_array))
+        order = top[np.lexsort((top, -candidate_scores[top]))][:k]
+        return [int(i) for i in index_array[order]]
+
+    return heapq.nlargest(k, indices, key=lambda i: (scores[i], -i))
+
+
+class MarcoTweetColumns:
+    """
+    窗口内推文的列式数据
+
+    只在访问单条推文时才构建字典，兼容按列表方式遍历的旧代码。
+    """
+
+    def __init__(self, rows: List[Dict[str, Any]], end_time: datetime,
+                 base: Optional[Dict[str, list]] = None):
+        """
+        从查询结果构建列并计算权重
+
+        Args:
+            rows: 查询结果行（按update_time降序）
+            end_time: 窗口结束时间，用于时间衰减
+            base: 可选的预先计算的基础列（base_weight_columns 的结果，与rows对齐），
+                  提供时只计算时间衰减
+        """
+        self.rows = rows
+        self.end_time = end_time
+
+        self.ids = [row['id_str'] for row in rows]
+        self.contents = [row['full_text'] or '' for row in rows]
+
+        if base is None:
+            base = base_weight_columns(rows)
+        self.followers = base['followers']
+
+        # 单条推文权重 = KOL影响力权重 × 互动热度系数 × 时间衰减系数
+        end_microseconds = _epoch_microseconds(end_time)
+        if NUMPY_AVAILABLE:
+            self.interaction = np.asarray(base['interaction'], dtype=float)
+            self.influence = np.asarray(base['influence'], dtype=float)
+            ages = (end_microseconds - np.asarray(base['timestamps'], dtype=float)) / MICROSECONDS_PER_HOUR
+        else:
+            self.interaction = base['interaction']
+            self.influence = base['influence']
+            ages = [None if timestamp is None else (end_microseconds - timestamp) / MICROSECONDS_PER_HOUR
+                    for timestamp in base['timestamps']]
+        self.decay = time_decay_weights(ages)
+        if NUMPY_AVAILABLE:
+            self.total_weights = self.influence * self.interaction * self.decay
+        else:
+            self.total_weights = [i * c * d for i, c, d in zip(self.influence, self.interaction, self.decay)]
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __bool__(self) -> bool:
+        return bool(self.rows)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.to_dict(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        return self.to_dict(index)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self.to_dict(index)
+
+    def weight(self, index: int) -> float:
+        """获取单条推文的总权重"""
+        return float(self.total_weights[index])
+
+    def eligible_indices(self, min_length: int = 10) -> List[int]:
+        """
+        参与情绪计算的推文下标：内容长度不低于min_length且权重为正
+
+        Args:
+            min_length: 最短内容长度
+
+        Returns:
+            下标列表
+        """
+        if NUMPY_AVAILABLE:
+            lengths = np.fromiter((len(content) for content in self.contents), dtype=int, count=len(self))
+            mask = (lengths >= min_length) & (self.total_weights > 0)
+            return [int(i) for i in np.flatnonzero(mask)]
+        return [i for i, content in enumerate(self.contents)
+                if len(content) >= min_length and self.total_weights[i] > 0]
+
+    def importance_scores(self, min_length: int = 20):
+        """
+        重要性得分 = 总权重 × (1 + 内容质量得分 / 100)，内容过短的推文不参与
+
+        Args:
+            min_length: 最短内容长度
+
+        Returns:
+            (得分列, 候选下标)，非候选推文得分为0
+        """
+        candidates = [i for i, content in enumerate(self.contents) if len(content) >= min_length]
+        quality = content_quality_scores([self.contents[i] for i in candidates])
+
+        if NUMPY_AVAILABLE:
+            scores = np.zeros(len(self))
+            index_array = np.asarray(candidates, dtype=int)
+            scores[index_array] = self.total_weights[index_array] * (1 + quality / 100)
+            return scores, candidates
+
+        scores = [0.0] * len(self)
+        for i, content_score in zip(candidates, quality):
+            scores[i] = self.total_weights[i] * (1 + content_score / 100)
+        return scores, candidates
+
+    def to_dict(self, index: int) -> Dict[str, Any]:
+        """
+        构建单条推文的字典（字段与逐行计算时一致）
+
+        Args:
+            index: 下标
+
+        Returns:
+            推文数据
+        """
+        row = self.rows[index]
+        return {
+            'id': self.ids[index],
+            'content': self.contents[index],
+            'created_at': row.get('created_at_datetime'),
+            'update_time': row.get('update_time'),
+            'retweet_count': row.get('retweet_count', 0) or 0,
+            'favorite_count': row.get('favorite_count', 0) or 0,
+            'reply_count': row.get('reply_count', 0) or 0,
+            'kol_id': row.get('kol_id'),
+            'real_followers': self.followers[index],
+            'screen_name': row.get('screen_name'),
+            'name': row.get('name'),
+            'interaction_coefficient': float(self.interaction[index]),
+            'influence_weight': float(self.influence[index]),
+            'time_decay_coefficient': float(self.decay[index]),
+            'total_weight': float(self.total_weights[index])
+        }
@@ -6,6 +6,8 @@ from typing import List, Dict, Any, Optional
 import logging
 from datetime import datetime
 
+from .twitter_time import parse_twitter_datetime, get_tweet_created_at, to_utc_naive
+
 
 class QuotationExtractor:
     """推特引用关系提取器"""
@@ -73,8 +75,7 @@ class QuotationExtractor:
             quotations_user_name = quoted_user_data.get('screen_name') if isinstance(quoted_user_data, dict) else None
             
             # 提取创建时间
-            created_at_str = api_data.get('created_at')
-            created_at = self._parse_twitter_datetime(created_at_str)
+            created_at = self._parse_twitter_datetime(get_tweet_created_at(api_data) or api_data.get('created_at'))
             
             # 验证必需字段
             if not all([twitter_id, user_id, user_name, twitter_quotation_id, user_quotation_id, quotations_user_name]):
@@ -117,24 +118,15 @@ class QuotationExtractor:
         Returns:
             解析后的datetime对象
         """
-        from datetime import datetime
-        
         if not date_str:
             return None
         
         try:
-            # 如果已经是datetime对象，直接返回
-            if isinstance(date_str, datetime):
-                return date_str
-            
-            # 如果是字符串，进行解析
-            # Twitter API日期格式: "Wed Oct 05 20:11:53 +0000 2016"
-            # 移除时区信息，简化解析
-            if '+0000' in str(date_str):
-                date_str = str(date_str).replace(' +0000', '')
-            
-            # 解析格式
-            return datetime.strptime(str(date_str), '%a %b %d %H:%M:%S %Y')
+            # Twitter API日期格式: "Wed Oct 05 20:11:53 +0000 2016"，统一转换为不带时区的UTC时间
+            parsed = parse_twitter_datetime(date_str)
+            if parsed is None:
+                raise ValueError("无法识别的时间格式")
+            return to_utc_naive(parsed)
             
         except Exception as e:
             self.logger.error(f"解析日期时间失败: {date_str}, 错误: {e}")
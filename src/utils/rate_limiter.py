@@ -0,0 +1,100 @@
+"""
+线程安全的令牌桶限流器
+用于在多个工作线程之间共享外部API的调用速率
+"""
+import threading
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """令牌桶限流器"""
+
+    def __init__(self, rate_per_second: float, capacity: Optional[float] = None):
+        """
+        初始化令牌桶
+
+        Args:
+            rate_per_second: 每秒补充的令牌数，<=0 表示不限流
+            capacity: 桶容量（允许的突发请求数），默认等于每秒速率且至少为1
+        """
+        self.rate = rate_per_second
+        self.capacity = capacity if capacity is not None else max(1.0, rate_per_second)
+        self._tokens = self.capacity
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def per_minute(cls, requests_per_minute: float, burst: Optional[float] = None) -> 'TokenBucket':
+        """
+        按每分钟请求数创建令牌桶
+
+        Args:
+            requests_per_minute: 每分钟允许的请求数，<=0 表示不限流
+            burst: 允许的突发请求数
+
+        Returns:
+            令牌桶实例
+        """
+        return cls(requests_per_minute / 60.0 if requests_per_minute else 0, burst)
+
+    @property
+    def enabled(self) -> bool:
+        """是否启用限流"""
+        return self.rate > 0
+
+    def _refill(self) -> None:
+        """按流逝时间补充令牌（调用方持有锁）"""
+        now = time.monotonic()
+        if now <= self._last_refill:
+            # 处于退避期内，暂不补充
+            return
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+
+    def acquire(self, tokens: float = 1, timeout: Optional[float] = None) -> bool:
+        """
+        获取令牌，令牌不足时阻塞等待
+
+        Args:
+            tokens: 需要的令牌数
+            timeout: 最长等待秒数，None 表示一直等待
+
+        Returns:
+            是否成功获取
+        """
+        if not self.enabled:
+            return True
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return True
+                backoff = max(0.0, self._last_refill - time.monotonic())
+                wait_time = backoff + (tokens - self._tokens) / self.rate
+
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait_time = min(wait_time, remaining)
+
+            time.sleep(wait_time)
+
+    def penalize(self, seconds: float) -> None:
+        """
+        服务端返回限流时，清空令牌并暂停补充一段时间，让所有线程一起退避
+
+        Args:
+            seconds: 暂停的秒数
+        """
+        if not self.enabled or seconds <= 0:
+            return
+        with self._lock:
+            self._refill()
+            self._tokens = min(self._tokens, 0)
+            self._last_refill = max(self._last_refill, time.monotonic() + seconds)
@@ -0,0 +1,380 @@
+"""
+爬取过程中的推文去重
+多个list并行拉取时共享一个线程安全的已见推文ID集合，在页面级别丢弃重复推文，
+并统计每个list与其他list的重叠比例；可选使用持久化的布隆过滤器记住最近几次爬取已处理的推文，
+命中的推文只做标记不丢弃（仍需刷新互动数据，布隆过滤器的误判也不能导致新推文被跳过）
+"""
+import hashlib
+import json
+import logging
+import math
+import os
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Set
+
+from .config_manager import config
+from .twitter_time import get_tweet_local_time
+
+
+class BloomFilter:
+    """定长布隆过滤器（双重哈希）"""
+
+    def __init__(self, capacity: int, error_rate: float, bits: bytearray = None, count: int = 0):
+        """
+        初始化布隆过滤器
+
+        Args:
+            capacity: 预期元素数量
+            error_rate: 目标误判率
+            bits: 已有的位数组（从文件加载时使用）
+            count: 已加入的元素数量
+        """
+        self.capacity = max(1, int(capacity))
+        self.error_rate = error_rate
+        self.size = max(8, int(math.ceil(-self.capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.hash_count = max(1, int(round(self.size / self.capacity * math.log(2))))
+        self.bits = bits if bits is not None else bytearray((self.size + 7) // 8)
+        self.count = count
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, item: str) -> None:
+        """
+        加入元素
+
+        Args:
+            item: 元素
+        """
+        is_new = False
+        for position in self._positions(item):
+            mask = 1 << (position & 7)
+            if not self.bits[position >> 3] & mask:
+                self.bits[position >> 3] |= mask
+                is_new = True
+        if is_new:
+            self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class RecentTweetFilter:
+    """
+    最近爬取过的推文ID（持久化的两代布隆过滤器）
+
+    当前代写满或超过轮换时间后成为上一代，查询同时检查两代，
+    因此记住的是最近 rotate_hours 到 2 × rotate_hours 小时内处理过的推文。
+    保留的最早一代开始记录之后发布的推文如果不在过滤器中，就一定没有处理过（见 is_definitely_new）
+    """
+
+    _HEADER_VERSION = 1
+
+    def __init__(self, file_path: str = None, enabled: bool = None):
+        """
+        初始化最近推文过滤器
+
+        Args:
+            file_path: 过滤器文件路径，默认读取 crawler.dedup.recent_filter.file
+            enabled: 是否启用，默认读取 crawler.dedup.recent_filter.enabled
+        """
+        self.logger = logging.getLogger(__name__)
+        settings = config.get('crawler.dedup.recent_filter', {}) or {}
+        self.enabled = settings.get('enabled', False) if enabled is None else enabled
+        self.file_path = Path(file_path or settings.get('file', 'data/recent_tweet_ids.bloom'))
+        self.capacity = settings.get('capacity', 200000)
+        self.error_rate = settings.get('error_rate', 0.001)
+        self.rotate_hours = settings.get('rotate_hours', 24)
+
+        self._lock = threading.Lock()
+        self._current = BloomFilter(self.capacity, self.error_rate)
+        self._current_created_at = datetime.now()
+        self._previous: Optional[BloomFilter] = None
+        self._previous_created_at: Optional[datetime] = None
+
+        if self.enabled:
+            self._load()
+
+    def _load(self) -> None:
+        """从文件加载过滤器"""
+        try:
+            if not self.file_path.exists():
+                return
+            with open(self.file_path, 'rb') as f:
+                header = json.loads(f.readline().decode('utf-8'))
+                if (header.get('version') != self._HEADER_VERSION or header.get('capacity') != self.capacity
+                        or header.get('error_rate') != self.error_rate):
+                    self.logger.info("最近推文过滤器参数已变更，重新开始记录")
+                    return
+                generations = [
+                    BloomFilter(self.capacity, self.error_rate, bytearray(f.read(generation['bytes'])),
+                                generation['count'])
+                    for generation in header['generations']
+                ]
+            self._current = generations[0]
+            self._current_created_at = datetime.fromisoformat(header['created_at'])
+            self._previous = generations[1] if len(generations) > 1 else None
+            if self._previous is not None:
+                # 旧文件没有记录上一代的开始时间，按当前代开始时间处理（只会少判定新推文）
+                self._previous_created_at = datetime.fromisoformat(
+                    header.get('previous_created_at') or header['created_at'])
+            self.logger.info(f"加载最近推文过滤器: 当前代 {self._current.count} 条")
+        except Exception as e:
+            self.logger.warning(f"加载最近推文过滤器失败，重新开始记录: {e}")
+
+    def _save(self) -> None:
+        """原子写入过滤器文件（调用方持有锁）"""
+        try:
+            generations = [self._current] + ([self._previous] if self._previous is not None else [])
+            header = {
+                'version': self._HEADER_VERSION,
+                'capacity': self.capacity,
+                'error_rate': self.error_rate,
+                'created_at': self._current_created_at.isoformat(),
+                'previous_created_at': (self._previous_created_at.isoformat()
+                                        if self._previous_created_at is not None else None),
+                'generations': [{'count': bloom.count, 'bytes': len(bloom.bits)} for bloom in generations]
+            }
+            self.file_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.file_path.with_suffix(self.file_path.suffix + '.tmp')
+            with open(tmp_path, 'wb') as f:
+                f.write(json.dumps(header).encode('utf-8') + b'\n')
+                for bloom in generations:
+                    f.write(bloom.bits)
+            os.replace(tmp_path, self.file_path)
+        except Exception as e:
+            self.logger.error(f"保存最近推文过滤器失败: {e}")
+
+    def _rotate_if_needed(self) -> None:
+        """当前代写满或超时后轮换（调用方持有锁）"""
+        if (self._current.count >= self.capacity
+                or datetime.now() - self._current_created_at >= timedelta(hours=self.rotate_hours)):
+            self._previous = self._current
+            self._previous_created_at = self._current_created_at
+            self._current = BloomFilter(self.capacity, self.error_rate)
+            self._current_created_at = datetime.now()
+
+    def __contains__(self, tweet_id: str) -> bool:
+        if not self.enabled:
+            return False
+        with self._lock:
+            return tweet_id in self._current or (self._previous is not None and tweet_id in self._previous)
+
+    def is_definitely_new(self, tweet_id: str, tweet_time: Optional[datetime]) -> bool:
+        """
+        推文是否一定没有处理过：发布于过滤器开始记录之后且不在过滤器中
+
+        Args:
+            tweet_id: 推文ID
+            tweet_time: 推文发布时间（本地时间），未知时返回False
+
+        Returns:
+            是否一定是新推文
+        """
+        if not self.enabled or tweet_time is None:
+            return False
+        with self._lock:
+            recording_since = self._previous_created_at if self._previous is not None else self._current_created_at
+            if tweet_time < recording_since:
+                return False
+            return not (tweet_id in self._current or (self._previous is not None and tweet_id in self._previous))
+
+    def add_many(self, tweet_ids: List[str]) -> None:
+        """
+        记录已成功处理的推文ID并保存
+
+        Args:
+            tweet_ids: 推文ID列表
+        """
+        if not self.enabled or not tweet_ids:
+            return
+        with self._lock:
+            for tweet_id in tweet_ids:
+                self._rotate_if_needed()
+                self._current.add(tweet_id)
+            self._save()
+
+
+class SeenTweetRegistry:
+    """一次爬取内各list共享的已见推文ID（线程安全），同时统计list之间的重叠"""
+
+    def __init__(self, recent_filter: RecentTweetFilter = None):
+        """
+        初始化已见推文集合
+
+        Args:
+            recent_filter: 最近爬取过的推文过滤器，为None时只在本次爬取内去重
+        """
+        self.recent_filter = recent_filter
+        self._lock = threading.Lock()
+        # 推文ID -> 首次出现的list
+        self._owners: Dict[str, str] = {}
+        # 最近爬取已处理过的推文ID（布隆过滤器命中，可能误判）
+        self._seen_recently: Set[str] = set()
+        # 发布于过滤器开始记录之后且未命中的推文ID（一定没有处理过）
+        self._definitely_new: Set[str] = set()
+        # 拉取或入库失败的list（本次不提交水位线）
+        self._failed_lists: Set[str] = set()
+        self._list_stats: Dict[str, Dict[str, Any]] = {}
+
+    def filter_page(self, list_id: str, api_page: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        丢弃页面中本次爬取已出现的推文，并按最近推文过滤器标记最近已处理过的推文（见 is_seen_recently）
+        和一定没有处理过的新推文（见 is_definitely_new）
+
+        Args:
+            list_id: 页面所属的列表ID
+            api_page: 单页API数据
+
+        Returns:
+            本次爬取中未出现过的推文
+        """
+        list_id = str(list_id)
+        unique = []
+        with self._lock:
+            stats = self._list_stats.setdefault(list_id, {
+                'raw': 0, 'unique': 0, 'duplicates': 0, 'seen_recently': 0, 'overlaps_with': {}, 'oldest_time': None
+            })
+            for api_data in api_page:
+                stats['raw'] += 1
+                # 分页是连续的，raw条推文覆盖从最早一条到本轮拉取的时间段
+                tweet_time = get_tweet_local_time(api_data)
+                if tweet_time is not None and (stats['oldest_time'] is None or tweet_time < stats['oldest_time']):
+                    stats['oldest_time'] = tweet_time
+                tweet_id = api_data.get('id_str')
+                if not tweet_id:
+                    unique.append(api_data)
+                    continue
+
+                owner = self._owners.get(tweet_id)
+                if owner is not None:
+                    stats['duplicates'] += 1
+                    stats['overlaps_with'][owner] = stats['overlaps_with'].get(owner, 0) + 1
+                    continue
+                if self.recent_filter is not None:
+                    if self.recent_filter.is_definitely_new(tweet_id, tweet_time):
+                        self._definitely_new.add(tweet_id)
+                    elif tweet_id in self.recent_filter:
+                        stats['seen_recently'] += 1
+                        self._seen_recently.add(tweet_id)
+
+                self._owners[tweet_id] = list_id
+                stats['unique'] += 1
+                unique.append(api_data)
+        return unique
+
+    def is_seen_recently(self, tweet_id: str) -> bool:
+        """
+        推文是否在最近的爬取中处理过（布隆过滤器可能误判，入库与否仍以数据库为准）
+
+        Args:
+            tweet_id: 推文ID
+
+        Returns:
+            是否命中最近推文过滤器
+        """
+        with self._lock:
+            return tweet_id in self._seen_recently
+
+    def is_definitely_new(self, tweet_id: str) -> bool:
+        """
+        推文是否一定没有处理过（布隆过滤器没有漏判），这类推文不需要查询是否已入库
+
+        Args:
+            tweet_id: 推文ID
+
+        Returns:
+            是否一定是新推文
+        """
+        with self._lock:
+            return tweet_id in self._definitely_new
+
+    def mark_list_failed(self, list_id: str) -> None:
+        """
+        标记list本次拉取失败
+
+        Args:
+            list_id: 列表ID
+        """
+        with self._lock:
+            self._failed_lists.add(str(list_id))
+
+    def mark_tweets_failed(self, tweet_ids: List[str]) -> None:
+        """
+        标记入库失败的推文，保留这些推文的list本次算作失败
+
+        Args:
+            tweet_ids: 推文ID列表
+        """
+        with self._lock:
+            self._failed_lists.update(self._owners[tweet_id] for tweet_id in tweet_ids if tweet_id in self._owners)
+
+    def failed_lists(self) -> Set[str]:
+        """
+        获取本次拉取或入库失败的list
+
+        Returns:
+            列表ID集合
+        """
+        with self._lock:
+            return set(self._failed_lists)
+
+    def commit(self) -> None:
+        """爬取成功后把本次处理的推文记入最近推文过滤器"""
+        if self.recent_filter is not None:
+            with self._lock:
+                tweet_ids = list(self._owners.keys())
+            self.recent_filter.add_many(tweet_ids)
+
+    def get_overlap_report(self) -> Dict[str, Any]:
+        """
+        获取各list的重叠统计
+
+        Returns:
+            {'lists': {list_id: {raw, unique, duplicates, seen_recently, overlap_ratio, overlaps_with, oldest_time}},
+             'total_raw', 'total_duplicates', 'total_seen_recently'}
+        """
+        with self._lock:
+            lists = {}
+            for list_id, stats in self._list_stats.items():
+                lists[list_id] = dict(stats, overlaps_with=dict(stats['overlaps_with']),
+                                      overlap_ratio=stats['duplicates'] / stats['raw'] if stats['raw'] else 0.0)
+        return {
+            'lists': lists,
+            'total_raw': sum(stats['raw'] for stats in lists.values()),
+            'total_duplicates': sum(stats['duplicates'] for stats in lists.values()),
+            'total_seen_recently': sum(stats['seen_recently'] for stats in lists.values())
+        }
+
+    def log_overlap_report(self, logger: logging.Logger) -> Dict[str, Any]:
+        """
+        输出各list的重叠比例
+
+        Args:
+            logger: 日志记录器
+
+        Returns:
+            重叠统计
+        """
+        report = self.get_overlap_report()
+        if not report['total_raw']:
+            return report
+
+        logger.info(f"list重叠统计: 原始 {report['total_raw']} 条，跨list/跨页重复 {report['total_duplicates']} 条，"
+                    f"最近已处理 {report['total_seen_recently']} 条")
+        for list_id, stats in sorted(report['lists'].items(), key=lambda item: -item[1]['overlap_ratio']):
+            overlaps = ', '.join(f"{other}:{count}" for other, count in
+                                 sorted(stats['overlaps_with'].items(), key=lambda item: -item[1]))
+            logger.info(f"  list {list_id}: 原始 {stats['raw']}，独有 {stats['unique']}，"
+                        f"重复 {stats['duplicates']} ({stats['overlap_ratio']:.1%})" +
+                        (f"，与 {overlaps} 重叠" if overlaps else ""))
+        return report
+
+
+# 全局最近推文过滤器实例
+recent_tweet_filter = RecentTweetFilter()
@@ -0,0 +1,122 @@
+"""
+基于 MinHash LSH 的相似推文分组
+每条推文的关键词集合只提取一次，用 MinHash 签名分段分桶，只对落在同一个桶中的推文计算精确的 Jaccard 相似度，
+分组规则与逐对比较相同：按原始顺序取未分组的推文作为种子，把与种子相似度超过阈值的未分组推文并入同一组
+"""
+import hashlib
+import random
+from typing import Dict, Iterable, List, Set, Tuple
+
+# MinHash 使用的梅森素数（2^61 - 1）
+_MERSENNE_PRIME = (1 << 61) - 1
+
+
+def jaccard_similarity(first: Set[str], second: Set[str]) -> float:
+    """
+    计算两个集合的 Jaccard 相似度
+
+    Args:
+        first: 集合
+        second: 集合
+
+    Returns:
+        交集大小 / 并集大小，任一集合为空时为0
+    """
+    if not first or not second:
+        return 0.0
+    intersection = len(first & second)
+    return intersection / (len(first) + len(second) - intersection)
+
+
+class MinHashLSHGrouper:
+    """MinHash LSH 分组器"""
+
+    def __init__(self, threshold: float = 0.3, bands: int = 64, rows_per_band: int = 2, seed: int = 1):
+        """
+        初始化分组器
+
+        相似度为 s 的两条推文至少落入一个相同桶的概率为 1 - (1 - s^rows_per_band)^bands，
+        默认参数下相似度0.3时约为99.8%，相似度越高越接近100%；候选推文都会再用精确的 Jaccard 相似度确认
+
+        Args:
+            threshold: 相似度阈值（超过该值才分入同一组）
+            bands: 分段数
+            rows_per_band: 每段的哈希值个数
+            seed: 哈希函数的随机种子（固定种子保证分组结果可复现）
+        """
+        self.threshold = threshold
+        self.bands = bands
+        self.rows_per_band = rows_per_band
+        num_perm = bands * rows_per_band
+        rng = random.Random(seed)
+        self._coefficients = [(rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+                              for _ in range(num_perm)]
+
+    def _hash_token(self, token: str, cache: Dict[str, Tuple[int, ...]]) -> Tuple[int, ...]:
+        """计算关键词在各哈希函数下的取值（同一批推文中的关键词大量重复，只计算一次）"""
+        hashes = cache.get(token)
+        if hashes is None:
+            base = int.from_bytes(hashlib.blake2b(token.encode('utf-8'), digest_size=8).digest(), 'big')
+            hashes = tuple((a * base + b) % _MERSENNE_PRIME for a, b in self._coefficients)
+            cache[token] = hashes
+        return hashes
+
+    def signature(self, tokens: Iterable[str], cache: Dict[str, Tuple[int, ...]] = None) -> Tuple[int, ...]:
+        """
+        计算集合的 MinHash 签名
+
+        Args:
+            tokens: 关键词集合（非空）
+            cache: 关键词哈希值缓存
+
+        Returns:
+            签名
+        """
+        cache = {} if cache is None else cache
+        return tuple(map(min, zip(*(self._hash_token(token, cache) for token in tokens))))
+
+    def group(self, keyword_sets: List[Set[str]]) -> List[List[int]]:
+        """
+        按关键词集合分组
+
+        Args:
+            keyword_sets: 每条推文的关键词集合（顺序即推文顺序）
+
+        Returns:
+            分组后的推文下标列表，组按种子推文的顺序排列，组内下标升序
+        """
+        buckets: Dict[Tuple[int, Tuple[int, ...]], List[int]] = {}
+        bucket_keys: List[List[Tuple[int, Tuple[int, ...]]]] = []
+        rows = self.rows_per_band
+        token_cache: Dict[str, Tuple[int, ...]] = {}
+        for index, keywords in enumerate(keyword_sets):
+            keys = []
+            if keywords:
+                signature = self.signature(keywords, token_cache)
+                for band in range(self.bands):
+                    key = (band, signature[band * rows:(band + 1) * rows])
+                    buckets.setdefault(key, []).append(index)
+                    keys.append(key)
+            bucket_keys.append(keys)
+
+        grouped = [False] * len(keyword_sets)
+        groups = []
+        for seed_index, seed_keywords in enumerate(keyword_sets):
+            if grouped[seed_index]:
+                continue
+            grouped[seed_index] = True
+            group = [seed_index]
+
+            candidates = set()
+            for key in bucket_keys[seed_index]:
+                bucket = buckets[key]
+                # 已分组的推文不会再成为候选，顺便从桶中清理，避免大桶被重复扫描
+                bucket[:] = [index for index in bucket if not grouped[index]]
+                candidates.update(bucket)
+
+            for index in sorted(candidates):
+                if jaccard_similarity(seed_keywords, keyword_sets[index]) > self.threshold:
+                    grouped[index] = True
+                    group.append(index)
+            groups.append(group)
+        return groups
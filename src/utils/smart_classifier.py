@@ -2,8 +2,11 @@
 智能分类处理器
 用于判断推文是项目还是话题，并自动查找或创建相应的ID
 """
+import atexit
 import json
 import logging
+import threading
+import time
 from typing import Optional, Dict, Any, Tuple
 from dataclasses import dataclass
 from datetime import datetime
@@ -15,6 +18,9 @@ from src.database.topic_dao import topic_dao
 from src.database.project_dao import ProjectDAO
 from src.api.chatgpt_client import chatgpt_client
 from src.utils.rootdata_project_matcher import rootdata_project_matcher
+from src.utils.topic_index import topic_index
+from src.utils.keyed_lock import KeyedLock
+from src.utils.config_manager import config
 
 
 @dataclass
@@ -37,17 +43,34 @@ class SmartClassifier:
         self.logger = logging.getLogger(__name__)
         self.project_dao = ProjectDAO()
         self.topic_dao = topic_dao
+        # 话题匹配使用进程内倒排索引，不再逐个关键词查询数据库
+        self.topic_index = topic_index
         self.rootdata_matcher = rootdata_project_matcher
 
         # 分类置信度阈值
         self.confidence_threshold = 0.7
+        
+        # 并发增强时按实体名称串行化查找与创建：同名实体只创建一次，不同实体互不阻塞
+        self._entity_locks = KeyedLock()
+        
+        # 本批推文中各话题的最高热度，批次结束时每个话题只写入一次（见 flush_topic_popularity）；
+        # 不在批次中调用时，待写入的话题数或等待时间达到阈值也会写入，进程退出时写入剩余部分
+        flush_config = config.get('classifier.popularity_flush', {}) or {}
+        self.popularity_flush_size = flush_config.get('max_pending_topics', 200)
+        self.popularity_flush_seconds = flush_config.get('max_delay_seconds', 60)
+        self._pending_popularity: Dict[str, Topic] = {}
+        self._pending_popularity_since: Optional[float] = None
+        self._popularity_lock = threading.Lock()
+        atexit.register(self.flush_topic_popularity)
     
-    def classify_tweet(self, tweet: Tweet) -> ClassificationResult:
+    def classify_tweet(self, tweet: Tweet,
+                       classification: Optional[Dict[str, Any]] = None) -> ClassificationResult:
         """
         对推文进行智能分类，判断是项目还是话题
         
         Args:
             tweet: 推文对象
+            classification: 可选的预先获取的AI分类结果（如批量增强结果），提供时不再单独调用AI
             
         Returns:
             ClassificationResult: 分类结果
@@ -60,7 +83,8 @@ class SmartClassifier:
                 )
             
             # 1. 使用AI进行分类
-            classification = self._ai_classify_content(tweet.full_text)
+            if classification is None:
+                classification = self._ai_classify_content(tweet.full_text)
             
             if not classification or classification.get('type') == 'unknown':
                 return ClassificationResult(
@@ -72,7 +96,7 @@ class SmartClassifier:
             entity_name = classification.get('name', '')
             confidence = classification.get('confidence', 0.0)
             
-            # 2. 根据分类结果处理
+            # 2. 根据分类结果处理（同名实体的创建在处理函数内按名称串行）
             if content_type == 'project':
                 return self._handle_project_classification(
                     entity_name, classification, tweet.id_str
@@ -157,7 +181,8 @@ class SmartClassifier:
                 {"role": "user", "content": prompt}
             ]
             
-            response = chatgpt_client._make_request(messages, temperature=0.1, max_tokens=300)
+            response = chatgpt_client._make_request(messages, cache_operation='classification',
+                                                    temperature=0.1, max_tokens=300)
             
             if not response:
                 self.logger.warning("ChatGPT API返回空响应")
@@ -215,6 +240,17 @@ class SmartClassifier:
 
             # 2. 查找现有项目（使用最终的项目名称）
             existing_project = self.project_dao.get_project_by_name(final_project_name)
+            new_project_id = None
+
+            if not existing_project:
+                # 同名项目的创建串行：等待的线程在先到的线程创建完成后直接复用其项目
+                with self._entity_locks.hold(('project', final_project_name.lower())):
+                    existing_project = self.project_dao.get_project_by_name(final_project_name, bypass_negative=True)
+                    if not existing_project:
+                        new_project_id = self._create_new_project(
+                            final_project_name,
+                            classification.get('brief', '')
+                        )
 
             if existing_project:
                 # 找到现有项目
@@ -229,12 +265,6 @@ class SmartClassifier:
                     is_new_created=False
                 )
             else:
-                # 创建新项目
-                new_project_id = self._create_new_project(
-                    final_project_name,
-                    classification.get('brief', '')
-                )
-
                 if new_project_id:
                     self.logger.info(f"推文 {tweet_id} 创建新项目: {final_project_name}")
                     return ClassificationResult(
@@ -283,30 +313,30 @@ class SmartClassifier:
             
             # 智能查找现有话题（包括模糊匹配）
             existing_topic = self._find_best_matching_topic(normalized_name, tweet.full_text)
+            new_topic_id = None
+            
+            if not existing_topic:
+                # 同名话题的创建串行：等待的线程在先到的线程创建完成后直接复用其话题
+                with self._entity_locks.hold(('topic', normalized_name.lower())):
+                    existing_topic = self._find_best_matching_topic(normalized_name, tweet.full_text,
+                                                                    bypass_negative=True)
+                    if not existing_topic:
+                        # 计算初始热度
+                        initial_popularity = self._calculate_initial_popularity(tweet)
+                        
+                        # 创建新话题
+                        new_topic_id = self._create_new_topic(
+                            normalized_name,
+                            classification.get('brief', ''),
+                            initial_popularity,
+                            tweet
+                        )
             
             if existing_topic:
-                # 找到现有话题 - 更新其热度
+                # 找到现有话题 - 记录热度，批次结束时写入
                 current_popularity = self._calculate_initial_popularity(tweet)
-                
-                # 如果新计算的热度更高，更新现有话题的热度
-                if current_popularity > (existing_topic.popularity or 0):
-                    try:
-                        existing_topic.popularity = current_popularity
-                        existing_topic.update_time = datetime.now()
-                        
-                        # 更新数据库中的热度
-                        success = self.topic_dao.update_topic_popularity(
-                            existing_topic.topic_id, 
-                            current_popularity
-                        )
-                        
-                        if success:
-                            self.logger.info(f"推文 {tweet.id_str} 更新现有话题热度: {normalized_name} (热度: {existing_topic.popularity or 0} -> {current_popularity})")
-                        else:
-                            self.logger.warning(f"更新话题热度失败: {normalized_name}")
-                            
-                    except Exception as e:
-                        self.logger.error(f"更新现有话题热度时出错: {e}")
+                if self._record_topic_popularity(existing_topic, current_popularity):
+                    self.logger.debug(f"推文 {tweet.id_str} 提高话题热度: {normalized_name} -> {current_popularity}")
                 
                 self.logger.debug(f"推文 {tweet.id_str} 匹配到现有话题: {normalized_name}")
                 return ClassificationResult(
@@ -318,17 +348,6 @@ class SmartClassifier:
                     is_new_created=False
                 )
             else:
-                # 计算初始热度
-                initial_popularity = self._calculate_initial_popularity(tweet)
-                
-                # 创建新话题
-                new_topic_id = self._create_new_topic(
-                    normalized_name,
-                    classification.get('brief', ''),
-                    initial_popularity,
-                    tweet
-                )
-                
                 if new_topic_id:
                     self.logger.info(f"推文 {tweet.id_str} 创建新话题: {normalized_name} (热度={initial_popularity})")
                     return ClassificationResult(
@@ -353,6 +372,65 @@ class SmartClassifier:
                 reason=f"处理话题分类出错: {str(e)}"
             )
     
+    def _record_topic_popularity(self, topic: Topic, popularity: int) -> bool:
+        """
+        记录话题的待写入热度（只保留本批次的最高值）
+
+        Args:
+            topic: 匹配到的话题
+            popularity: 当前推文计算的热度
+
+        Returns:
+            是否提高了话题热度
+        """
+        with self._popularity_lock:
+            pending = self._pending_popularity.get(topic.topic_id, topic)
+            if popularity <= max(pending.popularity or 0, topic.popularity or 0):
+                return False
+            pending.popularity = popularity
+            pending.update_time = datetime.now()
+            topic.popularity = popularity
+            self._pending_popularity[topic.topic_id] = pending
+            if self._pending_popularity_since is None:
+                self._pending_popularity_since = time.monotonic()
+            should_flush = (len(self._pending_popularity) >= self.popularity_flush_size
+                            or time.monotonic() - self._pending_popularity_since >= self.popularity_flush_seconds)
+        self.topic_index.update_popularity(topic.topic_id, popularity)
+        if should_flush:
+            self.flush_topic_popularity()
+        return True
+
+    def flush_topic_popularity(self) -> int:
+        """
+        写入本批次提高的话题热度：每个话题一次更新，热度历史在数据库当前内容后追加一条
+
+        Returns:
+            成功更新的话题数
+        """
+        with self._popularity_lock:
+            pending, self._pending_popularity = self._pending_popularity, {}
+            self._pending_popularity_since = None
+        if not pending:
+            return 0
+
+        try:
+            histories = self.topic_dao.append_popularity_history(
+                {topic_id: topic.popularity for topic_id, topic in pending.items()}
+            )
+        except Exception as e:
+            self.logger.error(f"批量更新话题热度时出错: {e}")
+            histories = {}
+
+        for topic_id, topic in pending.items():
+            if topic_id in histories:
+                # 与数据库保持一致，避免内存中的话题对象带着过期的历史被写回
+                topic.popularity_history = histories[topic_id]
+            else:
+                self.logger.warning(f"更新话题热度失败: {topic.topic_name}")
+
+        self.logger.info(f"批量更新话题热度: {len(histories)}/{len(pending)} 个话题")
+        return len(histories)
+
     def _normalize_project_name(self, name: str) -> str:
         """
         标准化项目名称
@@ -438,26 +516,34 @@ class SmartClassifier:
         normalized = name.strip().lower()
         return topic_mapping.get(normalized, name.strip().title())
     
-    def _find_best_matching_topic(self, topic_name: str, tweet_text: str) -> Optional:
+    def _find_best_matching_topic(self, topic_name: str, tweet_text: str, bypass_negative: bool = False) -> Optional:
         """
         智能查找最佳匹配的话题，包括精确匹配和模糊匹配
         
         Args:
             topic_name: 话题名称
             tweet_text: 推文内容
+            bypass_negative: 按名称查询数据库时忽略"不存在"的缓存（创建话题前的复查使用）
             
         Returns:
             匹配的话题对象或None
         """
         try:
+            # 启用索引时在内存中查找候选话题，否则查询数据库
+            if self.topic_index.enabled:
+                get_by_name, search = self.topic_index.get_by_name, self.topic_index.search
+            else:
+                get_by_name = lambda name: self.topic_dao.get_topic_by_name(name, bypass_negative=bypass_negative)
+                search = self.topic_dao.search_topics
+
             # 1. 精确匹配话题名称
-            exact_match = self.topic_dao.get_topic_by_name(topic_name)
+            exact_match = get_by_name(topic_name)
             if exact_match:
                 self.logger.debug(f"精确匹配到话题: {topic_name}")
                 return exact_match
             
             # 2. 搜索相似话题（关键词匹配）
-            similar_topics = self.topic_dao.search_topics(topic_name, limit=5)
+            similar_topics = search(topic_name, limit=5)
             if similar_topics:
                 # 选择最相似的话题
                 best_match = self._select_best_topic_match(similar_topics, topic_name, tweet_text)
@@ -468,7 +554,7 @@ class SmartClassifier:
             # 3. 基于推文内容关键词搜索话题
             tweet_keywords = self._extract_keywords_from_text(tweet_text)
             for keyword in tweet_keywords:
-                keyword_topics = self.topic_dao.search_topics(keyword, limit=3)
+                keyword_topics = search(keyword, limit=3)
                 if keyword_topics:
                     best_match = self._select_best_topic_match(keyword_topics, topic_name, tweet_text)
                     if best_match:
@@ -637,6 +723,7 @@ class SmartClassifier:
             # 保存到数据库
             success = self.topic_dao.insert(topic)
             if success:
+                self.topic_index.add_topic(topic)
                 return topic_id
             else:
                 self.logger.error(f"保存新话题到数据库失败: {topic_name}")
@@ -12,6 +12,7 @@ from ..api.chatgpt_client import chatgpt_client
 from ..models.tweet import Tweet
 from ..models.topic import Topic
 from ..utils.logger import get_logger
+from ..utils.similarity_grouping import MinHashLSHGrouper
 
 
 class TopicAnalyzer:
@@ -21,6 +22,8 @@ class TopicAnalyzer:
         """初始化话题分析器"""
         self.logger = get_logger(__name__)
         self.chatgpt_client = chatgpt_client
+        # 推文分组：关键词相似度超过0.3的推文分入同一组
+        self.tweet_grouper = MinHashLSHGrouper(threshold=0.3)
     
     def extract_topics_from_tweets(self, tweets: List[Tweet]) -> List[Topic]:
         """
@@ -103,32 +106,9 @@ class TopicAnalyzer:
             推文分组列表
         """
         try:
-            # 简单的关键词分组算法
-            groups = []
-            ungrouped_tweets = tweets.copy()
-            
-            # 第一轮：基于关键词分组
-            while ungrouped_tweets:
-                current_tweet = ungrouped_tweets.pop(0)
-                current_group = [current_tweet]
-                
-                # 提取当前推文的关键词
-                current_keywords = self._extract_keywords(current_tweet.full_text)
-                
-                # 查找相似推文
-                i = 0
-                while i < len(ungrouped_tweets):
-                    candidate_tweet = ungrouped_tweets[i]
-                    candidate_keywords = self._extract_keywords(candidate_tweet.full_text)
-                    
-                    # 计算关键词重叠度
-                    if self._calculate_keyword_similarity(current_keywords, candidate_keywords) > 0.3:
-                        current_group.append(candidate_tweet)
-                        ungrouped_tweets.pop(i)
-                    else:
-                        i += 1
-                
-                groups.append(current_group)
+            # 基于关键词分组：每条推文只提取一次关键词，用MinHash LSH查找相似度超过阈值的推文
+            keyword_sets = [self._extract_keywords(tweet.full_text) for tweet in tweets]
+            groups = [[tweets[index] for index in group] for group in self.tweet_grouper.group(keyword_sets)]
             
             self.logger.info(f"推文分组完成: {len(tweets)} 条推文 → {len(groups)} 个组")
             
@@ -179,16 +159,6 @@ class TopicAnalyzer:
         
         return keywords
     
-    def _calculate_keyword_similarity(self, keywords1: set, keywords2: set) -> float:
-        """计算关键词相似度"""
-        if not keywords1 or not keywords2:
-            return 0.0
-        
-        intersection = keywords1.intersection(keywords2)
-        union = keywords1.union(keywords2)
-        
-        return len(intersection) / len(union) if union else 0.0
-    
     def _extract_topic_from_single_tweet(self, tweet: Tweet) -> Dict[str, Any]:
         """
         从单条推文提取话题（更严格的标准）
@@ -0,0 +1,247 @@
+"""
+话题倒排索引
+进程内按 topic_name、brief、key_entities 的词建立倒排索引，智能分类匹配话题时不再逐个关键词执行 LIKE 全表扫描；
+启动时全量加载，新建话题时增量加入，之后按 update_time 水位线定期增量刷新
+"""
+import logging
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Set
+
+from ..database.topic_dao import topic_dao
+from ..models.topic import Topic
+from .config_manager import config
+
+
+class TopicIndex:
+    """话题倒排索引"""
+
+    # 建立索引的字段
+    INDEXED_FIELDS = ('topic_name', 'brief', 'key_entities')
+
+    def __init__(self, dao=None, settings: Dict[str, Any] = None):
+        """
+        初始化话题索引（首次查询时加载）
+
+        Args:
+            dao: 话题DAO，默认使用全局 topic_dao
+            settings: 索引参数，默认读取 classifier.topic_index
+        """
+        self.logger = logging.getLogger(__name__)
+        self.topic_dao = dao or topic_dao
+        if settings is None:
+            settings = config.get('classifier.topic_index', {}) or {}
+
+        self.enabled = settings.get('enabled', True)
+        self.refresh_seconds = settings.get('refresh_seconds', 60)
+        # 写后缓冲中的更新写入数据库时 update_time 早于写入时间，刷新时多回看一段时间
+        self.lookback_seconds = settings.get('lookback_seconds', 60)
+        self.full_reload_seconds = settings.get('full_reload_seconds', 3600)
+        self.page_size = settings.get('page_size', 5000)
+
+        self._lock = threading.RLock()
+        self._refresh_lock = threading.Lock()
+        self._topics: Dict[str, Topic] = {}
+        self._by_name: Dict[str, str] = {}
+        self._postings: Dict[str, Set[str]] = {}
+        self._terms: Dict[str, Set[str]] = {}
+        self._watermark: Optional[datetime] = None
+        self._last_refresh = 0.0
+        self._last_full_reload = 0.0
+
+        self.stats = {'lookups': 0, 'refreshes': 0, 'full_reloads': 0, 'indexed_topics': 0}
+
+    @staticmethod
+    def tokenize(text: Optional[str]) -> Set[str]:
+        """
+        切分为小写词
+
+        Args:
+            text: 文本
+
+        Returns:
+            词集合
+        """
+        if not text:
+            return set()
+        return set(re.findall(r'\w+', text.lower()))
+
+    def add_topic(self, topic: Topic) -> None:
+        """
+        加入或更新一个话题
+
+        Args:
+            topic: 话题对象
+        """
+        if not topic or not topic.topic_id:
+            return
+        with self._lock:
+            self._remove(topic.topic_id)
+            terms = set()
+            for field_name in self.INDEXED_FIELDS:
+                terms |= self.tokenize(getattr(topic, field_name, None))
+            for term in terms:
+                self._postings.setdefault(term, set()).add(topic.topic_id)
+            self._topics[topic.topic_id] = topic
+            self._terms[topic.topic_id] = terms
+            if topic.topic_name:
+                self._by_name[topic.topic_name] = topic.topic_id
+            if isinstance(topic.update_time, datetime) and (self._watermark is None or topic.update_time > self._watermark):
+                self._watermark = topic.update_time
+            self.stats['indexed_topics'] = len(self._topics)
+
+    def _remove(self, topic_id: str) -> None:
+        """移除话题的索引项（调用方持有锁）"""
+        old = self._topics.pop(topic_id, None)
+        if old is None:
+            return
+        for term in self._terms.pop(topic_id, set()):
+            posting = self._postings.get(term)
+            if posting is not None:
+                posting.discard(topic_id)
+                if not posting:
+                    del self._postings[term]
+        if old.topic_name and self._by_name.get(old.topic_name) == topic_id:
+            del self._by_name[old.topic_name]
+
+    def update_popularity(self, topic_id: str, popularity: int) -> None:
+        """
+        更新索引中话题的热度（搜索结果按热度排序）
+
+        Args:
+            topic_id: 话题ID
+            popularity: 新的热度值
+        """
+        with self._lock:
+            topic = self._topics.get(topic_id)
+            if topic is not None:
+                topic.popularity = popularity
+                topic.update_time = datetime.now()
+
+    def get_by_name(self, topic_name: str) -> Optional[Topic]:
+        """
+        按名称精确查找话题
+
+        Args:
+            topic_name: 话题名称
+
+        Returns:
+            话题对象或None
+        """
+        self._ensure_fresh()
+        with self._lock:
+            self.stats['lookups'] += 1
+            topic_id = self._by_name.get(topic_name)
+            return self._topics.get(topic_id) if topic_id else None
+
+    def search(self, keyword: str, limit: int = 20) -> List[Topic]:
+        """
+        查找索引字段中包含关键词全部词的话题，按热度从高到低
+
+        Args:
+            keyword: 关键词或短语
+            limit: 限制数量
+
+        Returns:
+            话题列表
+        """
+        terms = self.tokenize(keyword)
+        if not terms:
+            return []
+        self._ensure_fresh()
+        with self._lock:
+            self.stats['lookups'] += 1
+            postings = sorted((self._postings.get(term, set()) for term in terms), key=len)
+            topic_ids = set(postings[0])
+            for posting in postings[1:]:
+                topic_ids &= posting
+                if not topic_ids:
+                    return []
+            topics = [self._topics[topic_id] for topic_id in topic_ids]
+        topics.sort(key=lambda topic: topic.popularity or 0, reverse=True)
+        return topics[:limit]
+
+    def _ensure_fresh(self) -> None:
+        """首次使用时全量加载，之后按刷新间隔增量刷新（并发调用时只有一个线程读取数据库）"""
+        with self._refresh_lock:
+            now = time.time()
+            if now - self._last_full_reload >= self.full_reload_seconds:
+                self.reload()
+            elif now - self._last_refresh >= self.refresh_seconds:
+                self.refresh()
+
+    def reload(self) -> int:
+        """
+        全量重建索引（同时清除已删除的话题）
+
+        Returns:
+            索引的话题数
+        """
+        topics = self._load_since(None)
+        with self._lock:
+            if not topics and self._topics:
+                # 读取失败时保留现有索引
+                self._last_full_reload = self._last_refresh = time.time()
+                return len(self._topics)
+            self._topics, self._by_name, self._postings, self._terms = {}, {}, {}, {}
+            self._watermark = None
+            for topic in topics:
+                self.add_topic(topic)
+            self._last_full_reload = self._last_refresh = time.time()
+            self.stats['full_reloads'] += 1
+            self.stats['indexed_topics'] = len(self._topics)
+        self.logger.info(f"话题索引全量加载: {len(self._topics)} 个话题, {len(self._postings)} 个词")
+        return len(self._topics)
+
+    def refresh(self) -> int:
+        """
+        按 update_time 水位线增量刷新
+
+        Returns:
+            刷新的话题数
+        """
+        with self._lock:
+            since = self._watermark - timedelta(seconds=self.lookback_seconds) if self._watermark else None
+        topics = self._load_since(since)
+        for topic in topics:
+            self.add_topic(topic)
+        with self._lock:
+            self._last_refresh = time.time()
+            self.stats['refreshes'] += 1
+        if topics:
+            self.logger.debug(f"话题索引增量刷新: {len(topics)} 个话题")
+        return len(topics)
+
+    def _load_since(self, since: Optional[datetime]) -> List[Topic]:
+        """按更新时间分页读取话题"""
+        loaded: Dict[str, Topic] = {}
+        while True:
+            page = self.topic_dao.get_topics_updated_since(since, limit=self.page_size)
+            for topic in page:
+                loaded[topic.topic_id] = topic
+            if len(page) < self.page_size:
+                break
+            last_update = page[-1].update_time
+            if last_update is None or last_update == since:
+                # 同一更新时间的话题超过一页，无法继续推进
+                self.logger.warning(f"话题索引分页无法推进: {last_update}")
+                break
+            since = last_update
+        return list(loaded.values())
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取索引统计
+
+        Returns:
+            查询次数、刷新次数和索引规模
+        """
+        with self._lock:
+            return dict(self.stats, terms=len(self._postings),
+                        watermark=self._watermark.isoformat() if self._watermark else None)
+
+
+# 全局话题索引实例
+topic_index = TopicIndex()
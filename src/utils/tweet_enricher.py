@@ -4,6 +4,7 @@
 """
 import logging
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 
@@ -16,6 +17,7 @@ from ..models.tweet import Tweet
 from ..models.topic import Topic
 from ..models.project import Project
 from .advanced_topic_processor import advanced_topic_processor
+from .config_manager import config
 from .smart_classifier import smart_classifier
 from .token_extractor import token_extractor
 
@@ -31,6 +33,13 @@ class TweetEnricher:
         self.kol_dao = kol_dao
         self.project_dao = ProjectDAO()
         self.token_extractor = token_extractor
+        
+        # 并发增强的最大线程数（Gemini调用受 chatgpt.rate_limit 全局限流）
+        self.max_workers = config.get('chatgpt.concurrency.max_workers', 4)
+
+        # 批量增强：一次请求同时完成验证、情绪、分类、token提取和公告判断
+        self.batch_enrichment_enabled = config.get('chatgpt.batch_enrichment.enabled', True)
+        self.batch_enrichment_size = config.get('chatgpt.batch_enrichment.batch_size', 10)
 
         # 缓存已知的KOL用户ID，避免重复查询
         self._kol_user_cache = {}
@@ -104,43 +113,38 @@ class TweetEnricher:
         """
         批量增强推文数据
         
+        启用批量增强时，先按批次一次性获取验证、情绪、分类、token和公告结果，
+        每条推文内部缺失的字段再回退到单一用途的调用。
+        不同推文之间通过有界线程池并发，Gemini调用共享客户端的全局限流。
+        
         Args:
             tweets: 推文列表
             user_data_map: 用户数据映射 {user_id: user_data}
             
         Returns:
-            增强后的推文列表
+            增强后的推文列表（顺序与输入一致）
         """
         try:
-            enriched_tweets = []
-            
-            for tweet in tweets:
-                try:
-                    # 增强单条推文
-                    enriched_tweet = self.enrich_single_tweet(tweet, user_data_map)
-                    if enriched_tweet:
-                        enriched_tweets.append(enriched_tweet)
-                    else:
-                        # 如果增强失败，至少设置基础字段后再使用
-                        self.logger.warning(f"推文 {tweet.id_str} 增强失败，使用基础增强")
-                        fallback_tweet = self._apply_basic_enrichment(tweet, user_data_map)
-                        enriched_tweets.append(fallback_tweet)
-                        
-                except Exception as e:
-                    self.logger.error(f"增强推文 {tweet.id_str} 发生异常: {e}")
-                    self.logger.error(f"异常详情: {type(e).__name__}: {str(e)}")
-                    # 发生异常时，至少应用基础增强
-                    try:
-                        fallback_tweet = self._apply_basic_enrichment(tweet, user_data_map)
-                        enriched_tweets.append(fallback_tweet)
-                        self.logger.info(f"推文 {tweet.id_str} 应用基础增强成功")
-                    except Exception as fallback_error:
-                        self.logger.error(f"推文 {tweet.id_str} 基础增强也失败: {fallback_error}")
-                        # 最后兜底：使用原始推文但设置基本KOL信息
-                        if tweet.id_str in user_data_map:
-                            user_data = user_data_map[tweet.id_str]
-                            tweet.kol_id = user_data.get('id_str')
-                        enriched_tweets.append(tweet)
+            max_workers = min(self.max_workers, len(tweets))
+            prefetched_map = self._prefetch_batch_enrichment(tweets, user_data_map, max_workers)
+            
+            if max_workers <= 1:
+                enriched_tweets = [
+                    self._enrich_tweet_with_fallback(tweet, user_data_map, prefetched_map.get(tweet.id_str))
+                    for tweet in tweets
+                ]
+            else:
+                self.logger.info(f"并发增强 {len(tweets)} 条推文，并发数: {max_workers}")
+                with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='tweet-enricher') as executor:
+                    enriched_tweets = list(executor.map(
+                        lambda tweet: self._enrich_tweet_with_fallback(
+                            tweet, user_data_map, prefetched_map.get(tweet.id_str)
+                        ),
+                        tweets
+                    ))
+            
+            # 本批次提高的话题热度每个话题只写入一次
+            smart_classifier.flush_topic_popularity()
             
             self.logger.info(f"推文增强完成，处理 {len(enriched_tweets)} 条推文")
             return enriched_tweets
@@ -149,6 +153,103 @@ class TweetEnricher:
             self.logger.error(f"批量增强推文失败: {e}")
             return tweets
     
+    def _prefetch_batch_enrichment(self, tweets: List[Tweet],
+                                   user_data_map: Dict[str, Dict[str, Any]],
+                                   max_workers: int) -> Dict[str, Dict[str, Any]]:
+        """
+        按批次调用组合增强接口，预先获取每条推文的AI分析结果
+        
+        Args:
+            tweets: 推文列表
+            user_data_map: 用户数据映射
+            max_workers: 并发请求的批次数
+            
+        Returns:
+            {tweet_id: 预取字段}，失败或未启用时为空字典
+        """
+        if not self.batch_enrichment_enabled or not tweets:
+            return {}
+        
+        try:
+            # 内容过短的推文会被直接判定为无效，无需交给AI
+            candidates = [tweet for tweet in tweets if tweet.full_text and len(tweet.full_text.strip()) >= 10]
+            batch_size = max(1, self.batch_enrichment_size)
+            batches = [candidates[i:i + batch_size] for i in range(0, len(candidates), batch_size)]
+            if not batches:
+                return {}
+            
+            def fetch_batch(batch: List[Tweet]) -> List[Dict[str, Any]]:
+                return self.chatgpt.batch_enrich_tweets([
+                    {
+                        'text': tweet.full_text,
+                        'is_project_tweet': self._is_project_kol(
+                            self._extract_kol_id_from_user_data(tweet, user_data_map)
+                        )
+                    }
+                    for tweet in batch
+                ])
+            
+            workers = min(max_workers, len(batches))
+            if workers <= 1:
+                batch_results = [fetch_batch(batch) for batch in batches]
+            else:
+                with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='tweet-batch-enricher') as executor:
+                    batch_results = list(executor.map(fetch_batch, batches))
+            
+            prefetched_map = {}
+            for batch, results in zip(batches, batch_results):
+                for tweet, result in zip(batch, results):
+                    if result:
+                        prefetched_map[tweet.id_str] = result
+            
+            self.logger.info(f"批量增强预取完成: {len(prefetched_map)}/{len(candidates)} 条推文，"
+                             f"{len(batches)} 次请求")
+            return prefetched_map
+            
+        except Exception as e:
+            self.logger.warning(f"批量增强预取失败，将使用单项调用: {e}")
+            return {}
+    
+    def _enrich_tweet_with_fallback(self, tweet: Tweet, 
+                                    user_data_map: Dict[str, Dict[str, Any]],
+                                    prefetched: Optional[Dict[str, Any]] = None) -> Tweet:
+        """
+        增强单条推文，失败时依次降级到基础增强和原始推文
+        
+        Args:
+            tweet: 推文对象
+            user_data_map: 用户数据映射
+            prefetched: 批量增强预取的字段
+            
+        Returns:
+            增强后的推文
+        """
+        try:
+            # 增强单条推文
+            enriched_tweet = self.enrich_single_tweet(tweet, user_data_map, prefetched)
+            if enriched_tweet:
+                return enriched_tweet
+            
+            # 如果增强失败，至少设置基础字段后再使用
+            self.logger.warning(f"推文 {tweet.id_str} 增强失败，使用基础增强")
+            return self._apply_basic_enrichment(tweet, user_data_map)
+                
+        except Exception as e:
+            self.logger.error(f"增强推文 {tweet.id_str} 发生异常: {e}")
+            self.logger.error(f"异常详情: {type(e).__name__}: {str(e)}")
+            # 发生异常时，至少应用基础增强
+            try:
+                fallback_tweet = self._apply_basic_enrichment(tweet, user_data_map)
+                self.logger.info(f"推文 {tweet.id_str} 应用基础增强成功")
+                return fallback_tweet
+            except Exception as fallback_error:
+                self.logger.error(f"推文 {tweet.id_str} 基础增强也失败: {fallback_error}")
+                # 最后兜底：使用原始推文但设置基本KOL信息
+                if tweet.id_str in user_data_map:
+                    user_data = user_data_map[tweet.id_str]
+                    tweet.kol_id = user_data.get('id_str')
+                return tweet
+    
     def enrich_project_tweets_simplified(self, tweets: List[Tweet], 
                                        user_data_map: Dict[str, Dict[str, Any]]) -> List[Tweet]:
         """
@@ -420,6 +521,8 @@ class TweetEnricher:
         except Exception as e:
             self.logger.error(f"最小化增强推文 {tweet.id_str} 失败: {e}")
             return tweet
+    
+    def _apply_basic_enrichment(self, tweet: Tweet, user_data_map: Dict[str, Dict[str, Any]]) -> Tweet:
         """
         应用基础增强，确保关键字段被设置
         
@@ -457,18 +560,22 @@ class TweetEnricher:
             return tweet
     
     def enrich_single_tweet(self, tweet: Tweet, 
-                          user_data_map: Dict[str, Dict[str, Any]]) -> Optional[Tweet]:
+                          user_data_map: Dict[str, Dict[str, Any]],
+                          prefetched: Optional[Dict[str, Any]] = None) -> Optional[Tweet]:
         """
         增强单条推文
         
         Args:
             tweet: 推文对象
             user_data_map: 用户数据映射
+            prefetched: 批量增强预取的字段，缺失的字段回退到单一用途的AI调用
             
         Returns:
             增强后的推文对象
         """
         try:
+            prefetched = prefetched or {}
+
             self.logger.debug(f"开始增强推文 {tweet.id_str}")
             
             # 1. 设置 kol_id（从用户数据中获取 user.id_str）
@@ -501,7 +608,8 @@ class TweetEnricher:
                     is_valid = True
                     self.logger.debug(f"推文 {tweet.id_str} 来自项目官方账号，跳过内容验证")
                 else:
-                    is_valid = self._validate_crypto_content(tweet.full_text, use_ai=True)
+                    is_valid = self._validate_crypto_content(tweet.full_text, use_ai=True,
+                                                             prefetched=prefetched.get('is_valid'))
                     
                 tweet.is_valid = is_valid
                 self.logger.debug(f"推文 {tweet.id_str} 内容有效性: {is_valid}")
@@ -514,11 +622,12 @@ class TweetEnricher:
             # 5. 仅对有效推文进行进一步分析
             if is_valid:
                 # 5.1 情绪分析
-                sentiment = self._analyze_tweet_sentiment(tweet.full_text, use_ai=True)
+                sentiment = self._analyze_tweet_sentiment(tweet.full_text, use_ai=True,
+                                                          prefetched=prefetched.get('sentiment'))
                 tweet.sentiment = sentiment
 
                 # 4.2 使用智能分类器处理项目和话题
-                classification_result = self._classify_and_set_ids(tweet)
+                classification_result = self._classify_and_set_ids(tweet, prefetched.get('classification'))
 
                 # 设置相应的ID字段（确保互斥性）
                 if classification_result.content_type == 'project':
@@ -534,7 +643,7 @@ class TweetEnricher:
                     tweet.entity_id = classification_result.topic_id
                     tweet.project_tag = None  # 确保project_tag为空
                     # 4.3 对于非项目推文，提取token symbols
-                    token_tag = self._extract_token_symbols(tweet.full_text)
+                    token_tag = self._extract_token_symbols(tweet.full_text, prefetched.get('token_symbols'))
                     tweet.token_tag = token_tag
                 else:
                     # 未知类型，清空所有分类字段
@@ -543,12 +652,12 @@ class TweetEnricher:
                     tweet.entity_id = None
                     tweet.project_tag = None
                     # 4.3 对于非项目推文，提取token symbols
-                    token_tag = self._extract_token_symbols(tweet.full_text)
+                    token_tag = self._extract_token_symbols(tweet.full_text, prefetched.get('token_symbols'))
                     tweet.token_tag = token_tag
 
                 # 4.4 只对项目官方推文判断是否为重要公告
                 if tweet.is_real_project_tweet == 1:
-                    is_announce = self._classify_announcement(tweet.full_text)
+                    is_announce = self._classify_announcement(tweet.full_text, prefetched.get('is_announce'))
                     tweet.is_announce = is_announce
 
                     # 4.6 对于公告推文，生成AI总结
@@ -612,13 +721,15 @@ class TweetEnricher:
             
             return None
     
-    def _validate_crypto_content(self, text: str, use_ai: bool = True) -> bool:
+    def _validate_crypto_content(self, text: str, use_ai: bool = True,
+                                 prefetched: Optional[bool] = None) -> bool:
         """
         验证推文是否为有效的加密货币相关内容（且非广告）
         
         Args:
             text: 推文内容
             use_ai: 是否使用AI分析（默认使用关键词模式避免API消耗）
+            prefetched: 批量增强预取的验证结果
             
         Returns:
             是否为有效内容
@@ -627,6 +738,9 @@ class TweetEnricher:
             if not text or len(text.strip()) < 10:
                 return False
             
+            if prefetched is not None:
+                return prefetched
+            
             text_lower = text.lower()
             
             # 方法1: 使用AI分析（如果API可用且启用）
@@ -811,7 +925,7 @@ class TweetEnricher:
             response = self.chatgpt._make_request([
                 {"role": "system", "content": "你是一个专业的内容质量检查员，专门识别有价值的加密货币内容。"},
                 {"role": "user", "content": prompt}
-            ], temperature=0.1, max_tokens=10)
+            ], cache_operation='content_validation', temperature=0.1, max_tokens=10)
             
             if response:
                 result = response.strip().lower()
@@ -823,18 +937,23 @@ class TweetEnricher:
             self.logger.warning(f"AI内容验证失败: {e}")
             return None
     
-    def _analyze_tweet_sentiment(self, text: str, use_ai: bool = True) -> Optional[str]:
+    def _analyze_tweet_sentiment(self, text: str, use_ai: bool = True,
+                                 prefetched: Optional[str] = None) -> Optional[str]:
         """
         分析推文情绪倾向
         
         Args:
             text: 推文内容
             use_ai: 是否使用AI分析
+            prefetched: 批量增强预取的情绪（positive/negative/neutral）
             
         Returns:
             情绪倾向：'Positive'/'Negative'/'Neutral'
         """
         try:
+            if prefetched:
+                return prefetched.capitalize()
+            
             # 方法1: 使用AI分析（如果API可用且启用）
             if use_ai:
                 ai_sentiment = self._ai_analyze_sentiment(text)
@@ -1019,19 +1138,20 @@ class TweetEnricher:
         # 4. 简化架构：统一在一个流程中处理，减少系统复杂度
         return True
     
-    def _classify_and_set_ids(self, tweet: Tweet):
+    def _classify_and_set_ids(self, tweet: Tweet, prefetched: Optional[Dict[str, Any]] = None):
         """
         使用智能分类器对推文进行分类，并设置project_id和topic_id
 
         Args:
             tweet: 推文对象
+            prefetched: 批量增强预取的AI分类结果
 
         Returns:
             ClassificationResult: 分类结果
         """
         try:
             # 使用智能分类器进行分类
-            classification_result = smart_classifier.classify_tweet(tweet)
+            classification_result = smart_classifier.classify_tweet(tweet, prefetched)
 
             if classification_result.content_type == 'unknown':
                 self.logger.debug(f"推文 {tweet.id_str} 无法分类: {classification_result.reason}")
@@ -1052,12 +1172,13 @@ class TweetEnricher:
             from .smart_classifier import ClassificationResult
             return ClassificationResult(content_type='unknown', reason=f"分类出错: {str(e)}")
 
-    def _extract_token_symbols(self, text: str) -> Optional[str]:
+    def _extract_token_symbols(self, text: str, prefetched: Optional[List[str]] = None) -> Optional[str]:
         """
         从推文文本中提取token symbols
 
         Args:
             text: 推文文本
+            prefetched: 批量增强预取的AI symbols
 
         Returns:
             提取的token symbol字符串（逗号分隔），如果没有则返回None
@@ -1067,13 +1188,14 @@ class TweetEnricher:
                 return None
 
             # 1. 使用AI提取token symbols
-            ai_symbols = None
-            try:
-                ai_symbols = self.chatgpt.extract_token_symbols_from_tweet(text)
-                if ai_symbols:
-                    self.logger.debug(f"AI提取到的symbols: {ai_symbols}")
-            except Exception as e:
-                self.logger.warning(f"AI提取token失败，将使用规则提取: {e}")
+            ai_symbols = prefetched
+            if ai_symbols is None:
+                try:
+                    ai_symbols = self.chatgpt.extract_token_symbols_from_tweet(text)
+                    if ai_symbols:
+                        self.logger.debug(f"AI提取到的symbols: {ai_symbols}")
+                except Exception as e:
+                    self.logger.warning(f"AI提取token失败，将使用规则提取: {e}")
 
             # 2. 使用token_extractor验证和规范化
             token_tag = self.token_extractor.extract_symbols_from_text(text, ai_symbols)
@@ -1089,12 +1211,13 @@ class TweetEnricher:
             self.logger.error(f"提取token symbols失败: {e}")
             return None
 
-    def _classify_announcement(self, text: str) -> int:
+    def _classify_announcement(self, text: str, prefetched: Optional[int] = None) -> int:
         """
         判断推文是否为重要公告
 
         Args:
             text: 推文文本
+            prefetched: 批量增强预取的公告判断结果
 
         Returns:
             1表示是重要公告，0表示不是
@@ -1104,7 +1227,10 @@ class TweetEnricher:
                 return 0
 
             # 使用ChatGPT判断是否为公告
-            is_announce = self.chatgpt.classify_tweet_announcement(text)
+            if prefetched is not None:
+                is_announce = prefetched
+            else:
+                is_announce = self.chatgpt.classify_tweet_announcement(text)
 
             if is_announce == 1:
                 self.logger.info(f"识别为重要公告")
@@ -0,0 +1,181 @@
+"""
+Twitter时间解析工具
+对固定的Twitter时间格式（"Wed Oct 05 20:11:53 +0000 2016"）手工解析，
+重复的时间字符串走缓存，解析结果保存在原始推文字典上供后续环节复用
+"""
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Dict, Any, Optional
+
+from dateutil import parser as date_parser
+
+
+# 保存在原始推文字典上的解析结果字段
+PARSED_CREATED_AT_KEY = '_created_at_parsed'
+
+_MONTHS = {
+    'Jan': 1, 'Feb': 2, 'Mar': 3, 'Apr': 4, 'May': 5, 'Jun': 6,
+    'Jul': 7, 'Aug': 8, 'Sep': 9, 'Oct': 10, 'Nov': 11, 'Dec': 12
+}
+
+# 非Twitter格式时依次尝试的格式
+_FALLBACK_FORMATS = [
+    '%a %b %d %H:%M:%S %z %Y',  # Twitter标准格式
+    '%Y-%m-%dT%H:%M:%S.%fZ',     # ISO格式
+    '%Y-%m-%d %H:%M:%S',         # 标准格式
+]
+
+
+@lru_cache(maxsize=64)
+def _get_timezone(offset: str) -> timezone:
+    """
+    按"+0000"形式的偏移获取时区对象
+
+    Args:
+        offset: 时区偏移字符串
+
+    Returns:
+        时区对象
+    """
+    if offset == '+0000':
+        return timezone.utc
+    sign = -1 if offset[0] == '-' else 1
+    return timezone(sign * timedelta(hours=int(offset[1:3]), minutes=int(offset[3:5])))
+
+
+def _parse_fast(value: str) -> Optional[datetime]:
+    """
+    手工解析Twitter固定格式，格式不符时返回None
+
+    Args:
+        value: 时间字符串
+
+    Returns:
+        带时区的datetime对象
+    """
+    parts = value.split(' ')
+    if len(parts) != 6:
+        return None
+    _, month_name, day, clock, offset, year = parts
+    month = _MONTHS.get(month_name)
+    if month is None or len(clock) != 8 or len(offset) != 5 or offset[0] not in '+-':
+        return None
+    try:
+        return datetime(int(year), month, int(day), int(clock[0:2]), int(clock[3:5]), int(clock[6:8]),
+                        tzinfo=_get_timezone(offset))
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=4096)
+def _parse_cached(value: str) -> Optional[datetime]:
+    """
+    解析时间字符串（结果缓存，datetime不可变可以安全共享）
+
+    Args:
+        value: 时间字符串
+
+    Returns:
+        datetime对象，无法解析时返回None
+    """
+    parsed = _parse_fast(value)
+    if parsed is not None:
+        return parsed
+
+    for fmt in _FALLBACK_FORMATS:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+
+    try:
+        return date_parser.parse(value)
+    except (ValueError, OverflowError):
+        return None
+
+
+def parse_twitter_datetime(value) -> Optional[datetime]:
+    """
+    解析Twitter时间
+
+    Twitter格式返回带时区的datetime；其他格式按ISO、标准格式、dateutil依次尝试
+
+    Args:
+        value: 时间字符串或datetime对象
+
+    Returns:
+        datetime对象，为空或无法解析时返回None
+    """
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return value
+    return _parse_cached(str(value))
+
+
+def get_tweet_created_at(raw_tweet: Dict[str, Any]) -> Optional[datetime]:
+    """
+    获取原始推文的创建时间，首次解析后保存在推文字典上
+
+    Args:
+        raw_tweet: API返回的原始推文
+
+    Returns:
+        datetime对象，缺失或无法解析时返回None
+    """
+    parsed = raw_tweet.get(PARSED_CREATED_AT_KEY)
+    if parsed is None:
+        parsed = parse_twitter_datetime(raw_tweet.get('created_at'))
+        if parsed is not None:
+            raw_tweet[PARSED_CREATED_AT_KEY] = parsed
+    return parsed
+
+
+def get_tweet_local_time(raw_tweet: Dict[str, Any]) -> Optional[datetime]:
+    """
+    获取原始推文创建时间对应的本地时间（不带时区），用于与本地时间截止点比较
+
+    Args:
+        raw_tweet: API返回的原始推文
+
+    Returns:
+        本地时间，缺失或无法解析时返回None
+    """
+    tweet_time = get_tweet_created_at(raw_tweet)
+    if tweet_time is None:
+        return None
+    # 如果没有时区信息但格式符合UTC标准(+0000结尾)，假设为UTC
+    created_at_str = str(raw_tweet.get('created_at', ''))
+    if not tweet_time.tzinfo and (created_at_str.endswith('+0000') or 'GMT' in created_at_str or 'UTC' in created_at_str):
+        tweet_time = tweet_time.replace(tzinfo=timezone.utc)
+    return to_local_naive(tweet_time)
+
+
+def to_local_naive(value: datetime) -> datetime:
+    """
+    带时区的时间转换为本地时间并去掉时区信息，不带时区的原样返回
+
+    Args:
+        value: datetime对象
+
+    Returns:
+        本地时间
+    """
+    if value.tzinfo:
+        return value.astimezone().replace(tzinfo=None)
+    return value
+
+
+def to_utc_naive(value: datetime) -> datetime:
+    """
+    带时区的时间转换为UTC并去掉时区信息，不带时区的视为UTC原样返回
+
+    Args:
+        value: datetime对象
+
+    Returns:
+        UTC时间
+    """
+    if value.tzinfo:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
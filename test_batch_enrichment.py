@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+批量增强测试脚本
+模拟Gemini返回，验证组合结果的逐字段解析和解析失败时的回退
+"""
+
+import sys
+import json
+
+# 添加项目路径
+sys.path.append('.')
+
+from src.api.chatgpt_client import ChatGPTClient
+
+
+def build_client(response: str) -> ChatGPTClient:
+    """构建返回固定响应的客户端"""
+    client = ChatGPTClient()
+    client.requests = []
+
+    def fake_make_request(messages, **kwargs):
+        client.requests.append(messages)
+        return response
+
+    client._make_request = fake_make_request
+    return client
+
+
+TWEETS = [
+    {'text': 'Bitcoin just broke 100k, bullish on $BTC and $ETH', 'is_project_tweet': False},
+    {'text': 'Mainnet v2 is live today! Join our AMA on Spaces', 'is_project_tweet': True},
+    {'text': 'Regulation news is getting worse for the whole market', 'is_project_tweet': False},
+]
+
+
+def test_batch_parse() -> bool:
+    """测试一次请求解析整批结果"""
+    print("=" * 60)
+    print("测试批量增强结果解析")
+    print("=" * 60)
+
+    response = '```json\n' + json.dumps([
+        {'index': 0, 'is_valid': True, 'sentiment': 'Positive', 'type': 'project', 'name': 'Bitcoin',
+         'brief': 'BTC', 'confidence': 0.9, 'token_symbols': ['$btc', 'ETH'], 'is_announcement': False},
+        {'index': 1, 'is_valid': True, 'sentiment': 'positive', 'type': 'project', 'name': 'Foo',
+         'brief': 'Foo chain', 'confidence': 0.8, 'token_symbols': [], 'is_announcement': True},
+        {'index': 2, 'is_valid': True, 'sentiment': 'negative', 'type': 'topic', 'name': 'Regulation',
+         'brief': 'policy', 'confidence': 0.7, 'token_symbols': [], 'is_announcement': False},
+    ]) + '\n```'
+    client = build_client(response)
+    results = client.batch_enrich_tweets(TWEETS)
+
+    for result in results:
+        print(result)
+
+    ok = (len(client.requests) == 1
+          and results[0]['sentiment'] == 'positive'
+          and results[0]['token_symbols'] == ['BTC', 'ETH']
+          and results[0]['classification']['name'] == 'Bitcoin'
+          and results[1]['is_announce'] == 1
+          and results[2]['classification']['type'] == 'topic')
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def test_partial_fields() -> bool:
+    """测试缺失或非法字段被丢弃，由调用方单独回退"""
+    print("\n" + "=" * 60)
+    print("测试逐字段回退")
+    print("=" * 60)
+
+    response = json.dumps([
+        {'index': 0, 'is_valid': 'maybe', 'sentiment': 'very good', 'type': 'project'},
+        {'index': 1, 'is_valid': False},
+    ])
+    results = build_client(response).batch_enrich_tweets(TWEETS)
+
+    for result in results:
+        print(result)
+
+    ok = results[0] == {} and results[1] == {'is_valid': False} and results[2] == {}
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def test_invalid_json() -> bool:
+    """测试返回无法解析时全部回退"""
+    print("\n" + "=" * 60)
+    print("测试无效JSON回退")
+    print("=" * 60)
+
+    results = build_client('sorry, I cannot help with that').batch_enrich_tweets(TWEETS)
+    ok = results == [{}, {}, {}]
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def main():
+    """主函数"""
+    results = [
+        test_batch_parse(),
+        test_partial_fields(),
+        test_invalid_json(),
+    ]
+
+    print("\n" + "=" * 60)
+    print(f"测试通过: {sum(results)}/{len(results)}")
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    exit(main())
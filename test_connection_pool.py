@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+数据库连接池测试脚本
+使用模拟连接验证：空闲较短的连接借出时不ping、只在事务未结束时回滚、借出数量有界、空闲连接回收与保活
+"""
+
+import sys
+import time
+import threading
+
+# 添加项目路径
+sys.path.append('.')
+
+from pymysql.constants import SERVER_STATUS
+
+from src.database.connection import DatabaseConnectionPool, DatabaseManager
+
+
+class FakeConnection:
+    """记录ping、回滚和关闭次数的模拟连接"""
+
+    def __init__(self):
+        self.server_status = 0
+        self.autocommit = False
+        self.ping_count = 0
+        self.rollback_count = 0
+        self.closed = False
+        self.alive = True
+
+    def ping(self, reconnect=False):
+        self.ping_count += 1
+        if not self.alive:
+            raise ConnectionError("连接已断开")
+
+    def get_autocommit(self):
+        return self.autocommit
+
+    def rollback(self):
+        self.rollback_count += 1
+        self.server_status &= ~SERVER_STATUS.SERVER_STATUS_IN_TRANS
+
+    def close(self):
+        self.closed = True
+
+
+class FakePool(DatabaseConnectionPool):
+    """使用模拟连接的连接池"""
+
+    def _create_connection(self):
+        conn = FakeConnection()
+        self.created.append(conn)
+        with self._lock:
+            self._stats['created_count'] += 1
+        return conn
+
+
+def build_pool(**pool_config) -> FakePool:
+    """构建连接池（默认不启动后台线程）"""
+    settings = {'max_connections': 2, 'min_connections': 1, 'connection_timeout': 0.2,
+                'idle_timeout': 600, 'validate_idle_seconds': 30, 'keepalive_interval': 300, 'reaper_interval': 0}
+    settings.update(pool_config)
+    FakePool.created = []
+    pool = FakePool({'connection_pool': settings})
+    pool.created = FakePool.created
+    return pool
+
+
+def test_checkout_without_round_trips() -> bool:
+    """测试连续借还不产生ping和回滚，只有未结束的事务才回滚，空闲较久时验证"""
+    print("=" * 60)
+    print("测试借还不产生额外往返")
+    print("=" * 60)
+
+    pool = build_pool()
+    for _ in range(100):
+        conn = pool.get_connection()
+        pool.return_connection(conn)
+    conn = pool.created[0]
+    clean_pings, clean_rollbacks = conn.ping_count, conn.rollback_count
+
+    # 未提交的事务归还时回滚；只读使用不回滚
+    conn = pool.get_connection()
+    conn.server_status |= SERVER_STATUS.SERVER_STATUS_IN_TRANS
+    pool.return_connection(conn)
+    conn = pool.get_connection()
+    conn.server_status |= SERVER_STATUS.SERVER_STATUS_IN_TRANS
+    pool.return_connection(conn, read_only=True)
+    rollbacks = conn.rollback_count
+
+    # 空闲超过阈值后借出时验证，失效的连接被替换
+    pool._idle = [(conn, time.time() - 60)]
+    conn.alive = False
+    replacement = pool.get_connection()
+    pool.return_connection(replacement)
+
+    stats = pool.get_stats()
+    print(f"100次借还: ping {clean_pings} 次，回滚 {clean_rollbacks} 次；事务回滚: {rollbacks}；指标: {stats}")
+    ok = (clean_pings == 0 and clean_rollbacks == 0 and rollbacks == 1
+          and replacement is not conn and conn.closed and len(pool.created) == 2
+          and stats['checkout_count'] == 103 and stats['in_use'] == 0 and stats['validation_count'] == 1)
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def test_capacity_is_bounded() -> bool:
+    """测试借出数量达到上限时等待，超时后报错，归还后等待者获得连接"""
+    print("\n" + "=" * 60)
+    print("测试借出数量有界")
+    print("=" * 60)
+
+    pool = build_pool(max_connections=2, connection_timeout=1)
+    first, second = pool.get_connection(), pool.get_connection()
+    in_use = pool.get_stats()['in_use']
+
+    pool.connection_timeout = 0.1
+    try:
+        pool.get_connection()
+        timed_out = False
+    except TimeoutError:
+        timed_out = True
+
+    pool.connection_timeout = 2
+    result = {}
+
+    def waiter():
+        result['conn'] = pool.get_connection()
+
+    thread = threading.Thread(target=waiter)
+    thread.start()
+    time.sleep(0.2)
+    pool.return_connection(first)
+    thread.join(timeout=2)
+
+    stats = pool.get_stats()
+    print(f"借出: {in_use}, 超时: {timed_out}, 等待者获得: {result.get('conn') is first}, 指标: {stats}")
+    ok = (in_use == 2 and timed_out and result.get('conn') is first and stats['timeout_count'] == 1
+          and stats['max_wait_seconds'] >= 0.15 and len(pool.created) == 2)
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def test_reaper_and_error_rollback() -> bool:
+    """测试回收超时的多余空闲连接、保活保留连接，以及使用中出错时回滚"""
+    print("\n" + "=" * 60)
+    print("测试空闲回收与异常回滚")
+    print("=" * 60)
+
+    pool = build_pool(max_connections=4, min_connections=1)
+    conns = [pool.get_connection() for _ in range(3)]
+    for conn in conns:
+        pool.return_connection(conn)
+    now = time.time()
+    pool._idle = [(conns[0], now - 1000), (conns[1], now - 700), (conns[2], now - 10)]
+    reaped = pool.reap_idle_connections()
+
+    # 保留1个最小连接：最久的两个中关闭超时的多余连接
+    after_reap = [conn for conn, _ in pool._idle]
+
+    manager = DatabaseManager.__new__(DatabaseManager)
+    manager.pool = pool
+    try:
+        with manager.get_connection(read_only=True) as conn:
+            raise ValueError("模拟查询失败")
+    except ValueError:
+        pass
+
+    print(f"回收: {reaped}, 剩余: {len(after_reap)}, 异常回滚: {conn.rollback_count}")
+    ok = (reaped == {'closed': 2, 'kept_alive': 0} and after_reap == [conns[2]]
+          and conns[0].closed and conns[1].closed and conn.rollback_count == 1
+          and pool.get_stats()['in_use'] == 0)
+
+    # 保留的连接空闲超过保活间隔时ping
+    pool._idle = [(conns[2], time.time() - 400)]
+    kept = pool.reap_idle_connections()
+    ok = ok and kept == {'closed': 0, 'kept_alive': 1} and conns[2].ping_count == 1
+    print(f"保活: {kept}")
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def main():
+    """主函数"""
+    results = [
+        test_checkout_without_round_trips(),
+        test_capacity_is_bounded(),
+        test_reaper_and_error_rollback(),
+    ]
+
+    print("\n" + "=" * 60)
+    print(f"测试通过: {sum(results)}/{len(results)}")
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+增量爬取水位线测试脚本
+模拟分页数据，验证遇到已入库推文即停止、水位线只在入库成功后提交
+"""
+
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# 添加项目路径
+sys.path.append('.')
+
+from src.api.twitter_api import TwitterAPIClient
+from src.utils.crawl_watermark import CrawlWatermarkStore
+
+
+def build_pages(start_id: int, pages: int, per_page: int = 5):
+    """构建按时间倒序排列的模拟分页数据（ID越大越新）"""
+    now = datetime.utcnow()
+    result = []
+    tweet_id = start_id
+    for page in range(pages):
+        page_tweets = []
+        for _ in range(per_page):
+            minutes_ago = (start_id - tweet_id) + 1
+            created_at = (now - timedelta(minutes=minutes_ago)).strftime('%a %b %d %H:%M:%S +0000 %Y')
+            page_tweets.append({
+                'id_str': str(tweet_id),
+                'created_at': created_at,
+                'user': {'id_str': f"user_{tweet_id % 3}", 'name': 'tester'}
+            })
+            tweet_id -= 1
+        result.append(page_tweets)
+    return result
+
+
+def build_client(pages, store: CrawlWatermarkStore) -> TwitterAPIClient:
+    """构建使用模拟分页数据的客户端"""
+    client = TwitterAPIClient()
+    client.watermark_store = store
+    client.page_requests = 0
+
+    def fake_fetch_tweets(list_id=None, **kwargs):
+        index = client.page_requests
+        client.page_requests += 1
+        if index >= len(pages):
+            return [], None
+        next_cursor = f"cursor_{index + 1}" if index + 1 < len(pages) else None
+        return pages[index], next_cursor
+
+    client.fetch_tweets = fake_fetch_tweets
+    return client
+
+
+def test_stop_at_watermark() -> bool:
+    """测试遇到水位线即停止分页"""
+    print("=" * 60)
+    print("测试遇到已入库推文即停止")
+    print("=" * 60)
+
+    store = CrawlWatermarkStore(str(Path(tempfile.mkdtemp()) / 'watermarks.json'))
+    pages = build_pages(start_id=1000, pages=6)
+
+    # 第一次爬取：无水位线，拉完全部页面并提交
+    client = build_client(pages, store)
+    first = client.fetch_all_tweets(list_id='list_a', hours_limit=3)
+    client.commit_watermarks()
+    print(f"第一次: 请求 {client.page_requests} 页，获取 {len(first)} 条，水位线 {store.get('list_a')}")
+
+    # 第二次爬取：新增一页新推文，应在遇到旧推文的那一页停止
+    new_pages = build_pages(start_id=1005, pages=7)
+    client = build_client(new_pages, store)
+    second = client.fetch_all_tweets(list_id='list_a', hours_limit=3)
+    print(f"第二次: 请求 {client.page_requests} 页，获取 {len(second)} 条")
+
+    ok = (len(first) == 30 and store.get('list_a')['newest_id'] == '1000'
+          and client.page_requests == 2)
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def test_discard_on_failure() -> bool:
+    """测试入库失败时不推进水位线"""
+    print("\n" + "=" * 60)
+    print("测试入库失败时丢弃暂存水位线")
+    print("=" * 60)
+
+    store = CrawlWatermarkStore(str(Path(tempfile.mkdtemp()) / 'watermarks.json'))
+    client = build_client(build_pages(start_id=2000, pages=2), store)
+    client.fetch_all_tweets(list_id='list_b', hours_limit=3)
+    client.discard_watermarks()
+
+    ok = store.get('list_b') is None and client.commit_watermarks() == 0
+    print(f"水位线: {store.get('list_b')}")
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def test_watermark_never_moves_back() -> bool:
+    """测试水位线只前进不后退，并持久化到文件"""
+    print("\n" + "=" * 60)
+    print("测试水位线只前进不后退")
+    print("=" * 60)
+
+    file_path = str(Path(tempfile.mkdtemp()) / 'watermarks.json')
+    store = CrawlWatermarkStore(file_path)
+    store.stage('list_c', '500', datetime.now())
+    store.commit()
+    store.stage('list_c', '400', datetime.now())
+    store.commit()
+
+    reloaded = CrawlWatermarkStore(file_path)
+    ok = reloaded.get('list_c')['newest_id'] == '500'
+    print(f"重新加载的水位线: {reloaded.get('list_c')}")
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def main():
+    """主函数"""
+    results = [
+        test_stop_at_watermark(),
+        test_discard_on_failure(),
+        test_watermark_never_moves_back(),
+    ]
+
+    print("\n" + "=" * 60)
+    print(f"测试通过: {sum(results)}/{len(results)}")
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    exit(main())
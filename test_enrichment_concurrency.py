@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+并发增强一致性测试脚本
+使用模拟AI客户端（随机延迟打乱完成顺序），验证单线程与多线程增强得到相同的推文且顺序与输入一致
+"""
+
+import sys
+import copy
+import logging
+import random
+import threading
+import time
+import zlib
+from datetime import datetime
+
+# 添加项目路径
+sys.path.append('.')
+
+from src.models.tweet import Tweet
+from src.utils.smart_classifier import ClassificationResult
+from src.utils.token_extractor import token_extractor
+from src.utils.tweet_enricher import TweetEnricher
+
+PROJECT_KOLS = {'user_3', 'user_7'}
+
+TEXTS = [
+    'Bitcoin just broke 100k, bullish on $BTC and $ETH',
+    'Mainnet v2 is live today! Join our AMA on Spaces with the team',
+    'Regulation news is getting worse for the whole market, stay safe',
+    'New DeFi yield vault launching on Arbitrum, $ARB rewards inside',
+    'gm',
+    'Follow and retweet to win a free iPhone giveaway now',
+    'ETH staking ratio hits new high as restaking narrative grows',
+]
+
+
+def text_hash(text: str) -> int:
+    """稳定的文本哈希（模拟结果只取决于推文内容）"""
+    return zlib.crc32(text.encode('utf-8'))
+
+
+class FakeChatGPT:
+    """按推文内容返回固定结果的模拟客户端，每次调用随机延迟以打乱并发完成顺序"""
+
+    def __init__(self):
+        self.calls = 0
+        self._lock = threading.Lock()
+        self._rng = random.Random(5)
+
+    def _delay(self):
+        with self._lock:
+            self.calls += 1
+            delay = self._rng.random() * 0.003
+        time.sleep(delay)
+
+    def batch_enrich_tweets(self, tweets):
+        self._delay()
+        results = []
+        for tweet in tweets:
+            value = text_hash(tweet['text'])
+            # 部分推文批量结果缺失或只有部分字段，走单项调用回退
+            if value % 5 == 0:
+                results.append({})
+            elif value % 5 == 1:
+                results.append({'is_valid': True})
+            else:
+                results.append({
+                    'is_valid': value % 7 != 0,
+                    'sentiment': ['positive', 'negative', 'neutral'][value % 3],
+                    'token_symbols': ['BTC'] if value % 2 else ['ETH', 'ARB'],
+                    'is_announce': value % 4 == 0 and 1 or 0,
+                    'classification': {'type': 'topic', 'name': f"topic {value % 6}"},
+                })
+        return results
+
+    def _make_request(self, messages, **kwargs):
+        self._delay()
+        return 'true' if text_hash(messages[-1]['content']) % 3 else 'false'
+
+    def analyze_sentiment(self, text):
+        self._delay()
+        return {'sentiment': ['negative', 'neutral', 'positive'][text_hash(text) % 3]}
+
+    def extract_token_symbols_from_tweet(self, text):
+        self._delay()
+        return ['SOL'] if text_hash(text) % 2 else []
+
+    def classify_tweet_announcement(self, text):
+        self._delay()
+        return text_hash(text) % 2
+
+    def summarize_announcement(self, text):
+        self._delay()
+        return f"summary of {text[:20]}"
+
+
+def fake_classify(tweet, prefetched=None):
+    """按推文内容给出固定分类结果（代替访问数据库的智能分类器）"""
+    time.sleep(random.random() * 0.002)
+    value = text_hash(tweet.full_text)
+    if prefetched and prefetched.get('type') == 'topic':
+        return ClassificationResult(content_type='topic', topic_id=f"topic_{value % 6}", entity_name=prefetched['name'])
+    if value % 3 == 0:
+        return ClassificationResult(content_type='project', project_id=f"project_{value % 4}",
+                                    project_tag=f"Project {value % 4}")
+    return ClassificationResult(content_type='unknown')
+
+
+def build_enricher(max_workers: int) -> TweetEnricher:
+    """构建使用模拟客户端、不访问数据库的增强器"""
+    enricher = TweetEnricher.__new__(TweetEnricher)
+    enricher.logger = logging.getLogger('test_enrichment_concurrency')
+    enricher.chatgpt = FakeChatGPT()
+    enricher.token_extractor = token_extractor
+    enricher.max_workers = max_workers
+    enricher.batch_enrichment_enabled = True
+    enricher.batch_enrichment_size = 4
+    enricher._kol_user_cache = {}
+    enricher._project_kol_cache = set(PROJECT_KOLS)
+    enricher._is_project_kol = lambda kol_id: kol_id in PROJECT_KOLS
+    enricher._classify_and_set_ids = fake_classify
+    return enricher
+
+
+def build_tweets(count: int = 60):
+    """构建测试推文和用户数据映射"""
+    tweets = []
+    user_data_map = {}
+    for i in range(count):
+        tweet_id = f"tweet_{i}"
+        tweets.append(Tweet(id_str=tweet_id, full_text=f"{TEXTS[i % len(TEXTS)]} #{i}",
+                            update_time=datetime(2025, 1, 6, 12, 0, 0)))
+        user_data_map[tweet_id] = {'id_str': f"user_{i % 10}"}
+    return tweets, user_data_map
+
+
+def test_workers_produce_identical_results() -> bool:
+    """测试单线程与多线程增强结果完全一致且保持输入顺序"""
+    print("=" * 60)
+    print("测试并发增强结果一致")
+    print("=" * 60)
+
+    tweets, user_data_map = build_tweets()
+    results = {}
+    for workers in [1, 8]:
+        enricher = build_enricher(workers)
+        enriched = enricher.enrich_tweets(copy.deepcopy(tweets), user_data_map)
+        results[workers] = [tweet.to_dict() for tweet in enriched]
+        print(f"并发数: {workers}, 推文数: {len(enriched)}, 模拟AI调用: {enricher.chatgpt.calls}")
+
+    order_ok = [tweet['id_str'] for tweet in results[8]] == [tweet.id_str for tweet in tweets]
+    enriched_ok = any(tweet['sentiment'] for tweet in results[1]) and any(
+        tweet['isAnnounce'] == 1 for tweet in results[1])
+    diffs = [(a['id_str'], {key for key in a if a[key] != b.get(key)})
+             for a, b in zip(results[1], results[8]) if a != b]
+    print(f"顺序一致: {order_ok}, 不一致的推文: {diffs[:5]}")
+    ok = results[1] == results[8] and order_ok and enriched_ok
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def main():
+    """主函数"""
+    results = [
+        test_workers_produce_identical_results(),
+    ]
+
+    print("\n" + "=" * 60)
+    print(f"测试通过: {sum(results)}/{len(results)}")
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+实体读穿缓存测试脚本
+验证按名称查询命中缓存后不再访问数据库、不存在的名称负缓存、写入时同步更新缓存、查询失败不缓存、命中率统计，
+以及创建实体前的复查不使用负缓存
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# 添加项目路径
+sys.path.append('.')
+
+from src.database.entity_cache import EntityCache
+from src.database.project_dao import ProjectDAO
+from src.database.topic_dao import TopicDAO
+from src.database.write_buffer import WriteBehindBuffer
+from src.models.project import Project
+from src.models.topic import Topic
+from src.models.tweet import Tweet
+from test_entity_singleflight import build_classifier
+
+CACHE_SETTINGS = {'enabled': True, 'ttl_seconds': 300, 'negative_ttl_seconds': 60, 'max_entries': 100}
+
+
+class FakeDatabase:
+    """按名称返回行的模拟数据库，记录查询次数"""
+
+    def __init__(self, rows=None):
+        self.rows = rows or {}
+        self.query_count = 0
+        self.update_count = 0
+        self.fail = False
+
+    def execute_query(self, sql, params=None):
+        self.query_count += 1
+        if self.fail:
+            raise ConnectionError("数据库不可用")
+        row = self.rows.get(params[0])
+        return [row] if row else []
+
+    def execute_update(self, sql, params=None):
+        self.update_count += 1
+        return 1
+
+
+def build_project_dao(database: FakeDatabase, buffered: bool = False) -> ProjectDAO:
+    """构建使用模拟数据库和独立缓存的项目DAO"""
+    dao = ProjectDAO()
+    dao.db_manager = database
+    dao.name_cache = EntityCache('test_projects', CACHE_SETTINGS)
+    dao.write_buffer = WriteBehindBuffer({
+        'enabled': buffered, 'flush_interval_seconds': 3600,
+        'spool_file': str(Path(tempfile.mkdtemp()) / 'write_buffer.spool.jsonl')
+    })
+    return dao
+
+
+def test_read_through_and_negative_cache() -> bool:
+    """测试重复查询同一名称只访问一次数据库，不存在的名称负缓存，查询失败不缓存"""
+    print("=" * 60)
+    print("测试读穿缓存与负缓存")
+    print("=" * 60)
+
+    bitcoin = Project(project_id='project_btc', name='Bitcoin', symbol='BTC').to_dict()
+    database = FakeDatabase({'Bitcoin': bitcoin})
+    dao = build_project_dao(database)
+
+    found = [dao.get_project_by_name('Bitcoin') for _ in range(1000)]
+    missing = [dao.get_project_by_name('Unknown Coin') for _ in range(100)]
+    queries = database.query_count
+
+    # 查询失败时返回None但不缓存，恢复后重新查询
+    database.fail = True
+    failed = dao.get_project_by_name('Ethereum')
+    database.fail = False
+    database.rows['Ethereum'] = Project(project_id='project_eth', name='Ethereum', symbol='ETH').to_dict()
+    recovered = dao.get_project_by_name('Ethereum')
+
+    stats = dao.get_cache_stats()
+    print(f"数据库查询: {queries}, 失败后恢复: {recovered.project_id if recovered else None}, 统计: {stats}")
+    ok = (all(project.project_id == 'project_btc' for project in found) and missing == [None] * 100
+          and queries == 2 and failed is None and recovered is not None and database.query_count == 4
+          and stats['hits'] == 999 and stats['negative_hits'] == 99 and stats['hit_rate'] > 0.99)
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def test_write_through() -> bool:
+    """测试新建、缓冲写入、改名和删除时同步更新缓存"""
+    print("\n" + "=" * 60)
+    print("测试写入时同步更新缓存")
+    print("=" * 60)
+
+    database = FakeDatabase()
+    dao = build_project_dao(database, buffered=True)
+
+    # 负缓存后新建：立即可查，不再访问数据库
+    before = dao.get_project_by_name('Monad')
+    dao.insert_project(Project(project_id='project_monad', name='Monad', symbol='MON'))
+    created = dao.get_project_by_name('Monad')
+
+    # 写后缓冲尚未写入数据库时也能查到，改名后旧名称失效
+    dao.upsert_project(Project(project_id='project_monad', name='Monad Labs', symbol='MON'))
+    pending = dao.write_buffer.pending_count()
+    renamed = dao.get_project_by_name('Monad Labs')
+    old_name = dao.get_project_by_name('Monad')
+    queries = database.query_count
+
+    dao.delete_project('project_monad')
+    deleted = dao.get_project_by_name('Monad Labs')
+    dao.write_buffer.close()
+
+    print(f"新建前: {before}, 新建后: {created.project_id if created else None}, 待写入: {pending}, "
+          f"改名后: {renamed.name if renamed else None}, 数据库查询: {queries}, 删除后: {deleted}")
+    ok = (before is None and created is not None and created.project_id == 'project_monad' and pending == 1
+          and renamed is not None and renamed.name == 'Monad Labs' and queries == 2
+          and deleted is None and database.query_count == 3)
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def test_topic_cache_expiry() -> bool:
+    """测试话题名称缓存按TTL过期、容量超限时淘汰最久未使用的项"""
+    print("\n" + "=" * 60)
+    print("测试过期与容量淘汰")
+    print("=" * 60)
+
+    topic_row = Topic(topic_id='topic_etf', topic_name='ETF', popularity=5).to_dict()
+    topic_row.update(kol_opinions='[]', popularity_history='[]')
+    database = FakeDatabase({'ETF': topic_row})
+    dao = TopicDAO()
+    dao.db_manager = database
+    dao.name_cache = EntityCache('test_topics', dict(CACHE_SETTINGS, ttl_seconds=0.2, max_entries=3))
+
+    first = dao.get_topic_by_name('ETF')
+    dao.get_topic_by_name('ETF')
+    cached_queries = database.query_count
+    time.sleep(0.3)
+    dao.get_topic_by_name('ETF')
+    expired_queries = database.query_count
+
+    for name in ['A', 'B', 'C']:
+        dao.get_topic_by_name(name)
+    stats = dao.get_cache_stats()
+
+    print(f"缓存期内查询: {cached_queries}, 过期后查询: {expired_queries}, 统计: {stats}")
+    ok = (first is not None and first.topic_id == 'topic_etf' and cached_queries == 1 and expired_queries == 2
+          and stats['size'] == 3 and stats['evictions'] == 1)
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def test_create_recheck_bypasses_negative_cache() -> bool:
+    """测试名称已被负缓存、项目随后由其他进程创建时，分类器创建前的复查查到该项目而不是重复创建"""
+    print("\n" + "=" * 60)
+    print("测试创建前复查忽略负缓存")
+    print("=" * 60)
+
+    database = FakeDatabase()
+    dao = build_project_dao(database)
+    classifier = build_classifier()
+    classifier.project_dao = dao
+
+    name = classifier._normalize_project_name('monad')
+    before = dao.get_project_by_name(name)
+    database.rows[name] = Project(project_id='project_monad', name=name, symbol='MON').to_dict()
+    cached = dao.get_project_by_name(name)
+
+    result = classifier.classify_tweet(Tweet(id_str='tweet_1', full_text='Monad mainnet is live'),
+                                       {'type': 'project', 'name': 'monad', 'confidence': 0.9})
+    after = dao.get_project_by_name(name)
+
+    print(f"负缓存: {before}/{cached}, 分类结果: {result.project_id} (新建: {result.is_new_created}), "
+          f"写入次数: {database.update_count}, 复查后缓存: {after.project_id if after else None}")
+    ok = (before is None and cached is None and result.project_id == 'project_monad'
+          and not result.is_new_created and database.update_count == 0
+          and after is not None and after.project_id == 'project_monad')
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def main():
+    """主函数"""
+    results = [
+        test_read_through_and_negative_cache(),
+        test_write_through(),
+        test_topic_cache_expiry(),
+        test_create_recheck_bypasses_negative_cache(),
+    ]
+
+    print("\n" + "=" * 60)
+    print(f"测试通过: {sum(results)}/{len(results)}")
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    exit(main())
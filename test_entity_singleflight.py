@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+实体创建串行化测试脚本
+验证并发分类同一个新项目/新话题时只创建一次、其余线程复用其ID，不同实体的创建互不阻塞，
+以及并发匹配同一话题时只记录最高热度
+"""
+
+import logging
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# 添加项目路径
+sys.path.append('.')
+
+from src.models.tweet import Tweet
+from src.utils.keyed_lock import KeyedLock
+from src.utils.smart_classifier import SmartClassifier
+from src.utils.topic_index import TopicIndex
+
+CREATE_SECONDS = 0.2
+
+
+class FakeProjectDAO:
+    """内存中的项目DAO，插入较慢以暴露并发竞争"""
+
+    def __init__(self):
+        self.projects = {}
+        self.insert_count = 0
+        self._lock = threading.Lock()
+
+    def get_project_by_name(self, name, bypass_negative=False):
+        with self._lock:
+            return self.projects.get(name)
+
+    def insert_project(self, project):
+        time.sleep(CREATE_SECONDS)
+        with self._lock:
+            self.insert_count += 1
+            self.projects[project.name] = project
+        return True
+
+
+class FakeTopicDAO:
+    """内存中的话题DAO，插入较慢以暴露并发竞争"""
+
+    def __init__(self):
+        self.insert_count = 0
+        self.popularity_updates = []
+        self._lock = threading.Lock()
+
+    def get_topics_updated_since(self, since_time=None, limit=5000):
+        return []
+
+    def insert(self, topic):
+        time.sleep(CREATE_SECONDS)
+        with self._lock:
+            self.insert_count += 1
+        return True
+
+    def append_popularity_history(self, popularities):
+        with self._lock:
+            self.popularity_updates.extend(popularities.values())
+        return {topic_id: [{'popularity': popularity}] for topic_id, popularity in popularities.items()}
+
+
+class NoRootDataMatch:
+    """不匹配任何RootData项目"""
+
+    def match_project_name(self, name):
+        return None
+
+
+def build_classifier():
+    """构建使用内存DAO的分类器"""
+    classifier = SmartClassifier.__new__(SmartClassifier)
+    classifier.logger = logging.getLogger('src.utils.smart_classifier')
+    classifier.project_dao = FakeProjectDAO()
+    classifier.topic_dao = FakeTopicDAO()
+    classifier.topic_index = TopicIndex(classifier.topic_dao, {'enabled': True, 'refresh_seconds': 3600,
+                                                               'full_reload_seconds': 36000})
+    classifier.rootdata_matcher = NoRootDataMatch()
+    classifier.confidence_threshold = 0.7
+    classifier._entity_locks = KeyedLock()
+    classifier._pending_popularity = {}
+    classifier._pending_popularity_since = None
+    classifier._popularity_lock = threading.Lock()
+    classifier.popularity_flush_size = 200
+    classifier.popularity_flush_seconds = 3600
+    return classifier
+
+
+def make_tweet(i, text, retweet_count=0):
+    """构建推文"""
+    return Tweet(id_str=f"tweet_{i}", full_text=text, retweet_count=retweet_count)
+
+
+def test_same_project_created_once() -> bool:
+    """测试并发分类同一个新项目只创建一次，不同项目并行创建"""
+    print("=" * 60)
+    print("测试同名项目只创建一次")
+    print("=" * 60)
+
+    classifier = build_classifier()
+    names = ['monad'] * 8 + ['berachain'] * 8
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        results = list(executor.map(
+            lambda item: classifier.classify_tweet(
+                make_tweet(item[0], f"Big news about {item[1]} mainnet launch"),
+                {'type': 'project', 'name': item[1], 'confidence': 0.9}
+            ),
+            enumerate(names)
+        ))
+    elapsed = time.perf_counter() - start
+
+    monad_ids = {result.project_id for result in results[:8]}
+    bera_ids = {result.project_id for result in results[8:]}
+    created = sum(result.is_new_created for result in results)
+    stats = classifier._entity_locks.get_stats()
+
+    print(f"插入次数: {classifier.project_dao.insert_count}, 新建标记: {created}, "
+          f"ID数: {len(monad_ids)}/{len(bera_ids)}, 耗时: {elapsed:.2f}s, 加锁统计: {stats}")
+    ok = (classifier.project_dao.insert_count == 2 and created == 2 and len(monad_ids) == 1 and len(bera_ids) == 1
+          and None not in monad_ids | bera_ids and monad_ids != bera_ids
+          and elapsed < CREATE_SECONDS * 2 and stats['active_keys'] == 0)
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def test_same_topic_created_once() -> bool:
+    """测试并发分类同一个新话题只创建一次，其余线程复用并只写入最高热度"""
+    print("\n" + "=" * 60)
+    print("测试同名话题只创建一次")
+    print("=" * 60)
+
+    classifier = build_classifier()
+    retweets = [0, 0, 500, 0, 50, 0, 5000, 0]
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(
+            lambda item: classifier.classify_tweet(
+                make_tweet(item[0], "Restaking yields are the talk of the week", retweet_count=item[1]),
+                {'type': 'topic', 'name': 'restaking', 'confidence': 0.9}
+            ),
+            enumerate(retweets)
+        ))
+
+    classifier.flush_topic_popularity()
+    topic_ids = {result.topic_id for result in results}
+    topic = classifier.topic_index.get_by_name('Restaking')
+    updates = classifier.topic_dao.popularity_updates
+
+    print(f"插入次数: {classifier.topic_dao.insert_count}, ID数: {len(topic_ids)}, "
+          f"热度更新: {updates}, 最终热度: {topic.popularity if topic else None}")
+    ok = (classifier.topic_dao.insert_count == 1 and len(topic_ids) == 1 and None not in topic_ids
+          and topic is not None and len(updates) == 1 and updates[0] == topic.popularity
+          and topic.popularity == max([classifier._calculate_initial_popularity(make_tweet(0, '', count))
+                                       for count in retweets]))
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def main():
+    """主函数"""
+    results = [
+        test_same_project_created_once(),
+        test_same_topic_created_once(),
+    ]
+
+    print("\n" + "=" * 60)
+    print(f"测试通过: {sum(results)}/{len(results)}")
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    exit(main())
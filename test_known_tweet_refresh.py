@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+已入库推文互动数据刷新测试脚本
+使用记录SQL的模拟数据库，验证已入库ID查询的IN列表分块、CASE批量更新的SQL和参数，
+以及爬取时已入库推文跳过增强但仍刷新互动数据
+"""
+
+import sys
+import logging
+import re
+from types import SimpleNamespace
+
+# 添加项目路径
+sys.path.append('.')
+
+from src.database.tweet_dao import TweetDAO
+from src.models.tweet import Tweet
+from test_streaming_crawl import FakeAPIClient, build_crawler, build_pages
+
+ENGAGEMENT_FIELDS = ['favorite_count', 'retweet_count', 'view_count', 'engagement_total']
+
+
+class RecordingDatabase:
+    """记录查询和更新语句的模拟数据库"""
+
+    def __init__(self, stored_ids=None, failing_update_ids=None):
+        self.stored_ids = set(stored_ids or [])
+        self.failing_update_ids = set(failing_update_ids or [])
+        self.queries = []
+        self.updates = []
+
+    def execute_query(self, sql, params=None):
+        self.queries.append((sql, params))
+        return [{'id_str': id_str} for id_str in params if id_str in self.stored_ids]
+
+    def execute_update(self, sql, params=None):
+        self.updates.append((sql, params))
+        ids = params[-sql.split('IN (')[-1].count('%s'):]
+        if self.failing_update_ids & set(ids):
+            raise RuntimeError('update failed')
+        return sum(1 for id_str in ids if id_str in self.stored_ids)
+
+
+def build_dao(db: RecordingDatabase) -> TweetDAO:
+    """构建使用模拟数据库的推文DAO"""
+    dao = TweetDAO.__new__(TweetDAO)
+    dao.db_manager = db
+    dao.table_name = 'twitter_tweet'
+    dao.logger = logging.getLogger('test_known_tweet_refresh')
+    return dao
+
+
+def build_tweet(id_str: str, index: int) -> Tweet:
+    """构建带互动数据的推文（view_count缺失时应写入0）"""
+    return Tweet(id_str=id_str, full_text=f"tweet {id_str}", favorite_count=index, retweet_count=index * 2,
+                 view_count=None if index % 3 == 0 else index * 100, engagement_total=index * 3)
+
+
+def test_existing_ids_chunking() -> bool:
+    """测试已入库ID查询去重并按IN列表上限分块，查询失败时返回空集合"""
+    print("=" * 60)
+    print("测试已入库ID查询分块")
+    print("=" * 60)
+
+    ids = [f"t{i}" for i in range(2500)] + ['t0', 't1', '', None]
+    db = RecordingDatabase(stored_ids={'t0', 't999', 't1000', 't2499', 'other'})
+    existing = build_dao(db).get_existing_ids(ids)
+
+    chunk_sizes = [len(params) for _, params in db.queries]
+    placeholders_ok = all(sql.count('%s') == len(params) and 'WHERE id_str IN (' in sql
+                          for sql, params in db.queries)
+    queried = [id_str for _, params in db.queries for id_str in params]
+
+    class FailingDatabase(RecordingDatabase):
+        def execute_query(self, sql, params=None):
+            raise RuntimeError('connection lost')
+
+    failed = build_dao(FailingDatabase()).get_existing_ids(['t0'])
+
+    print(f"查询次数: {len(db.queries)}, 每次ID数: {chunk_sizes}, 已入库: {sorted(existing)}")
+    ok = (chunk_sizes == [1000, 1000, 500] and placeholders_ok
+          and queried == [f"t{i}" for i in range(2500)]
+          and existing == {'t0', 't999', 't1000', 't2499'}
+          and failed == set() and build_dao(db).get_existing_ids([]) == set())
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def test_engagement_case_update() -> bool:
+    """测试互动数据按块生成CASE批量更新，参数与占位符一一对应，失败块不计入"""
+    print("\n" + "=" * 60)
+    print("测试CASE批量更新SQL")
+    print("=" * 60)
+
+    tweets = [build_tweet(f"t{i}", i) for i in range(5)]
+    db = RecordingDatabase(stored_ids={tweet.id_str for tweet in tweets}, failing_update_ids={'t4'})
+    count = build_dao(db).batch_update_engagement(tweets, chunk_size=2)
+
+    sql, params = db.updates[0]
+    chunk = tweets[:2]
+    expected_params = []
+    for field in ENGAGEMENT_FIELDS:
+        for tweet in chunk:
+            value = getattr(tweet, field)
+            expected_params.extend([tweet.id_str, value if value is not None else 0])
+    sql_ok = (all(re.search(rf"{field} = CASE id_str (WHEN %s THEN %s ){{2}}ELSE {field} END", sql)
+                  for field in ENGAGEMENT_FIELDS)
+              and 'update_time = %s' in sql and sql.count('%s') == len(params))
+    params_ok = (list(params[:len(expected_params)]) == expected_params
+                 and list(params[len(expected_params) + 1:]) == ['t0', 't1'])
+
+    print(f"UPDATE次数: {len(db.updates)}, 成功数: {count}")
+    print(f"SQL一致: {sql_ok}, 参数一致: {params_ok}")
+    ok = len(db.updates) == 3 and count == 4 and sql_ok and params_ok
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def test_known_tweets_skip_enrichment() -> bool:
+    """测试爬取时已入库推文不增强、不重新入库，只刷新互动数据；新推文照常增强入库"""
+    print("\n" + "=" * 60)
+    print("测试已入库推文跳过增强")
+    print("=" * 60)
+
+    pages = build_pages(0, 2)
+    all_ids = [item['id_str'] for page in pages for item in page]
+    stored_ids = set(all_ids[::3])
+    db = RecordingDatabase(stored_ids=stored_ids)
+
+    crawler = build_crawler(FakeAPIClient({'a': pages}, page_delay=0.01))
+    del crawler._refresh_known_tweets
+    crawler.tweet_dao = build_dao(db)
+    crawler._map_data_to_tweets = lambda page: [build_tweet(item['id_str'], i) for i, item in enumerate(page)]
+    enriched_ids = []
+
+    def enrich_tweets(tweets, user_data_map):
+        enriched_ids.extend(tweet.id_str for tweet in tweets)
+        return tweets
+
+    crawler.tweet_enricher = SimpleNamespace(enrich_tweets=enrich_tweets)
+    success = crawler.crawl_tweets_streaming(list_ids=['a'])
+
+    new_ids = [id_str for id_str in all_ids if id_str not in stored_ids]
+    updated_ids = [id_str for sql, params in db.updates
+                   for id_str in params[-sql.split('IN (')[-1].count('%s'):]]
+
+    print(f"已入库: {sorted(stored_ids)}")
+    print(f"增强: {enriched_ids}, 入库: {crawler.saved_ids}, 刷新互动数据: {updated_ids}")
+    ok = (success and enriched_ids == new_ids and crawler.saved_ids == new_ids
+          and sorted(updated_ids) == sorted(stored_ids))
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def main():
+    """主函数"""
+    results = [
+        test_existing_ids_chunking(),
+        test_engagement_case_update(),
+        test_known_tweets_skip_enrichment(),
+    ]
+
+    print("\n" + "=" * 60)
+    print(f"测试通过: {sum(results)}/{len(results)}")
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+自适应list调度测试脚本
+验证按推文速率调整轮询间隔和时间窗口、每轮到期list数量有界且轮转公平，以及状态持久化
+"""
+
+import sys
+import tempfile
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# 添加项目路径
+sys.path.append('.')
+
+from src.crawler import TwitterCrawler
+from src.utils.list_scheduler import AdaptiveListPlanner, AdaptiveCrawlerScheduler
+from src.utils.seen_tweets import SeenTweetRegistry
+
+SETTINGS = {
+    'default_hours_limit': 2, 'min_interval_minutes': 2, 'max_interval_minutes': 60,
+    'target_tweets_per_poll': 50, 'rate_smoothing': 0.5, 'window_factor': 2,
+    'min_hours_limit': 0.5, 'max_hours_limit': 6, 'max_lists_per_tick': 20
+}
+
+
+def build_planner(**overrides) -> AdaptiveListPlanner:
+    """构建使用临时状态文件的规划器"""
+    state_file = Path(tempfile.mkdtemp()) / 'list_schedule.json'
+    return AdaptiveListPlanner(str(state_file), dict(SETTINGS, **overrides))
+
+
+def test_interval_follows_rate() -> bool:
+    """测试活跃list间隔短、窗口小，安静list间隔长"""
+    print("=" * 60)
+    print("测试按推文速率调整间隔")
+    print("=" * 60)
+
+    planner = build_planner()
+    now = datetime(2026, 1, 1, 12, 0)
+    lists = ['hot', 'medium', 'quiet']
+    # 首轮时间窗口2小时：hot 1200条、medium 100条、quiet 0条
+    planner.record_results(lists, {'hot': 1200, 'medium': 100, 'quiet': 0}, now)
+    snapshot = planner.get_snapshot()
+    for list_id in lists:
+        print(f"{list_id}: {snapshot[list_id]}")
+
+    hot, medium, quiet = (snapshot[list_id] for list_id in lists)
+    ok = (hot['interval_minutes'] == 5.0 and medium['interval_minutes'] == 60
+          and quiet['interval_minutes'] == 60 and hot['hours_limit'] == 0.5 and quiet['hours_limit'] == 2.0
+          and planner.due_lists(lists, now + timedelta(minutes=6)) == ['hot']
+          and planner.due_lists(lists, now + timedelta(minutes=1)) == [])
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def test_fair_bounded_rounds() -> bool:
+    """测试每轮最多处理 max_lists_per_tick 个list，逾期最久的优先，所有list都能轮到"""
+    print("\n" + "=" * 60)
+    print("测试每轮有界且公平")
+    print("=" * 60)
+
+    planner = build_planner(max_lists_per_tick=20)
+    list_ids = [f"list_{i}" for i in range(50)]
+    now = datetime(2026, 1, 1, 12, 0)
+    served = []
+    rounds = []
+    for tick in range(3):
+        due = planner.due_lists(list_ids, now)
+        rounds.append(len(due))
+        served.extend(due)
+        planner.record_results(due, {list_id: 0 for list_id in due}, now)
+        now += timedelta(seconds=30)
+
+    # 失败的list退避后再到期
+    failed = planner.due_lists(list_ids, now + timedelta(hours=2))[:3]
+    planner.record_results(failed, None, now + timedelta(hours=2))
+    backoff = planner.get_snapshot()[failed[0]]
+
+    print(f"每轮到期: {rounds}, 覆盖: {len(set(served))}, 失败退避: {backoff}")
+    ok = (rounds == [20, 20, 10] and len(set(served)) == 50 and len(served) == 50
+          and backoff['failures'] == 1
+          and datetime.fromisoformat(backoff['next_run']) == now + timedelta(hours=3))
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def test_scheduler_round_and_persistence() -> bool:
+    """测试调度器按到期list调用拉取函数，状态保存后可重新加载"""
+    print("\n" + "=" * 60)
+    print("测试调度轮次与状态持久化")
+    print("=" * 60)
+
+    planner = build_planner()
+    scheduler = AdaptiveCrawlerScheduler(planner)
+    scheduler.list_ids_provider = lambda: ['a', 'b']
+    calls = []
+
+    def list_crawler(list_ids, hours_limits):
+        calls.append((list(list_ids), dict(hours_limits)))
+        return {'a': 600, 'b': 2}
+
+    scheduler.set_list_crawler(list_crawler)
+    first = scheduler.run_once()
+    second = scheduler.run_once()  # 没有到期的list
+
+    reloaded = AdaptiveListPlanner(str(planner.state_file), SETTINGS).get_snapshot()
+    print(f"调用: {calls}")
+    print(f"重新加载: {reloaded}")
+    ok = (first and second and len(calls) == 1 and sorted(calls[0][0]) == ['a', 'b']
+          and calls[0][1] == {'a': 2, 'b': 2}
+          and reloaded == planner.get_snapshot() and reloaded['a']['interval_minutes'] < reloaded['b']['interval_minutes'])
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def test_crawl_lists_failure() -> bool:
+    """测试爬取失败时（包括API在返回任何数据前失败）返回None，调度器按失败退避"""
+    print("\n" + "=" * 60)
+    print("测试爬取失败返回None")
+    print("=" * 60)
+
+    crawler = TwitterCrawler.__new__(TwitterCrawler)
+    oldest_time = datetime.now() - timedelta(hours=1)
+    report = {'lists': {'a': {'raw': 30, 'oldest_time': oldest_time}}, 'total_raw': 30}
+
+    def fake_crawl(success, overlap_report):
+        def crawl_tweets(**kwargs):
+            crawler.last_overlap_report = overlap_report
+            return success
+        return crawl_tweets
+
+    results = {}
+    for name, success, overlap_report in [('api_failed', False, None), ('save_failed', False, report),
+                                          ('success', True, report)]:
+        crawler.crawl_tweets = fake_crawl(success, overlap_report)
+        results[name] = crawler.crawl_lists(['a', 'b'], {'a': 2, 'b': 2})
+
+    planner = build_planner()
+    now = datetime(2025, 1, 6, 12, 0, 0)
+    planner.record_results(['a'], results['api_failed'], now=now)
+    state = planner.get_snapshot()['a']
+
+    print(f"结果: {results}, 失败次数: {state['failures']}")
+    ok = (results['api_failed'] is None and results['save_failed'] is None
+          and results['success']['a']['tweets'] == 30 and 1 <= results['success']['a']['hours'] < 1.01
+          and results['success']['b'] == {'tweets': 0, 'hours': None} and state['failures'] == 1)
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def build_steady_page(count: int, interval_seconds: float = 12):
+    """构建按固定速率发布的推文页（最新的在前，间隔 interval_seconds 秒）"""
+    now = datetime.now(timezone.utc)
+    return [{'id_str': f"t{now.timestamp()}_{i}",
+             'created_at': (now - timedelta(seconds=i * interval_seconds)).strftime('%a %b %d %H:%M:%S +0000 %Y')}
+            for i in range(count)]
+
+
+def test_steady_rate_keeps_interval() -> bool:
+    """测试速率稳定（每分钟5条）的list每10分钟拉取一次，间隔保持10分钟不缩短
+
+    steady 启用水位线：首轮拉取整个时间窗口，之后拉取到上次之后的50条新推文和一页20条重叠推文；
+    windowed 不启用水位线：每轮拉取整个时间窗口内的推文
+    """
+    print("\n" + "=" * 60)
+    print("测试稳定速率下间隔不变")
+    print("=" * 60)
+
+    crawler = TwitterCrawler.__new__(TwitterCrawler)
+    crawled = set()
+
+    def crawl_tweets(list_ids, hours_limits, **kwargs):
+        registry = SeenTweetRegistry()
+        steady_count = 50 + 20 if 'steady' in crawled else int(hours_limits['steady'] * 300)
+        crawled.add('steady')
+        registry.filter_page('steady', build_steady_page(steady_count))
+        registry.filter_page('windowed', build_steady_page(int(hours_limits['windowed'] * 300)))
+        crawler.last_overlap_report = registry.get_overlap_report()
+        return True
+
+    crawler.crawl_tweets = crawl_tweets
+    planner = build_planner()
+    now = datetime(2026, 1, 1, 12, 0)
+    lists = ['steady', 'windowed']
+    intervals = []
+    for _ in range(6):
+        planner.record_results(lists, crawler.crawl_lists(lists, planner.hours_limits(lists)), now)
+        snapshot = planner.get_snapshot()
+        intervals.append([round(snapshot[list_id]['interval_minutes'], 1) for list_id in lists])
+        now += timedelta(minutes=10)
+
+    print(f"每轮间隔（分钟）: {intervals}")
+    ok = all(abs(interval - 10) < 0.5 for round_intervals in intervals for interval in round_intervals)
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def main():
+    """主函数"""
+    results = [
+        test_interval_follows_rate(),
+        test_fair_bounded_rounds(),
+        test_scheduler_round_and_persistence(),
+        test_crawl_lists_failure(),
+        test_steady_rate_keeps_interval(),
+    ]
+
+    print("\n" + "=" * 60)
+    print(f"测试通过: {sum(results)}/{len(results)}")
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    exit(main())
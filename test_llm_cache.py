@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+持久化LLM响应缓存测试脚本
+验证稳定缓存键、跨实例持久化、TTL过期和LRU淘汰
+"""
+
+import sys
+import time
+import tempfile
+from pathlib import Path
+
+# 添加项目路径
+sys.path.append('.')
+
+from src.api.chatgpt_client import ChatGPTClient
+from src.utils.llm_cache import LLMResponseCache
+
+
+def temp_db() -> str:
+    """生成临时缓存文件路径"""
+    return str(Path(tempfile.mkdtemp()) / 'llm_cache.sqlite3')
+
+
+def test_persistent_across_instances() -> bool:
+    """测试缓存键稳定且重启后仍可命中"""
+    print("=" * 60)
+    print("测试跨实例持久化")
+    print("=" * 60)
+
+    db_path = temp_db()
+    key = LLMResponseCache.make_key('gemini', 'sentiment', '  Analyze:\n   BTC to the moon ')
+    same_key = LLMResponseCache.make_key('gemini', 'sentiment', 'Analyze: BTC to the moon')
+    other_key = LLMResponseCache.make_key('gemini', 'announcement', 'Analyze: BTC to the moon')
+
+    LLMResponseCache(db_path, enabled=True).set(key, 'sentiment', '{"sentiment": "positive"}')
+    reloaded = LLMResponseCache(db_path, enabled=True)
+
+    ok = (key == same_key and key != other_key
+          and reloaded.get(key) == '{"sentiment": "positive"}'
+          and reloaded.get(other_key) is None
+          and reloaded.get_statistics()['hits'] == 1
+          and reloaded.get_statistics()['misses'] == 1)
+    print(f"统计: {reloaded.get_statistics()}")
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def test_ttl_and_lru() -> bool:
+    """测试过期失效和按最近访问淘汰"""
+    print("\n" + "=" * 60)
+    print("测试TTL与LRU淘汰")
+    print("=" * 60)
+
+    expiring = LLMResponseCache(temp_db(), ttl_hours=0.5 / 3600, enabled=True)
+    expiring.set('k', 'op', 'v')
+    time.sleep(0.6)
+    expired_ok = expiring.get('k') is None
+
+    cache = LLMResponseCache(temp_db(), max_entries=10, enabled=True)
+    for i in range(10):
+        cache.set(f"key{i}", 'op', f"value{i}")
+        time.sleep(0.002)
+    cache.get('key0')  # 最近访问，不应被淘汰
+    cache.set('key10', 'op', 'value10')
+
+    stats = cache.get_statistics()
+    print(f"统计: {stats}")
+    ok = (expired_ok and cache.get('key0') == 'value0' and cache.get('key1') is None
+          and stats['entries'] == 9 and stats['evictions'] == 2)
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def test_client_uses_cache() -> bool:
+    """测试客户端相同请求只调用一次模型"""
+    print("\n" + "=" * 60)
+    print("测试客户端缓存命中")
+    print("=" * 60)
+
+    client = ChatGPTClient()
+    client.response_cache = LLMResponseCache(temp_db(), enabled=True)
+    client.enable_response_caching = True
+    calls = []
+
+    class FakeChat:
+        def send_message(self, prompt):
+            calls.append(prompt)
+            return type('Response', (), {'text': '{"symbols": ["BTC"]}'})()
+
+    class FakeClient:
+        chats = type('Chats', (), {'create': staticmethod(lambda model: FakeChat())})()
+
+    client.client = FakeClient()
+    first = client.extract_token_symbols_from_tweet('Long $BTC and $ETH into the weekend')
+    second = client.extract_token_symbols_from_tweet('Long $BTC and $ETH into the weekend')
+    stats = client.get_statistics()
+
+    print(f"结果: {first} / {second}, 统计: {stats}")
+    ok = first == second == ['BTC'] and len(calls) == 1 and stats['cache_hits'] == 1
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def main():
+    """主函数"""
+    results = [
+        test_persistent_across_instances(),
+        test_ttl_and_lru(),
+        test_client_uses_cache(),
+    ]
+
+    print("\n" + "=" * 60)
+    print(f"测试通过: {sum(results)}/{len(results)}")
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -11,6 +11,7 @@ from datetime import datetime, timedelta
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from src.utils.marco_processor import marco_processor
+from src.utils.marco_weights import time_decay_weights
 from src.utils.logger import setup_logger
 
 
@@ -66,7 +67,7 @@ def test_4h_time_window():
             
             for name, delta in test_times:
                 test_time = end_time - delta
-                weight = marco_processor._calculate_time_decay_weight(test_time, end_time)
+                weight = float(time_decay_weights([(end_time - test_time).total_seconds() / 3600])[0])
                 print(f"  {name}: 权重 {weight:.2f}")
             
             # 显示前5条推文的详细信息
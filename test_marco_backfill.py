@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Marco单次扫描回填测试脚本
+使用内存中的推文数据，验证滑动窗口与逐窗口查询结果一致且只扫描一次
+"""
+
+import sys
+from datetime import datetime, timedelta
+
+# 添加项目路径
+sys.path.append('.')
+
+from src.utils import marco_backfill
+from src.utils.marco_backfill import MarcoBackfillEngine
+from src.utils.marco_processor import MarcoProcessor
+from src.utils.marco_weights import MarcoTweetColumns
+
+
+START = datetime(2025, 1, 6, 0, 0, 0)
+
+
+def build_rows(hours: int = 30, per_hour: int = 12):
+    """构建按update_time升序排列的模拟查询结果"""
+    rows = []
+    for i in range(hours * per_hour):
+        update_time = START + timedelta(minutes=i * 60 // per_hour)
+        rows.append({
+            'id_str': str(1000 + i),
+            'full_text': f"{'BTC to the moon, buy' if i % 3 else 'market crash, sell now'} tweet number {i}",
+            'created_at_datetime': update_time,
+            'update_time': update_time,
+            'retweet_count': i % 17,
+            'favorite_count': (i * 7) % 50,
+            'reply_count': i % 5,
+            'kol_id': str(i % 9),
+            'followers_count': [5_000, 50_000, 500_000, 5_000_000][i % 4],
+            'screen_name': f"kol{i % 9}",
+            'name': f"KOL {i % 9}",
+        })
+    return rows
+
+
+class MemoryMarcoDAO:
+    """内存中的Marco数据存储"""
+
+    def __init__(self, existing=None):
+        self.existing = set(existing or [])
+        self.inserted = {}
+        self.range_queries = 0
+
+    def get_existing_timestamps(self, start_time, end_time):
+        self.range_queries += 1
+        return {timestamp for timestamp in self.existing if start_time <= timestamp <= end_time}
+
+    def insert(self, marco_data):
+        self.inserted[marco_data.timestamp] = marco_data
+        return True
+
+
+def build_engine(rows, dao):
+    """构建使用内存数据的回填引擎"""
+    processor = MarcoProcessor()
+    processor.scans = 0
+
+    def iter_kol_tweets(start_time, end_time):
+        processor.scans += 1
+        for row in rows:
+            if start_time <= row['update_time'] <= end_time:
+                yield row
+
+    processor.iter_kol_tweets = iter_kol_tweets
+    processor._generate_mock_summary = lambda kol_tweets, timestamp: f"{len(kol_tweets)} tweets"
+    return MarcoBackfillEngine(processor=processor, dao=dao)
+
+
+def window_by_query(processor, rows, timestamp, lookback_hours=4):
+    """按单窗口查询的语义计算窗口推文（update_time降序，最多5000条）"""
+    start_time = timestamp - timedelta(hours=lookback_hours)
+    selected = [row for row in rows if start_time <= row['update_time'] <= timestamp]
+    selected.sort(key=lambda row: row['update_time'], reverse=True)
+    return MarcoTweetColumns(selected[:processor.window_tweet_limit], timestamp)
+
+
+def test_sliding_windows_match_queries() -> bool:
+    """测试滑动窗口与逐窗口查询得到相同的推文和权重"""
+    print("=" * 60)
+    print("测试滑动窗口结果一致")
+    print("=" * 60)
+
+    rows = build_rows()
+    engine = build_engine(rows, MemoryMarcoDAO())
+    processor = engine.processor
+    timestamps = processor.generate_timestamp_sequence(START + timedelta(hours=2), START + timedelta(hours=28))
+    lookback = timedelta(hours=4)
+
+    mismatches = 0
+    for timestamp, window in engine.iter_windows(
+            processor.iter_kol_tweets(timestamps[0] - lookback, timestamps[-1]), timestamps, lookback):
+        expected = window_by_query(processor, rows, timestamp)
+        if ([(t['id'], round(t['total_weight'], 9)) for t in window]
+                != [(t['id'], round(t['total_weight'], 9)) for t in expected]):
+            mismatches += 1
+
+    print(f"窗口数: {len(timestamps)}, 不一致: {mismatches}")
+    ok = mismatches == 0
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def test_base_columns_computed_once() -> bool:
+    """测试每条推文的基础权重列只在进入窗口时计算一次"""
+    print("\n" + "=" * 60)
+    print("测试基础权重列只计算一次")
+    print("=" * 60)
+
+    rows = build_rows()
+    engine = build_engine(rows, MemoryMarcoDAO())
+    processor = engine.processor
+    timestamps = processor.generate_timestamp_sequence(START + timedelta(hours=2), START + timedelta(hours=28))
+    lookback = timedelta(hours=4)
+
+    computed = []
+    original = marco_backfill.base_weight_columns
+
+    def counting_base_weight_columns(batch):
+        computed.extend(row['id_str'] for row in batch)
+        return original(batch)
+
+    marco_backfill.base_weight_columns = counting_base_weight_columns
+    try:
+        scanned = [row['id_str'] for row in rows
+                   if timestamps[0] - lookback <= row['update_time'] <= timestamps[-1]]
+        windows = sum(1 for _ in engine.iter_windows(
+            processor.iter_kol_tweets(timestamps[0] - lookback, timestamps[-1]), timestamps, lookback))
+    finally:
+        marco_backfill.base_weight_columns = original
+
+    print(f"窗口数: {windows}, 扫描推文: {len(scanned)}, 计算基础列: {len(computed)}")
+    ok = windows == len(timestamps) and computed == scanned
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def test_failed_labels_requested_once() -> bool:
+    """测试情绪判断失败的推文在重叠窗口中不重复请求"""
+    print("\n" + "=" * 60)
+    print("测试失败标签不重复请求")
+    print("=" * 60)
+
+    rows = build_rows()
+    engine = build_engine(rows, MemoryMarcoDAO())
+    processor = engine.processor
+    timestamps = processor.generate_timestamp_sequence(START + timedelta(hours=2), START + timedelta(hours=28))
+    lookback = timedelta(hours=4)
+
+    requested = []
+    processor._get_stance_labels = lambda tweets: requested.extend(tweet['id'] for tweet in tweets) or {}
+    windows = engine.iter_windows(processor.iter_kol_tweets(timestamps[0] - lookback, timestamps[-1]),
+                                  timestamps, lookback)
+    labelled = list(engine._label_windows(windows, mock_mode=False))
+
+    print(f"窗口数: {len(labelled)}, 请求推文: {len(requested)}, 去重后: {len(set(requested))}")
+    ok = len(labelled) == len(timestamps) and len(requested) == len(set(requested)) > 0
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def test_backfill_single_scan() -> bool:
+    """测试回填只扫描一次并跳过已存在的时间点"""
+    print("\n" + "=" * 60)
+    print("测试单次扫描回填")
+    print("=" * 60)
+
+    rows = build_rows()
+    existing = [START + timedelta(hours=10), START + timedelta(hours=10, minutes=30)]
+    dao = MemoryMarcoDAO(existing)
+    engine = build_engine(rows, dao)
+
+    stats = engine.backfill(START + timedelta(hours=4), START + timedelta(hours=28),
+                            mock_mode=True, max_workers=4)
+
+    print(f"统计: {stats}, 扫描次数: {engine.processor.scans}, 范围查询: {dao.range_queries}")
+
+    # 与逐个时间点的计算结果对比
+    sample = START + timedelta(hours=20)
+    expected_index = engine.processor._calculate_sentiment_index(
+        window_by_query(engine.processor, rows, sample), mock_mode=True)
+
+    ok = (engine.processor.scans == 1 and dao.range_queries == 1
+          and stats['skipped'] == 2 and stats['success'] == stats['total'] - 2
+          and dao.inserted[sample].sentiment_index == expected_index)
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def main():
+    """主函数"""
+    results = [
+        test_sliding_windows_match_queries(),
+        test_base_columns_computed_once(),
+        test_failed_labels_requested_once(),
+        test_backfill_single_scan(),
+    ]
+
+    print("\n" + "=" * 60)
+    print(f"测试通过: {sum(results)}/{len(results)}")
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Marco批量情绪判断测试脚本
+模拟Gemini返回，验证按编号解析、只重试失败推文以及批次并发
+"""
+
+import sys
+import json
+import re
+import threading
+
+# 添加项目路径
+sys.path.append('.')
+
+from src.utils.marco_processor import MarcoProcessor
+
+
+class FakeChatGPT:
+    """按提示词中的编号返回情绪判断的模拟客户端"""
+
+    def __init__(self, drop_first_ids=None, garbage_batches=0):
+        self.calls = []
+        self.drop_first_ids = set(drop_first_ids or [])
+        self.garbage_batches = garbage_batches
+        self._lock = threading.Lock()
+
+    def _make_request(self, messages, **kwargs):
+        prompt = messages[-1]['content']
+        with self._lock:
+            self.calls.append(prompt)
+            if self.garbage_batches > 0:
+                self.garbage_batches -= 1
+                return 'I am not able to answer that.'
+
+        items = []
+        for index, text in re.findall(r'^\s*\[(\d+)\] (.*)$', prompt, re.MULTILINE):
+            tweet_id = text.split('#')[-1]
+            with self._lock:
+                if tweet_id in self.drop_first_ids:
+                    self.drop_first_ids.discard(tweet_id)
+                    continue
+            stance = 'bullish' if 'moon' in text else 'bearish' if 'dump' in text else 'neutral'
+            items.append({'index': int(index), 'stance': stance})
+        return '```json\n' + json.dumps(items) + '\n```'
+
+
+def build_tweets(count: int):
+    """构建测试推文"""
+    texts = ['BTC to the moon', 'Time to dump everything', 'Protocol docs updated']
+    return [
+        {'id': str(i), 'content': f"{texts[i % 3]} #{i}", 'total_weight': 0.5}
+        for i in range(count)
+    ]
+
+
+def build_processor(fake: FakeChatGPT, batch_size: int = 25) -> MarcoProcessor:
+    """构建使用模拟客户端的处理器（不访问标签存储）"""
+    processor = MarcoProcessor()
+    processor.chatgpt = fake
+    processor.stance_store_enabled = False
+    processor.stance_batch_enabled = True
+    processor.stance_batch_size = batch_size
+    processor.stance_batch_workers = 4
+    return processor
+
+
+def test_batch_requests() -> bool:
+    """测试100条推文只需4次请求且结果正确"""
+    print("=" * 60)
+    print("测试批量情绪判断")
+    print("=" * 60)
+
+    fake = FakeChatGPT()
+    labels = build_processor(fake)._classify_stances_batched(build_tweets(100))
+
+    print(f"请求次数: {len(fake.calls)}, 标签数: {len(labels)}")
+    ok = (len(fake.calls) == 4 and len(labels) == 100
+          and labels['0'] == 'bullish' and labels['1'] == 'bearish' and labels['2'] == 'neutral')
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def test_retry_failed_items_only() -> bool:
+    """测试只重试解析失败的推文"""
+    print("\n" + "=" * 60)
+    print("测试只重试失败推文")
+    print("=" * 60)
+
+    fake = FakeChatGPT(drop_first_ids=['3', '40', '41'])
+    labels = build_processor(fake)._classify_stances_batched(build_tweets(50))
+
+    retried = re.findall(r'^\s*\[\d+\] .*#(\d+)$', fake.calls[-1], re.MULTILINE)
+    print(f"请求次数: {len(fake.calls)}, 重试的推文: {retried}")
+    items_ok = len(labels) == 50 and len(fake.calls) == 3 and sorted(retried) == ['3', '40', '41']
+
+    # 整批返回无法解析时，整批重试
+    fake = FakeChatGPT(garbage_batches=1)
+    labels = build_processor(fake, batch_size=50)._classify_stances_batched(build_tweets(50))
+    print(f"整批失败后请求次数: {len(fake.calls)}, 标签数: {len(labels)}")
+    batch_ok = len(labels) == 50 and len(fake.calls) == 2
+
+    ok = items_ok and batch_ok
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def test_sentiment_index_matches_single_mode() -> bool:
+    """测试批量模式与逐条模式的情绪指数一致"""
+    print("\n" + "=" * 60)
+    print("测试情绪指数一致")
+    print("=" * 60)
+
+    tweets = build_tweets(60)
+    batched = build_processor(FakeChatGPT())._calculate_sentiment_index(tweets)
+
+    single = build_processor(FakeChatGPT())
+    single.stance_batch_enabled = False
+    single._analyze_sentiment_tendency_ai = lambda content: (
+        'bullish' if 'moon' in content else 'bearish' if 'dump' in content else 'neutral'
+    )
+    direct = single._calculate_sentiment_index(tweets)
+
+    print(f"批量: {batched}, 逐条: {direct}")
+    ok = batched == direct
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def test_failed_batches_not_retried_per_tweet() -> bool:
+    """测试批量判断失败的推文不计入总权重，不再逐条调用AI"""
+    print("\n" + "=" * 60)
+    print("测试批量失败不逐条重试")
+    print("=" * 60)
+
+    tweets = build_tweets(60)
+    processor = build_processor(FakeChatGPT(garbage_batches=100))
+    single_calls = []
+    processor._analyze_sentiment_tendency_ai = lambda content: single_calls.append(content) or 'bullish'
+    failed_index = processor._calculate_sentiment_index(tweets)
+    batch_calls = len(processor.chatgpt.calls)
+
+    # 部分推文失败：只有判断成功的推文（ID 0，看涨）参与计算
+    dropped = [tweet['id'] for tweet in tweets if tweet['id'] != '0']
+    partial = build_processor(FakeChatGPT(drop_first_ids=dropped))
+    partial.stance_batch_retries = 0
+    partial._analyze_sentiment_tendency_ai = lambda content: single_calls.append(content) or 'bullish'
+    partial_index = partial._calculate_sentiment_index(tweets)
+
+    print(f"全部失败: 指数 {failed_index}, 批量请求 {batch_calls}, 逐条请求 {len(single_calls)}")
+    print(f"部分失败: 指数 {partial_index}")
+    ok = (failed_index == 50.0 and batch_calls == 3 * (1 + processor.stance_batch_retries)
+          and not single_calls and partial_index == 100.0)
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def main():
+    """主函数"""
+    results = [
+        test_batch_requests(),
+        test_retry_failed_items_only(),
+        test_sentiment_index_matches_single_mode(),
+        test_failed_batches_not_retried_per_tweet(),
+    ]
+
+    print("\n" + "=" * 60)
+    print(f"测试通过: {sum(results)}/{len(results)}")
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    exit(main())
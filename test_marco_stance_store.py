@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Marco推文情绪标签复用测试脚本
+使用内存中的标签存储，验证重叠窗口只分析新推文且情绪指数不变
+"""
+
+import sys
+
+# 添加项目路径
+sys.path.append('.')
+
+from src.utils.marco_processor import MarcoProcessor
+
+
+class MemoryStanceDAO:
+    """内存中的情绪标签存储"""
+
+    def __init__(self):
+        self.stances = {}
+
+    def get_stances(self, tweet_ids):
+        return {tweet_id: self.stances[tweet_id] for tweet_id in tweet_ids if tweet_id in self.stances}
+
+    def save_stances(self, stances):
+        self.stances.update(stances)
+        return len(stances)
+
+
+def build_tweets(start: int, count: int):
+    """构建带权重的测试推文"""
+    texts = ['BTC looks bullish, buying more', 'Market will crash, selling everything', 'ETH upgrade scheduled next week']
+    return [
+        {'id': str(i), 'content': f"{texts[i % 3]} #{i}", 'total_weight': 0.2 + (i % 5) * 0.1}
+        for i in range(start, start + count)
+    ]
+
+
+def build_processor(store_enabled: bool = True) -> MarcoProcessor:
+    """构建使用关键词代替AI判断的处理器"""
+    processor = MarcoProcessor()
+    processor.marco_dao = MemoryStanceDAO()
+    processor.stance_store_enabled = store_enabled
+    processor.stance_batch_enabled = False
+    processor.ai_calls = 0
+
+    def fake_classify(content):
+        processor.ai_calls += 1
+        return processor._analyze_sentiment_tendency_mock(content)
+
+    processor._classify_stance_ai = fake_classify
+    return processor
+
+
+def test_overlapping_windows_reuse_labels() -> bool:
+    """测试重叠窗口复用已保存的标签"""
+    print("=" * 60)
+    print("测试重叠窗口复用情绪标签")
+    print("=" * 60)
+
+    processor = build_processor()
+    first_index = processor._calculate_sentiment_index(build_tweets(0, 40))
+    first_calls = processor.ai_calls
+
+    # 下一个窗口：丢弃最早10条，新增10条
+    second_index = processor._calculate_sentiment_index(build_tweets(10, 40))
+    second_calls = processor.ai_calls - first_calls
+
+    print(f"第一个窗口: 指数 {first_index}, AI调用 {first_calls}")
+    print(f"第二个窗口: 指数 {second_index}, AI调用 {second_calls}")
+    ok = first_calls == 40 and second_calls == 10
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def test_index_unchanged() -> bool:
+    """测试复用标签时情绪指数与逐条分析一致"""
+    print("\n" + "=" * 60)
+    print("测试情绪指数计算结果不变")
+    print("=" * 60)
+
+    tweets = build_tweets(0, 30)
+    with_store = build_processor(store_enabled=True)
+    with_store._calculate_sentiment_index(build_tweets(0, 15))
+    stored_index = with_store._calculate_sentiment_index(tweets)
+
+    without_store = build_processor(store_enabled=False)
+    without_store._analyze_sentiment_tendency_ai = without_store._classify_stance_ai
+    direct_index = without_store._calculate_sentiment_index(tweets)
+
+    print(f"复用标签: {stored_index}, 逐条分析: {direct_index}")
+    ok = stored_index == direct_index
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def main():
+    """主函数"""
+    results = [
+        test_overlapping_windows_reuse_labels(),
+        test_index_unchanged(),
+    ]
+
+    print("\n" + "=" * 60)
+    print(f"测试通过: {sum(results)}/{len(results)}")
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Marco列式权重计算测试脚本
+验证列式计算与逐条计算的权重一致，以及重要推文筛选的排序与稳定排序一致；
+NumPy和纯Python两种实现分别测试（未安装NumPy时只测试纯Python实现）
+"""
+
+import sys
+import math
+import re
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+# 添加项目路径
+sys.path.append('.')
+
+from src.utils import marco_weights
+from src.utils.marco_processor import MarcoProcessor
+from src.utils.marco_weights import MarcoTweetColumns, top_k_indices
+
+
+END_TIME = datetime(2025, 1, 6, 12, 0, 0)
+
+
+def build_rows(count: int = 400):
+    """构建覆盖各粉丝数分段和时间衰减分段的查询结果"""
+    followers = [0, 9_999, 10_000, 99_999, 100_000, 1_000_000, 10_000_000, None]
+    minutes = [0, 30, 31, 60, 90, 120, 150, 180, 210, 240, 300]
+    rows = []
+    for i in range(count):
+        update_time = END_TIME - timedelta(minutes=minutes[i % len(minutes)])
+        rows.append({
+            'id_str': str(i),
+            'full_text': None if i % 41 == 0 else f"{'BTC breakout, bullish' if i % 2 else 'ETH'} update #{i}",
+            'created_at_datetime': update_time,
+            'update_time': None if i % 37 == 0 else update_time,
+            'retweet_count': i % 13,
+            'favorite_count': None if i % 29 == 0 else (i * 3) % 40,
+            'reply_count': i % 7,
+            'kol_id': str(i % 11),
+            'followers_count': followers[i % len(followers)],
+            'screen_name': f"kol{i % 11}",
+            'name': f"KOL {i % 11}",
+        })
+    return rows
+
+
+def implementations():
+    """可测试的实现：纯Python，以及安装了NumPy时的NumPy实现"""
+    return [False, True] if marco_weights.np is not None else [False]
+
+
+@contextmanager
+def use_numpy(enabled: bool):
+    """临时切换列式计算的实现"""
+    original = marco_weights.NUMPY_AVAILABLE
+    marco_weights.NUMPY_AVAILABLE = enabled
+    try:
+        yield
+    finally:
+        marco_weights.NUMPY_AVAILABLE = original
+
+
+def scalar_influence(followers_count: int) -> float:
+    """逐条计算的KOL影响力权重（参考实现）"""
+    if followers_count >= 10_000_000:
+        return 1.0
+    elif followers_count >= 1_000_000:
+        return 0.8
+    elif followers_count >= 100_000:
+        return 0.6
+    elif followers_count >= 10_000:
+        return 0.4
+    return 0.2
+
+
+def scalar_decay(tweet_time, current_time) -> float:
+    """逐条计算的时间衰减权重（参考实现）"""
+    if not tweet_time:
+        return 0.8
+    hours = (current_time - tweet_time).total_seconds() / 3600
+    for bound, weight in [(0.5, 1.0), (1, 0.95), (2, 0.85), (3, 0.75), (4, 0.6)]:
+        if hours <= bound:
+            return weight
+    return 0.5
+
+
+def scalar_content_quality(content: str) -> int:
+    """逐条计算的内容质量得分（参考实现）"""
+    score = 20 if len(content) > 100 else 10 if len(content) > 50 else 0
+    content_lower = content.lower()
+    crypto_keywords = ['btc', 'bitcoin', 'eth', 'ethereum', 'crypto', '加密',
+                       'defi', 'nft', 'dao', 'web3', '区块链', '比特币', '以太坊']
+    ta_keywords = ['支撑', '阻力', '突破', '回调', '牛市', '熊市', '分析', 'analysis']
+    score += min(30, sum(1 for keyword in crypto_keywords if keyword in content_lower) * 5)
+    score += min(20, sum(1 for keyword in ta_keywords if keyword in content_lower) * 5)
+    if re.search(r'\$[\d,]+', content) or re.search(r'[\d,]+\$', content):
+        score += 15
+    if 'http' in content or '图片' in content:
+        score += 10
+    return min(100, score)
+
+
+def scalar_weight(row):
+    """按逐条计算的方式得到单条推文权重"""
+    interaction = (row.get('retweet_count') or 0) + (row.get('favorite_count') or 0) * 0.5 \
+        + (row.get('reply_count') or 0) * 0.8
+    influence = scalar_influence(row.get('followers_count') or 0)
+    decay = scalar_decay(row.get('update_time') or row.get('created_at_datetime'), END_TIME)
+    return influence * math.log(max(1, interaction)) * decay
+
+
+def test_weights_match_scalar() -> bool:
+    """测试列式权重与逐条计算一致"""
+    print("=" * 60)
+    print(f"测试列式权重计算 (NumPy可用: {marco_weights.np is not None})")
+    print("=" * 60)
+
+    rows = build_rows()
+    ok = True
+    for numpy_enabled in implementations():
+        with use_numpy(numpy_enabled):
+            columns = MarcoTweetColumns(rows, END_TIME)
+            mismatches = sum(
+                1 for i, row in enumerate(rows)
+                if abs(columns.weight(i) - scalar_weight(row)) > 1e-12
+            )
+            tweet = columns[5]
+            fields_ok = tweet['id'] == '5' and tweet['total_weight'] == columns.weight(5) and len(columns[:3]) == 3
+
+        print(f"NumPy: {numpy_enabled}, 推文数: {len(columns)}, 不一致: {mismatches}")
+        ok = ok and mismatches == 0 and fields_ok
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def test_precomputed_base_columns() -> bool:
+    """测试使用预先计算的基础列时只按窗口结束时间重新计算时间衰减"""
+    print("\n" + "=" * 60)
+    print("测试预先计算的基础列")
+    print("=" * 60)
+
+    rows = build_rows()
+    later = END_TIME + timedelta(minutes=90)
+    ok = True
+    for numpy_enabled in implementations():
+        with use_numpy(numpy_enabled):
+            base = marco_weights.base_weight_columns(rows)
+            reused = MarcoTweetColumns(rows, later, base=base)
+            fresh = MarcoTweetColumns(rows, later)
+            same = [reused.weight(i) for i in range(len(rows))] == [fresh.weight(i) for i in range(len(rows))]
+            decay_ok = all(float(reused.decay[i]) == scalar_decay(row.get('update_time')
+                                                                 or row.get('created_at_datetime'), later)
+                           for i, row in enumerate(rows))
+
+        print(f"NumPy: {numpy_enabled}, 权重一致: {same}, 时间衰减一致: {decay_ok}")
+        ok = ok and same and decay_ok
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def test_content_quality_scores() -> bool:
+    """测试列式内容质量得分与逐条计算一致"""
+    print("\n" + "=" * 60)
+    print("测试内容质量得分")
+    print("=" * 60)
+
+    contents = [row['full_text'] or '' for row in build_rows(60)] + [
+        '',
+        'BTC突破$100,000，牛市来了！分析见 https://example.com ' + 'x' * 60,
+        'ETH 2,500$ 支撑位回调，熊市阻力 analysis 图片 defi nft dao web3 crypto bitcoin ethereum',
+        '比特币和以太坊的区块链加密生态' * 5,
+    ]
+    expected = [scalar_content_quality(content) for content in contents]
+    ok = True
+    for numpy_enabled in implementations():
+        with use_numpy(numpy_enabled):
+            actual = [int(score) for score in marco_weights.content_quality_scores(contents)]
+            empty = list(marco_weights.content_quality_scores([]))
+        print(f"NumPy: {numpy_enabled}, 内容数: {len(contents)}, 一致: {actual == expected}")
+        ok = ok and actual == expected and empty == []
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def test_sentiment_index_matches_dicts() -> bool:
+    """测试列式数据与推文字典列表得到相同的情绪指数和重要推文"""
+    print("\n" + "=" * 60)
+    print("测试情绪指数与重要推文一致")
+    print("=" * 60)
+
+    processor = MarcoProcessor()
+    ok = True
+    for numpy_enabled in implementations():
+        with use_numpy(numpy_enabled):
+            columns = MarcoTweetColumns(build_rows(), END_TIME)
+            dicts = list(columns)
+
+            column_index = processor._calculate_sentiment_index(columns, mock_mode=True)
+            dict_index = processor._calculate_sentiment_index(dicts, mock_mode=True)
+
+            column_top = [tweet['id'] for tweet in processor._filter_important_tweets(columns)]
+            dict_top = [tweet['id'] for tweet in processor._filter_important_tweets(dicts)]
+
+        print(f"NumPy: {numpy_enabled}, 情绪指数: 列式 {column_index}, 字典 {dict_index}")
+        print(f"重要推文: {len(column_top)} 条, 顺序一致: {column_top == dict_top}")
+        ok = ok and column_index == dict_index and column_top == dict_top and len(column_top) == 30
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def test_top_k_ties() -> bool:
+    """测试得分并列时保持原顺序"""
+    print("\n" + "=" * 60)
+    print("测试Top-K并列排序")
+    print("=" * 60)
+
+    scores = [3, 1, 5, 3, 5, 0, 3, 2, 5, 3]
+    candidates = [0, 1, 2, 3, 4, 6, 7, 8, 9]
+    expected = sorted(candidates, key=lambda i: scores[i], reverse=True)
+
+    ok = True
+    for numpy_enabled in implementations():
+        with use_numpy(numpy_enabled):
+            ok = ok and all(top_k_indices(scores, k, candidates) == expected[:k] for k in range(len(candidates) + 2))
+            ok = ok and top_k_indices(scores, 3) == [2, 4, 8] and top_k_indices([], 5) == []
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def main():
+    """主函数"""
+    results = [
+        test_weights_match_scalar(),
+        test_precomputed_base_columns(),
+        test_content_quality_scores(),
+        test_sentiment_index_matches_dicts(),
+        test_top_k_ties(),
+    ]
+
+    print("\n" + "=" * 60)
+    print(f"测试通过: {sum(results)}/{len(results)}")
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -104,7 +104,8 @@ def test_popularity_calculation():
             print(f"   - is_new_created: {classification_result.is_new_created}")
             
             if classification_result.topic_id:
-                # 查询数据库中保存的topic
+                # 写入合并的话题热度后查询数据库中保存的topic
+                smart_classifier.flush_topic_popularity()
                 saved_topic = topic_dao.get_topic_by_id(classification_result.topic_id)
                 if saved_topic:
                     print(f"   数据库中保存的popularity: {saved_topic.popularity}")
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+跨list推文去重测试脚本
+验证共享已见集合的线程安全去重和重叠统计、布隆过滤器的持久化，
+以及流式爬取中最近已处理的推文只刷新互动数据、过滤器误判的新推文照常入库、
+过滤器确认的新推文不查询是否已入库
+"""
+
+import sys
+import tempfile
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# 添加项目路径
+sys.path.append('.')
+
+from src.utils.seen_tweets import BloomFilter, RecentTweetFilter, SeenTweetRegistry
+from test_streaming_crawl import FakeAPIClient, build_crawler, build_pages
+
+
+def test_registry_overlap() -> bool:
+    """测试多线程共享已见集合时每条推文只保留一次，并统计list重叠"""
+    print("=" * 60)
+    print("测试共享已见集合与重叠统计")
+    print("=" * 60)
+
+    registry = SeenTweetRegistry()
+    kept = []
+    kept_lock = threading.Lock()
+    # 每个list 100条，其中前50条三个list共有
+    pages = {list_id: [{'id_str': f"shared-{i}" if i < 50 else f"{list_id}-{i}"} for i in range(100)]
+             for list_id in ('a', 'b', 'c')}
+
+    def worker(list_id):
+        for start in range(0, 100, 10):
+            unique = registry.filter_page(list_id, pages[list_id][start:start + 10])
+            with kept_lock:
+                kept.extend(item['id_str'] for item in unique)
+
+    threads = [threading.Thread(target=worker, args=(list_id,)) for list_id in pages]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    report = registry.get_overlap_report()
+    print(f"保留: {len(kept)}, 重复: {report['total_duplicates']}")
+    print({list_id: round(stats['overlap_ratio'], 2) for list_id, stats in report['lists'].items()})
+    ok = (len(kept) == len(set(kept)) == 50 + 3 * 50
+          and report['total_raw'] == 300 and report['total_duplicates'] == 100
+          and sum(stats['unique'] for stats in report['lists'].values()) == 200
+          and all(sum(stats['overlaps_with'].values()) == stats['duplicates'] for stats in report['lists'].values()))
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def test_recent_filter_persistence() -> bool:
+    """测试布隆过滤器没有漏判、误判率接近目标值，且保存后可重新加载"""
+    print("\n" + "=" * 60)
+    print("测试最近推文过滤器")
+    print("=" * 60)
+
+    bloom = BloomFilter(10000, 0.01)
+    for i in range(10000):
+        bloom.add(str(i))
+    false_negatives = sum(1 for i in range(10000) if str(i) not in bloom)
+    false_positives = sum(1 for i in range(10000, 30000) if str(i) in bloom) / 20000
+
+    path = Path(tempfile.mkdtemp()) / 'recent.bloom'
+    first = RecentTweetFilter(str(path), enabled=True)
+    first.add_many([f"tweet-{i}" for i in range(100)])
+    reloaded = RecentTweetFilter(str(path), enabled=True)
+    disabled = RecentTweetFilter(str(path), enabled=False)
+
+    print(f"漏判: {false_negatives}, 误判率: {false_positives:.4f}")
+    ok = (false_negatives == 0 and false_positives < 0.02
+          and all(f"tweet-{i}" in reloaded for i in range(100)) and "tweet-100" not in reloaded
+          and "tweet-1" not in disabled)
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+class FakeTweetStore:
+    """记录已入库推文和互动数据刷新的模拟推文DAO"""
+
+    def __init__(self):
+        self.ids = set()
+        self.refreshed = []
+        self.queried = []
+
+    def get_existing_ids(self, id_strs):
+        self.queried.extend(id_strs)
+        return {id_str for id_str in id_strs if id_str in self.ids}
+
+    def batch_update_engagement(self, tweets):
+        self.refreshed.extend(tweet.id_str for tweet in tweets)
+        return len(tweets)
+
+
+def build_store_crawler(pages, recent_filter, store):
+    """构建使用真实已入库判断（模拟推文DAO）的流式爬虫"""
+    crawler = build_crawler(FakeAPIClient(pages, page_delay=0.01))
+    del crawler._refresh_known_tweets
+    crawler.tweet_dao = store
+    crawler.recent_tweet_filter = recent_filter
+    return crawler
+
+
+def test_streaming_refreshes_recent_tweets() -> bool:
+    """测试第二次爬取只增强入库新推文，最近已处理的推文仍刷新互动数据，过滤器误判的新推文照常入库"""
+    print("\n" + "=" * 60)
+    print("测试流式爬取中最近已处理推文的处理")
+    print("=" * 60)
+
+    recent_filter = RecentTweetFilter(str(Path(tempfile.mkdtemp()) / 'recent.bloom'), enabled=True)
+    store = FakeTweetStore()
+
+    first_crawler = build_store_crawler({'a': build_pages(0, 2), 'b': build_pages(1, 2)}, recent_filter, store)
+    first_success = first_crawler.crawl_tweets_streaming(list_ids=['a', 'b'])
+    store.ids.update(first_crawler.saved_ids)
+
+    # 第二次爬取：list a 多了一页新数据，其中的推文被过滤器误判为最近已处理
+    second_pages = {'a': build_pages(0, 3), 'b': build_pages(1, 2)}
+    new_ids = sorted(item['id_str'] for item in second_pages['a'][2])
+    recent_filter.add_many(new_ids)
+    second_crawler = build_store_crawler(second_pages, recent_filter, store)
+    second_success = second_crawler.crawl_tweets_streaming(list_ids=['a', 'b'])
+
+    report = second_crawler.last_overlap_report
+    print(f"第一次入库: {len(first_crawler.saved_ids)}, 第二次入库: {sorted(second_crawler.saved_ids)}, "
+          f"刷新互动数据: {len(store.refreshed)}, 最近已处理: {report['total_seen_recently']}")
+    ok = (first_success and second_success and len(first_crawler.saved_ids) == 20
+          and sorted(second_crawler.saved_ids) == new_ids
+          and sorted(store.refreshed) == sorted(first_crawler.saved_ids)
+          and report['total_seen_recently'] == 25)
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def test_definitely_new_skips_lookup() -> bool:
+    """测试过滤器开始记录之后发布且未命中的推文不查询是否已入库，直接增强入库；
+    过滤器命中的和开始记录之前发布的推文仍以数据库为准"""
+    print("\n" + "=" * 60)
+    print("测试过滤器确认的新推文跳过已入库查询")
+    print("=" * 60)
+
+    path = Path(tempfile.mkdtemp()) / 'recent.bloom'
+    RecentTweetFilter(str(path), enabled=True).add_many([f"recent-{i}" for i in range(5)])
+    recent_filter = RecentTweetFilter(str(path), enabled=True)
+
+    def page(prefix, tweet_time):
+        created_at = tweet_time.strftime('%a %b %d %H:%M:%S +0000 %Y')
+        return [{'id_str': f"{prefix}-{i}", 'created_at': created_at, 'user': {'id_str': f"user-{i}"}}
+                for i in range(5)]
+
+    now = datetime.now(timezone.utc)
+    # 新推文、最近已处理的推文、过滤器启用前已入库的推文
+    pages = {'a': [page('new', now + timedelta(minutes=1)), page('recent', now),
+                   page('old', now - timedelta(days=1))]}
+    store = FakeTweetStore()
+    store.ids.update(f"{prefix}-{i}" for prefix in ('recent', 'old') for i in range(5))
+    crawler = build_store_crawler(pages, recent_filter, store)
+    success = crawler.crawl_tweets_streaming(list_ids=['a'])
+
+    print(f"查询是否已入库: {store.queried}")
+    print(f"入库: {crawler.saved_ids}, 刷新互动数据: {store.refreshed}")
+    ok = (success and not any(id_str.startswith('new') for id_str in store.queried)
+          and sorted(store.queried) == sorted(store.ids)
+          and crawler.saved_ids == [f"new-{i}" for i in range(5)]
+          and sorted(store.refreshed) == sorted(store.ids))
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def main():
+    """主函数"""
+    results = [
+        test_registry_overlap(),
+        test_recent_filter_persistence(),
+        test_streaming_refreshes_recent_tweets(),
+        test_definitely_new_skips_lookup(),
+    ]
+
+    print("\n" + "=" * 60)
+    print(f"测试通过: {sum(results)}/{len(results)}")
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    exit(main())
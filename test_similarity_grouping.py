@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+相似推文分组测试脚本
+验证 MinHash LSH 分组与逐对比较的分组结果一致（话题分析器和ChatGPT内容合并两处），以及大批量推文的分组耗时
+"""
+
+import random
+import sys
+import time
+
+# 添加项目路径
+sys.path.append('.')
+
+from src.api.chatgpt_client import ChatGPTClient
+from src.models.tweet import Tweet
+from src.utils.similarity_grouping import MinHashLSHGrouper, jaccard_similarity
+from src.utils.topic_analyzer import TopicAnalyzer
+
+TERMS = ['bitcoin', 'btc', 'ethereum', 'eth', 'defi', 'nft', 'dao', 'dex', 'cex', 'trading', 'market',
+         'pump', 'dump', 'bull', 'bear', 'token', 'yield', 'staking', 'mining']
+HASHTAGS = ['#bitcoin', '#eth', '#defi', '#airdrop', '#nft', '#memecoin', '#layer2', '#etf', '#restaking']
+SYMBOLS = ['$BTC', '$ETH', '$SOL', '$ARB', '$OP', '$PEPE', '$DOGE', '$LINK', '$UNI', '$AAVE']
+FILLER = ['today', 'huge', 'news', 'just', 'announced', 'watch', 'this', 'week', 'again', 'for', 'the', 'is']
+
+
+def generate_tweets(count: int, seed: int = 7) -> list:
+    """生成固定种子的推文样本（若干热点主题的转述加随机噪声）"""
+    rng = random.Random(seed)
+    themes = [rng.sample(TERMS, 3) + rng.sample(HASHTAGS, 1) + rng.sample(SYMBOLS, 1) for _ in range(40)]
+    tweets = []
+    for i in range(count):
+        words = [word for word in rng.choice(themes) if rng.random() < 0.75]
+        words += rng.sample(TERMS + HASHTAGS + SYMBOLS, rng.randint(0, 3))
+        words += rng.sample(FILLER, rng.randint(2, 6))
+        rng.shuffle(words)
+        tweets.append(Tweet(id_str=f"tweet_{i}", full_text=' '.join(words)))
+    return tweets
+
+
+def pairwise_groups(keyword_sets: list, similarity) -> list:
+    """逐对比较的参考分组（原实现）"""
+    groups = []
+    ungrouped = list(range(len(keyword_sets)))
+    while ungrouped:
+        current = ungrouped.pop(0)
+        group = [current]
+        i = 0
+        while i < len(ungrouped):
+            if similarity(keyword_sets[current], keyword_sets[ungrouped[i]]) > 0.3:
+                group.append(ungrouped.pop(i))
+            else:
+                i += 1
+        groups.append(group)
+    return groups
+
+
+def test_topic_analyzer_groups_match() -> bool:
+    """测试话题分析器的分组结果与逐对比较一致"""
+    print("=" * 60)
+    print("测试话题分析器分组一致性")
+    print("=" * 60)
+
+    analyzer = TopicAnalyzer()
+    tweets = generate_tweets(2000)
+    keyword_sets = [analyzer._extract_keywords(tweet.full_text) for tweet in tweets]
+    expected = [[tweets[i].id_str for i in group]
+                for group in pairwise_groups(keyword_sets, jaccard_similarity)]
+    actual = [[tweet.id_str for tweet in group] for group in analyzer._preprocess_and_group_tweets(tweets)]
+
+    multi = sum(1 for group in expected if len(group) > 1)
+    print(f"推文数: {len(tweets)}, 参考分组: {len(expected)} (多条推文的组 {multi}), LSH分组: {len(actual)}")
+    ok = actual == expected and multi > 0
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def test_content_groups_match() -> bool:
+    """测试ChatGPT内容合并的分组结果与逐对比较一致，返回格式不变"""
+    print("\n" + "=" * 60)
+    print("测试内容合并分组一致性")
+    print("=" * 60)
+
+    client = ChatGPTClient.__new__(ChatGPTClient)
+    client.content_grouper = MinHashLSHGrouper(threshold=0.3)
+    texts = [tweet.full_text for tweet in generate_tweets(1000, seed=11)] + ['', '   ']
+    keyword_sets = [set(text.lower().split()) for text in texts]
+
+    def similarity(first, second):
+        union = first | second
+        return len(first & second) / len(union) if union else 0
+
+    expected = [(group, [texts[i] for i in group]) for group in pairwise_groups(keyword_sets, similarity)]
+    actual = client._group_similar_content(texts)
+
+    print(f"文本数: {len(texts)}, 参考分组: {len(expected)}, LSH分组: {len(actual)}")
+    ok = actual == expected
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def test_large_batch_speed() -> bool:
+    """测试大批量推文的分组耗时接近线性"""
+    print("\n" + "=" * 60)
+    print("测试大批量分组耗时")
+    print("=" * 60)
+
+    grouper = MinHashLSHGrouper(threshold=0.3)
+    rng = random.Random(3)
+    vocabulary = [f"word{i}" for i in range(20000)]
+    keyword_sets = [set(rng.sample(vocabulary, 8)) for _ in range(10000)]
+
+    start = time.perf_counter()
+    groups = grouper.group(keyword_sets)
+    elapsed = time.perf_counter() - start
+
+    grouped = sorted(index for group in groups for index in group)
+    print(f"推文数: {len(keyword_sets)}, 分组数: {len(groups)}, 耗时: {elapsed:.2f}s")
+    ok = grouped == list(range(len(keyword_sets))) and elapsed < 20
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def main():
+    """主函数"""
+    results = [
+        test_topic_analyzer_groups_match(),
+        test_content_groups_match(),
+        test_large_batch_speed(),
+    ]
+
+    print("\n" + "=" * 60)
+    print(f"测试通过: {sum(results)}/{len(results)}")
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    exit(main())
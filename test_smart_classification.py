@@ -154,6 +154,9 @@ def test_smart_classification():
         
         print("-" * 60)
     
+    # 写入分类过程中提高的话题热度
+    smart_classifier.flush_topic_popularity()
+    
     # 输出测试总结
     print(f"\n📊 测试总结:")
     print(f"总测试数: {results['total']}")
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+分页早停策略测试脚本
+验证模拟器与客户端回放的拉取页数一致，以及漏掉推文和浪费页数的统计
+"""
+
+import sys
+import gzip
+import json
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# 添加项目路径
+sys.path.append('.')
+
+from src.api.stop_simulator import StopStrategySimulator, load_recorded_sequences
+from src.api.stop_strategies import ConsecutiveEmptyPagesStrategy, build_stop_strategy
+from test_tweetscout_replay import build_client
+
+
+def write_pages(path: Path, list_id: str, recorded_at: datetime, pages):
+    """
+    写入一段录制数据，pages 为每页推文距录制时间的分钟数列表
+    """
+    utc_recorded_at = datetime.utcnow() - (datetime.now() - recorded_at)
+    tweet_id = 1000
+    with gzip.open(path, 'at', encoding='utf-8') as f:
+        for page, minutes_list in enumerate(pages):
+            tweets = []
+            for minutes in minutes_list:
+                created_at = utc_recorded_at - timedelta(minutes=minutes)
+                tweets.append({
+                    'id_str': str(tweet_id),
+                    'created_at': created_at.strftime('%a %b %d %H:%M:%S +0000 %Y'),
+                    'user': {'id_str': f"user_{tweet_id % 3}", 'name': 'tester'}
+                })
+                tweet_id -= 1
+            next_cursor = f"cursor_{page + 1}" if page + 1 < len(pages) else None
+            f.write(json.dumps({
+                'list_id': list_id,
+                'cursor': f"cursor_{page}" if page else None,
+                'next_cursor': next_cursor,
+                'recorded_at': recorded_at.isoformat(),
+                'response': {'tweets': tweets, 'next_cursor': next_cursor}
+            }) + '\n')
+
+
+def test_simulator_matches_client() -> bool:
+    """测试默认策略下模拟器的拉取页数与客户端回放一致"""
+    print("=" * 60)
+    print("测试模拟器与客户端回放一致")
+    print("=" * 60)
+
+    path = Path(tempfile.mkdtemp()) / 'pages.jsonl.gz'
+    # 首页在2小时窗口内，之后全部超时
+    pages = [[0, 20, 40, 60, 80]] + [[200 + page * 100 + i for i in range(5)] for page in range(7)]
+    write_pages(path, 'list_a', datetime.now() - timedelta(days=3), pages)
+
+    client = build_client()
+    session = client.enable_replay(str(path))
+    list(client.fetch_tweets_with_pagination(list_id='list_a', hours_limit=2, max_pages=8,
+                                             stop_strategy=build_stop_strategy({})))
+
+    simulator = StopStrategySimulator(load_recorded_sequences(str(path)), hours_limit=2, max_pages=8)
+    default_report = simulator.simulate(lambda: build_stop_strategy({}), 'default')
+    none_report = simulator.simulate(lambda: build_stop_strategy({'enabled': False}), 'none')
+
+    print(f"客户端请求页数: {session.request_count}")
+    print(f"default: {default_report}")
+    print(f"none: {none_report}")
+    ok = (default_report['pages_fetched'] == session.request_count
+          and default_report['pages_fetched'] < none_report['pages_fetched'] == 8
+          and default_report['missed_tweets'] == none_report['missed_tweets'] == 0
+          and default_report['in_window_tweets'] == 5
+          and none_report['pages_wasted'] == 7)
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def test_simulator_reports_missed_tweets() -> bool:
+    """测试过早停止时统计漏掉的窗口内推文"""
+    print("\n" + "=" * 60)
+    print("测试漏掉推文统计")
+    print("=" * 60)
+
+    path = Path(tempfile.mkdtemp()) / 'pages.jsonl.gz'
+    recorded_at = datetime.now() - timedelta(days=3)
+    # 第2页全部超时，第3页又出现窗口内推文（例如延迟进入列表的账号）
+    write_pages(path, 'list_a', recorded_at, [[0, 10, 20], [300, 310, 320], [30, 40, 400]])
+    write_pages(path, 'list_b', recorded_at, [[5, 15], [25]])
+
+    sequences = load_recorded_sequences(str(path))
+    simulator = StopStrategySimulator(sequences, hours_limit=2)
+    eager = simulator.simulate(lambda: ConsecutiveEmptyPagesStrategy(1), 'eager')
+    patient = simulator.simulate(lambda: ConsecutiveEmptyPagesStrategy(2), 'patient')
+
+    print(f"eager: {eager}")
+    print(f"patient: {patient}")
+    ok = (len(sequences) == 2
+          and eager['in_window_tweets'] == 8 and eager['missed_tweets'] == 2
+          and eager['stop_reasons'] == {'consecutive_empty_pages': 1}
+          and patient['missed_tweets'] == 0 and patient['pages_fetched'] == 5 and patient['pages_wasted'] == 0)
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def main():
+    """主函数"""
+    results = [
+        test_simulator_matches_client(),
+        test_simulator_reports_missed_tweets(),
+    ]
+
+    print("\n" + "=" * 60)
+    print(f"测试通过: {sum(results)}/{len(results)}")
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    exit(main())
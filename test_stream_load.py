@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Doris Stream Load 写入器测试脚本
+使用本地模拟的 stream-load HTTP 服务，无需真实 Doris 集群
+"""
+
+import sys
+import json
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+# 添加项目路径
+sys.path.append('.')
+
+from src.database.stream_load import DorisStreamLoader
+from src.models.tweet import Tweet
+from src.models.user import TwitterUser
+
+
+class FakeStreamLoadServer:
+    """
+    本地模拟的 Doris stream-load 服务
+
+    - FE 路径返回 307 重定向到同一服务的 BE 路径（与真实集群一致）
+    - 记录每个 label 的导入，重复 label 返回 Label Already Exists
+    - 可以设置前 N 次请求返回 500，用于验证重试
+    """
+
+    def __init__(self):
+        self.loads = {}
+        self.requests = []
+        self.fail_next = 0
+        self._lock = threading.Lock()
+        self.server = HTTPServer(('127.0.0.1', 0), self._make_handler())
+        self.port = self.server.server_address[1]
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def _make_handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_PUT(self):
+                length = int(self.headers.get('Content-Length', 0))
+                body = self.rfile.read(length)
+
+                # FE -> BE 重定向
+                if self.path.startswith('/api/'):
+                    self.send_response(307)
+                    self.send_header('Location', f"http://127.0.0.1:{fake.port}/be{self.path}")
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+
+                with fake._lock:
+                    fake.requests.append({'path': self.path, 'headers': dict(self.headers), 'body': body})
+
+                    if not self.headers.get('Authorization'):
+                        return self._reply(401, {'Status': 'Fail', 'Message': 'no auth'})
+
+                    if fake.fail_next > 0:
+                        fake.fail_next -= 1
+                        return self._reply(500, {'Status': 'Fail', 'Message': 'injected'})
+
+                    label = self.headers.get('label')
+                    if label in fake.loads:
+                        return self._reply(200, {
+                            'Status': 'Label Already Exists',
+                            'ExistingJobStatus': 'FINISHED',
+                            'Message': f'Label [{label}] has already been used'
+                        })
+
+                    lines = [line for line in body.decode('utf-8').split('\n') if line]
+                    fake.loads[label] = lines
+                    return self._reply(200, {
+                        'Status': 'Success',
+                        'NumberLoadedRows': len(lines),
+                        'Label': label
+                    })
+
+            def _reply(self, code, data):
+                payload = json.dumps(data).encode('utf-8')
+                self.send_response(code)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        return Handler
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+_server = None
+
+
+def get_server() -> FakeStreamLoadServer:
+    """获取（必要时启动）共享的模拟服务"""
+    global _server
+    if _server is None:
+        _server = FakeStreamLoadServer().start()
+    return _server
+
+
+def build_loader(port: int, data_format: str = 'json') -> DorisStreamLoader:
+    """构建指向本地模拟服务的写入器"""
+    loader = DorisStreamLoader()
+    loader.host = '127.0.0.1'
+    loader.http_port = port
+    loader.database = 'test_db'
+    loader.username = 'root'
+    loader.password = ''
+    loader.data_format = data_format
+    loader.retry_delay = 0
+    return loader
+
+
+def build_tweets(count: int):
+    """构建测试推文"""
+    return [
+        Tweet(
+            id_str=f"19000000000000{i:04d}",
+            full_text=f"BTC test tweet {i}, with \"quotes\" and commas",
+            created_at="Mon Jan 06 08:00:00 +0000 2025",
+            favorite_count=i,
+            retweet_count=i * 2,
+            update_time=datetime(2025, 1, 6, 8, 0, 0)
+        )
+        for i in range(count)
+    ]
+
+
+def test_tweets_json_load() -> bool:
+    """测试推文JSON-lines导入与重定向认证"""
+    print("=" * 60)
+    print("测试推文 JSON-lines 导入")
+    print("=" * 60)
+
+    server = get_server()
+    loader = build_loader(server.port)
+    result = loader.load_tweets(build_tweets(5), crawl_id='20250106080000')
+
+    print(f"导入结果: {result}")
+    rows = [json.loads(line) for line in server.loads.get(result['label'], [])]
+    ok = (result['success'] and result['loaded_rows'] == 5 and len(rows) == 5
+          and rows[0]['update_time'] == '2025-01-06 08:00:00'
+          and server.requests[-1]['headers'].get('format') == 'json')
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def test_label_idempotency() -> bool:
+    """测试相同批次重试时label不变且不重复导入"""
+    print("\n" + "=" * 60)
+    print("测试 label 幂等")
+    print("=" * 60)
+
+    server = get_server()
+    loader = build_loader(server.port)
+    tweets = build_tweets(3)
+    first = loader.load_tweets(tweets, crawl_id='20250106081000')
+    second = loader.load_tweets(tweets, crawl_id='20250106081000')
+
+    print(f"第一次: {first['status']}, 第二次: {second['status']}")
+    ok = (first['label'] == second['label'] and first['success'] and second['success']
+          and second['status'] == 'Label Already Exists')
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def test_retry_on_server_error() -> bool:
+    """测试服务端错误时使用相同label重试"""
+    print("\n" + "=" * 60)
+    print("测试服务端错误重试")
+    print("=" * 60)
+
+    server = get_server()
+    loader = build_loader(server.port)
+    server.fail_next = 2
+    users = [TwitterUser(id_str=f"1000{i}", screen_name=f"user{i}", name=f"User {i}") for i in range(4)]
+    result = loader.load_users(users, crawl_id='20250106082000')
+
+    print(f"导入结果: {result}")
+    ok = result['success'] and result['loaded_rows'] == 4
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def test_quotations_csv_load() -> bool:
+    """测试引用关系CSV导入"""
+    print("\n" + "=" * 60)
+    print("测试引用关系 CSV 导入")
+    print("=" * 60)
+
+    server = get_server()
+    loader = build_loader(server.port, data_format='csv')
+    quotations = [{
+        'twitter_id': '1', 'user_id': '2', 'user_name': 'alice',
+        'twitter_quotation_id': '3', 'user_quotation_id': '4',
+        'quotations_user_name': 'bob'
+    }, {
+        'twitter_id': '5', 'user_id': '', 'user_name': 'invalid',
+        'twitter_quotation_id': '6', 'user_quotation_id': '7',
+        'quotations_user_name': 'carol'
+    }]
+    result = loader.load_quotations(quotations, crawl_id='20250106083000')
+
+    print(f"导入结果: {result}")
+    lines = server.loads.get(result['label'], [])
+    ok = (result['success'] and result['loaded_rows'] == 1
+          and lines == ['1,2,alice,3,4,bob,bob']
+          and server.requests[-1]['headers'].get('format') == 'csv')
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def test_csv_null_marker() -> bool:
+    """测试CSV中None写为不加引号、不转义的 \\N，字符串 "\\N" 和特殊字符被包围转义"""
+    print("\n" + "=" * 60)
+    print("测试 CSV NULL 标记")
+    print("=" * 60)
+
+    server = get_server()
+    loader = build_loader(server.port, data_format='csv')
+    rows = [
+        {'id_str': '1', 'description': None, 'language': 'en'},
+        {'id_str': '2', 'description': 'gm, "frens" \\o/', 'language': None},
+        {'id_str': '3', 'description': '\\N', 'language': 'en'},
+    ]
+    result = loader.load_rows('twitter_user', ['id_str', 'description', 'language'], rows,
+                              crawl_id='20250106084000')
+
+    lines = server.loads.get(result['label'], [])
+    print(f"导入结果: {result['status']}, 数据: {lines}")
+    ok = (result['success'] and lines == [
+        '1,\\N,en',
+        '2,"gm, \\"frens\\" \\\\o/",\\N',
+        '3,"\\\\N",en',
+    ])
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def main():
+    """主函数"""
+    try:
+        results = [
+            test_tweets_json_load(),
+            test_label_idempotency(),
+            test_retry_on_server_error(),
+            test_quotations_csv_load(),
+            test_csv_null_marker(),
+        ]
+    finally:
+        get_server().stop()
+
+    print("\n" + "=" * 60)
+    print(f"测试通过: {sum(results)}/{len(results)}")
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    exit(main())
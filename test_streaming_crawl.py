@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+流式爬取测试脚本
+使用模拟的分页API和数据库写入，验证逐页入库、跨页去重、预取页面数有界，
+以及启用Stream Load时跨页累积、每张表每次爬取只导入一次，水位线按各list的拉取和入库结果提交
+"""
+
+import sys
+import time
+import threading
+from types import SimpleNamespace
+
+# 添加项目路径
+sys.path.append('.')
+
+from src.crawler import TwitterCrawler
+
+
+class FakeAPIClient:
+    """按list返回模拟分页数据的API客户端"""
+
+    def __init__(self, pages_per_list, page_delay=0.05, failing_list_ids=()):
+        self.pages_per_list = pages_per_list
+        self.page_delay = page_delay
+        self.failing_list_ids = set(failing_list_ids)
+        self.max_concurrency = 4
+        self.fetched_pages = 0
+        self.committed = False
+        self.discarded = False
+        self.committed_list_ids = []
+        self.discarded_list_ids = []
+        self._lock = threading.Lock()
+
+    def fetch_tweets_with_pagination(self, list_id=None, **kwargs):
+        for page in self.pages_per_list[list_id]:
+            time.sleep(self.page_delay)
+            with self._lock:
+                self.fetched_pages += 1
+            yield page
+        if list_id in self.failing_list_ids:
+            raise ConnectionError("API不可用")
+
+    def get_request_stats(self):
+        return {'total_requests': self.fetched_pages}
+
+    def commit_watermarks(self, list_ids=None):
+        self.committed = True
+        self.committed_list_ids.extend(list_ids or [])
+
+    def discard_watermarks(self, list_ids=None):
+        self.discarded = True
+        self.discarded_list_ids.extend(list_ids or [])
+
+
+def build_pages(list_index: int, pages: int, per_page: int = 5, overlap: int = 0):
+    """构建单个list的分页数据，overlap为与其他list重复的推文数"""
+    result = []
+    for page in range(pages):
+        page_data = []
+        for i in range(per_page):
+            tweet_id = f"{list_index}-{page}-{i}" if i >= overlap else f"shared-{page}-{i}"
+            page_data.append({'id_str': tweet_id, 'user': {'id_str': f"user-{i}"}})
+        result.append(page_data)
+    return result
+
+
+def build_crawler(api_client: FakeAPIClient, prefetch_pages: int = 2) -> TwitterCrawler:
+    """构建使用模拟组件的爬虫"""
+    crawler = TwitterCrawler()
+    crawler.api_client = api_client
+    crawler.stream_prefetch_pages = prefetch_pages
+    crawler.saved_ids = []
+    crawler.first_save_fetched_pages = None
+    crawler.max_buffered_pages = 0
+
+    crawler._map_data_to_tweets = lambda page: [SimpleNamespace(id_str=item['id_str'], full_text='', is_valid=1)
+                                                for item in page]
+    crawler._refresh_known_tweets = lambda tweets, seen_registry=None: (tweets, 0)
+    crawler._extract_users_from_api_data = lambda page: [SimpleNamespace(id_str=item['user']['id_str']) for item in page]
+    crawler._save_users_to_database = lambda users: len(users)
+    crawler._save_quotations_to_database = lambda quotations: len(quotations)
+    crawler._detect_and_structure_activities = lambda tweets: True
+    crawler.tweet_enricher = SimpleNamespace(enrich_tweets=lambda tweets, user_data_map: tweets)
+    crawler.quotation_extractor = SimpleNamespace(
+        extract_quotations_from_api_data=lambda page: [],
+        filter_valid_quotations=lambda quotations: quotations
+    )
+    crawler.project_engine = SimpleNamespace(analyze_recent_tweets=lambda hours, max_tweets: True)
+    crawler.stream_loader = SimpleNamespace(enabled=False, max_batch_rows=10000)
+
+    def save_tweets(tweets):
+        if crawler.first_save_fetched_pages is None:
+            crawler.first_save_fetched_pages = api_client.fetched_pages
+        # 入库时已拉取但未处理的页数（预取量）
+        crawler.max_buffered_pages = max(crawler.max_buffered_pages,
+                                         api_client.fetched_pages - len(crawler.saved_batches))
+        crawler.saved_batches.append(len(tweets))
+        crawler.saved_ids.extend(tweet.id_str for tweet in tweets)
+        time.sleep(0.05)
+        return len(tweets)
+
+    crawler.saved_batches = []
+    crawler._save_tweets_to_database = save_tweets
+    return crawler
+
+
+def test_pages_written_incrementally() -> bool:
+    """测试第一页返回后即入库，预取页面数有界"""
+    print("=" * 60)
+    print("测试逐页入库")
+    print("=" * 60)
+
+    api_client = FakeAPIClient({'a': build_pages(0, 10)})
+    crawler = build_crawler(api_client, prefetch_pages=2)
+    success = crawler.crawl_tweets_streaming(list_ids=['a'])
+
+    print(f"首次入库时已拉取页数: {crawler.first_save_fetched_pages}, 最大未处理页数: {crawler.max_buffered_pages}")
+    print(f"入库批次: {crawler.saved_batches}")
+    ok = (success and api_client.committed and crawler.first_save_fetched_pages <= 2
+          and crawler.max_buffered_pages <= 2 + 2 and len(crawler.saved_batches) == 10)
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def test_cross_list_dedup() -> bool:
+    """测试多个list并行拉取时跨页、跨list去重"""
+    print("\n" + "=" * 60)
+    print("测试跨list去重")
+    print("=" * 60)
+
+    api_client = FakeAPIClient({
+        'a': build_pages(0, 4, overlap=2),
+        'b': build_pages(1, 4, overlap=2),
+        'c': build_pages(2, 4, overlap=2),
+    }, page_delay=0.01)
+    crawler = build_crawler(api_client)
+    success = crawler.crawl_tweets_streaming(list_ids=['a', 'b', 'c'])
+
+    # 每个list每页3条独有推文，另有每页2条共享推文
+    expected = 3 * 4 * 3 + 4 * 2
+    print(f"入库推文: {len(crawler.saved_ids)}, 唯一: {len(set(crawler.saved_ids))}, 期望: {expected}")
+    ok = success and len(crawler.saved_ids) == len(set(crawler.saved_ids)) == expected
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def test_empty_crawl_discards_watermarks() -> bool:
+    """测试没有数据时丢弃水位线"""
+    print("\n" + "=" * 60)
+    print("测试空数据")
+    print("=" * 60)
+
+    api_client = FakeAPIClient({'a': []})
+    crawler = build_crawler(api_client)
+    success = crawler.crawl_tweets_streaming(list_ids=['a'])
+
+    ok = not success and api_client.discarded and not api_client.committed
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def test_stream_load_once_per_crawl() -> bool:
+    """测试启用Stream Load时跨页累积，每次爬取每张表只导入一次，超过上限时分批"""
+    print("\n" + "=" * 60)
+    print("测试Stream Load跨页累积")
+    print("=" * 60)
+
+    batches = {}
+    for max_batch_rows in (10000, 20):
+        api_client = FakeAPIClient({'a': build_pages(0, 10)}, page_delay=0.01)
+        crawler = build_crawler(api_client)
+        crawler.stream_loader = SimpleNamespace(enabled=True, max_batch_rows=max_batch_rows)
+        user_batches = []
+        crawler._save_users_to_database = lambda users: user_batches.append(len(users)) or len(users)
+        success = crawler.crawl_tweets_streaming(list_ids=['a'])
+        batches[max_batch_rows] = (success, crawler.saved_batches, user_batches, len(set(crawler.saved_ids)))
+
+    print(f"导入批次（推文, 用户）: {batches}")
+    ok = (batches[10000] == (True, [50], [5], 50)
+          and batches[20][0] and batches[20][1] == [20, 20, 10] and batches[20][3] == 50)
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def test_watermarks_follow_each_list() -> bool:
+    """测试只提交拉取和入库都成功的list的水位线：入库失败、拉取中途失败的list丢弃水位线"""
+    print("\n" + "=" * 60)
+    print("测试按list提交水位线")
+    print("=" * 60)
+
+    api_client = FakeAPIClient({'a': build_pages(0, 2), 'b': build_pages(1, 2), 'c': build_pages(2, 2)},
+                               page_delay=0.01, failing_list_ids=['c'])
+    crawler = build_crawler(api_client)
+    save_tweets = crawler._save_tweets_to_database
+    crawler._save_tweets_to_database = lambda tweets: (
+        0 if any(tweet.id_str.startswith('1-') for tweet in tweets) else save_tweets(tweets))
+    success = crawler.crawl_tweets_streaming(list_ids=['a', 'b', 'c'])
+
+    print(f"提交: {api_client.committed_list_ids}, 丢弃: {api_client.discarded_list_ids}")
+    ok = (success and api_client.committed_list_ids == ['a']
+          and sorted(api_client.discarded_list_ids) == ['b', 'c'])
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def main():
+    """主函数"""
+    results = [
+        test_pages_written_incrementally(),
+        test_cross_list_dedup(),
+        test_empty_crawl_discards_watermarks(),
+        test_stream_load_once_per_crawl(),
+        test_watermarks_follow_each_list(),
+    ]
+
+    print("\n" + "=" * 60)
+    print(f"测试通过: {sum(results)}/{len(results)}")
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+话题倒排索引测试脚本
+验证索引查找与原有匹配规则一致、新建话题增量加入、按 update_time 水位线增量刷新，以及匹配过程不查询数据库
+"""
+
+import logging
+import sys
+import time
+from datetime import datetime, timedelta
+
+# 添加项目路径
+sys.path.append('.')
+
+from src.models.topic import Topic
+from src.utils.topic_index import TopicIndex
+from src.utils.smart_classifier import SmartClassifier
+
+BASE_TIME = datetime(2026, 1, 1, 12, 0)
+
+
+class FakeTopicDAO:
+    """内存中的话题DAO，记录查询次数"""
+
+    def __init__(self, topics):
+        self.topics = {topic.topic_id: topic for topic in topics}
+        self.query_count = 0
+
+    def get_topics_updated_since(self, since_time=None, limit=5000):
+        self.query_count += 1
+        rows = sorted(self.topics.values(), key=lambda topic: topic.update_time)
+        if since_time is not None:
+            rows = [topic for topic in rows if topic.update_time >= since_time]
+        return [Topic(**vars(topic)) for topic in rows[:limit]]
+
+    def get_topic_by_name(self, topic_name):
+        raise AssertionError("启用索引时不应按名称查询数据库")
+
+    def search_topics(self, keyword, limit=20):
+        raise AssertionError("启用索引时不应执行LIKE查询")
+
+
+def make_topic(topic_id, name, key_entities='', popularity=1, minutes=0):
+    """构建话题"""
+    return Topic(topic_id=topic_id, topic_name=name, brief=f"{name} 相关讨论话题", key_entities=key_entities,
+                 popularity=popularity, update_time=BASE_TIME + timedelta(minutes=minutes))
+
+
+def build_index(dao, page_size=2) -> TopicIndex:
+    """构建索引（小分页验证分页加载）"""
+    return TopicIndex(dao, {'enabled': True, 'refresh_seconds': 3600, 'lookback_seconds': 60,
+                            'full_reload_seconds': 36000, 'page_size': page_size})
+
+
+def test_index_lookup() -> bool:
+    """测试精确查找、多词短语查找按热度排序"""
+    print("=" * 60)
+    print("测试索引查找")
+    print("=" * 60)
+
+    dao = FakeTopicDAO([
+        make_topic('t1', 'Bitcoin ETF', 'BlackRock SEC', popularity=10, minutes=1),
+        make_topic('t2', 'Ethereum ETF', 'SEC Grayscale', popularity=30, minutes=2),
+        make_topic('t3', 'Layer 2', 'Arbitrum Optimism', popularity=20, minutes=3),
+    ])
+    index = build_index(dao)
+
+    exact = index.get_by_name('Bitcoin ETF')
+    etf = [topic.topic_id for topic in index.search('etf')]
+    phrase = [topic.topic_id for topic in index.search('bitcoin etf')]
+    entity = [topic.topic_id for topic in index.search('Arbitrum')]
+    missing = index.search('solana')
+    stats = index.get_stats()
+
+    print(f"精确: {exact.topic_id if exact else None}, ETF: {etf}, 短语: {phrase}, 实体: {entity}, 统计: {stats}")
+    ok = (exact is not None and exact.topic_id == 't1' and etf == ['t2', 't1'] and phrase == ['t1']
+          and entity == ['t3'] and missing == [] and stats['full_reloads'] == 1 and dao.query_count == 3)
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def test_watermark_refresh() -> bool:
+    """测试新建话题增量加入、按水位线刷新其他进程写入的话题和改名"""
+    print("\n" + "=" * 60)
+    print("测试增量更新与水位线刷新")
+    print("=" * 60)
+
+    dao = FakeTopicDAO([make_topic('t1', 'DeFi', 'Aave Uniswap', minutes=1)])
+    index = build_index(dao, page_size=5000)
+    index.reload()
+
+    # 本进程新建的话题立即可查
+    index.add_topic(make_topic('t2', 'Restaking', 'EigenLayer', minutes=2))
+    local = [topic.topic_id for topic in index.search('eigenlayer')]
+
+    # 其他进程新增话题、修改已有话题
+    dao.topics['t3'] = make_topic('t3', 'Memecoins', 'Pepe Bonk', minutes=5)
+    dao.topics['t1'] = make_topic('t1', 'DeFi Lending', 'Aave Compound', minutes=6)
+    queries_before = dao.query_count
+    refreshed = index.refresh()
+
+    renamed = index.get_by_name('DeFi Lending')
+    old_name = index.get_by_name('DeFi')
+    uniswap = index.search('uniswap')
+    memecoins = [topic.topic_id for topic in index.search('pepe')]
+
+    print(f"本地新建: {local}, 刷新: {refreshed}, 查询次数: {dao.query_count - queries_before}, "
+          f"改名: {renamed.topic_id if renamed else None}, 旧名: {old_name}, 水位线: {index.get_stats()['watermark']}")
+    ok = (local == ['t2'] and refreshed == 2 and dao.query_count - queries_before == 1
+          and renamed is not None and renamed.topic_id == 't1' and old_name is None and uniswap == []
+          and memecoins == ['t3'] and index.get_stats()['watermark'] == (BASE_TIME + timedelta(minutes=6)).isoformat())
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def test_classifier_uses_index() -> bool:
+    """测试智能分类的话题匹配只使用索引，匹配规则保持不变"""
+    print("\n" + "=" * 60)
+    print("测试话题匹配使用索引")
+    print("=" * 60)
+
+    topics = [make_topic(f"t{i}", f"Topic {i}", f"entity{i}", minutes=i) for i in range(200)]
+    topics.append(make_topic('etf', 'Bitcoin ETF Flows', 'blackrock fidelity inflows', popularity=50, minutes=300))
+    dao = FakeTopicDAO(topics)
+
+    classifier = SmartClassifier.__new__(SmartClassifier)
+    classifier.logger = logging.getLogger('src.utils.smart_classifier')
+    classifier.topic_dao = dao
+    classifier.topic_index = build_index(dao, page_size=5000)
+
+    tweet_text = "BlackRock and Fidelity report record Bitcoin ETF inflows today"
+    fuzzy = classifier._find_best_matching_topic('Bitcoin ETF', tweet_text)
+    exact = classifier._find_best_matching_topic('Topic 7', 'nothing related')
+    start = time.perf_counter()
+    for _ in range(1000):
+        none_match = classifier._find_best_matching_topic('Solana Outage', 'validators restart the network')
+    per_call_us = (time.perf_counter() - start) / 1000 * 1e6
+
+    print(f"模糊匹配: {fuzzy.topic_id if fuzzy else None}, 精确匹配: {exact.topic_id if exact else None}, "
+          f"无匹配: {none_match}, 每次匹配: {per_call_us:.1f}us, 数据库查询: {dao.query_count}")
+    ok = (fuzzy is not None and fuzzy.topic_id == 'etf' and exact is not None and exact.topic_id == 't7'
+          and none_match is None and dao.query_count == 1)
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def main():
+    """主函数"""
+    results = [
+        test_index_lookup(),
+        test_watermark_refresh(),
+        test_classifier_uses_index(),
+    ]
+
+    print("\n" + "=" * 60)
+    print(f"测试通过: {sum(results)}/{len(results)}")
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    exit(main())
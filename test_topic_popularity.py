@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+话题热度合并写入测试脚本
+验证一批推文集中命中同一话题时只记录最高热度、批次结束时每个话题只写入一次、
+热度历史在数据库当前内容后只追加一条（不覆盖其他写入者追加的记录），整批更新合并为一条批量UPDATE；
+不在批次中调用时按待写入话题数和等待时间自动写入
+"""
+
+import json
+import logging
+import sys
+import threading
+import time
+from datetime import datetime
+
+# 添加项目路径
+sys.path.append('.')
+
+from src.database.topic_dao import TopicDAO
+from src.models.topic import Topic
+from src.models.tweet import Tweet
+from src.utils.keyed_lock import KeyedLock
+from src.utils.smart_classifier import SmartClassifier
+from src.utils.topic_index import TopicIndex
+
+
+class RecordingDatabase:
+    """记录批量更新语句的模拟数据库"""
+
+    def __init__(self, histories=None):
+        self.histories = histories or {}
+        self.case_updates = []
+        self.single_updates = 0
+
+    def execute_query(self, sql, params=None):
+        return [{'topic_id': topic_id, 'popularity_history': self.histories.get(topic_id)} for topic_id in params]
+
+    def execute_case_update(self, table_name, key_column, rows):
+        self.case_updates.append(list(rows))
+        return len(rows)
+
+    def execute_update(self, sql, params=None):
+        self.single_updates += 1
+        return 1
+
+
+class TopicSource:
+    """为索引提供已有话题"""
+
+    def __init__(self, topics):
+        self.topics = topics
+
+    def get_topics_updated_since(self, since_time=None, limit=5000):
+        return [] if since_time else list(self.topics)
+
+
+def build_classifier(topics, histories=None):
+    """构建使用真实TopicDAO（模拟数据库）的分类器"""
+    database = RecordingDatabase(histories)
+    dao = TopicDAO()
+    dao.db_manager = database
+
+    classifier = SmartClassifier.__new__(SmartClassifier)
+    classifier.logger = logging.getLogger('src.utils.smart_classifier')
+    classifier.topic_dao = dao
+    classifier.topic_index = TopicIndex(TopicSource(topics), {'enabled': True, 'refresh_seconds': 3600,
+                                                              'full_reload_seconds': 36000})
+    classifier._entity_locks = KeyedLock()
+    classifier._pending_popularity = {}
+    classifier._pending_popularity_since = None
+    classifier._popularity_lock = threading.Lock()
+    classifier.popularity_flush_size = 200
+    classifier.popularity_flush_seconds = 3600
+    return classifier, database
+
+
+def test_burst_coalesced() -> bool:
+    """测试热门话题的一批推文只产生每个话题一次更新"""
+    print("=" * 60)
+    print("测试批量推文的热度合并")
+    print("=" * 60)
+
+    history = [{'popularity': 2, 'timestamp': datetime(2026, 1, 1).isoformat()}]
+    topics = [
+        Topic(topic_id='topic_etf', topic_name='Bitcoin ETF', key_entities='blackrock', popularity=2,
+              popularity_history=list(history)),
+        Topic(topic_id='topic_l2', topic_name='Layer 2', key_entities='arbitrum', popularity=9,
+              popularity_history=list(history)),
+    ]
+    # 索引加载话题后，话题引擎又在数据库中追加了一条热度历史
+    engine_entry = {'popularity': 3, 'timestamp': datetime(2026, 1, 2).isoformat()}
+    classifier, database = build_classifier(topics, {'topic_etf': json.dumps(history + [engine_entry])})
+
+    # 100条ETF推文（互动量逐渐变化）和20条互动很低的Layer 2推文
+    retweet_counts = [(i * 37) % 2000 for i in range(100)]
+    for i, retweet_count in enumerate(retweet_counts):
+        tweet = Tweet(id_str=f"etf_{i}", full_text="BlackRock Bitcoin ETF inflows again", retweet_count=retweet_count)
+        classifier._handle_topic_classification('Bitcoin ETF', {'confidence': 0.9}, tweet)
+    for i in range(20):
+        tweet = Tweet(id_str=f"l2_{i}", full_text="Arbitrum Layer 2 fees", retweet_count=1)
+        classifier._handle_topic_classification('Layer 2', {'confidence': 0.9}, tweet)
+
+    updated = classifier.flush_topic_popularity()
+
+    expected = max(classifier._calculate_initial_popularity(Tweet(id_str='x', full_text='', retweet_count=count))
+                   for count in retweet_counts)
+    rows = dict(row for statement in database.case_updates for row in statement)
+    etf_history = json.loads(rows['topic_etf']['popularity_history']) if 'topic_etf' in rows else []
+
+    print(f"更新话题数: {updated}, 批量语句: {len(database.case_updates)}, 单条UPDATE: {database.single_updates}")
+    print(f"写入: {rows}")
+    ok = (updated == 1 and len(database.case_updates) == 1 and database.single_updates == 0
+          and list(rows) == ['topic_etf'] and rows['topic_etf']['popularity'] == expected
+          and etf_history[:2] == history + [engine_entry] and len(etf_history) == 3
+          and etf_history[-1]['popularity'] == expected
+          and classifier.topic_index.get_by_name('Bitcoin ETF').popularity_history == etf_history
+          and classifier.topic_index.get_by_name('Layer 2').popularity == 9)
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def test_threshold_flush() -> bool:
+    """测试没有批次结束调用时，待写入话题数或等待时间达到阈值自动写入"""
+    print("\n" + "=" * 60)
+    print("测试按阈值自动写入热度")
+    print("=" * 60)
+
+    topics = [Topic(topic_id=f"topic_{i}", topic_name=f"Topic {i}", key_entities=f"entity{i}", popularity=1)
+              for i in range(5)]
+    classifier, database = build_classifier(topics)
+    classifier.popularity_flush_size = 3
+    classifier.popularity_flush_seconds = 0.2
+
+    def classify(i):
+        tweet = Tweet(id_str=f"t_{i}", full_text=f"Entity{i} news", retweet_count=5000)
+        classifier._handle_topic_classification(f"Topic {i}", {'confidence': 0.9}, tweet)
+
+    # 达到话题数阈值
+    for i in range(3):
+        classify(i)
+    after_size = len(classifier._pending_popularity)
+
+    # 达到等待时间阈值
+    classify(3)
+    time.sleep(0.3)
+    classify(4)
+    after_time = len(classifier._pending_popularity)
+
+    written = sorted(key for statement in database.case_updates for key, _ in statement)
+
+    print(f"话题数阈值后待写入: {after_size}, 时间阈值后待写入: {after_time}, 已写入: {written}")
+    ok = after_size == 0 and after_time == 0 and written == [f"topic_{i}" for i in range(5)]
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def main():
+    """主函数"""
+    results = [
+        test_burst_coalesced(),
+        test_threshold_flush(),
+    ]
+
+    print("\n" + "=" * 60)
+    print(f"测试通过: {sum(results)}/{len(results)}")
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+推文批量写入测试脚本
+使用记录SQL的模拟数据库，验证分块多行插入、分块失败时的逐行回退以及成功数统计
+"""
+
+import sys
+import logging
+import time
+
+# 添加项目路径
+sys.path.append('.')
+
+from src.database.tweet_dao import TweetDAO
+from src.models.tweet import Tweet
+
+
+class RecordingDatabase:
+    """记录每次写入的模拟数据库，包含指定推文ID的写入会失败"""
+
+    def __init__(self, bad_ids=None, skipped_ids=None, latency: float = 0.0):
+        self.bad_ids = set(bad_ids or [])
+        # Doris过滤掉的行：语句成功但不计入影响行数
+        self.skipped_ids = set(skipped_ids or [])
+        self.latency = latency
+        self.bulk_calls = []
+        self.row_calls = []
+        self.rows = {}
+
+    def execute_bulk_insert(self, table_name, fields, params_list):
+        time.sleep(self.latency)
+        ids = [params[fields.index('id_str')] for params in params_list]
+        self.bulk_calls.append(ids)
+        if self.bad_ids & set(ids):
+            raise RuntimeError('bad row in chunk')
+        written = [id_str for id_str in ids if id_str not in self.skipped_ids]
+        self.rows.update((id_str, table_name) for id_str in written)
+        return len(written)
+
+    def execute_update(self, sql, params=None):
+        time.sleep(self.latency)
+        id_str = params[0]
+        self.row_calls.append(id_str)
+        if id_str in self.bad_ids:
+            raise RuntimeError('bad row')
+        if id_str in self.skipped_ids:
+            return 0
+        self.rows[id_str] = 'row'
+        return 1
+
+
+def build_dao(db: RecordingDatabase) -> TweetDAO:
+    """构建使用模拟数据库的推文DAO"""
+    dao = TweetDAO.__new__(TweetDAO)
+    dao.db_manager = db
+    dao.table_name = 'twitter_tweet'
+    dao.logger = logging.getLogger('test_tweet_bulk_write')
+    return dao
+
+
+def build_tweets(count: int):
+    """构建测试推文"""
+    return [Tweet(id_str=f"t{i}", full_text=f"tweet {i}", favorite_count=i, is_valid=1) for i in range(count)]
+
+
+def test_chunk_failure_falls_back_row_by_row() -> bool:
+    """测试分块插入失败时只对该块逐行插入，成功数只计入实际写入的推文"""
+    print("=" * 60)
+    print("测试分块失败逐行回退")
+    print("=" * 60)
+
+    tweets = build_tweets(7)
+    tweets.append(Tweet(id_str='t_invalid', full_text='spam', is_valid=0))
+    db = RecordingDatabase(bad_ids=['t4'])
+    count = build_dao(db).batch_upsert_tweets(tweets, chunk_size=3)
+
+    print(f"多行插入: {db.bulk_calls}")
+    print(f"逐行插入: {db.row_calls}")
+    print(f"成功数: {count}, 已写入: {sorted(db.rows)}")
+    ok = (db.bulk_calls == [['t0', 't1', 't2'], ['t3', 't4', 't5'], ['t6']]
+          and db.row_calls == ['t3', 't4', 't5']
+          and count == 6 and sorted(db.rows) == ['t0', 't1', 't2', 't3', 't5', 't6'])
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def test_count_uses_affected_rows() -> bool:
+    """测试成功数按数据库返回的影响行数统计，而不是按块大小"""
+    print("\n" + "=" * 60)
+    print("测试成功数按影响行数统计")
+    print("=" * 60)
+
+    db = RecordingDatabase(skipped_ids=['t1', 't5'])
+    bulk_count = build_dao(db).batch_upsert_tweets(build_tweets(6), chunk_size=4)
+
+    row_db = RecordingDatabase(skipped_ids=['t1', 't5'])
+    row_count = build_dao(row_db).batch_upsert_tweets(build_tweets(6), chunk_size=1)
+
+    print(f"多行插入成功数: {bulk_count}, 逐行插入成功数: {row_count}")
+    ok = bulk_count == 4 and row_count == 4 and len(db.bulk_calls) == 2 and not row_db.bulk_calls
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def test_round_trips() -> bool:
+    """测试1000条推文的数据库往返次数（模拟每次往返1ms）"""
+    print("\n" + "=" * 60)
+    print("测试批量插入往返次数")
+    print("=" * 60)
+
+    timings = {}
+    for chunk_size in [1, 200]:
+        db = RecordingDatabase(latency=0.001)
+        start = time.perf_counter()
+        count = build_dao(db).batch_upsert_tweets(build_tweets(1000), chunk_size=chunk_size)
+        timings[chunk_size] = (count, len(db.bulk_calls) + len(db.row_calls), time.perf_counter() - start)
+        print(f"chunk_size={chunk_size}: 成功 {count} 条, 往返 {timings[chunk_size][1]} 次, "
+              f"耗时 {timings[chunk_size][2]:.2f}s")
+
+    ok = timings[1][:2] == (1000, 1000) and timings[200][:2] == (1000, 5)
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def main():
+    """主函数"""
+    results = [
+        test_chunk_failure_falls_back_row_by_row(),
+        test_count_uses_affected_rows(),
+        test_round_trips(),
+    ]
+
+    print("\n" + "=" * 60)
+    print(f"测试通过: {sum(results)}/{len(results)}")
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+TweetScout录制回放测试脚本
+验证录制的页面可按cursor回放、时间截止点使用录制时间、429注入后重试成功，以及回放时分页不等待
+"""
+
+import sys
+import gzip
+import json
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# 添加项目路径
+sys.path.append('.')
+
+from src.api.twitter_api import TwitterAPIClient
+from src.utils.rate_limiter import TokenBucket
+from test_twitter_rate_limit import FakeSession
+
+
+def build_page(start_id: int, now: datetime, per_page: int = 5, minutes_step: int = 25):
+    """构建一页按时间倒序排列的推文（ID越大越新）"""
+    tweets = []
+    for i in range(per_page):
+        tweet_id = start_id - i
+        created_at = now - timedelta(minutes=(1000 - tweet_id) * minutes_step)
+        tweets.append({
+            'id_str': str(tweet_id),
+            'created_at': created_at.strftime('%a %b %d %H:%M:%S +0000 %Y'),
+            'user': {'id_str': f"user_{tweet_id % 3}", 'name': 'tester'}
+        })
+    return tweets
+
+
+def write_recording(path: Path, list_id: str, recorded_at: datetime, pages: int = 4):
+    """写入一段录制数据（模拟过去某次爬取）"""
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        for page in range(pages):
+            f.write(json.dumps({
+                'list_id': list_id,
+                'cursor': f"cursor_{page}" if page else None,
+                'next_cursor': f"cursor_{page + 1}" if page + 1 < pages else None,
+                'recorded_at': recorded_at.isoformat(),
+                'response': {
+                    'tweets': build_page(1000 - page * 5, datetime.utcnow() - (datetime.now() - recorded_at)),
+                    'next_cursor': f"cursor_{page + 1}" if page + 1 < pages else None
+                }
+            }) + '\n')
+
+
+def build_client() -> TwitterAPIClient:
+    """构建不限流、快速重试的客户端"""
+    client = TwitterAPIClient()
+    client.rate_limiter = TokenBucket(0)
+    client.retry_delay = 0.05
+    client.retry_jitter = 0
+    return client
+
+
+def test_record_roundtrip() -> bool:
+    """测试录制的响应可以原样回放"""
+    print("=" * 60)
+    print("测试录制与回放")
+    print("=" * 60)
+
+    path = Path(tempfile.mkdtemp()) / 'pages.jsonl.gz'
+
+    class PagedSession(FakeSession):
+        def get(self, url, params=None, timeout=None):
+            response = super().get(url, params, timeout)
+            cursor = params.get('cursor')
+            page = int(cursor.split('_')[1]) if cursor else 0
+            body = {'tweets': [{'id_str': f"{params['list_id']}-{page}"}],
+                    'next_cursor': f"cursor_{page + 1}" if page < 2 else None}
+            response.json = lambda: body
+            return response
+
+    recorder = build_client()
+    recorder.session = PagedSession()
+    recorder.enable_recording(str(path))
+    recorded = [recorder.fetch_tweets(list_id='a', cursor=cursor)[0] for cursor in (None, 'cursor_1', 'cursor_2')]
+
+    player = build_client()
+    player.enable_replay(str(path))
+    replayed = [player.fetch_tweets(list_id='a', cursor=cursor)[0] for cursor in (None, 'cursor_1', 'cursor_2')]
+    missing, _ = player.fetch_tweets(list_id='b')
+
+    print(f"录制页数: {recorder.page_recorder.recorded_pages}, 回放: {replayed}")
+    ok = recorded == replayed and recorder.page_recorder.recorded_pages == 3 and missing == []
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def test_replay_uses_recorded_time() -> bool:
+    """测试回放时按录制时间计算截止点，并在429注入后重试成功"""
+    print("\n" + "=" * 60)
+    print("测试回放时间截止点与429注入")
+    print("=" * 60)
+
+    path = Path(tempfile.mkdtemp()) / 'pages.jsonl.gz'
+    write_recording(path, 'list_a', datetime.now() - timedelta(days=10))
+
+    client = build_client()
+    session = client.enable_replay(str(path), latency_ms=5, rate_limit_every=3, retry_after=0.05)
+    tweets = client.fetch_all_tweets(list_id='list_a', hours_limit=2)
+
+    # 推文每条间隔25分钟，录制时间前2小时内为ID 1000..996
+    ids = [tweet['id_str'] for tweet in tweets]
+    print(f"回放推文: {ids}, 请求数: {session.request_count}, 注入429: {session.rate_limited_count}")
+    ok = (ids == [str(i) for i in range(1000, 995, -1)] and session.rate_limited_count >= 1
+          and client.get_request_stats()['rate_limited_count'] == session.rate_limited_count)
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def test_replay_skips_page_delay() -> bool:
+    """测试回放时分页之间不等待（不限流时真实API每页等待1秒）"""
+    print("\n" + "=" * 60)
+    print("测试回放分页不等待")
+    print("=" * 60)
+
+    path = Path(tempfile.mkdtemp()) / 'pages.jsonl.gz'
+    write_recording(path, 'list_a', datetime.now() - timedelta(days=10))
+
+    client = build_client()
+    session = client.enable_replay(str(path))
+    start = time.monotonic()
+    tweets = client.fetch_all_tweets(list_id='list_a', hours_limit=24)
+    elapsed = time.monotonic() - start
+
+    print(f"回放推文: {len(tweets)} 条, 请求数: {session.request_count}, 耗时: {elapsed:.2f}s")
+    ok = len(tweets) == 20 and session.request_count == 4 and elapsed < 1.0
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def main():
+    """主函数"""
+    results = [
+        test_record_roundtrip(),
+        test_replay_uses_recorded_time(),
+        test_replay_skips_page_delay(),
+    ]
+
+    print("\n" + "=" * 60)
+    print(f"测试通过: {sum(results)}/{len(results)}")
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    exit(main())
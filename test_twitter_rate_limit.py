@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+TweetScout客户端共享限流测试脚本
+使用模拟会话，验证多线程共享令牌桶、请求统计准确、Retry-After退避，以及分页只由令牌桶控制节奏
+"""
+
+import sys
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+# 添加项目路径
+sys.path.append('.')
+
+from src.api.twitter_api import TwitterAPIClient
+from src.utils.rate_limiter import TokenBucket
+
+
+class FakeResponse:
+    """模拟HTTP响应"""
+
+    def __init__(self, status_code=200, headers=None, data=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.text = ''
+        self.data = data
+
+    def json(self):
+        return self.data or {'tweets': [{'id_str': '1'}], 'next_cursor': None}
+
+
+class FakePagingSession:
+    """每次返回一页推文、最后一页没有next_cursor的模拟会话"""
+
+    def __init__(self, pages: int):
+        self.pages = pages
+        self.call_times = []
+
+    def get(self, url, params=None, timeout=None):
+        self.call_times.append(time.monotonic())
+        page = len(self.call_times)
+        created_at = datetime.now(timezone.utc).strftime('%a %b %d %H:%M:%S +0000 %Y')
+        tweets = [{'id_str': str(page * 10 + i), 'created_at': created_at, 'user': {'id_str': f"user-{i}"}}
+                  for i in range(5)]
+        return FakeResponse(data={'tweets': tweets, 'next_cursor': f"cursor-{page}" if page < self.pages else None})
+
+
+class FakeSession:
+    """按预设状态码依次返回的模拟会话"""
+
+    def __init__(self, statuses=None):
+        self.statuses = list(statuses or [])
+        self.call_times = []
+        self._lock = threading.Lock()
+
+    def get(self, url, params=None, timeout=None):
+        with self._lock:
+            self.call_times.append(time.monotonic())
+            status, headers = self.statuses.pop(0) if self.statuses else (200, {})
+        return FakeResponse(status, headers)
+
+
+def build_client(session: FakeSession, requests_per_minute: float, burst: float = 1) -> TwitterAPIClient:
+    """构建使用模拟会话的客户端"""
+    client = TwitterAPIClient()
+    client.session = session
+    client.rate_limiter = TokenBucket.per_minute(requests_per_minute, burst)
+    client.retry_delay = 0.2
+    client.retry_jitter = 0.5
+    return client
+
+
+def test_shared_bucket_across_threads() -> bool:
+    """测试多个线程共享同一速率限制，统计不丢失"""
+    print("=" * 60)
+    print("测试多线程共享令牌桶")
+    print("=" * 60)
+
+    session = FakeSession()
+    client = build_client(session, requests_per_minute=600, burst=2)  # 每秒10次
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(lambda _: client.fetch_tweets(list_id='list'), range(22)))
+    elapsed = time.monotonic() - start
+
+    stats = client.get_request_stats()
+    print(f"请求数: {stats['total_requests']}, 耗时: {elapsed:.2f}s")
+    # 22次请求、突发2次，至少需要 (22 - 2) / 10 = 2 秒
+    ok = (stats['total_requests'] == 22 and all(tweets for tweets, _ in results)
+          and elapsed >= 1.9)
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def test_retry_after_backoff() -> bool:
+    """测试429时按Retry-After退避并带抖动"""
+    print("\n" + "=" * 60)
+    print("测试Retry-After退避")
+    print("=" * 60)
+
+    session = FakeSession(statuses=[(429, {'Retry-After': '1'})])
+    client = build_client(session, requests_per_minute=6000)
+
+    data = client._make_request('https://example.com/list-tweets')
+    gap = session.call_times[1] - session.call_times[0]
+
+    delays = [client._get_backoff_delay(0, '2') for _ in range(50)]
+    fallback = client._get_backoff_delay(1)
+    stats = client.get_request_stats()
+
+    print(f"重试间隔: {gap:.2f}s, Retry-After=2时的等待范围: {min(delays):.2f}-{max(delays):.2f}s")
+    ok = (data is not None and 1.0 <= gap <= 1.6 and stats['rate_limited_count'] == 1
+          and all(2.0 <= delay <= 3.0 for delay in delays) and len(set(delays)) > 1
+          and 0.4 <= fallback <= 0.6 and client._parse_retry_after('garbage') is None)
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def test_pagination_paced_by_bucket() -> bool:
+    """测试分页之间只由令牌桶控制节奏，未启用限流时保留每页1秒的延迟"""
+    print("\n" + "=" * 60)
+    print("测试分页节奏")
+    print("=" * 60)
+
+    results = {}
+    for name, requests_per_minute, pages in [('bucket', 600, 5), ('disabled', 0, 2)]:
+        session = FakePagingSession(pages)
+        client = build_client(session, requests_per_minute=requests_per_minute)
+        start = time.monotonic()
+        fetched = [page for page in client.fetch_tweets_with_pagination(list_id='list', max_pages=10,
+                                                                         use_watermark=False)]
+        elapsed = time.monotonic() - start
+        gaps = [b - a for a, b in zip(session.call_times, session.call_times[1:])]
+        print(f"{name}: {len(fetched)} 页, 耗时 {elapsed:.2f}s, 请求间隔: {[round(gap, 2) for gap in gaps]}")
+        results[name] = (len(fetched), elapsed, min(gaps))
+
+    # 每分钟600次即每次0.1秒：5页约0.4秒；未启用限流时2页之间等待1秒
+    ok = (results['bucket'][0] == 5 and results['bucket'][1] < 1.0 and results['bucket'][2] >= 0.08
+          and results['disabled'][0] == 2 and results['disabled'][2] >= 1.0)
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def main():
+    """主函数"""
+    results = [
+        test_shared_bucket_across_threads(),
+        test_retry_after_backoff(),
+        test_pagination_paced_by_bucket(),
+    ]
+
+    print("\n" + "=" * 60)
+    print(f"测试通过: {sum(results)}/{len(results)}")
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    exit(main())
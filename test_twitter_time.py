@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Twitter时间解析测试脚本
+验证快速解析与strptime/dateutil结果一致，以及解析结果在原始推文上复用
+"""
+
+import sys
+import time
+from datetime import datetime
+from dateutil import parser as date_parser
+
+# 添加项目路径
+sys.path.append('.')
+
+from src.utils import twitter_time
+from src.utils.twitter_time import parse_twitter_datetime, get_tweet_created_at, PARSED_CREATED_AT_KEY
+from src.utils.quotation_extractor import quotation_extractor
+from src.models.tweet import Tweet
+
+
+SAMPLES = [
+    'Wed Oct 05 20:11:53 +0000 2016',
+    'Mon Jan 06 00:00:00 +0000 2025',
+    'Sat Feb 29 23:59:59 +0000 2020',
+    'Tue Mar 04 08:15:00 +0530 2025',
+    'Thu Dec 31 12:00:00 -0700 2024',
+]
+
+
+def test_fast_path_matches_strptime() -> bool:
+    """测试快速解析与strptime结果一致"""
+    print("=" * 60)
+    print("测试快速解析结果一致")
+    print("=" * 60)
+
+    mismatches = [
+        sample for sample in SAMPLES
+        if twitter_time._parse_fast(sample) != datetime.strptime(sample, '%a %b %d %H:%M:%S %z %Y')
+        or twitter_time._parse_fast(sample).utcoffset() != date_parser.parse(sample).utcoffset()
+    ]
+
+    # 非Twitter格式回退到其他解析方式
+    fallbacks_ok = (
+        twitter_time._parse_fast('2025-01-06 12:00:00') is None
+        and parse_twitter_datetime('2025-01-06 12:00:00') == datetime(2025, 1, 6, 12, 0, 0)
+        and parse_twitter_datetime('2025-01-06T12:00:00.000Z') == datetime(2025, 1, 6, 12, 0, 0)
+        and parse_twitter_datetime('Wed Foo 05 20:11:53 +0000 2016') is None
+        and parse_twitter_datetime('') is None
+    )
+
+    print(f"不一致: {mismatches}, 回退解析: {'正常' if fallbacks_ok else '异常'}")
+    ok = not mismatches and fallbacks_ok
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def test_parsed_value_reused() -> bool:
+    """测试解析结果保存在原始推文上并被后续环节复用"""
+    print("\n" + "=" * 60)
+    print("测试解析结果复用")
+    print("=" * 60)
+
+    raw = {
+        'id_str': '1',
+        'created_at': SAMPLES[0],
+        'user': {'id_str': '42', 'screen_name': 'tester'},
+        'is_quote_status': True,
+        'quoted_status': {'id_str': '2', 'user': {'id_str': '43', 'screen_name': 'quoted'}},
+    }
+    parsed = get_tweet_created_at(raw)
+
+    tweet = Tweet.from_api_data(raw, {'id_str': 'id_str', 'created_at': 'created_at'})
+    quotation = quotation_extractor.extract_quotations_from_api_data([raw])[0]
+
+    print(f"推文时间: {tweet.created_at_datetime}, 引用关系时间: {quotation['created_at']}")
+    ok = (raw[PARSED_CREATED_AT_KEY] is parsed and tweet.created_at_datetime is parsed
+          and quotation['created_at'] == datetime(2016, 10, 5, 20, 11, 53))
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def test_speed() -> bool:
+    """对比快速解析与dateutil的耗时"""
+    print("\n" + "=" * 60)
+    print("测试解析耗时")
+    print("=" * 60)
+
+    values = [f"Mon Jan 06 {h:02d}:{m:02d}:{s:02d} +0000 2025" for h in range(24) for m in range(60) for s in (0, 30)]
+
+    start = time.perf_counter()
+    for value in values:
+        date_parser.parse(value)
+    dateutil_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for value in values:
+        twitter_time._parse_fast(value)
+    fast_time = time.perf_counter() - start
+
+    print(f"{len(values)} 条: dateutil {dateutil_time:.3f}s, 快速解析 {fast_time:.3f}s")
+    ok = fast_time < dateutil_time
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def main():
+    """主函数"""
+    results = [
+        test_fast_path_matches_strptime(),
+        test_parsed_value_reused(),
+        test_speed(),
+    ]
+
+    print("\n" + "=" * 60)
+    print(f"测试通过: {sum(results)}/{len(results)}")
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    exit(main())
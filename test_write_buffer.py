@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+写后缓冲测试脚本
+验证同一主键的多次写入合并为最新值、按批量大小写入、写入失败后重试、反复失败的批次逐行写入并移出死信，
+崩溃后从spool文件恢复，以及多个进程使用同一spool路径时互不接管对方的数据
+"""
+
+import json
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+# 添加项目路径
+sys.path.append('.')
+
+from src.database.write_buffer import WriteBehindBuffer
+
+
+def build_buffer(spool_file: Path = None, **overrides) -> WriteBehindBuffer:
+    """构建使用临时spool文件的写后缓冲（时间阈值足够长，只由测试触发写入）"""
+    settings = {'enabled': True, 'flush_size': 1000, 'flush_interval_seconds': 3600, 'batch_size': 2,
+                'spool_file': str(spool_file or Path(tempfile.mkdtemp()) / 'write_buffer.spool.jsonl')}
+    settings.update(overrides)
+    return WriteBehindBuffer(settings)
+
+
+def simulate_crash(buffer: WriteBehindBuffer) -> None:
+    """模拟进程崩溃：不写入数据库、不清理spool文件，文件锁随进程退出释放"""
+    buffer._stopped.set()
+    buffer._wakeup.set()
+    if buffer._spool is not None:
+        buffer._spool.close()
+    buffer._spool_lock_file.close()
+
+
+def test_coalesce_and_batches() -> bool:
+    """测试同一主键合并为最新列值，写入按 batch_size 分批，未注册的通道不写入"""
+    print("=" * 60)
+    print("测试合并与分批写入")
+    print("=" * 60)
+
+    buffer = build_buffer()
+    chunks = []
+    buffer.register('topics:popularity', lambda rows: chunks.append(rows) or len(rows))
+
+    for popularity in range(1, 101):
+        buffer.put('topics:popularity', 'topic_a', {'popularity': popularity})
+    buffer.put('topics:popularity', 'topic_a', {'update_time': datetime(2026, 1, 1, 12, 0)})
+    buffer.put('topics:popularity', 'topic_b', {'popularity': 7})
+    buffer.put('topics:popularity', 'topic_c', {'popularity': 9})
+    buffer.put('unknown:channel', 'x', {'value': 1})
+    pending_before = buffer.pending_count()
+
+    written = buffer.flush()
+    rows = dict(row for chunk in chunks for row in chunk)
+    stats = buffer.get_stats()
+    buffer.close()
+
+    print(f"写入前待写入: {pending_before}, 写入: {written}, 批次: {[len(chunk) for chunk in chunks]}")
+    print(f"topic_a: {rows.get('topic_a')}, 统计: {stats}")
+    ok = (pending_before == 4 and written == 3 and [len(chunk) for chunk in chunks] == [2, 1]
+          and rows['topic_a'] == {'popularity': 100, 'update_time': '2026-01-01 12:00:00'}
+          and stats['coalesced'] == 100 and stats['pending'] == 1)
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def test_failed_flush_is_retried() -> bool:
+    """测试写入失败的数据留在缓冲中，期间的新值优先，下次写入成功"""
+    print("\n" + "=" * 60)
+    print("测试写入失败重试")
+    print("=" * 60)
+
+    buffer = build_buffer()
+    state = {'fail': True}
+    written_rows = {}
+
+    def flusher(rows):
+        if state['fail']:
+            # 写入过程中又加入了同一主键的新值
+            state['fail'] = False
+            buffer.put('tweets:activity', '1', {'is_activity': 1, 'activity_detail': 'new'})
+            raise ConnectionError("数据库不可用")
+        written_rows.update(rows)
+        return len(rows)
+
+    buffer.register('tweets:activity', flusher)
+    buffer.put('tweets:activity', '1', {'is_activity': 1, 'activity_detail': 'old'})
+    buffer.put('tweets:activity', '2', {'is_activity': 1, 'activity_detail': 'other'})
+
+    first = buffer.flush()
+    pending = buffer.pending_count()
+    second = buffer.flush()
+    stats = buffer.get_stats()
+    buffer.close()
+
+    print(f"第一次: {first}, 待重试: {pending}, 第二次: {second}, 写入: {written_rows}")
+    ok = (first == 0 and pending == 2 and second == 2
+          and written_rows['1']['activity_detail'] == 'new' and written_rows['2']['activity_detail'] == 'other'
+          and stats['failed_flushes'] == 1 and stats['pending'] == 0)
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def test_poison_row_dead_lettered() -> bool:
+    """测试含有错误行的批次重试达到上限后逐行写入，错误行移入死信文件，不再无限重试"""
+    print("\n" + "=" * 60)
+    print("测试错误行移入死信文件")
+    print("=" * 60)
+
+    buffer = build_buffer(max_retries=2)
+    calls = []
+    written_rows = {}
+
+    def flusher(rows):
+        calls.append([key for key, _ in rows])
+        if any(key == 'bad' for key, _ in rows):
+            raise ValueError("Incorrect datetime value")
+        written_rows.update(rows)
+        return len(rows)
+
+    buffer.register('projects:upsert', flusher)
+    for key in ['good_1', 'bad', 'good_2']:
+        buffer.put('projects:upsert', key, {'name': key})
+
+    results = [buffer.flush() for _ in range(4)]
+    stats = buffer.get_stats()
+    dead = [json.loads(line) for line in buffer.dead_letter_file.read_text(encoding='utf-8').splitlines()]
+    buffer.close()
+
+    print(f"各次写入: {results}, 调用: {calls}, 死信: {dead}, 统计: {stats}")
+    ok = (results == [1, 0, 1, 0] and calls == [['good_1', 'bad'], ['good_2'], ['good_1', 'bad'],
+                                                 ['good_1'], ['bad']]
+          and sorted(written_rows) == ['good_1', 'good_2'] and [entry['key'] for entry in dead] == ['bad']
+          and 'Incorrect datetime value' in dead[0]['error'] and dead[0]['values'] == {'name': 'bad'}
+          and stats['dead_letter_rows'] == 1 and stats['pending'] == 0)
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def test_spool_recovery() -> bool:
+    """测试未写入的数据在新进程中从spool文件恢复，写入后spool文件被清空"""
+    print("\n" + "=" * 60)
+    print("测试spool文件恢复")
+    print("=" * 60)
+
+    spool_file = Path(tempfile.mkdtemp()) / 'write_buffer.spool.jsonl'
+    crashed = build_buffer(spool_file)
+    start = time.perf_counter()
+    for i in range(200):
+        crashed.put('kols:upsert', f"kol_{i % 50}", {'influence_score': i})
+    put_seconds = time.perf_counter() - start
+    # 模拟崩溃：不调用close，直接丢弃实例；写入中途的半行也应被忽略
+    crashed._spool.write('{"channel": "kols:upsert", "key": "kol_')
+    crashed._spool.flush()
+    simulate_crash(crashed)
+
+    recovered = build_buffer(spool_file)
+    pending = recovered.pending_count()
+    written_rows = {}
+    recovered.register('kols:upsert', lambda rows: written_rows.update(rows) or len(rows))
+    written = recovered.flush()
+    recovered.close()
+
+    third = build_buffer(spool_file)
+    leftover = third.pending_count()
+    third.close()
+
+    print(f"200次加入耗时: {put_seconds * 1000:.1f}ms, 恢复: {pending}, 写入: {written}, 再次启动剩余: {leftover}")
+    ok = (pending == 50 and written == 50 and written_rows['kol_0'] == {'influence_score': 150}
+          and written_rows['kol_49'] == {'influence_score': 199} and leftover == 0)
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def read_spool_keys(spool_file: Path) -> set:
+    """读取spool文件中的主键"""
+    if not spool_file.exists():
+        return set()
+    return {json.loads(line)['key'] for line in spool_file.read_text(encoding='utf-8').splitlines() if line.strip()}
+
+
+def test_shared_spool_path() -> bool:
+    """测试两个进程使用同一spool路径时各自锁定独立文件，退出的进程遗留的数据由后启动的进程接管"""
+    print("\n" + "=" * 60)
+    print("测试同一spool路径的多个进程")
+    print("=" * 60)
+
+    spool_file = Path(tempfile.mkdtemp()) / 'main-schedule.spool.jsonl'
+    first = build_buffer(spool_file)
+    first.put('topics:popularity', '1', {'popularity': 1})
+
+    # 第二个进程不接管第一个进程的待写入数据，也不会在写入时把它写入数据库
+    second = build_buffer(spool_file)
+    second_pending = second.pending_count()
+    first.put('topics:popularity', '2', {'popularity': 2})
+    second.put('topics:popularity', '3', {'popularity': 3})
+    second_rows = {}
+    second.register('topics:popularity', lambda rows: second_rows.update(rows) or len(rows))
+    second.flush()
+    second.put('topics:popularity', '4', {'popularity': 4})
+    first_keys = read_spool_keys(first.spool_file)
+    second_keys = read_spool_keys(second.spool_file)
+
+    # 两个进程都崩溃后，新进程恢复默认文件并接管序号文件
+    simulate_crash(first)
+    simulate_crash(second)
+    third = build_buffer(spool_file)
+    third_rows = {}
+    third.register('topics:popularity', lambda rows: third_rows.update(rows) or len(rows))
+    third.flush()
+    third.close()
+    leftovers = sorted(path.name for path in spool_file.parent.iterdir()
+                       if not path.name.endswith('.lock') and read_spool_keys(path))
+
+    print(f"进程2路径: {second.spool_file.name}, 进程2接管: {second_pending}, 进程2写入: {sorted(second_rows)}")
+    print(f"进程1 spool: {sorted(first_keys)}, 进程2 spool: {sorted(second_keys)}, "
+          f"新进程写入: {sorted(third_rows)}, 剩余文件: {leftovers}")
+    ok = (second.spool_file != first.spool_file and second_pending == 0 and sorted(second_rows) == ['3']
+          and first_keys == {'1', '2'} and second_keys == {'4'} and third.spool_file == spool_file
+          and sorted(third_rows) == ['1', '2', '4'] and leftovers == [])
+    print(f"结果: {'通过' if ok else '失败'}")
+    return ok
+
+
+def main():
+    """主函数"""
+    results = [
+        test_coalesce_and_batches(),
+        test_failed_flush_is_retried(),
+        test_poison_row_dead_lettered(),
+        test_spool_recovery(),
+        test_shared_spool_path(),
+    ]
+
+    print("\n" + "=" * 60)
+    print(f"测试通过: {sum(results)}/{len(results)}")
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    exit(main())